@@ -0,0 +1,78 @@
+"""
+Ota-onalarga davomat SMS xabarlari (kun oxirida send_absence_alerts)
+
+Kunning absent/late davomat qatorlari ota-ona telefoni bilan birga bitta
+so'rovda olinadi, telefon bo'yicha birlashtiriladi (bir nechta farzand
+yoki guruh - bitta SMS), shablon bir marta yuklanadi va xabarlar
+communications.sms.send_batches orqali paketlab yuboriladi.
+
+Yuborilgan qatorlarga parent_alerted_at yoziladi: qayta ishga tushirish
+faqat yangi belgilangan qatorlarni yuboradi, paket xatosi esa keyingi
+ishga tushirishda qayta uriniladi.
+"""
+import logging
+from collections import Counter
+
+from django.template.loader import get_template
+from django.utils import timezone
+
+from communications.sms import SmsMessage, normalize_phone, send_batches
+from .models import Attendance, AttendanceStatus
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE = 'sms/absence_alert.txt'
+ALERT_STATUSES = [AttendanceStatus.ABSENT, AttendanceStatus.LATE]
+
+
+def pending_alerts(day):
+    """Kunning xabar yuborilmagan absent/late qatorlari - bitta so'rov"""
+    return Attendance.objects.filter(
+        date=day, status__in=ALERT_STATUSES, parent_alerted_at__isnull=True,
+    ).exclude(student__parent_phone='').order_by('student__parent_phone', 'pk').values_list(
+        'pk', 'student__parent_phone', 'student__parent_name',
+        'student__user__first_name', 'student__user__last_name', 'group__name', 'status',
+    )
+
+
+def build_messages(rows, day):
+    """Ota-ona (telefon) bo'yicha bitta xabar; key - xabarga kirgan davomat id lari"""
+    parents = {}
+    for pk, phone, parent, first_name, last_name, group, status in rows:
+        phone = normalize_phone(phone)
+        if not phone:
+            continue
+        entry = parents.setdefault(phone, {'parent': parent, 'items': [], 'ids': []})
+        entry['items'].append({'student': f"{first_name} {last_name}".strip(), 'group': group, 'status': status})
+        entry['ids'].append(pk)
+
+    template = get_template(TEMPLATE)
+    return [
+        SmsMessage(
+            phone,
+            template.render({'parent': entry['parent'], 'date': day, 'items': entry['items']}).strip(),
+            key=entry['ids'],
+        )
+        for phone, entry in parents.items()
+    ]
+
+
+def send_absence_alerts(day=None, gateway=None, **options):
+    """
+    Returns:
+        Counter: messages (yuborilgan SMS), rows (belgilangan qatorlar), failed (xato SMS)
+    """
+    day = day or timezone.localdate()
+    messages = build_messages(pending_alerts(day), day)
+    stats = Counter()
+
+    for batch, error in send_batches(messages, gateway=gateway, **options):
+        if error:
+            stats['failed'] += len(batch)
+            logger.error(f"SMS paketi yuborilmadi: {error}", extra={'date': str(day), 'count': len(batch)})
+            continue
+        ids = [pk for message in batch for pk in message.key]
+        Attendance.objects.filter(pk__in=ids).update(parent_alerted_at=timezone.now())
+        stats['messages'] += len(batch)
+        stats['rows'] += len(ids)
+    return stats
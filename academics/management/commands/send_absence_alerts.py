@@ -0,0 +1,25 @@
+"""
+Kun oxirida ota-onalarga davomat SMS xabarlari (cron orqali)
+
+Usage:
+    python manage.py send_absence_alerts
+    python manage.py send_absence_alerts --date 2025-09-01
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from academics.alerts import send_absence_alerts
+
+
+class Command(BaseCommand):
+    help = "Kelmagan yoki kechikkan talabalar ota-onalariga SMS yuboradi (SMS_GATEWAY orqali)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, help="Kun (YYYY-MM-DD), standart - bugun")
+        parser.add_argument('--batch-size', type=int, help="Bitta paketdagi SMS soni")
+
+    def handle(self, *args, **options):
+        stats = send_absence_alerts(day=options['date'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"SMS: {stats['messages']} yuborildi ({stats['rows']} davomat), xato: {stats['failed']}"
+        ))
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0003_lessonschedule'),
+        ('accounts', '0003_user_unread_notifications'),
+        ('courses', '0002_group_branch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='parent_alerted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'status'], name='attendance_date_status_idx'),
+        ),
+    ]
@@ -16,10 +16,13 @@ class Attendance(TimestampedModel):
     date = models.DateField(default=timezone.now)
     status = models.CharField(max_length=20, choices=AttendanceStatus.choices, default=AttendanceStatus.PRESENT)
     added_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, blank=True)
+    # Ota-onaga SMS yuborilgan vaqt (academics/alerts.py) - qayta yuborilmasligi uchun
+    parent_alerted_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         unique_together = ('group', 'student', 'date')
         ordering = ['-date']
+        indexes = [models.Index(fields=['date', 'status'], name='attendance_date_status_idx')]
 
     def __str__(self):
         return f"{self.date} - {self.student.user.get_full_name()}: {self.status}"
@@ -1,3 +1,87 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import date
+from pathlib import Path
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from communications.sms import FileSmsGateway
+from courses.models import Course, Group
+from .alerts import send_absence_alerts
+from .models import Attendance, AttendanceStatus
+
+
+class FailingGateway:
+    def send_messages(self, messages):
+        raise ConnectionError("provayder javob bermadi")
+
+
+class AbsenceAlertTests(TestCase):
+    day = date(2025, 9, 1)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.sms_file = Path(directory.name) / 'sms.jsonl'
+        settings_override = override_settings(SMS_FILE_PATH=str(self.sms_file))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        course = Course.objects.create(title='Python')
+        self.group = Group.objects.create(name='P1', course=course)
+        self.other_group = Group.objects.create(name='P2', course=course)
+        self.students = []
+        for i, phone in enumerate(['+998 90 111-11-11', '998901111111', '+998902222222', '']):
+            user = User.objects.create_user(email=f's{i}@example.com', first_name=f'Ali{i}', last_name='Valiyev')
+            user.student_profile.parent_phone = phone
+            user.student_profile.parent_name = 'Karim'
+            user.student_profile.save()
+            self.students.append(user.student_profile)
+
+    def mark(self, student, status, group=None, day=None):
+        return Attendance.objects.create(group=group or self.group, student=student, status=status, date=day or self.day)
+
+    def sent(self):
+        return [json.loads(line) for line in self.sms_file.read_text(encoding='utf-8').splitlines()]
+
+    def test_one_sms_per_parent_for_absent_and_late(self):
+        self.mark(self.students[0], AttendanceStatus.ABSENT)
+        self.mark(self.students[0], AttendanceStatus.LATE, group=self.other_group)
+        self.mark(self.students[1], AttendanceStatus.ABSENT)  # xuddi shu telefon boshqa formatda
+        self.mark(self.students[2], AttendanceStatus.PRESENT)
+        self.mark(self.students[2], AttendanceStatus.ABSENT, day=date(2025, 8, 31))
+        self.mark(self.students[3], AttendanceStatus.ABSENT)  # telefon yo'q
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = send_absence_alerts(self.day)
+
+        selects = [q for q in queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual((stats['messages'], stats['rows'], stats['failed']), (1, 3, 0))
+        [sms] = self.sent()
+        self.assertEqual(sms['phone'], '+998901111111')
+        self.assertIn('Ali0 Valiyev - P1 darsida qatnashmadi', sms['text'])
+        self.assertIn('Ali0 Valiyev - P2 darsida kechikdi', sms['text'])
+        self.assertIn('Ali1 Valiyev', sms['text'])
+
+    def test_rerun_sends_only_new_rows(self):
+        self.mark(self.students[0], AttendanceStatus.ABSENT)
+        send_absence_alerts(self.day)
+        self.assertEqual(send_absence_alerts(self.day)['messages'], 0)
+
+        self.mark(self.students[2], AttendanceStatus.LATE)
+        send_absence_alerts(self.day)
+
+        self.assertEqual([sms['phone'] for sms in self.sent()], ['+998901111111', '+998902222222'])
+
+    def test_failed_batch_is_retried_next_run(self):
+        row = self.mark(self.students[2], AttendanceStatus.ABSENT)
+
+        stats = send_absence_alerts(self.day, gateway=FailingGateway())
+        row.refresh_from_db()
+        self.assertEqual((stats['failed'], row.parent_alerted_at), (1, None))
+
+        self.assertEqual(send_absence_alerts(self.day, gateway=FileSmsGateway())['messages'], 1)
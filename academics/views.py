@@ -11,6 +11,8 @@ from django.views.generic import ListView, CreateView, UpdateView, DetailView, T
 from django.db.models import Prefetch, Q
 from accounts.mixins import TeacherRequiredMixin, StudentRequiredMixin
 from accounts.models import StudentProfile, TeacherProfile, User
+from communications import emails
+from core import search as search_index
 from courses.models import Course, Group
 from .models import Homework, HomeworkSubmission, Attendance
 from .forms import HomeworkForm, SubmissionCheckForm, AttendanceSelectForm
@@ -144,6 +146,24 @@ class HomeworkCreateView(TeacherRequiredMixin, CreateView):
         homework.teacher = self.request.user.teacher_profile
         homework.save()
         
+        # Guruh talabalariga xat - bitta bulk INSERT
+        deadline = f"{timezone.localtime(homework.deadline):%Y-%m-%d %H:%M}" if homework.deadline else ''
+        emails.enqueue_many(
+            (
+                (email, {
+                    'name': f"{first_name} {last_name}".strip() or email,
+                    'group': homework.group.name,
+                    'title': homework.title,
+                    'description': homework.description,
+                    'deadline': deadline,
+                })
+                for email, first_name, last_name in homework.group.students.values_list(
+                    'user__email', 'user__first_name', 'user__last_name'
+                )
+            ),
+            'homework_assigned',
+        )
+        
         messages.success(
             self.request,
             f"Topshiriq '{homework.title}' muvaffaqiyatli yaratildi."
@@ -224,6 +244,14 @@ class SubmissionUpdateView(TeacherRequiredMixin, UpdateView):
         submission.checked_by = self.request.user
         submission.save()
         
+        student = submission.student.user
+        emails.enqueue(student.email, 'grade_posted', {
+            'name': student.get_full_name() or student.email,
+            'homework': submission.homework.title,
+            'score': str(submission.score),
+            'feedback': submission.feedback,
+        })
+        
         messages.success(
             self.request,
             f"Baholash muvaffaqiyatli saqlandi: {submission.score}/100"
@@ -270,7 +298,9 @@ class AttendanceListView(TeacherRequiredMixin, ListView):
         
         # FILTER 1: Search by student name or email
         search = self.request.GET.get('search', '').strip()
-        if search:
+        if search and search_index.available():
+            queryset = search_index.filter_queryset(queryset, 'user', search, field='student__user_id')
+        elif search:
             queryset = queryset.filter(
                 Q(student__user__first_name__icontains=search) |
                 Q(student__user__last_name__icontains=search) |
@@ -626,7 +656,8 @@ class GroupDetailView(TeacherRequiredMixin, DetailView):
         group = context['group']
         
         # Guruh studentlari
-        students = group.students.all().select_related('user')
+        # Soft delete qilinganlar purge tugashini kutmasdan yashiriladi
+        students = group.students.filter(user__deleted_at__isnull=True).select_related('user')
         
         # Guruh homework'lari
         homeworks = Homework.objects.filter(
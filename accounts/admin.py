@@ -51,7 +51,7 @@ class AdminProfileAdmin(admin.ModelAdmin):
 
 @admin.register(TeacherProfile)
 class TeacherProfileAdmin(admin.ModelAdmin):
-    list_display = ('user', 'speciality', 'salary', 'rating')
+    list_display = ('user', 'speciality', 'salary', 'lesson_rate', 'rating')
     list_filter = ('rating',)
     search_fields = ('user__email', 'speciality')
 
@@ -1,3 +1,6 @@
+from communications.models import Notification
+
+
 def user_context(request):
     """
     User role va permissions haqida ma'lumot.
@@ -20,5 +23,5 @@ def user_context(request):
         'is_teacher': user.type in ['teacher', 'support_teacher'],
         'is_admin': user.type in ['admin', 'manager', 'super_user'],
         'is_superuser': user.is_superuser,
-        'notification_count': 0,  # Hozircha 0, keyinchalik real data
+        'notification_count': Notification.objects.unread_count(user),  # hisoblagich + keshlangan umumiylar
     }
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+Ommaviy import uchun parol xeshlash
+
+Standart PBKDF2 (1M iteratsiya) bitta parolga ~0.4 s sarflaydi - 10k talaba
+importi uchun bu bir soatdan ortiq. Import qilingan boshlang'ich parollar
+InitialPBKDF2PasswordHasher (kamroq iteratsiya) bilan xeshlanadi; u
+PASSWORD_HASHERS ro'yxatida birinchi emas, shuning uchun foydalanuvchi
+birinchi marta kirganda Django parolni standart xeshga avtomatik o'tkazadi.
+Hech kirmaganlarning kuchsiz xeshlari STUDENT_IMPORT_PASSWORD_MAX_AGE_DAYS
+dan keyin expire_initial_passwords buyrug'i bilan o'chiriladi.
+
+Bu modul modellarni import qilmaydi - ProcessPoolExecutor ishchilari
+funksiyalarni shu yerdan oladi.
+"""
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+
+
+class InitialPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """Faqat import qilingan boshlang'ich parollar uchun (birinchi kirishda yangilanadi)"""
+    algorithm = 'pbkdf2_sha256_initial'
+    iterations = 10_000
+
+
+def init_worker():
+    """Jarayonlar hovuzi ishchisi (spawn bo'lsa ham) sozlangan Django bilan ishlasin"""
+    django.setup()
+
+
+def hash_password(raw_password):
+    """Hovuzda ishlaydi: bo'sh parol - foydalanib bo'lmaydigan parol"""
+    if not raw_password:
+        return make_password(None)
+    return make_password(raw_password, hasher=settings.STUDENT_IMPORT_PASSWORD_HASHER)
@@ -0,0 +1,229 @@
+"""
+Talabalarni CSV dan ommaviy import qilish (import_students buyrug'i va admin yuklash)
+
+Fayl oqim sifatida STUDENT_IMPORT_CHUNK_SIZE qatordan o'qiladi; har bir bo'lak:
+
+    - mavjud emaillar bitta so'rov bilan tekshiriladi,
+    - parollar jarayonlar hovuzida xeshlanadi (accounts/hashers.py),
+    - User, StudentProfile va (ixtiyoriy) guruh a'zoligi bulk_create bilan
+      bitta tranzaksiyada yoziladi (qidiruv indeksi ham) - create_profile_for_user signali
+      chaqirilmaydi, profil shu yerda yaratiladi.
+
+CSV ustunlari (sarlavha qatori majburiy, faqat email shart):
+    email, first_name, last_name, phone, password, parent_name, parent_phone, join_date
+"""
+import csv
+import logging
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils import timezone
+
+from communications.models import bump_audience_version
+from core import search
+from .hashers import hash_password, init_worker
+from .models import StudentProfile, User, bump_permission_version
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('email', 'first_name', 'last_name', 'phone', 'password', 'parent_name', 'parent_phone', 'join_date')
+POOL_MIN_ROWS = 64  # bundan kam parol uchun hovuz ochilmaydi
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+
+class StudentImportError(ValueError):
+    """Faylni o'qib bo'lmadi (kodirovka, CSV yoki ustunlar xatosi)"""
+
+
+def read_rows(stream):
+    """
+    Matn oqimidan qatorlar (line_no, dict) - fayl xotiraga to'liq o'qilmaydi.
+
+    Raises:
+        StudentImportError: email ustuni yo'q yoki CSV buzilgan
+    """
+    reader = csv.DictReader(stream)
+    try:
+        fieldnames = [name.strip().lower() for name in (reader.fieldnames or [])]
+        if 'email' not in fieldnames:
+            raise StudentImportError("Kerakli ustun topilmadi: email")
+        reader.fieldnames = fieldnames
+        for line_no, row in enumerate(reader, start=2):
+            yield line_no, {column: (row.get(column) or '').strip() for column in COLUMNS}
+    except UnicodeDecodeError:
+        raise StudentImportError("Fayl UTF-8 kodirovkasida bo'lishi kerak.")
+    except csv.Error as e:
+        raise StudentImportError(f"CSV faylni o'qib bo'lmadi: {e}")
+
+
+def clean_row(row):
+    """Qatorni tekshirish; xato bo'lsa sababini qaytaradi"""
+    try:
+        validate_email(row['email'])
+    except ValidationError:
+        return "noto'g'ri email"
+    if row['join_date']:
+        try:
+            row['join_date'] = date.fromisoformat(row['join_date'])
+        except ValueError:
+            return "noto'g'ri join_date"
+    row['email'] = User.objects.normalize_email(row['email'])
+    return None
+
+
+class StudentImporter:
+    """
+    Bo'laklab import; hovuz birinchi katta bo'lakda ochiladi va oxirigacha
+    qayta ishlatiladi.
+    """
+
+    def __init__(self, group=None, chunk_size=None, progress=None):
+        self.group = group
+        self.chunk_size = chunk_size or settings.STUDENT_IMPORT_CHUNK_SIZE
+        self.progress = progress
+        self.stats = Counter()
+        self.seen = set()
+        self.pool = None
+
+    def hash_passwords(self, passwords):
+        if len(passwords) >= POOL_MIN_ROWS and MAX_WORKERS > 1:
+            if self.pool is None:
+                # spawn - fork ota jarayonning DB ulanishi va thread'larini ishchilarga ko'chirardi
+                self.pool = ProcessPoolExecutor(
+                    max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context('spawn'), initializer=init_worker,
+                )
+            return list(self.pool.map(hash_password, passwords, chunksize=32))
+        return [hash_password(password) for password in passwords]
+
+    def select_new(self, chunk):
+        """Noto'g'ri, fayl ichida takroriy va bazada bor qatorlarni ajratish"""
+        valid = []
+        for line_no, row in chunk:
+            error = clean_row(row)
+            key = row['email'].lower()
+            if error:
+                self.stats['invalid'] += 1
+                logger.warning(f"Import: {line_no}-qator o'tkazib yuborildi ({error})")
+            elif key in self.seen:
+                self.stats['duplicate'] += 1
+            else:
+                self.seen.add(key)
+                valid.append(row)
+
+        existing = {
+            email.lower()
+            for email in User.objects.filter(email__in=[row['email'] for row in valid]).values_list('email', flat=True)
+        }
+        self.stats['exists'] += sum(1 for row in valid if row['email'].lower() in existing)
+        return [row for row in valid if row['email'].lower() not in existing]
+
+    def import_chunk(self, chunk):
+        rows = self.select_new(chunk)
+        if rows:
+            passwords = self.hash_passwords([row['password'] for row in rows])
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(
+                        email=row['email'], first_name=row['first_name'], last_name=row['last_name'],
+                        phone=row['phone'], password=password, type=User.UserType.STUDENT,
+                    )
+                    for row, password in zip(rows, passwords)
+                ])
+                profiles = StudentProfile.objects.bulk_create([
+                    StudentProfile(
+                        user_id=user.pk, parent_name=row['parent_name'], parent_phone=row['parent_phone'],
+                        join_date=row['join_date'] or timezone.localdate(),
+                    )
+                    for user, row in zip(users, rows)
+                ])
+                # bulk_create signal chaqirmaydi - qidiruv indeksi shu yerda
+                search.add('user', [
+                    search.user_document(
+                        user.pk, user.first_name, user.last_name, user.email, user.phone,
+                        row['parent_name'], row['parent_phone'],
+                    )
+                    for user, row in zip(users, rows)
+                ])
+                if self.group:
+                    through = self.group.students.through
+                    through.objects.bulk_create(
+                        [through(group_id=self.group.pk, studentprofile_id=profile.pk) for profile in profiles],
+                        ignore_conflicts=True,
+                    )
+            self.stats['created'] += len(rows)
+        if self.progress:
+            self.progress(len(chunk))
+
+    def run(self, stream):
+        rows = read_rows(stream)
+        try:
+            while chunk := list(islice(rows, self.chunk_size)):
+                self.import_chunk(chunk)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+            if self.stats['created']:
+                # bulk_create signal chaqirmaydi - auditoriya keshini o'zimiz eskirtiramiz
+                bump_audience_version('users', 'groups')
+                # ...va o'chirilgan userning pk si qayta berilgan bo'lsa, eski ruxsatlar keshi
+                bump_permission_version()
+        return self.stats
+
+
+def import_students(stream, group=None, chunk_size=None, progress=None):
+    """
+    Args:
+        stream: matn oqimi (CSV)
+        group: talabalar qo'shiladigan Group (ixtiyoriy)
+        progress: har bo'lakdan keyin o'qilgan qatorlar soni bilan chaqiriladi
+
+    Returns:
+        Counter: created, exists, duplicate, invalid
+    """
+    return StudentImporter(group, chunk_size, progress).run(stream)
+
+
+def expire_initial_passwords(max_age_days=None, now=None):
+    """
+    Hech kirmagan talabalarning boshlang'ich (kam iteratsiyali) parollarini
+    foydalanib bo'lmaydigan qilish - bitta UPDATE. Kirgan foydalanuvchining
+    paroli birinchi kirishdayoq standart xeshga o'tgan; qolganlar parolni
+    tiklash orqali yangisini o'rnatadi.
+
+    Returns:
+        int: o'chirilgan parollar soni
+    """
+    max_age_days = settings.STUDENT_IMPORT_PASSWORD_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    cutoff = (now or timezone.now()) - timedelta(days=max_age_days)
+    expired = User.objects.filter(
+        password__startswith=f'{settings.STUDENT_IMPORT_PASSWORD_HASHER}$',
+        last_login__isnull=True,
+        date_joined__lt=cutoff,
+    ).update(password=make_password(None))
+    if expired:
+        logger.info(f"Boshlang'ich parollar eskirdi: {expired}", extra={'max_age_days': max_age_days})
+    return expired
+
+
+def import_students_job(job, path, group_id=None):
+    """Fon vazifasi (admin yuklash): fayl diskdan oqim bilan o'qiladi, oxirida o'chiriladi"""
+    from courses.models import Group
+
+    group = Group.objects.get(pk=group_id) if group_id else None
+    try:
+        with open(path, 'rb') as binary:
+            job.set_total(max(0, sum(1 for _ in binary) - 1))
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            stats = import_students(stream, group=group, progress=job.advance)
+        logger.info(f"Talabalar importi: {dict(stats)}", extra={'job_id': job.id, 'group_id': group_id})
+    finally:
+        os.remove(path)
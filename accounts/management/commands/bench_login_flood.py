@@ -0,0 +1,136 @@
+"""
+Login oqimi (credential stuffing) paytida oddiy trafik kechikishini o'lchash
+
+Jarayon ichida server --workers ta ishchi (ThreadPoolExecutor) sifatida
+modellashtiriladi: hujumchi noto'g'ri parollar bilan /accounts/login/ POST larini
+--rate so'rov/soniya tezlikda navbatga qo'yadi (--ips ta turli IP dan), alohida
+oqim esa bosh sahifani so'rab kechikishni (navbatda kutish bilan) yozadi.
+Natija: bajarilgan/cheklangan so'rovlar, hisoblangan parol xeshlari va oddiy
+trafik p50/p95 (oqimdan oldin va oqim paytida).
+
+Usage:
+    python manage.py bench_login_flood
+    python manage.py bench_login_flood --rate 1000 --seconds 5 --ips 50
+    python manage.py bench_login_flood --no-throttle    # taqqoslash uchun
+"""
+import logging
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from accounts import throttle
+
+
+class Command(BaseCommand):
+    help = "Login oqimi paytida oddiy so'rovlar kechikishini o'lchaydi (cheklov bilan/cheklovsiz)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rate', type=int, default=1000, help="Oqim tezligi (so'rov/soniya)")
+        parser.add_argument('--seconds', type=float, default=5, help="Oqim davomiyligi")
+        parser.add_argument('--ips', type=int, default=50, help="Hujumchi IP lar soni")
+        parser.add_argument('--workers', type=int, default=4, help="Server ishchilari (gunicorn --threads kabi)")
+        parser.add_argument('--no-throttle', action='store_true', help="Cheklovni o'chirib o'lchash")
+
+    def handle(self, *args, **options):
+        # Har bir 401/429 logi o'lchovni buzadi
+        for name in ('django.request', 'accounts'):
+            logging.getLogger(name).setLevel(logging.ERROR)
+        with override_settings(ALLOWED_HOSTS=['*'], LOGIN_THROTTLE_ENABLED=not options['no_throttle']):
+            throttle.reset_throttles()
+            try:
+                self.run(options)
+            finally:
+                throttle.reset_throttles()
+
+    def sample(self, pool, client, url, stop, latencies, interval=0.05):
+        while not stop.is_set():
+            started = time.perf_counter()
+            pool.submit(client.get, url).result()
+            latencies.append((time.perf_counter() - started) * 1000)
+            time.sleep(interval)
+
+    def flood(self, pool, options, deadline, statuses, lock):
+        """So'rovlar javobni kutmasdan navbatga qo'yiladi - haqiqiy hujum kabi"""
+        client, url = Client(), reverse('accounts:login')
+
+        def attempt(sent):
+            ip = f"10.0.{sent % options['ips'] // 250}.{sent % options['ips'] % 250 + 1}"
+            response = client.post(url, {'username': f'victim{sent}@example.com', 'password': 'wrong'}, REMOTE_ADDR=ip)
+            with lock:
+                statuses[response.status_code] += 1
+
+        spacing = 1 / options['rate']
+        next_at, sent = time.perf_counter(), 0
+        while time.perf_counter() < deadline:
+            pool.submit(attempt, sent)
+            sent += 1
+            next_at += spacing
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return sent
+
+    def run(self, options):
+        home, client = reverse('home'), Client()
+        pool = ThreadPoolExecutor(max_workers=options['workers'])
+        baseline = []
+        self.sample(pool, client, home, _Countdown(20), baseline, interval=0)
+
+        hashes, statuses, lock = Counter(), Counter(), threading.Lock()
+        encode = PBKDF2PasswordHasher.encode
+
+        def counting_encode(hasher, *args, **kwargs):
+            with lock:
+                hashes['pbkdf2'] += 1
+            return encode(hasher, *args, **kwargs)
+
+        during, stop = [], threading.Event()
+        started = time.perf_counter()
+        deadline = started + options['seconds']
+        with mock.patch.object(PBKDF2PasswordHasher, 'encode', counting_encode):
+            sampler = threading.Thread(target=self.sample, args=(pool, Client(), home, stop, during))
+            sampler.start()
+            sent = self.flood(pool, options, deadline, statuses, lock)
+            stop.set()
+            sampler.join()
+            # Bajarilmay qolgan navbat - server ortda qolgani
+            pool.shutdown(wait=True, cancel_futures=True)
+        elapsed = time.perf_counter() - started
+
+        total = sum(statuses.values())
+        mode = "o'chirilgan" if options['no_throttle'] else 'yoqilgan'
+        self.stdout.write(f"Cheklov: {mode}")
+        self.stdout.write(
+            f"Oqim: {sent} yuborildi, {total} bajarildi ({total / elapsed:.0f} so'rov/s), javoblar {dict(statuses)}, "
+            f"PBKDF2 hisoblandi: {hashes['pbkdf2']}"
+        )
+        for label, latencies in (("Oqimdan oldin", baseline), ("Oqim paytida", during)):
+            if latencies:
+                self.stdout.write(
+                    f"{label}: bosh sahifa p50 {statistics.median(latencies):.1f} ms, "
+                    f"p95 {_percentile(latencies, 95):.1f} ms ({len(latencies)} so'rov)"
+                )
+
+
+class _Countdown:
+    """sample() ni n marta aylantirish uchun Event o'rnini bosuvchi"""
+
+    def __init__(self, count):
+        self.count = count
+
+    def is_set(self):
+        self.count -= 1
+        return self.count < 0
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
@@ -0,0 +1,24 @@
+"""
+Hech kirmagan talabalarning boshlang'ich parollarini o'chirish (kuniga bir marta cron orqali)
+
+Usage:
+    python manage.py expire_initial_passwords
+    python manage.py expire_initial_passwords --days 7
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from accounts.imports import expire_initial_passwords
+
+
+class Command(BaseCommand):
+    help = "Import qilingan, lekin hech ishlatilmagan kuchsiz boshlang'ich parollarni foydalanib bo'lmaydigan qiladi"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.STUDENT_IMPORT_PASSWORD_MAX_AGE_DAYS,
+            help="Shuncha kundan beri kirilmagan boshlang'ich parollar o'chiriladi",
+        )
+
+    def handle(self, *args, **options):
+        expired = expire_initial_passwords(options['days'])
+        self.stdout.write(self.style.SUCCESS(f"O'chirildi: {expired} ta boshlang'ich parol"))
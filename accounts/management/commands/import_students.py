@@ -0,0 +1,42 @@
+"""
+Talabalarni CSV fayldan ommaviy import qilish
+
+Usage:
+    python manage.py import_students students.csv
+    python manage.py import_students students.csv --group 12
+
+CSV ustunlari: email, first_name, last_name, phone, password, parent_name, parent_phone, join_date
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from accounts.imports import StudentImportError, import_students
+from courses.models import Group
+
+
+class Command(BaseCommand):
+    help = "Talabalarni (ota-ona ma'lumotlari bilan) CSV dan import qiladi, ixtiyoriy guruhga qo'shadi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV fayl yo'li (UTF-8)")
+        parser.add_argument('--group', type=int, help="Talabalar qo'shiladigan guruh id si")
+        parser.add_argument('--chunk-size', type=int, help="Bitta tranzaksiyadagi qatorlar soni")
+
+    def handle(self, *args, **options):
+        group = None
+        if options['group']:
+            group = Group.objects.filter(pk=options['group']).first()
+            if group is None:
+                raise CommandError(f"Guruh topilmadi: {options['group']}")
+
+        started = time.monotonic()
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                stats = import_students(stream, group=group, chunk_size=options['chunk_size'])
+        except (OSError, StudentImportError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Yaratildi: {stats['created']}, mavjud: {stats['exists']}, takroriy: {stats['duplicate']}, "
+            f"xato: {stats['invalid']} ({time.monotonic() - started:.1f} s)"
+        ))
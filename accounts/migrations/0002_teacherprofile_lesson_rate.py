@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacherprofile',
+            name='lesson_rate',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+    ]
@@ -11,6 +11,8 @@ from django.http import Http404
 from functools import wraps
 from django.contrib import messages
 
+from .permissions import get_permissions, has_perms
+
 
 # ============================================================================
 # 1. DASHBOARD URL MAPPING - Role asosida yo'naltirish
@@ -187,15 +189,13 @@ class PermissionRequiredMixin(CustomLoginRedirectMixin):
         if user.is_superuser or user.type == 'manager':
             return True
         
-        for perm in self.required_permissions:
-            if not user.has_perm(perm):
-                return False
-        return True
+        # Keshlangan to'plamdan (accounts/permissions.py) - issiq yo'lda SQL yo'q
+        return has_perms(user, self.required_permissions)
     
     def get_context_data(self, **kwargs):
         """Context da permissions qo'shish"""
         context = super().get_context_data(**kwargs)
-        context['user_permissions'] = self.request.user.get_all_permissions()
+        context['user_permissions'] = get_permissions(self.request.user)
         return context
 
 
@@ -284,11 +284,10 @@ def permission_required(*perms):
             if request.user.is_superuser or request.user.type == 'manager':
                 return view_func(request, *args, **kwargs)
             
-            # Permission tekshirish
-            for perm in perms:
-                if not request.user.has_perm(perm):
-                    messages.error(request, "Siz bu amaliyotni bajarishga ruxsat yo'q.")
-                    return redirect(get_dashboard_url(request.user))
+            # Permission tekshirish (keshlangan to'plamdan)
+            if not has_perms(request.user, perms):
+                messages.error(request, "Siz bu amaliyotni bajarishga ruxsat yo'q.")
+                return redirect(get_dashboard_url(request.user))
             
             return view_func(request, *args, **kwargs)
         return wrapper
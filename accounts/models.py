@@ -3,14 +3,36 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth.models import (
-    AbstractBaseUser, BaseUserManager, PermissionsMixin
+    AbstractBaseUser, BaseUserManager, PermissionsMixin, Group as AuthGroup, Permission
 )
-from core.models import TimestampedModel, Branch
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from core import search
+from core.models import TimestampedModel, Branch, SoftDeleteManager
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Cast, Concat
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
+import time
 
 
-class UserManager(BaseUserManager):
+class UserManager(SoftDeleteManager, BaseUserManager):
+    def soft_delete_updates(self):
+        # Email purge tugaguncha band qolmasin (unique) - qayta ro'yxatdan o'tish mumkin
+        return {
+            'is_active': False,
+            'email': Concat(Value('deleted-'), Cast('pk', CharField()), Value('-'), F('email')),
+        }
+
+    def after_soft_delete(self, ids):
+        from communications.models import bump_audience_version
+        from finance.models import DebtorBalance
+
+        search.remove('user', ids)
+        bump_audience_version('users', 'groups')
+        bump_permission_version(*ids)
+        # Qarzdorlar ro'yxatidan darhol chiqadi (compute o'chirilganlarni tashlaydi)
+        DebtorBalance.objects.refresh(StudentProfile.objects.filter(user_id__in=ids).values_list('pk', flat=True))
+
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError("Email bo'lishi shart")
@@ -46,6 +68,10 @@ class User(TimestampedModel, AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)  # admin site kirishini belgilaydi
     date_joined = models.DateTimeField(default=timezone.now)
+    # Soft delete: objects ko'rsatmaydi, bog'liq ma'lumot fonda o'chiriladi (core/purge.py)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # O'qilmagan bildirishnomalar soni - communications signallari F() bilan yangilaydi
+    unread_notifications = models.PositiveIntegerField(default=0, editable=False)
 
     objects = UserManager()
 
@@ -55,6 +81,14 @@ class User(TimestampedModel, AbstractBaseUser, PermissionsMixin):
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
 
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, *args, **kwargs):
+        # Hisoblagich faqat atomar F() UPDATE lar bilan o'zgaradi: oddiy save() (update_fields=None)
+        # xotiradagi eskirgan qiymatni yozib yubormasin. save() semantikasi (update_fields,
+        # .only()/.defer() maydonlari, signallar) o'zgarmaydi; aniq so'ralsa yoziladi.
+        if update_fields is None:
+            values = [value for value in values if value[0].attname != 'unread_notifications']
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, *args, **kwargs)
+
     def __str__(self):
         return self.email
 
@@ -86,6 +120,7 @@ class TeacherProfile(models.Model):
     speciality = models.CharField(max_length=200, blank=True)
     bio = models.TextField(blank=True)
     salary = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    lesson_rate = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # har bir dars uchun qo'shimcha
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)  # 0.00 - 5.00
 
 
@@ -144,4 +179,55 @@ def create_profile_for_user(sender, instance, created, **kwargs):
         elif t == User.UserType.SUPPORT_TEACHER:
             SupportTeacherProfile.objects.get_or_create(user=instance)
         else:
-            StudentProfile.objects.get_or_create(user=instance)
\ No newline at end of file
+            StudentProfile.objects.get_or_create(user=instance)
+
+# ============================================================================
+# RUXSATLAR KESHI VERSIYALARI (accounts/permissions.py)
+# ============================================================================
+
+PERMISSION_VERSION_KEY = 'accounts:permissions:version:{}'
+PERMISSION_USER_FIELDS = {'is_active', 'is_superuser'}
+
+
+def bump_permission_version(*user_ids):
+    """Berilgan foydalanuvchilar (bo'sh bo'lsa - guruhlar, ya'ni hamma) keshi eskiradi"""
+    scopes = [f'user:{user_id}' for user_id in user_ids] or ['groups']
+    version = time.time_ns()
+    cache.set_many({PERMISSION_VERSION_KEY.format(scope): version for scope in scopes}, None)
+
+
+@receiver(post_save, sender=User)
+def invalidate_permissions_on_user_change(sender, instance, created, update_fields=None, **kwargs):
+    # Yangi user ham: SQLite o'chirilgan userning pk sini qayta berishi mumkin
+    if created or update_fields is None or PERMISSION_USER_FIELDS & set(update_fields):
+        bump_permission_version(instance.pk)
+
+
+def invalidate_user_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    """user.user_permissions / user.groups (yoki teskari tomondan) o'zgarganda"""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_permission_version(instance.pk)
+    elif pk_set:
+        bump_permission_version(*pk_set)
+    else:
+        # group.user_set.clear() - kimga ta'sir qilgani noma'lum
+        bump_permission_version()
+
+
+m2m_changed.connect(invalidate_user_permissions, sender=User.user_permissions.through)
+m2m_changed.connect(invalidate_user_permissions, sender=User.groups.through)
+
+
+@receiver(m2m_changed, sender=AuthGroup.permissions.through)
+def invalidate_group_permissions(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_permission_version()
+
+
+@receiver(post_delete, sender=AuthGroup)
+@receiver(post_delete, sender=Permission)
+def invalidate_permissions_on_delete(sender, **kwargs):
+    # Kaskad o'chirilgan bog'lanishlar m2m_changed yubormaydi
+    bump_permission_version()
@@ -0,0 +1,77 @@
+"""
+Foydalanuvchi ruxsatlarini keshlash (PermissionRequiredMixin, permission_required)
+
+user.has_perm / get_all_permissions har so'rovda auth_permission jadvallariga
+boradi. Bu yerda foydalanuvchining barcha ruxsatlari bir marta hisoblanib
+keshga yoziladi; kalit ikki versiyadan iborat:
+
+    - foydalanuvchi versiyasi: user_permissions / groups / is_active o'zgarsa,
+    - guruhlar versiyasi: Group.permissions, guruh yoki ruxsat o'chirilsa.
+
+Versiyalarni accounts/models.py dagi signallar yangilaydi - eski kalitlar
+shunchaki ishlatilmay qoladi. Issiq yo'lda: 2 ta kesh o'qish, 0 ta SQL;
+so'rov ichida natija user obyektida ham saqlanadi.
+
+Kesh jarayon ichida bo'lsa (LocMem, Dummy) so'rovlararo keshlanmaydi: bir
+workerda ruxsat olib tashlanganda versiya faqat o'sha jarayonda yangilanadi,
+boshqalari eski ruxsatlar bilan ishlashda davom etardi. Bunday holda faqat
+so'rov ichidagi (user obyektidagi) natija qoladi.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .models import PERMISSION_VERSION_KEY
+
+PERMISSIONS_KEY = 'accounts:permissions:{}:{}:{}'
+USER_ATTR = '_cached_permission_set'
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def shared_cache():
+    """Standart kesh workerlar orasida umumiymi (Redis, Memcached, DB)"""
+    return not isinstance(caches['default'], PROCESS_LOCAL_BACKENDS)
+
+
+def versions(user_id):
+    """Foydalanuvchi va guruhlar versiyasi; yo'qlari (kesh tozalangan) yangidan boshlanadi"""
+    keys = [PERMISSION_VERSION_KEY.format(f'user:{user_id}'), PERMISSION_VERSION_KEY.format('groups')]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def get_permissions(user):
+    """
+    Foydalanuvchining barcha ruxsatlari ('app_label.codename').
+
+    Returns:
+        frozenset: faol bo'lmagan yoki anonim foydalanuvchi uchun bo'sh
+    """
+    if not user.is_authenticated or not user.is_active:
+        return frozenset()
+    permissions = getattr(user, USER_ATTR, None)
+    if permissions is None:
+        if shared_cache():
+            key = PERMISSIONS_KEY.format(user.pk, *versions(user.pk))
+            permissions = cache.get(key)
+            if permissions is None:
+                permissions = frozenset(user.get_all_permissions())
+                cache.set(key, permissions, settings.PERMISSION_CACHE_TIMEOUT)
+        else:
+            permissions = frozenset(user.get_all_permissions())
+        setattr(user, USER_ATTR, permissions)
+    return permissions
+
+
+def has_perms(user, perms):
+    """user.has_perms bilan bir xil natija (faol superuser - hammasi), lekin to'plamdan"""
+    if user.is_active and user.is_superuser:
+        return True
+    return set(perms) <= get_permissions(user)
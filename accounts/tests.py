@@ -1,3 +1,349 @@
-from django.test import TestCase
+import io
+import tempfile
+import threading
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import identify_hasher
+from django.contrib.auth.models import AnonymousUser, Group as AuthGroup, Permission
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import search
+from core.models import BackgroundJob
+from courses.models import Course, Group
+from . import imports, permissions, throttle
+from .mixins import permission_required
+from .models import StudentProfile, User
+
+
+HEADER = 'email,first_name,last_name,phone,password,parent_name,parent_phone,join_date\n'
+
+
+def csv_rows(count, start=0):
+    return ''.join(
+        f's{i}@example.com,Ali{i},Valiyev,+99890{i:07d},Parol{i}!x,Karim,+998911234567,2025-09-01\n'
+        for i in range(start, start + count)
+    )
+
+
+class StudentImportTests(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name='P1', course=Course.objects.create(title='Python'))
+        User.objects.create_user(email='s1@example.com')
+
+    def test_imports_students_with_parents_and_group_in_chunks(self):
+        content = HEADER + csv_rows(5) + 's2@example.com,Takror,,,,,,\nnot-an-email,,,,,,,\n'
+
+        stats = imports.import_students(io.StringIO(content), group=self.group, chunk_size=2)
+
+        self.assertEqual(dict(stats), {'created': 4, 'exists': 1, 'duplicate': 1, 'invalid': 1})
+        profile = StudentProfile.objects.select_related('user').get(user__email='s3@example.com')
+        self.assertEqual((profile.parent_name, profile.parent_phone), ('Karim', '+998911234567'))
+        self.assertEqual((profile.user.first_name, profile.user.type), ('Ali3', User.UserType.STUDENT))
+        self.assertEqual(str(profile.join_date), '2025-09-01')
+        self.assertEqual(self.group.students.count(), 4)
+        # bulk_create signalsiz - qidiruv indeksi importning o'zida
+        self.assertEqual([result.title for result in search.search('ali3 valiyev')], ['Ali3 Valiyev'])
+
+    def test_rows_are_written_in_bulk_without_profile_signal(self):
+        with CaptureQueriesContext(connection) as queries:
+            stats = imports.import_students(io.StringIO(HEADER + csv_rows(300, 100)), group=self.group)
+
+        # SQLite o'zgaruvchilar chegarasi bulk_create ni bir necha INSERT ga bo'ladi, lekin qator boshiga so'rov yo'q
+        self.assertEqual(stats['created'], 300)
+        self.assertLess(len(queries), 20)
+        self.assertFalse([q for q in queries if 'SELECT' in q['sql'] and 'accounts_studentprofile' in q['sql']])
+
+    def test_initial_password_is_upgraded_on_first_login(self):
+        imports.import_students(io.StringIO(HEADER + csv_rows(1, 7)))
+        user = User.objects.get(email='s7@example.com')
+        self.assertEqual(identify_hasher(user.password).algorithm, 'pbkdf2_sha256_initial')
+
+        self.assertTrue(self.client.login(email='s7@example.com', password='Parol7!x'))
+
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).algorithm, 'pbkdf2_sha256')
+
+    def test_unused_initial_passwords_expire(self):
+        imports.import_students(io.StringIO(HEADER + csv_rows(3, 40)))
+        User.objects.filter(email__in=['s40@example.com', 's41@example.com']).update(
+            date_joined=timezone.now() - timedelta(days=30),
+        )
+        self.assertTrue(self.client.login(email='s41@example.com', password='Parol41!x'))
+
+        call_command('expire_initial_passwords', days=14, stdout=io.StringIO())
+
+        usable = dict(User.objects.filter(email__startswith='s4').values_list('email', 'password'))
+        self.assertFalse(User(password=usable['s40@example.com']).has_usable_password())
+        self.assertTrue(User.objects.get(email='s41@example.com').check_password('Parol41!x'))
+        self.assertTrue(User.objects.get(email='s42@example.com').check_password('Parol42!x'))
+
+    def test_passwords_are_hashed_in_process_pool(self):
+        with mock.patch.object(imports, 'MAX_WORKERS', 2), mock.patch.object(imports, 'POOL_MIN_ROWS', 4):
+            stats = imports.import_students(io.StringIO(HEADER + csv_rows(6, 20)))
+
+        self.assertEqual(stats['created'], 6)
+        user = User.objects.get(email='s22@example.com')
+        self.assertTrue(user.check_password('Parol22!x'))
+
+    def test_command_reports_missing_email_column(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('name,phone\nAli,123\n')
+        self.addCleanup(Path(handle.name).unlink)
+
+        with self.assertRaisesMessage(Exception, 'email'):
+            call_command('import_students', handle.name, stdout=io.StringIO())
+
+
+@override_settings(BACKGROUND_JOBS_EAGER=True)
+class StudentImportUploadTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media = Path(media.name)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.admin = User.objects.create_user(email='admin@example.com', type=User.UserType.ADMIN, is_superuser=True)
+        self.group = Group.objects.create(name='P1', course=Course.objects.create(title='Python'))
+
+    def test_upload_runs_import_job_and_removes_file(self):
+        self.client.force_login(self.admin)
+        upload = SimpleUploadedFile('students.csv', (HEADER + csv_rows(3)).encode(), content_type='text/csv')
+
+        response = self.client.post(reverse('admin_panel:user_import'), {'file': upload, 'group': self.group.pk})
+
+        job = BackgroundJob.objects.get()
+        self.assertRedirects(response, reverse('jobs:detail', args=[job.pk]), fetch_redirect_response=False)
+        self.assertEqual((job.status, job.total, job.processed), (BackgroundJob.Status.DONE, 3, 3))
+        self.assertEqual(self.group.students.count(), 3)
+        self.assertEqual(list((self.media / 'imports').iterdir()), [])
+
+    def test_upload_without_email_column_is_rejected(self):
+        self.client.force_login(self.admin)
+        upload = SimpleUploadedFile('students.csv', b'name\nAli\n', content_type='text/csv')
+
+        response = self.client.post(reverse('admin_panel:user_import'), {'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('file', response.context['form'].errors)
+        self.assertFalse(BackgroundJob.objects.exists())
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@override_settings(LOGIN_THROTTLE_LOCKOUT=60, LOGIN_THROTTLE_LOCKOUT_MAX=600)
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.throttle = throttle.SlidingWindowThrottle('test-ip', 3, 60, throttle.LocalStore(10), clock=self.clock)
+
+    def test_locks_after_limit_with_exponential_lockout(self):
+        self.assertEqual([self.throttle.hit('1.1.1.1') for _ in range(3)], [0, 0, 0])
+        self.assertEqual(self.throttle.hit('1.1.1.1'), 60)
+        self.assertEqual(self.throttle.retry_after('1.1.1.1'), 60)
+        self.assertEqual(self.throttle.retry_after('2.2.2.2'), 0)
+
+        self.clock.now += 61
+        for _ in range(3):
+            self.throttle.hit('1.1.1.1')
+        self.assertEqual(self.throttle.hit('1.1.1.1'), 120)
+
+        self.throttle.reset('1.1.1.1')
+        self.assertEqual(self.throttle.hit('1.1.1.1'), 0)
+
+    def test_previous_window_is_weighted(self):
+        for _ in range(3):
+            self.throttle.hit('1.1.1.1')
+        self.clock.now += 90  # oldingi oynaning yarmi hali hisobda: 3 * 0.5
+        state = self.throttle.store.get(throttle.KEY.format('test-ip', '1.1.1.1'))
+        self.throttle._roll(state, self.clock.now)
+
+        self.assertEqual(self.throttle.estimate(state, self.clock.now), 1.5)
+        self.assertEqual(self.throttle.hit('1.1.1.1'), 0)
+
+    def test_local_store_evicts_oldest_keys(self):
+        for i in range(15):
+            self.throttle.hit(f'10.0.0.{i}')
+
+        self.assertEqual(len(self.throttle.store._states), 10)
+        self.assertIsNone(self.throttle.store.get(throttle.KEY.format('test-ip', '10.0.0.0')))
+
+
+@override_settings(LOGIN_THROTTLE_ENABLED=True, LOGIN_THROTTLE_IP_LIMIT=3, LOGIN_THROTTLE_EMAIL_LIMIT=2)
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        throttle.reset_throttles()
+        self.addCleanup(throttle.reset_throttles)
+        self.url = reverse('accounts:login')
+        self.user = User.objects.create_user(email='ali@example.com', password='ToGri-parol1')
+
+    def login(self, email='ali@example.com', password='xato', ip='10.0.0.1'):
+        return self.client.post(self.url, {'username': email, 'password': password}, REMOTE_ADDR=ip)
+
+    def test_ip_limit_rejects_before_password_check(self):
+        for i in range(3):
+            self.assertEqual(self.login(email=f'u{i}@example.com').status_code, 200)
+
+        with mock.patch('django.contrib.auth.forms.authenticate') as authenticate:
+            response = self.login(email='boshqa@example.com')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+        authenticate.assert_not_called()
+        self.assertEqual(self.login(ip='10.0.0.2').status_code, 200)
+
+    def test_failed_attempts_lock_email_across_ips(self):
+        self.login(ip='10.0.0.1')
+        self.login(ip='10.0.0.2')
+        self.login(ip='10.0.0.3')
+
+        response = self.login(password='ToGri-parol1', ip='10.0.0.4')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_successful_login_resets_email_counter(self):
+        self.login()
+        self.login()
+        self.assertEqual(self.login(password='ToGri-parol1', ip='10.0.0.2').status_code, 302)
+        self.client.logout()
+
+        self.login(ip='10.0.0.3')
+        self.assertEqual(self.login(password='ToGri-parol1', ip='10.0.0.4').status_code, 302)
+
+    @override_settings(LOGIN_THROTTLE_MAX_CONCURRENT=2, LOGIN_THROTTLE_HASH_WAIT=0.01)
+    def test_rejects_when_no_hash_slot_free(self):
+        with throttle.hash_slot(), throttle.hash_slot():
+            response = self.login()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+
+    @override_settings(LOGIN_THROTTLE_MAX_CONCURRENT=1, LOGIN_THROTTLE_HASH_WAIT=5)
+    def test_overlapping_login_waits_for_hash_slot(self):
+        held, release = threading.Event(), threading.Event()
+
+        def hold():
+            with throttle.hash_slot():
+                held.set()
+                release.wait(5)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        held.wait(5)
+        threading.Timer(0.05, release.set).start()
+
+        response = self.login(password='ToGri-parol1')
+        holder.join()
+
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(LOGIN_THROTTLE_IP_LIMIT=1)
+    def test_register_is_throttled_by_ip(self):
+        url = reverse('accounts:register')
+        self.assertEqual(self.client.post(url, {}, REMOTE_ADDR='10.0.0.9').status_code, 200)
+        self.assertEqual(self.client.post(url, {}, REMOTE_ADDR='10.0.0.9').status_code, 429)
+
+    @override_settings(LOGIN_THROTTLE_ENABLED=False)
+    def test_disabled(self):
+        for _ in range(5):
+            self.assertEqual(self.login().status_code, 200)
+
+
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        # Test LocMem keshi bitta jarayonda - umumiy kesh (Redis) kabi ishlaydi
+        self.shared = mock.patch.object(permissions, 'shared_cache', return_value=True)
+        self.shared.start()
+        self.addCleanup(self.shared.stop)
+        self.user = User.objects.create_user(email='t@example.com', type=User.UserType.TEACHER)
+        self.group = AuthGroup.objects.create(name='Ustozlar')
+        self.view_user = Permission.objects.get(codename='view_user')
+        self.change_user = Permission.objects.get(codename='change_user')
+
+    def fresh(self):
+        # Har so'rovda yangi user obyekti - faqat kesh saqlanib qoladi
+        return User.objects.get(pk=self.user.pk)
+
+    def test_warm_checks_run_no_queries(self):
+        self.group.permissions.add(self.view_user)
+        self.user.groups.add(self.group)
+        self.assertTrue(permissions.has_perms(self.fresh(), ['accounts.view_user']))
+
+        user = self.fresh()
+        with self.assertNumQueries(0):
+            self.assertTrue(permissions.has_perms(user, ['accounts.view_user']))
+            self.assertFalse(permissions.has_perms(user, ['accounts.view_user', 'accounts.change_user']))
+            self.assertEqual(permissions.get_permissions(user), {'accounts.view_user'})
+
+    def test_user_permission_and_group_changes_invalidate(self):
+        self.assertFalse(permissions.has_perms(self.fresh(), ['accounts.change_user']))
+
+        self.user.user_permissions.add(self.change_user)
+        self.assertTrue(permissions.has_perms(self.fresh(), ['accounts.change_user']))
+
+        self.user.groups.add(self.group)
+        self.group.permissions.add(self.view_user)
+        self.assertTrue(permissions.has_perms(self.fresh(), ['accounts.view_user']))
+
+        self.group.permissions.remove(self.view_user)
+        self.assertFalse(permissions.has_perms(self.fresh(), ['accounts.view_user']))
+
+        self.group.permissions.add(self.view_user)
+        self.group.user_set.remove(self.user)
+        self.assertFalse(permissions.has_perms(self.fresh(), ['accounts.view_user']))
+
+        self.user.groups.add(self.group)
+        self.group.delete()
+        self.assertEqual(permissions.get_permissions(self.fresh()), {'accounts.change_user'})
+
+    def test_inactive_and_anonymous_have_no_permissions(self):
+        self.user.user_permissions.add(self.change_user)
+        self.assertTrue(permissions.has_perms(self.fresh(), ['accounts.change_user']))
+
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+
+        self.assertFalse(permissions.has_perms(self.fresh(), ['accounts.change_user']))
+        self.assertEqual(permissions.get_permissions(AnonymousUser()), frozenset())
+
+    def test_process_local_cache_is_not_used_across_requests(self):
+        self.shared.stop()
+        self.assertFalse(permissions.shared_cache())
+        self.user.user_permissions.add(self.change_user)
+        self.assertTrue(permissions.has_perms(self.fresh(), ['accounts.change_user']))
+
+        # Boshqa workerda olib tashlandi - bu jarayonda versiya yangilanmaydi
+        with mock.patch('accounts.models.bump_permission_version'):
+            self.user.user_permissions.remove(self.change_user)
+
+        user = self.fresh()
+        self.assertFalse(permissions.has_perms(user, ['accounts.change_user']))
+        with self.assertNumQueries(0):
+            permissions.get_permissions(user)
+
+    def test_permission_required_decorator(self):
+        view = permission_required('accounts.change_user')(lambda request: HttpResponse('ok'))
+        request = RequestFactory().get('/')
+        request.user = self.fresh()
+        request._messages = mock.MagicMock()
+        self.assertEqual(view(request).status_code, 302)
+
+        self.user.user_permissions.add(self.change_user)
+        request.user = self.fresh()
+        self.assertEqual(view(request).status_code, 200)
@@ -0,0 +1,225 @@
+"""
+Kirish urinishlarini cheklash (parol xeshi CPU ni band qilmasligi uchun)
+
+Har bir login/ro'yxatdan o'tish POST i PBKDF2 hisoblaydi (~0.4 s CPU).
+Cheklov autentifikatsiyadan OLDIN tekshiriladi, shuning uchun bloklangan
+so'rov xesh hisoblamaydi va darhol 429 oladi.
+
+    - IP bo'yicha: barcha urinishlar (LOGIN_THROTTLE_IP_LIMIT / _IP_WINDOW),
+    - email bo'yicha: faqat muvaffaqiyatsiz urinishlar (_EMAIL_LIMIT / _EMAIL_WINDOW),
+      muvaffaqiyatli kirish hisobni tozalaydi,
+    - chegaradan oshsa bloklash: LOGIN_THROTTLE_LOCKOUT * 2^(n-1), ko'pi bilan
+      LOGIN_THROTTLE_LOCKOUT_MAX soniya,
+    - ko'p IP dan kelgan oqim uchun: jarayonda bir vaqtda ko'pi bilan
+      LOGIN_THROTTLE_MAX_CONCURRENT ta parol tekshiruvi (CPU / worker soni),
+      qolganlari LOGIN_THROTTLE_HASH_WAIT soniya kutadi, keyin 429.
+
+Hisoblagich - taxminiy sirpanuvchi oyna (joriy va oldingi oyna, vaznli),
+kalit uchun xotira O(1). Holat jarayon ichida saqlanadi (LRU, cheklangan);
+LOGIN_THROTTLE_SHARED=True bo'lsa Django keshida - bir nechta worker uchun.
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY = 'accounts:throttle:{}:{}'
+
+
+@dataclass
+class WindowState:
+    window_start: float = 0.0
+    current: int = 0
+    previous: int = 0
+    lockouts: int = 0
+    locked_until: float = 0.0
+
+
+class LocalStore:
+    """Jarayon ichidagi holat; ko'p kalitli hujumda eng eskilari chiqariladi"""
+
+    def __init__(self, max_keys=None):
+        self.max_keys = max_keys or settings.LOGIN_THROTTLE_MAX_KEYS
+        self._states = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        state = self._states.get(key)
+        if state is not None:
+            self._states.move_to_end(key)
+        return state
+
+    def set(self, key, state, timeout):
+        self._states[key] = state
+        self._states.move_to_end(key)
+        while len(self._states) > self.max_keys:
+            self._states.popitem(last=False)
+
+    def delete(self, key):
+        self._states.pop(key, None)
+
+
+class CacheStore:
+    """Workerlar orasida umumiy holat (kesh); yangilash atomar emas - taxminiy cheklov uchun yetarli"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return cache.get(key)
+
+    def set(self, key, state, timeout):
+        cache.set(key, state, timeout)
+
+    def delete(self, key):
+        cache.delete(key)
+
+
+class SlidingWindowThrottle:
+    """
+    Bitta turdagi kalitlar (ip yoki email) uchun cheklov.
+
+    Args:
+        scope: kalit prefiksi ('login-ip', 'login-email', ...)
+        limit: oynada ruxsat etilgan urinishlar
+        window: oyna uzunligi (soniya)
+    """
+
+    def __init__(self, scope, limit, window, store=None, clock=time.time):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.store = store or LocalStore()
+        self.clock = clock
+
+    def _key(self, value):
+        return KEY.format(self.scope, value)
+
+    def _roll(self, state, now):
+        """Oynani joriy vaqtga surish"""
+        elapsed = now - state.window_start
+        if elapsed >= 2 * self.window:
+            state.window_start, state.current, state.previous = now, 0, 0
+        elif elapsed >= self.window:
+            state.window_start, state.previous, state.current = state.window_start + self.window, state.current, 0
+
+    def estimate(self, state, now):
+        """Oxirgi `window` soniyadagi urinishlar (oldingi oyna qoldiq ulushi bilan)"""
+        weight = 1 - (now - state.window_start) / self.window
+        return state.current + state.previous * max(0.0, weight)
+
+    def retry_after(self, value):
+        """Bloklangan bo'lsa qolgan soniyalar, aks holda 0"""
+        if not value:
+            return 0
+        # LocalStore.get LRU tartibini o'zgartiradi - hit() bilan bir vaqtda lock ostida
+        with self.store.lock:
+            state = self.store.get(self._key(value))
+        if state is None:
+            return 0
+        return max(0, math.ceil(state.locked_until - self.clock()))
+
+    def hit(self, value):
+        """
+        Urinishni hisoblash; chegaradan oshsa bloklanadi.
+
+        Returns:
+            int: bloklangan bo'lsa qolgan soniyalar, aks holda 0
+        """
+        if not value:
+            return 0
+        key, now = self._key(value), self.clock()
+        with self.store.lock:
+            state = self.store.get(key) or WindowState(window_start=now)
+            if state.locked_until > now:
+                return math.ceil(state.locked_until - now)
+            self._roll(state, now)
+            state.current += 1
+            locked = 0
+            if self.estimate(state, now) > self.limit:
+                state.lockouts += 1
+                locked = min(
+                    settings.LOGIN_THROTTLE_LOCKOUT * 2 ** (state.lockouts - 1), settings.LOGIN_THROTTLE_LOCKOUT_MAX,
+                )
+                state.locked_until = now + locked
+                # Har bloklashda bir marta (har rad etilgan so'rovda emas - oqimda log ham yuk)
+                logger.warning(
+                    f"Kirish cheklandi: {self.scope}",
+                    extra={'scope': self.scope, 'key': value, 'lockout': locked, 'lockouts': state.lockouts}
+                )
+                state.window_start, state.current, state.previous = now + locked, 0, 0
+            # Bloklashlar soni LOCKOUT_MAX davomida tinch bo'lsa unutiladi
+            self.store.set(key, state, int(locked + self.window * 2 + settings.LOGIN_THROTTLE_LOCKOUT_MAX))
+        return math.ceil(locked)
+
+    def reset(self, value):
+        if value:
+            with self.store.lock:
+                self.store.delete(self._key(value))
+
+
+def client_ip(request):
+    """Faqat REMOTE_ADDR - X-Forwarded-For ni mijoz soxtalashtira oladi"""
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def normalize_email(value):
+    return (value or '').strip().lower()[:254]
+
+
+_throttles = {}
+_throttles_lock = threading.Lock()
+
+
+def get_throttle(scope):
+    """Jarayon bo'yicha yagona cheklovchi (sozlamalar birinchi chaqiriqda o'qiladi)"""
+    with _throttles_lock:
+        if scope not in _throttles:
+            kind = scope.rsplit('-', 1)[1]
+            store = CacheStore() if settings.LOGIN_THROTTLE_SHARED else LocalStore()
+            _throttles[scope] = SlidingWindowThrottle(
+                scope,
+                getattr(settings, f'LOGIN_THROTTLE_{kind.upper()}_LIMIT'),
+                getattr(settings, f'LOGIN_THROTTLE_{kind.upper()}_WINDOW'),
+                store,
+            )
+        return _throttles[scope]
+
+
+_hash_slots = None
+
+
+@contextmanager
+def hash_slot():
+    """
+    Parol tekshiruvi uchun joy: bir-biriga to'g'ri kelgan oddiy kirishlar
+    LOGIN_THROTTLE_HASH_WAIT gacha navbat kutadi; shunda ham band bo'lsa
+    False - so'rov xesh hisoblamasdan rad etiladi, CPU oddiy trafik uchun qoladi.
+    """
+    global _hash_slots
+    with _throttles_lock:
+        if _hash_slots is None:
+            _hash_slots = threading.BoundedSemaphore(settings.LOGIN_THROTTLE_MAX_CONCURRENT)
+        slots = _hash_slots
+    acquired = slots.acquire(timeout=settings.LOGIN_THROTTLE_HASH_WAIT)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            slots.release()
+
+
+def reset_throttles():
+    """Testlar va sozlama o'zgarganda"""
+    global _hash_slots
+    with _throttles_lock:
+        _throttles.clear()
+        _hash_slots = None
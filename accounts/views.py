@@ -14,6 +14,9 @@ from django.contrib import messages
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_protect
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.conf import settings
+from communications import emails
+from . import throttle
 from .forms import UserRegistrationForm
 from .mixins import get_dashboard_url
 
@@ -39,6 +42,23 @@ class HomeView(TemplateView):
         return context
 
 
+# ============================================================================
+# CHEKLOV (accounts/throttle.py)
+# ============================================================================
+
+def throttled_response(request, retry_after):
+    """
+    429: yengil sahifa (forma va base.html chizilmaydi) - oqim paytida
+    rad etish arzon bo'lsin, xesh esa umuman hisoblanmaydi.
+    """
+    response = render(request, 'accounts/throttled.html', {
+        'minutes': max(1, round(retry_after / 60)),
+        'retry_url': request.path,
+    }, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 # ============================================================================
 # REGISTER VIEW
 # ============================================================================
@@ -61,11 +81,30 @@ class RegisterView(SuccessMessageMixin, CreateView):
             return redirect(get_dashboard_url(request.user))
         return super().dispatch(request, *args, **kwargs)
     
+    def post(self, request, *args, **kwargs):
+        """Parol xeshlanishidan oldin IP bo'yicha cheklov"""
+        self.object = None
+        if settings.LOGIN_THROTTLE_ENABLED:
+            retry_after = throttle.get_throttle('register-ip').hit(throttle.client_ip(request))
+            if retry_after:
+                return throttled_response(request, retry_after)
+            with throttle.hash_slot() as acquired:
+                if not acquired:
+                    return throttled_response(request, 1)
+                return super().post(request, *args, **kwargs)
+        return super().post(request, *args, **kwargs)
+    
     def form_valid(self, form):
         """Form to'g'ri bo'lganda - user yaratish va login qilish"""
         response = super().form_valid(form)
         user = self.object
         
+        # Xush kelibsiz xati - faqat navbatga (send_emails yuboradi)
+        emails.enqueue(user.email, 'welcome', {
+            'name': user.get_full_name() or user.email,
+            'login_url': self.request.build_absolute_uri(reverse_lazy('accounts:login')),
+        })
+        
         # Logging
         logger.info(
             f"Yangi user registratsiya: {user.email} (student)",
@@ -133,8 +172,34 @@ class CustomLoginView(SuccessMessageMixin, LoginView):
             return redirect(get_dashboard_url(request.user))
         return super().dispatch(request, *args, **kwargs)
     
+    def post(self, request, *args, **kwargs):
+        """
+        Cheklov autentifikatsiyadan OLDIN: bloklangan email yoki IP uchun
+        parol tekshirilmaydi (PBKDF2 hisoblanmaydi).
+        """
+        if settings.LOGIN_THROTTLE_ENABLED:
+            self.throttle_email = throttle.normalize_email(request.POST.get('username'))
+            retry_after = (
+                throttle.get_throttle('login-email').retry_after(self.throttle_email)
+                or throttle.get_throttle('login-ip').hit(throttle.client_ip(request))
+            )
+            if retry_after:
+                return throttled_response(request, retry_after)
+            with throttle.hash_slot() as acquired:
+                if not acquired:
+                    return throttled_response(request, 1)
+                return super().post(request, *args, **kwargs)
+        return super().post(request, *args, **kwargs)
+    
+    def form_valid(self, form):
+        if settings.LOGIN_THROTTLE_ENABLED:
+            throttle.get_throttle('login-email').reset(self.throttle_email)
+        return super().form_valid(form)
+    
     def form_invalid(self, form):
         """Login xatosi."""
+        if settings.LOGIN_THROTTLE_ENABLED:
+            throttle.get_throttle('login-email').hit(self.throttle_email)
         logger.warning(
             f"Login xatosi - Invalid credentials",
             extra={'errors': str(form.errors)}
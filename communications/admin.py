@@ -1,5 +1,49 @@
 from django.contrib import admin
 
-from .models import Notification
+from .models import (
+    Announcement, BroadcastNotification, EmailOutbox, MessageThread, Notification, ThreadParticipant,
+)
 
-admin.site.register(Notification)
\ No newline at end of file
+admin.site.register(Notification)
+
+
+@admin.register(BroadcastNotification)
+class BroadcastNotificationAdmin(admin.ModelAdmin):
+    list_display = ('title', 'audience', 'group', 'course', 'branch', 'expires_at', 'created_at')
+    list_filter = ('audience',)
+    search_fields = ('title',)
+    raw_id_fields = ('group', 'course', 'branch', 'created_by')
+    ordering = ('-created_at',)
+
+
+class ThreadParticipantInline(admin.TabularInline):
+    model = ThreadParticipant
+    raw_id_fields = ('user',)
+    extra = 0
+
+
+@admin.register(MessageThread)
+class MessageThreadAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'message_count', 'last_message_at', 'created_at')
+    search_fields = ('subject',)
+    raw_id_fields = ('last_message',)
+    inlines = [ThreadParticipantInline]
+    ordering = ('-last_message_at',)
+
+
+@admin.register(Announcement)
+class AnnouncementAdmin(admin.ModelAdmin):
+    list_display = ('title', 'target_audience', 'course', 'group', 'branch', 'expires_at', 'created_at')
+    list_filter = ('target_audience',)
+    search_fields = ('title',)
+    raw_id_fields = ('course', 'group', 'branch', 'created_by')
+    ordering = ('-created_at',)
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'template', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'template')
+    search_fields = ('to_email',)
+    readonly_fields = ('last_error',)
+    ordering = ('-created_at',)
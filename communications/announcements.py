@@ -0,0 +1,101 @@
+"""
+E'lonlar lentasi - auditoriya bo'yicha keshlangan HTML bo'laklari
+
+Har bir auditoriya (segment: 'all', 'students', 'group:12', 'course:3',
+'branch:1') uchun oxirgi e'lonlar bir marta chiziladi va keshda
+(created_at, id, html) ro'yxati sifatida saqlanadi. Kesh kaliti segment
+versiyasini o'z ichiga oladi; versiya shu segmentdagi e'lon o'zgarganda
+yangilanadi (models.py::invalidate_announcement_feed).
+
+Foydalanuvchi lentasi uning segmentlari bo'laklaridan yig'iladi: a'zolik
+uchun bitta so'rov va ikkita cache.get_many - e'lonlar jadvali o'qilmaydi.
+"""
+from django.core.cache import cache
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from accounts.models import User
+from .models import ANNOUNCEMENT_VERSION_KEY, Announcement, user_memberships
+
+
+FEED_LIMIT = 20
+CACHE_TIMEOUT = 60 * 60
+FRAGMENT_KEY = 'communications:announcements:feed:{}:{}'
+ITEM_TEMPLATE = 'communications/announcement_item.html'
+
+ROLE_SEGMENTS = {
+    Announcement.Audience.STUDENTS: [User.UserType.STUDENT],
+    Announcement.Audience.TEACHERS: [User.UserType.TEACHER, User.UserType.SUPPORT_TEACHER],
+    Announcement.Audience.STAFF: [User.UserType.ADMIN, User.UserType.MANAGER, User.UserType.SUPERUSER],
+}
+
+
+def user_segments(user):
+    """Foydalanuvchi ko'radigan barcha segmentlar"""
+    groups, courses, branches = user_memberships(user)
+    segments = [Announcement.Audience.ALL.value]
+    segments += [role.value for role, types in ROLE_SEGMENTS.items() if user.type in types]
+    segments += [f"{Announcement.Audience.COURSE}:{pk}" for pk in sorted(courses)]
+    segments += [f"{Announcement.Audience.GROUP}:{pk}" for pk in sorted(groups)]
+    segments += [f"{Announcement.Audience.BRANCH}:{pk}" for pk in sorted(branches)]
+    return segments
+
+
+def segment_filter(segment):
+    audience, _, target = segment.partition(':')
+    condition = Q(target_audience=audience)
+    if target:
+        condition &= Q(**{f'{audience}_id': int(target)})
+    return condition
+
+
+def render_segment(segment, now=None):
+    """
+    Segmentning faol e'lonlarini chizish.
+
+    Returns:
+        tuple: ((created_at, id, html) ro'yxati, kesh muddati soniyalarda)
+    """
+    now = now or timezone.now()
+    announcements = list(
+        Announcement.objects.active(now).filter(segment_filter(segment)).select_related(
+            'created_by', 'course', 'group', 'branch',
+        ).order_by('-created_at', '-pk')[:FEED_LIMIT]
+    )
+    items = [
+        (announcement.created_at.timestamp(), announcement.pk,
+         render_to_string(ITEM_TEMPLATE, {'announcement': announcement}))
+        for announcement in announcements
+    ]
+
+    # Birinchi tugaydigan e'lon bilan bo'lak ham eskiradi
+    timeout = CACHE_TIMEOUT
+    expiries = [announcement.expires_at for announcement in announcements if announcement.expires_at]
+    if expiries:
+        timeout = max(1, min(timeout, int((min(expiries) - now).total_seconds()) + 1))
+    return items, timeout
+
+
+def feed(user, limit=FEED_LIMIT):
+    """Foydalanuvchi lentasi - keshlangan bo'laklardan yig'ilgan HTML"""
+    segments = user_segments(user)
+    version_keys = {segment: ANNOUNCEMENT_VERSION_KEY.format(segment) for segment in segments}
+    versions = cache.get_many(version_keys.values())
+    keys = {
+        segment: FRAGMENT_KEY.format(segment, versions.get(version_keys[segment], 0))
+        for segment in segments
+    }
+    fragments = cache.get_many(keys.values())
+
+    items = []
+    for segment, key in keys.items():
+        fragment = fragments.get(key)
+        if fragment is None:
+            fragment, timeout = render_segment(segment)
+            cache.set(key, fragment, timeout)
+        items += fragment
+
+    items.sort(key=lambda item: item[:2], reverse=True)
+    return mark_safe(''.join(html for _, _, html in items[:limit]))
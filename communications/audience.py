@@ -0,0 +1,287 @@
+"""
+Auditoriya ifodalari - qabul qiluvchilarni user id to'plamlariga aylantirish
+
+Ifoda asosiy to'plamlar va amallardan iborat:
+
+    role:student & course:python - status:blocked
+    (group:12 | group:15) & status:debtor
+    all - role:admin
+
+    asosiy to'plamlar:
+        all                         - barcha foydalanuvchilar
+        role:<student|teacher|admin|support_teacher|manager|...>
+        group:<id>                  - guruh a'zolari (talabalar, o'qituvchi, yordamchi)
+        course:<id yoki slug>       - kurs guruhlari a'zolari
+        branch:<id>                 - filial guruhlari a'zolari
+        status:<active|inactive>    - User.is_active
+        status:<blocked|finished>   - talaba holati
+        status:debtor               - qarzdor talabalar (DebtorBalance.debt > 0)
+    amallar: & (kesishma) ustun, | (birlashma) va - (ayirma) chapdan o'ngga,
+    qavslar.
+
+Har bir asosiy to'plam bitta so'rov bilan olinadi va keshda saralangan
+array('I') baytlari sifatida saqlanadi; kalit to'plam turining versiyasini
+o'z ichiga oladi (models.py::invalidate_audience_* signallari yangilaydi).
+Jarayon ichida ham oxirgi to'plamlar saqlanadi, shuning uchun tayyor
+auditoriyani hisoblash - bitta cache.get_many va xotiradagi set amallari.
+"""
+import re
+import threading
+import time
+from array import array
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from accounts.models import StudentProfile, User
+from .models import AUDIENCE_VERSION_KEY, ROLE_TYPES
+
+
+CACHE_TIMEOUT = 15 * 60
+DEBT_TIMEOUT = 60  # qarz to'lovlar bilan tez o'zgaradi, signal yo'q (bulk refresh)
+SET_KEY = 'communications:audience:set:{}:{}:{}'
+MEMO_SIZE = 64
+
+ROLES = {
+    **{role.rstrip('s'): types for role, types in ROLE_TYPES.items()},
+    **ROLE_TYPES,
+    **{value: [value] for value in User.UserType.values},
+}
+STUDENT_STATUSES = {value for value, _ in StudentProfile.STATUS_CHOICES} - {'active'}
+STATUSES = {'active', 'inactive', 'debtor', *STUDENT_STATUSES}
+
+# Asosiy to'plam turi -> versiya guruhi (signallar shu guruhni eskirtiradi)
+SCOPES = {
+    'all': 'users',
+    'role': 'users',
+    'status': 'users',
+    'group': 'groups',
+    'course': 'groups',
+    'branch': 'groups',
+}
+
+TOKEN = re.compile(r'\s*(?:(?P<op>[&|()-])|(?P<atom>all\b|[a-z_]+:[\w.-]+))')
+
+
+class AudienceError(ValueError):
+    """Ifodani tushunib bo'lmadi"""
+
+
+# ============================================================================
+# IFODANI TAHLIL QILISH
+# ============================================================================
+
+def tokenize(expression):
+    tokens, position = [], 0
+    expression = expression.strip().lower()
+    while position < len(expression):
+        match = TOKEN.match(expression, position)
+        if not match:
+            raise AudienceError(f"Tushunarsiz belgi: '{expression[position:].strip()[:20]}'")
+        tokens.append(match.group('op') or match.group('atom'))
+        position = match.end()
+    return tokens
+
+
+def parse_atom(token):
+    if token == 'all':
+        return ('all', '')
+    kind, _, value = token.partition(':')
+    if kind not in SCOPES or kind == 'all':
+        raise AudienceError(f"Noma'lum to'plam: '{kind}'")
+    if kind == 'role' and value not in ROLES:
+        raise AudienceError(f"Noma'lum rol: '{value}'")
+    if kind == 'status' and value not in STATUSES:
+        raise AudienceError(f"Noma'lum holat: '{value}'")
+    if kind in ('group', 'branch') and not value.isdigit():
+        raise AudienceError(f"{kind} uchun id kerak: '{value}'")
+    return (kind, value)
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression):
+    """
+    Ifoda -> daraxt: ('all', '') / (tur, qiymat) barglar va ('&'|'|'|'-', chap, o'ng).
+
+    Raises:
+        AudienceError: sintaksis xatosi
+    """
+    tokens = tokenize(expression)
+    if not tokens:
+        raise AudienceError("Ifoda bo'sh")
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def factor():
+        token = peek()
+        if token is None:
+            raise AudienceError("Ifoda to'liq emas")
+        take()
+        if token == '(':
+            node = union()
+            if peek() != ')':
+                raise AudienceError("Yopuvchi qavs yo'q")
+            take()
+            return node
+        if token in ('&', '|', '-', ')'):
+            raise AudienceError(f"Kutilmagan amal: '{token}'")
+        return parse_atom(token)
+
+    def intersection():
+        node = factor()
+        while peek() == '&':
+            take()
+            node = ('&', node, factor())
+        return node
+
+    def union():
+        node = intersection()
+        while peek() in ('|', '-'):
+            node = (take(), node, intersection())
+        return node
+
+    node = union()
+    if peek() is not None:
+        raise AudienceError(f"Kutilmagan belgi: '{peek()}'")
+    return node
+
+
+def atoms(node):
+    if node[0] in ('&', '|', '-'):
+        return atoms(node[1]) | atoms(node[2])
+    return {node}
+
+
+def evaluate(node, sets):
+    """Daraxtni xotirada hisoblash; sets - {barg: set}"""
+    operator = node[0]
+    if operator == '&':
+        return evaluate(node[1], sets) & evaluate(node[2], sets)
+    if operator == '|':
+        return evaluate(node[1], sets) | evaluate(node[2], sets)
+    if operator == '-':
+        return evaluate(node[1], sets) - evaluate(node[2], sets)
+    return sets[node]
+
+
+# ============================================================================
+# ASOSIY TO'PLAMLAR (bitta so'rov, keshda array('I'))
+# ============================================================================
+
+def _member_ids(condition):
+    """Guruh(lar) a'zolari - talabalar, o'qituvchi va yordamchi bitta so'rovda"""
+    from courses.models import Group
+
+    ids = set()
+    rows = Group.objects.filter(condition).values_list(
+        'students__user_id', 'teacher__user_id', 'support_teacher__user_id',
+    )
+    for row in rows:
+        ids.update(row)
+    ids.discard(None)
+    return ids
+
+
+def load_atom(atom):
+    """Barg uchun user id lar - bazadan"""
+    kind, value = atom
+    if kind == 'all':
+        queryset = User.objects.all()
+    elif kind == 'role':
+        queryset = User.objects.filter(type__in=ROLES[value])
+    elif kind == 'status' and value in ('active', 'inactive'):
+        queryset = User.objects.filter(is_active=value == 'active')
+    elif kind == 'status' and value == 'debtor':
+        queryset = User.objects.filter(student_profile__debtor_balance__debt__gt=0)
+    elif kind == 'status':
+        queryset = User.objects.filter(student_profile__status=value)
+    elif kind == 'course':
+        return _member_ids(Q(course_id=int(value)) if value.isdigit() else Q(course__slug=value))
+    elif kind == 'group':
+        return _member_ids(Q(pk=int(value)))
+    else:
+        return _member_ids(Q(branch_id=int(value)))
+    return set(queryset.values_list('pk', flat=True))
+
+
+def versions(scopes):
+    """Versiya guruhlari; yo'qlari (kesh tozalangan) yangi qiymat bilan boshlanadi"""
+    keys = {scope: AUDIENCE_VERSION_KEY.format(scope) for scope in scopes}
+    found = cache.get_many(keys.values())
+    for scope, key in keys.items():
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return {scope: found[key] for scope, key in keys.items()}
+
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def _recall(key, now):
+    with _memo_lock:
+        expires, ids = _memo.get(key, (0, None))
+    return ids if expires > now else None
+
+
+def _remember(key, ids, timeout):
+    # ASGI/thread worker'larda bir nechta so'rov bir vaqtda yozadi - pop/set lock ostida
+    with _memo_lock:
+        if key not in _memo and len(_memo) >= MEMO_SIZE:
+            _memo.pop(next(iter(_memo)))
+        _memo[key] = (time.monotonic() + timeout, ids)
+
+
+def base_sets(leaves):
+    """
+    Barglar to'plamlari: jarayon xotirasi -> kesh (bitta get_many) -> baza.
+
+    Returns:
+        dict: {barg: frozenset}
+    """
+    current = versions({SCOPES[kind] for kind, _ in leaves})
+    keys = {atom: SET_KEY.format(atom[0], atom[1], current[SCOPES[atom[0]]]) for atom in leaves}
+    now = time.monotonic()
+
+    sets, missing = {}, []
+    for atom, key in keys.items():
+        ids = _recall(key, now)
+        if ids is not None:
+            sets[atom] = ids
+        else:
+            missing.append(atom)
+
+    cached = cache.get_many([keys[atom] for atom in missing]) if missing else {}
+    for atom in missing:
+        key = keys[atom]
+        timeout = DEBT_TIMEOUT if atom == ('status', 'debtor') else CACHE_TIMEOUT
+        packed = cached.get(key)
+        if packed is None:
+            ids = load_atom(atom)
+            cache.set(key, array('I', sorted(ids)).tobytes(), timeout)
+        else:
+            ids = array('I')
+            ids.frombytes(packed)
+        sets[atom] = frozenset(ids)
+        _remember(key, sets[atom], timeout)
+    return sets
+
+
+def resolve(expression):
+    """
+    Ifoda -> user id lar (saralangan ro'yxat).
+
+    Raises:
+        AudienceError: ifoda noto'g'ri
+    """
+    node = compile_expression(expression)
+    return sorted(evaluate(node, base_sets(atoms(node))))
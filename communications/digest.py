@@ -0,0 +1,101 @@
+"""
+Kunlik bildirishnomalar dayjesti
+
+Har bir bildirishnoma uchun alohida xat o'rniga: oxirgi
+NOTIFICATION_DIGEST_WINDOW_HOURS soatdagi o'qilmagan bildirishnomalar
+(user_id, id) tartibida bitta so'rov bilan oqim sifatida o'qiladi va
+foydalanuvchi bo'yicha guruhlanib, har biriga bitta EmailOutbox xati
+qo'yiladi (yuborish - send_emails).
+
+    - suv belgisi (NotificationDigest.last_notification_id) - qayta ishga
+      tushirish faqat yangi bildirishnomalarni oladi,
+    - xatlar va suv belgilari NOTIFICATION_DIGEST_BATCH_SIZE foydalanuvchidan
+      bo'lib bitta tranzaksiyada yoziladi - xotira foydalanuvchilar soniga
+      bog'liq emas, to'xtab qolsa ham yozilgan qismi takrorlanmaydi.
+"""
+from collections import Counter
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from . import emails
+from .models import EmailOutbox, Notification, NotificationDigest
+
+
+MESSAGE_LENGTH = 200
+
+
+def pending_notifications(now):
+    """Dayjestga kirmagan o'qilmagan bildirishnomalar - (user_id, id) bo'yicha"""
+    digested = NotificationDigest.objects.filter(user=OuterRef('user'), last_notification_id__gte=OuterRef('pk'))
+    return Notification.objects.filter(
+        is_read=False,
+        created_at__gte=now - timedelta(hours=settings.NOTIFICATION_DIGEST_WINDOW_HOURS),
+        user__is_active=True,
+    ).exclude(user__email='').exclude(Exists(digested)).order_by('user_id', 'pk').values_list(
+        'user_id', 'user__email', 'user__first_name', 'pk', 'title', 'message', 'created_at',
+    )
+
+
+def build_digest(rows, max_items):
+    """Bitta foydalanuvchi qatorlari -> (email, kontekst, oxirgi id); faqat max_items band xotirada"""
+    items, count, last_id = [], 0, 0
+    for _, email, name, pk, title, message, created_at in rows:
+        count += 1
+        last_id = pk
+        if len(items) < max_items:
+            items.append({
+                'title': title,
+                'message': Truncator(message).chars(MESSAGE_LENGTH),
+                'created_at': f"{timezone.localtime(created_at):%Y-%m-%d %H:%M}",
+            })
+    context = {'name': name, 'count': count, 'items': items, 'more': count - len(items)}
+    return email, context, last_id
+
+
+def _flush(batch, now):
+    with transaction.atomic():
+        emails.enqueue_many(
+            [(email, context) for _, email, context, _ in batch], EmailOutbox.Template.DAILY_DIGEST,
+        )
+        NotificationDigest.objects.bulk_create(
+            [
+                NotificationDigest(user_id=user_id, last_notification_id=last_id, sent_at=now)
+                for user_id, _, _, last_id in batch
+            ],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['last_notification_id', 'sent_at'],
+        )
+
+
+def send_digests(now=None, batch_size=None, max_items=None):
+    """
+    Bitta o'tish: har bir foydalanuvchiga bitta dayjest xati.
+
+    Returns:
+        Counter: users, notifications
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or settings.NOTIFICATION_DIGEST_BATCH_SIZE
+    max_items = max_items or settings.NOTIFICATION_DIGEST_MAX_ITEMS
+    stats, batch = Counter(), []
+
+    rows = pending_notifications(now).iterator(chunk_size=2000)
+    for user_id, user_rows in groupby(rows, key=itemgetter(0)):
+        email, context, last_id = build_digest(user_rows, max_items)
+        batch.append((user_id, email, context, last_id))
+        stats['users'] += 1
+        stats['notifications'] += context['count']
+        if len(batch) >= batch_size:
+            _flush(batch, now)
+            batch = []
+    if batch:
+        _flush(batch, now)
+    return stats
@@ -0,0 +1,194 @@
+"""
+Email navbati (outbox)
+
+So'rov ichida faqat EmailOutbox qatori qo'shiladi (enqueue / enqueue_many).
+Yuborish send_emails buyrug'ida (bitta ishchi jarayon):
+
+    - muddati kelgan qatorlar paket bo'lib olinadi,
+    - domen bo'yicha cheklov (EMAIL_OUTBOX_DOMAIN_LIMIT / _WINDOW soniya) -
+      oshganlari keyingi oynaga suriladi, urinish hisoblanmaydi,
+    - shablon har bir (shablon, til) juftligi uchun bir marta yuklanadi,
+    - barcha xatlar bitta get_connection() ulanishi orqali send_messages bilan,
+    - xato bo'lsa eksponentsial kechikish bilan qayta urinish,
+      EMAIL_OUTBOX_MAX_ATTEMPTS dan keyin FAILED.
+"""
+import logging
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Count
+from django.template.loader import get_template
+from django.utils import timezone, translation
+from django.utils.html import strip_tags
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# NAVBATGA QO'YISH (so'rov ichida)
+# ============================================================================
+
+def _row(to_email, template, context, locale):
+    return EmailOutbox(
+        to_email=to_email,
+        domain=to_email.rpartition('@')[2].lower(),
+        template=template,
+        context=context or {},
+        locale=locale or settings.LANGUAGE_CODE,
+    )
+
+
+def enqueue(to_email, template, context=None, locale=None):
+    """Bitta xat - bitta INSERT"""
+    row = _row(to_email, template, context, locale)
+    row.save()
+    return row
+
+
+def enqueue_many(recipients, template, locale=None):
+    """
+    Bir shablon bilan ko'p xat - bitta bulk_create.
+
+    Args:
+        recipients: (email, context) juftliklari
+    """
+    return EmailOutbox.objects.bulk_create(
+        [_row(to_email, template, context, locale) for to_email, context in recipients if to_email]
+    )
+
+
+# ============================================================================
+# YUBORISH (send_emails buyrug'i)
+# ============================================================================
+
+def backoff(attempts):
+    """attempts-urinishdan keyingi kechikish: base * 2^(attempts-1), yuqori chegara bilan"""
+    delay = settings.EMAIL_OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_BACKOFF_MAX_SECONDS))
+
+
+def domain_budgets(domains, now):
+    """Joriy oynada har bir domenga yana nechta xat yuborish mumkin"""
+    window_start = now - timedelta(seconds=settings.EMAIL_OUTBOX_DOMAIN_WINDOW)
+    sent = dict(
+        EmailOutbox.objects.filter(domain__in=domains, sent_at__gte=window_start).values('domain').annotate(
+            total=Count('pk')
+        ).values_list('domain', 'total')
+    )
+    return {domain: max(0, settings.EMAIL_OUTBOX_DOMAIN_LIMIT - sent.get(domain, 0)) for domain in domains}
+
+
+def render_messages(rows, connection):
+    """
+    Qatorlardan xatlar: shablon (shablon, til) bo'yicha bir marta yuklanadi.
+
+    Returns:
+        tuple: ((row, EmailMultiAlternatives) ro'yxati, {row.pk: xato matni})
+    """
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row.template, row.locale].append(row)
+
+    messages, errors = [], {}
+    for (template_name, locale), group in groups.items():
+        with translation.override(locale):
+            template = get_template(f'emails/{template_name}.html')
+            subject = str(EmailOutbox.Template(template_name).label)
+            for row in group:
+                try:
+                    html = template.render({**row.context, 'subject': subject, 'email': row.to_email})
+                except Exception as e:
+                    errors[row.pk] = f"Shablon xatosi: {e}"
+                    continue
+                message = EmailMultiAlternatives(
+                    subject, strip_tags(html).strip(), settings.DEFAULT_FROM_EMAIL, [row.to_email],
+                    connection=connection,
+                )
+                message.attach_alternative(html, 'text/html')
+                messages.append((row, message))
+    return messages, errors
+
+
+def deliver(connection, messages):
+    """
+    Bitta ochiq ulanish orqali yuborish. Har bir xat alohida send_messages
+    chaqirig'ida - xato faqat o'z qatoriga yoziladi, yuborilganlar qayta ketmaydi.
+
+    Returns:
+        dict: {row.pk: xato matni}
+    """
+    errors = {}
+    try:
+        connection.open()
+    except Exception as e:
+        return {row.pk: f"Ulanish xatosi: {e}" for row, _ in messages}
+    try:
+        for row, message in messages:
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                errors[row.pk] = str(e)
+    finally:
+        connection.close()
+    return errors
+
+
+def send_pending(batch_size=None, now=None, connection=None):
+    """
+    Bitta paketni yuborish.
+
+    Returns:
+        Counter: sent, retry, failed, throttled
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    rows = list(EmailOutbox.objects.filter(
+        status=EmailOutbox.Status.PENDING, next_attempt_at__lte=now,
+    ).order_by('next_attempt_at', 'pk')[:batch_size])
+    stats = Counter()
+    if not rows:
+        return stats
+
+    budgets = domain_budgets({row.domain for row in rows}, now)
+    ready, throttled = [], []
+    for row in rows:
+        if budgets[row.domain] > 0:
+            budgets[row.domain] -= 1
+            ready.append(row)
+        else:
+            throttled.append(row.pk)
+    if throttled:
+        EmailOutbox.objects.filter(pk__in=throttled).update(
+            next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_DOMAIN_WINDOW)
+        )
+        stats['throttled'] = len(throttled)
+
+    connection = connection or get_connection()
+    messages, errors = render_messages(ready, connection)
+    if messages:
+        errors.update(deliver(connection, messages))
+
+    sent_at = timezone.now()
+    for row in ready:
+        error = errors.get(row.pk)
+        if error is None:
+            row.status, row.sent_at, row.last_error = EmailOutbox.Status.SENT, sent_at, ''
+            stats['sent'] += 1
+            continue
+        row.attempts += 1
+        row.last_error = error
+        if row.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            row.status = EmailOutbox.Status.FAILED
+            stats['failed'] += 1
+            logger.error(f"Email yuborilmadi: {row.to_email}", extra={'outbox_id': row.pk, 'error': error})
+        else:
+            row.next_attempt_at = now + backoff(row.attempts)
+            stats['retry'] += 1
+    EmailOutbox.objects.bulk_update(
+        ready, ['status', 'attempts', 'next_attempt_at', 'sent_at', 'last_error'],
+    )
+    return stats
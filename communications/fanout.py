@@ -0,0 +1,50 @@
+"""
+Bildirishnomalarni tarqatish (fan-out)
+
+Qabul qiluvchilar bitta so'rov bilan user id larga aylantiriladi, Notification
+qatorlari fon vazifasida (core/jobs.py) bo'laklab bulk_create qilinadi.
+80k foydalanuvchi uchun ham admin so'rovi darhol job id bilan qaytadi.
+
+Katta auditoriyaga bir xil matn uchun BroadcastNotification afzal (matn bir
+marta saqlanadi) - fan-out shaxsiy nusxa kerak bo'lganda ishlatiladi.
+
+Qabul qiluvchi turlari auditoriya ifodalariga (audience.py) aylantiriladi -
+id to'plamlari keshdan olinadi.
+"""
+from accounts.models import User
+from . import audience
+from .models import ROLE_TYPES, Notification
+
+
+CHUNK_SIZE = 2000
+
+RECIPIENT_AUDIENCES = {
+    'all': 'all',
+    **{role: f'role:{role}' for role in ROLE_TYPES},
+}
+
+
+def parse_emails(value):
+    return sorted({email.strip().lower() for email in (value or '').splitlines() if email.strip()})
+
+
+def resolve_recipients(recipient_type, emails=(), expression=''):
+    """Faol foydalanuvchilar id lari (saralangan)"""
+    if recipient_type == 'specific':
+        return list(
+            User.objects.filter(email__in=list(emails), is_active=True).order_by('pk').values_list('pk', flat=True)
+        )
+    if recipient_type != 'audience':
+        expression = RECIPIENT_AUDIENCES[recipient_type]
+    return audience.resolve(f"({expression}) & status:active")
+
+
+def fanout_notification(job, title, message, recipient_type, emails=(), expression=''):
+    """Fon vazifasi: har bir qabul qiluvchiga Notification (bo'laklab)"""
+    user_ids = resolve_recipients(recipient_type, emails, expression)
+    job.set_total(len(user_ids))
+
+    for start in range(0, len(user_ids), CHUNK_SIZE):
+        chunk = user_ids[start:start + CHUNK_SIZE]
+        Notification.objects.create_for_users(chunk, title, message, batch_size=CHUNK_SIZE)
+        job.advance(len(chunk))
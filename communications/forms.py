@@ -4,7 +4,8 @@ Communications Forms - Bildirishnomalar, Xabarlar, Elanlar
 """
 from django import forms
 from django.core.exceptions import ValidationError
-from .models import Notification, Message, Announcement
+from . import audience
+from .models import Notification, BroadcastNotification, Message, Announcement
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -25,6 +26,7 @@ class NotificationForm(forms.ModelForm):
             ('teachers', 'Faqat o\'qituvchilar'),
             ('admins', 'Faqat adminlar'),
             ('specific', 'Muayyan foydalanuvchilar'),
+            ('audience', "Auditoriya ifodasi bo'yicha"),
         ],
         widget=forms.RadioSelect(attrs={
             'class': 'form-check-input',
@@ -41,6 +43,17 @@ class NotificationForm(forms.ModelForm):
         }),
         help_text="Agar 'Muayyan foydalanuvchilar' tanlangan bo'lsa, emaillarni kiriting"
     )
+
+    audience = forms.CharField(
+        required=False,
+        max_length=500,
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'role:student & course:python - status:blocked',
+        }),
+        label="Auditoriya ifodasi",
+        help_text="To'plamlar: all, role:, group:, course:, branch:, status:; amallar: & | - va qavslar",
+    )
     
     class Meta:
         model = Notification
@@ -104,6 +117,64 @@ class NotificationForm(forms.ModelForm):
         
         return specific_users
 
+    def clean_audience(self):
+        expression = self.cleaned_data.get('audience', '').strip()
+        if self.cleaned_data.get('recipient_type') != 'audience':
+            return ''
+        if not expression:
+            raise ValidationError("Auditoriya ifodasini kiriting.")
+        try:
+            audience.compile_expression(expression)
+        except audience.AudienceError as e:
+            raise ValidationError(str(e))
+        return expression
+
+
+class BroadcastForm(forms.ModelForm):
+    """
+    Umumiy bildirishnoma (matn bir marta saqlanadi) - rol, guruh, kurs yoki filialga
+    """
+    TARGET_FIELDS = {
+        BroadcastNotification.Audience.GROUP: 'group',
+        BroadcastNotification.Audience.COURSE: 'course',
+        BroadcastNotification.Audience.BRANCH: 'branch',
+    }
+
+    class Meta:
+        model = BroadcastNotification
+        fields = ['title', 'message', 'audience', 'group', 'course', 'branch', 'expires_at']
+        widgets = {
+            'title': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Bildirishnoma sarlavhasi'}),
+            'message': forms.Textarea(attrs={'class': 'form-control', 'rows': '5'}),
+            'audience': forms.Select(attrs={'class': 'form-control'}),
+            'group': forms.Select(attrs={'class': 'form-control'}),
+            'course': forms.Select(attrs={'class': 'form-control'}),
+            'branch': forms.Select(attrs={'class': 'form-control'}),
+            'expires_at': forms.DateTimeInput(attrs={'class': 'form-control', 'type': 'datetime-local'}),
+        }
+        labels = {
+            'title': 'Sarlavhasi',
+            'message': 'Matni',
+            'audience': 'Auditoriya',
+            'group': 'Guruh',
+            'course': 'Kurs',
+            'branch': 'Filial',
+            'expires_at': 'Amal qilish muddati',
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        audience = cleaned_data.get('audience')
+
+        # Faqat tanlangan auditoriyaga mos maydon saqlanadi
+        for value, field in self.TARGET_FIELDS.items():
+            if audience != value:
+                cleaned_data[field] = None
+            elif not cleaned_data.get(field):
+                self.add_error(field, "Bu auditoriya uchun tanlash majburiy.")
+
+        return cleaned_data
+
 
 class NotificationFilterForm(forms.Form):
     """
@@ -251,7 +322,7 @@ class AnnouncementForm(forms.ModelForm):
     
     class Meta:
         model = Announcement
-        fields = ['title', 'content', 'target_audience', 'expires_at']
+        fields = ['title', 'content', 'target_audience', 'course', 'group', 'branch', 'expires_at']
         widgets = {
             'title': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -267,6 +338,9 @@ class AnnouncementForm(forms.ModelForm):
             'target_audience': forms.Select(attrs={
                 'class': 'form-control',
             }),
+            'course': forms.Select(attrs={'class': 'form-control'}),
+            'group': forms.Select(attrs={'class': 'form-control'}),
+            'branch': forms.Select(attrs={'class': 'form-control'}),
             'expires_at': forms.DateTimeInput(attrs={
                 'class': 'form-control',
                 'type': 'datetime-local',
@@ -276,9 +350,18 @@ class AnnouncementForm(forms.ModelForm):
             'title': 'Sarlavhasi',
             'content': 'Matni',
             'target_audience': 'Maqsadli auditoriya',
+            'course': 'Kurs',
+            'group': 'Guruh',
+            'branch': 'Filial',
             'expires_at': 'Tugash vaqti',
         }
     
+    TARGET_FIELDS = {
+        Announcement.Audience.COURSE: 'course',
+        Announcement.Audience.GROUP: 'group',
+        Announcement.Audience.BRANCH: 'branch',
+    }
+    
     def clean_title(self):
         title = self.cleaned_data.get('title')
         
@@ -303,6 +386,14 @@ class AnnouncementForm(forms.ModelForm):
         if expires_at and expires_at <= timezone.now():
             raise ValidationError("Tugash vaqti kelajakda bo'lishi kerak.")
         
+        # Faqat tanlangan auditoriyaga mos maydon saqlanadi
+        audience = cleaned_data.get('target_audience')
+        for value, field in self.TARGET_FIELDS.items():
+            if audience != value:
+                cleaned_data[field] = None
+            elif not cleaned_data.get(field):
+                self.add_error(field, "Bu auditoriya uchun tanlash majburiy.")
+        
         return cleaned_data
 
 
@@ -310,13 +401,7 @@ class AnnouncementFilterForm(forms.Form):
     """
     Elanlarni filtrlash formasі
     """
-    AUDIENCE_CHOICES = [
-        ('', '--- Barcha auditoriya ---'),
-        ('all', 'Barcha foydalanuvchilar'),
-        ('students', 'Talabalar'),
-        ('teachers', 'O\'qituvchilar'),
-        ('staff', 'Xodimlar'),
-    ]
+    AUDIENCE_CHOICES = [('', '--- Barcha auditoriya ---')] + Announcement.Audience.choices
     
     target_audience = forms.ChoiceField(
         choices=AUDIENCE_CHOICES,
@@ -365,6 +450,13 @@ class BulkMessageForm(forms.Form):
         ('teachers', 'Barcha o\'qituvchilar'),
         ('inactive', 'Faol bo\'lmagan foydalanuvchilar'),
     ]
+    # Har bir tanlov - auditoriya ifodasi (communications/audience.py)
+    AUDIENCES = {
+        'all': 'all & status:active',
+        'students': 'role:students & status:active',
+        'teachers': 'role:teachers & status:active',
+        'inactive': 'status:inactive',
+    }
     
     recipient_group = forms.ChoiceField(
         choices=RECIPIENT_GROUP,
@@ -415,4 +507,7 @@ class BulkMessageForm(forms.Form):
         if message and len(message) < 10:
             raise ValidationError("Xabar matni kamita 10 belgidan iborat bo'lishi kerak.")
         
-        return message
\ No newline at end of file
+        return message
+    def recipient_ids(self):
+        """Tanlangan guruh foydalanuvchilari id lari (keshlangan to'plamlardan)"""
+        return audience.resolve(self.AUDIENCES[self.cleaned_data['recipient_group']])
@@ -0,0 +1,127 @@
+"""
+Bildirishnomalar qutisi: shaxsiy (Notification) va umumiy (BroadcastNotification)
+bildirishnomalar bitta lentada. Xabarlar qutisi - ThreadParticipant bo'yicha.
+
+Sahifalash keyset bo'yicha: tartib kaliti (created_at, tur, id) kamayish
+tartibida, kursor - oxirgi ko'rsatilgan elementning kaliti. Har bir jadvaldan
+indeks bo'yicha limit + 1 qator olinadi va Python'da birlashtiriladi - OFFSET
+va COUNT so'rovlari yo'q.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db.models import Prefetch, Q
+
+from .models import BroadcastNotification, Notification, ThreadParticipant
+
+
+PAGE_SIZE = 30
+
+PERSONAL = 'n'
+BROADCAST = 'b'
+# Bir xil vaqtdagi elementlar uchun tartib: shaxsiy umumiydan oldin
+RANKS = {PERSONAL: 1, BROADCAST: 0}
+
+
+@dataclass(frozen=True)
+class InboxItem:
+    kind: str
+    pk: int
+    title: str
+    message: str
+    created_at: datetime
+    is_read: bool
+
+    @property
+    def is_broadcast(self):
+        return self.kind == BROADCAST
+
+    @property
+    def sort_key(self):
+        return self.created_at, RANKS[self.kind], self.pk
+
+    @property
+    def cursor(self):
+        return f"{self.created_at.isoformat()}_{self.kind}_{self.pk}"
+
+
+def parse_cursor(value):
+    """'<iso vaqt>_<tur>_<id>' -> (created_at, rank, id); noto'g'ri bo'lsa None"""
+    try:
+        created_at, kind, pk = value.rsplit('_', 2)
+        return datetime.fromisoformat(created_at), RANKS[kind], int(pk)
+    except (AttributeError, ValueError, KeyError):
+        return None
+
+
+def before(cursor, rank):
+    """Kursordan keyingi (kaliti kichikroq) qatorlar sharti - berilgan tur uchun"""
+    created_at, cursor_rank, pk = cursor
+    if rank < cursor_rank:
+        return Q(created_at__lte=created_at)
+    if rank > cursor_rank:
+        return Q(created_at__lt=created_at)
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+
+
+def inbox(user, cursor=None, limit=PAGE_SIZE):
+    """
+    Returns:
+        tuple: (InboxItem ro'yxati, keyingi sahifa kursori yoki None)
+    """
+    cursor = parse_cursor(cursor) if cursor else None
+
+    personal = Notification.objects.filter(user=user)
+    broadcasts = BroadcastNotification.objects.for_user(user).with_read_state(user)
+    if cursor:
+        personal = personal.filter(before(cursor, RANKS[PERSONAL]))
+        broadcasts = broadcasts.filter(before(cursor, RANKS[BROADCAST]))
+
+    fields = ('pk', 'title', 'message', 'created_at', 'is_read')
+    items = [
+        InboxItem(PERSONAL, *row)
+        for row in personal.order_by('-created_at', '-pk').values_list(*fields)[:limit + 1]
+    ] + [
+        InboxItem(BROADCAST, *row)
+        for row in broadcasts.order_by('-created_at', '-pk').values_list(*fields)[:limit + 1]
+    ]
+    items.sort(key=lambda item: item.sort_key, reverse=True)
+
+    page = items[:limit]
+    next_cursor = page[-1].cursor if len(items) > limit else None
+    return page, next_cursor
+
+
+def thread_inbox(user, cursor=None, limit=PAGE_SIZE):
+    """
+    Foydalanuvchi suhbatlari, oxirgi xabar bo'yicha. Kursor '<iso vaqt>_<id>';
+    quti hajmidan qat'i nazar ikkita so'rov (ishtirokchilar + suhbatdoshlar).
+
+    Returns:
+        tuple: (ThreadParticipant ro'yxati, keyingi sahifa kursori yoki None)
+    """
+    participants = ThreadParticipant.objects.filter(user=user, last_message_at__isnull=False)
+    if cursor:
+        try:
+            last_message_at, pk = cursor.rsplit('_', 1)
+            last_message_at, pk = datetime.fromisoformat(last_message_at), int(pk)
+        except ValueError:
+            pass
+        else:
+            participants = participants.filter(
+                Q(last_message_at__lt=last_message_at) | Q(last_message_at=last_message_at, pk__lt=pk)
+            )
+
+    page = list(participants.select_related('thread__last_message').prefetch_related(
+        Prefetch(
+            'thread__participants',
+            queryset=ThreadParticipant.objects.exclude(user=user).select_related('user'),
+            to_attr='others',
+        ),
+    ).order_by('-last_message_at', '-pk')[:limit + 1])
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = f"{page[-1].last_message_at.isoformat()}_{page[-1].pk}"
+    return page, next_cursor
@@ -0,0 +1,158 @@
+"""
+Jonli bildirishnomalar (Server-Sent Events, faqat ASGI)
+
+Jarayon ichidagi publish/subscribe markazi: har bir SSE ulanishi user id
+bo'yicha obuna bo'ladi va chegaralangan asyncio.Queue oladi. Notification
+yaratilganda (sinxron kod, istalgan oqimdan) hodisa faqat ulangan
+foydalanuvchilarga loop.call_soon_threadsafe orqali uzatiladi.
+
+    - navbat to'lsa (sekin mijoz) - navbat tozalanadi va bitta "refresh"
+      hodisasi qoladi: brauzer sahifani/hisoblagichni o'zi yangilaydi,
+    - jim ulanishlarga har LIVE_HEARTBEAT_SECONDS da izoh-satr (": ping"),
+    - umumiy va foydalanuvchi bo'yicha ulanishlar chegarasi (503).
+
+Markaz bitta ASGI jarayoni ichida; bir nechta worker bo'lsa har biri faqat
+o'zida yaratilgan bildirishnomalarni yuboradi, qolganlari keyingi
+"refresh"/sahifa yangilanishida ko'rinadi.
+"""
+import asyncio
+import json
+import threading
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+from accounts.models import User
+
+
+class HubFull(Exception):
+    """Ulanishlar chegarasi to'lgan"""
+
+
+@dataclass(eq=False)
+class Subscription:
+    user_id: int
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue
+    hub: 'Hub'
+    dropped: int = field(default=0)
+
+    def put(self, event):
+        """Loop oqimida chaqiriladi; to'lgan navbat bitta refresh bilan almashtiriladi"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait(('refresh', {}))
+
+
+class Hub:
+    def __init__(self, max_connections=None, max_per_user=None, queue_size=None):
+        self.max_connections = max_connections or settings.LIVE_MAX_CONNECTIONS
+        self.max_per_user = max_per_user or settings.LIVE_MAX_CONNECTIONS_PER_USER
+        self.queue_size = queue_size or settings.LIVE_QUEUE_SIZE
+        self._subscribers = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def subscribe(self, user_id):
+        """Joriy event loop'da obuna; chegara to'lsa HubFull"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            user_subscriptions = self._subscribers.get(user_id, set())
+            if self._count >= self.max_connections or len(user_subscriptions) >= self.max_per_user:
+                raise HubFull
+            subscription = Subscription(user_id, loop, asyncio.Queue(self.queue_size), self)
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            user_subscriptions = self._subscribers.get(subscription.user_id)
+            if user_subscriptions and subscription in user_subscriptions:
+                user_subscriptions.discard(subscription)
+                self._count -= 1
+                if not user_subscriptions:
+                    del self._subscribers[subscription.user_id]
+
+    def connected(self, user_ids=None):
+        """Ulangan foydalanuvchilar (user_ids berilsa - ular bilan kesishma)"""
+        with self._lock:
+            if user_ids is None:
+                return set(self._subscribers)
+            return {user_id for user_id in user_ids if user_id in self._subscribers}
+
+    def publish(self, user_id, event, data):
+        """Istalgan oqimdan xavfsiz; ulanmagan foydalanuvchi uchun hech narsa qilmaydi"""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, (event, data))
+            except RuntimeError:  # loop yopilgan - ulanish allaqachon uzilgan
+                self.unsubscribe(subscription)
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    """Jarayon markazi (sozlamalar birinchi chaqiriqda o'qiladi)"""
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = Hub()
+        return _hub
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def event_stream(subscription, heartbeat=None, initial=None):
+    """
+    SSE oqimi: hodisalar navbatdan, jimlikda heartbeat. Mijoz uzilganda
+    (generator yopiladi yoki bekor qilinadi) obuna o'chiriladi.
+    """
+    heartbeat = heartbeat or settings.LIVE_HEARTBEAT_SECONDS
+    try:
+        yield f"retry: {settings.LIVE_RETRY_MS}\n\n"
+        if initial:
+            yield format_event(*initial)
+        while True:
+            try:
+                event, data = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+            else:
+                yield format_event(event, data)
+    finally:
+        subscription.hub.unsubscribe(subscription)
+
+
+def notify_users(user_ids, event, payload, count=True):
+    """
+    Ulangan foydalanuvchilarga hodisa + joriy o'qilmaganlar soni (count=False -
+    sonsiz, mijoz nishonni o'zi oshiradi). Ulanganlar bo'lmasa so'rov ham yo'q.
+    """
+    current = get_hub()
+    connected = current.connected(user_ids)
+    if not connected:
+        return 0
+    if not count:
+        for user_id in connected:
+            current.publish(user_id, event, payload)
+        return len(connected)
+
+    from .models import Notification
+
+    for user in User.objects.filter(pk__in=connected):
+        current.publish(user.pk, event, {**payload, 'unread': Notification.objects.unread_count(user)})
+    return len(connected)
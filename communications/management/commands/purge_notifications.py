@@ -0,0 +1,30 @@
+"""
+Eskirgan bildirishnomalarni tozalash (kuniga bir marta cron orqali)
+
+Usage:
+    python manage.py purge_notifications
+    python manage.py purge_notifications --days 30
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from communications.models import BroadcastNotification, Notification
+
+
+class Command(BaseCommand):
+    help = "Muddati tugagan umumiy va eskirgan o'qilgan shaxsiy bildirishnomalarni o'chiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.NOTIFICATION_TTL_DAYS,
+            help="Shuncha kundan eski bildirishnomalar o'chiriladi",
+        )
+
+    def handle(self, *args, **options):
+        older_than = timezone.now() - timedelta(days=options['days'])
+        broadcasts = BroadcastNotification.objects.purge(older_than)
+        personal = Notification.objects.purge_read(older_than)
+        self.stdout.write(self.style.SUCCESS(
+            f"O'chirildi: {broadcasts} ta umumiy, {personal} ta shaxsiy bildirishnoma"
+        ))
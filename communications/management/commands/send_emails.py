@@ -0,0 +1,37 @@
+"""
+Email navbatini yuborish (bitta ishchi jarayon)
+
+Usage:
+    python manage.py send_emails              # muddati kelganlarni yuborib chiqadi
+    python manage.py send_emails --loop       # doimiy ishchi (--interval soniyada navbatni tekshiradi)
+"""
+import time
+from collections import Counter
+from django.core.management.base import BaseCommand
+from communications.emails import send_pending
+
+
+class Command(BaseCommand):
+    help = "EmailOutbox navbatidagi xatlarni paketlab yuboradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Bitta paketdagi xatlar soni")
+        parser.add_argument('--loop', action='store_true', help="To'xtamasdan ishlash")
+        parser.add_argument('--interval', type=float, default=10, help="--loop da navbat bo'sh bo'lsa kutish (soniya)")
+
+    def handle(self, *args, **options):
+        total = Counter()
+        while True:
+            stats = send_pending(batch_size=options['batch_size'])
+            total.update(stats)
+            if stats['sent'] or stats['retry'] or stats['failed']:
+                self.stdout.write(f"Paket: {dict(stats)}")
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Yuborildi: {total['sent']}, qayta urinish: {total['retry']}, xato: {total['failed']}, "
+            f"cheklangan: {total['throttled']}"
+        ))
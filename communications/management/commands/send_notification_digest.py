@@ -0,0 +1,24 @@
+"""
+Kunlik bildirishnomalar dayjesti (kuniga bir marta cron orqali)
+
+Usage:
+    python manage.py send_notification_digest
+    python manage.py send_notification_digest --batch-size 1000
+
+Xatlar EmailOutbox navbatiga qo'yiladi - yuborish send_emails buyrug'ida.
+"""
+from django.core.management.base import BaseCommand
+from communications.digest import send_digests
+
+
+class Command(BaseCommand):
+    help = "O'qilmagan bildirishnomalar bo'yicha har bir foydalanuvchiga bitta dayjest xati"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Bitta tranzaksiyadagi foydalanuvchilar soni")
+
+    def handle(self, *args, **options):
+        stats = send_digests(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Dayjest: {stats['users']} foydalanuvchi, {stats['notifications']} bildirishnoma"
+        ))
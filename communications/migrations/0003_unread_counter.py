@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:53
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_unread_counts(apps, schema_editor):
+    """Mavjud o'qilmagan bildirishnomalardan hisoblagichni boshlang'ich to'ldirish"""
+    User = apps.get_model('accounts', 'User')
+    Notification = apps.get_model('communications', 'Notification')
+    unread = Notification.objects.filter(user=OuterRef('pk'), is_read=False).values('user').annotate(
+        total=Count('pk')
+    ).values('total')
+    User.objects.update(unread_notifications=Coalesce(Subquery(unread), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0002_announcement_message'),
+        ('accounts', '0003_user_unread_notifications'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read'], name='notification_user_unread_idx'),
+        ),
+        migrations.RunPython(fill_unread_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0003_unread_counter'),
+        ('core', '0002_backgroundjob'),
+        ('courses', '0002_group_branch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('audience', models.CharField(choices=[('all', 'Barcha foydalanuvchilar'), ('students', 'Talabalar'), ('teachers', "O'qituvchilar"), ('admins', 'Adminlar'), ('group', 'Guruh'), ('course', 'Kurs'), ('branch', 'Filial')], default='all', max_length=20)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='notification_user_inbox_idx'),
+        ),
+        migrations.AddField(
+            model_name='broadcastnotification',
+            name='branch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='broadcasts', to='core.branch'),
+        ),
+        migrations.AddField(
+            model_name='broadcastnotification',
+            name='course',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='broadcasts', to='courses.course'),
+        ),
+        migrations.AddField(
+            model_name='broadcastnotification',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='broadcasts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='broadcastnotification',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='broadcasts', to='courses.group'),
+        ),
+        migrations.AddField(
+            model_name='broadcastreceipt',
+            name='broadcast',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='communications.broadcastnotification'),
+        ),
+        migrations.AddField(
+            model_name='broadcastreceipt',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcast_receipts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='broadcastnotification',
+            index=models.Index(fields=['-created_at', '-id'], name='broadcast_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='broadcastnotification',
+            index=models.Index(fields=['expires_at'], name='broadcast_expires_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='broadcastreceipt',
+            constraint=models.UniqueConstraint(fields=('user', 'broadcast'), name='unique_broadcast_receipt'),
+        ),
+    ]
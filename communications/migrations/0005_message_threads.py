@@ -0,0 +1,96 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def thread_existing_messages(apps, schema_editor):
+    """Mavjud har bir xabar uchun alohida suhbat va ishtirokchilar"""
+    Message = apps.get_model('communications', 'Message')
+    MessageThread = apps.get_model('communications', 'MessageThread')
+    ThreadParticipant = apps.get_model('communications', 'ThreadParticipant')
+    for message in Message.objects.filter(thread__isnull=True).iterator():
+        thread = MessageThread.objects.create(
+            subject=message.subject, last_message=message, last_message_at=message.created_at, message_count=1,
+        )
+        ThreadParticipant.objects.bulk_create([
+            ThreadParticipant(
+                thread=thread, user_id=user_id, last_message_at=message.created_at,
+                unread_count=int(user_id == message.recipient_id and not message.is_read),
+            )
+            for user_id in {message.sender_id, message.recipient_id}
+        ])
+        Message.objects.filter(pk=message.pk).update(thread=thread)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0004_broadcast_notifications'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThreadParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MessageThread',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('subject', models.CharField(max_length=255)),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('message_count', models.PositiveIntegerField(default=0)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='communications.message')),
+            ],
+            options={
+                'ordering': ['-last_message_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='thread',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='communications.messagethread'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['recipient', 'is_read', 'created_at'], name='message_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['thread', 'created_at'], name='message_thread_idx'),
+        ),
+        migrations.AddField(
+            model_name='threadparticipant',
+            name='thread',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='communications.messagethread'),
+        ),
+        migrations.AddField(
+            model_name='threadparticipant',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='message_threads', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='threadparticipant',
+            index=models.Index(fields=['user', '-last_message_at', '-id'], name='thread_inbox_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='threadparticipant',
+            constraint=models.UniqueConstraint(fields=('thread', 'user'), name='unique_thread_participant'),
+        ),
+        migrations.RunPython(thread_existing_messages, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='message',
+            name='thread',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='communications.messagethread'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0005_message_threads'),
+        ('core', '0002_backgroundjob'),
+        ('courses', '0002_group_branch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='announcement',
+            name='branch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='announcements', to='core.branch'),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='course',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='announcements', to='courses.course'),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='announcements', to='courses.group'),
+        ),
+        migrations.AlterField(
+            model_name='announcement',
+            name='target_audience',
+            field=models.CharField(choices=[('all', 'Barcha foydalanuvchilar'), ('students', 'Talabalar'), ('teachers', "O'qituvchilar"), ('staff', 'Xodimlar'), ('course', 'Kurs'), ('group', 'Guruh'), ('branch', 'Filial')], default='all', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['target_audience', '-created_at'], name='announcement_audience_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0006_announcement_audiences'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('to_email', models.EmailField(max_length=254)),
+                ('domain', models.CharField(max_length=255)),
+                ('template', models.CharField(choices=[('welcome', 'Xush kelibsiz'), ('homework_assigned', 'Yangi uy vazifasi'), ('grade_posted', "Baho qo'yildi"), ('payment_approved', "To'lov tasdiqlandi"), ('password_reset', 'Parolni tiklash')], max_length=50)),
+                ('locale', models.CharField(max_length=10)),
+                ('context', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Navbatda'), ('sent', 'Yuborildi'), ('failed', 'Xato')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['pk'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_due_idx'), models.Index(fields=['domain', 'sent_at'], name='email_outbox_domain_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_unread_notifications'),
+        ('communications', '0007_email_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationDigest',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_digest', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_notification_id', models.PositiveBigIntegerField(default=0)),
+                ('sent_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='emailoutbox',
+            name='template',
+            field=models.CharField(choices=[('welcome', 'Xush kelibsiz'), ('homework_assigned', 'Yangi uy vazifasi'), ('grade_posted', "Baho qo'yildi"), ('payment_approved', "To'lov tasdiqlandi"), ('password_reset', 'Parolni tiklash'), ('daily_digest', 'Kunlik bildirishnomalar')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:20
+
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def recount_personal(apps, schema_editor):
+    """Hisoblagichdan umumiy bildirishnomalar chiqariladi - faqat shaxsiylar qoladi"""
+    User = apps.get_model('accounts', 'User')
+    Notification = apps.get_model('communications', 'Notification')
+    unread = Notification.objects.filter(user=OuterRef('pk'), is_read=False).values('user').annotate(
+        total=Count('pk')
+    ).values('total')
+    User.objects.update(unread_notifications=Coalesce(Subquery(unread), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0008_notification_digest'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_personal, migrations.RunPython.noop),
+    ]
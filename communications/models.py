@@ -1,6 +1,93 @@
 # communications/models.py
-from django.db import models
+import time
+
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from accounts.models import StudentProfile, User
 from core.models import TimestampedModel
+from . import live
+
+
+# Rol auditoriyalari -> foydalanuvchi turlari (fanout va broadcast uchun umumiy)
+ROLE_TYPES = {
+    'students': [User.UserType.STUDENT],
+    'teachers': [User.UserType.TEACHER, User.UserType.SUPPORT_TEACHER],
+    'admins': [User.UserType.ADMIN, User.UserType.MANAGER, User.UserType.SUPERUSER],
+}
+
+
+class NotificationManager(models.Manager):
+
+    def create_for_users(self, user_ids, title, message, batch_size=2000):
+        """
+        Ko'p foydalanuvchiga bildirishnoma (bulk_create signal chaqirmaydi,
+        shuning uchun hisoblagich shu yerda bitta UPDATE bilan oshiriladi).
+        """
+        with transaction.atomic():
+            self.bulk_create(
+                [self.model(user_id=user_id, title=title, message=message) for user_id in user_ids],
+                batch_size=batch_size,
+            )
+            User.objects.filter(pk__in=user_ids).update(unread_notifications=F('unread_notifications') + 1)
+            transaction.on_commit(
+                lambda: live.notify_users(user_ids, 'notification', {'title': title, 'message': message})
+            )
+
+    def mark_read(self, user, pk):
+        """Bitta bildirishnomani o'qilgan qilish; hisoblagich faqat haqiqatan o'zgarganda kamayadi"""
+        with transaction.atomic():
+            changed = self.filter(pk=pk, user=user, is_read=False).update(is_read=True)
+            if changed:
+                User.objects.filter(pk=user.pk, unread_notifications__gt=0).update(
+                    unread_notifications=F('unread_notifications') - 1
+                )
+        return bool(changed)
+
+    def mark_all_read(self, user):
+        """
+        Barchasini o'qilgan qilish - shaxsiylar bitta UPDATE, umumiylar uchun
+        yetishmagan kvitansiyalar bitta INSERT; hisoblagich nolga tushadi.
+        """
+        with transaction.atomic():
+            changed = self.filter(user=user, is_read=False).update(is_read=True)
+            changed += BroadcastNotification.objects.mark_all_read(user)
+            User.objects.filter(pk=user.pk).update(unread_notifications=0)
+        return changed
+
+    def unread_count(self, user):
+        """
+        Navbar soni: shaxsiylar - denormallashgan hisoblagichdan (so'rovsiz),
+        umumiylar - kvitansiyalardan (keshlangan, BroadcastQuerySet.unread_count).
+        """
+        return user.unread_notifications + BroadcastNotification.objects.unread_count(user)
+
+    def purge_read(self, older_than, chunk_size=5000):
+        """
+        Muddati o'tgan o'qilgan bildirishnomalarni bo'laklab o'chirish
+        (o'qilmaganlar foydalanuvchida qoladi, hisoblagich o'zgarmaydi).
+        """
+        deleted = 0
+        old = self.filter(is_read=True, created_at__lt=older_than).order_by('pk')
+        while True:
+            chunk = list(old.values_list('pk', flat=True)[:chunk_size])
+            if not chunk:
+                return deleted
+            deleted += self.filter(pk__in=chunk).delete()[0]
+
+    def recount(self):
+        """
+        Hisoblagichlarni jadvaldan qayta hisoblash (drift bo'lsa) - bitta UPDATE.
+        Umumiy bildirishnomalar hisoblagichga kirmaydi (kvitansiyalardan sanaladi).
+        """
+        unread = self.filter(user=OuterRef('pk'), is_read=False).values('user').annotate(
+            total=Count('pk')
+        ).values('total')
+        return User.objects.update(unread_notifications=Coalesce(Subquery(unread), 0))
 
 
 class Notification(TimestampedModel):
@@ -9,8 +96,515 @@ class Notification(TimestampedModel):
     message = models.TextField()
     is_read = models.BooleanField(default=False)
 
+    objects = NotificationManager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read'], name='notification_user_unread_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_inbox_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} — {self.title}"
+
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        User.objects.filter(pk=instance.user_id).update(unread_notifications=F('unread_notifications') + 1)
+        transaction.on_commit(lambda: live.notify_users([instance.user_id], 'notification', {
+            'id': instance.pk, 'title': instance.title, 'message': instance.message,
+        }))
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        User.objects.filter(pk=instance.user_id, unread_notifications__gt=0).update(
+            unread_notifications=F('unread_notifications') - 1
+        )
+
+
+class NotificationDigest(models.Model):
+    """
+    Kunlik dayjest suv belgisi: foydalanuvchiga emailda yuborilgan oxirgi
+    bildirishnoma id si. Qayta ishga tushirish faqat undan keyingilarini oladi
+    (communications/digest.py).
+    """
+    user = models.OneToOneField(
+        'accounts.User', on_delete=models.CASCADE, primary_key=True, related_name='notification_digest',
+    )
+    last_notification_id = models.PositiveBigIntegerField(default=0)
+    sent_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user_id} — {self.last_notification_id}"
+
+
+# ============================================================================
+# UMUMIY (BROADCAST) BILDIRISHNOMALAR
+# ============================================================================
+
+def user_memberships(user):
+    """
+    Foydalanuvchi (talaba, o'qituvchi yoki yordamchi sifatida) a'zo bo'lgan
+    guruhlar, ularning kurslari va filiallari - bitta so'rov.
+
+    Returns:
+        tuple: (group id lar, course id lar, branch id lar) to'plamlari
+    """
+    from courses.models import Group
+
+    rows = Group.objects.filter(
+        Q(students__user=user) | Q(teacher__user=user) | Q(support_teacher__user=user)
+    ).values_list('id', 'course_id', 'branch_id').distinct()
+    groups, courses, branches = set(), set(), set()
+    for group_id, course_id, branch_id in rows:
+        groups.add(group_id)
+        courses.add(course_id)
+        if branch_id:
+            branches.add(branch_id)
+    return groups, courses, branches
+
+
+class BroadcastQuerySet(models.QuerySet):
+
+    def active(self, now=None):
+        now = now or timezone.now()
+        return self.filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+
+    def for_user(self, user):
+        """
+        Foydalanuvchiga tegishli faol bildirishnomalar. Guruh/kurs/filial
+        a'zoligi bitta so'rov bilan olinadi; ro'yxatdan o'tishdan oldingi
+        bildirishnomalar ko'rsatilmaydi.
+        """
+        groups, courses, branches = user_memberships(user)
+
+        Audience = BroadcastNotification.Audience
+        roles = [role for role, types in ROLE_TYPES.items() if user.type in types]
+        return self.active().filter(
+            Q(audience=Audience.ALL)
+            | Q(audience__in=roles)
+            | Q(audience=Audience.GROUP, group__in=groups)
+            | Q(audience=Audience.COURSE, course__in=courses)
+            | Q(audience=Audience.BRANCH, branch__in=branches),
+            created_at__gte=user.date_joined,
+        )
+
+    def with_read_state(self, user):
+        return self.annotate(
+            is_read=Exists(BroadcastReceipt.objects.filter(broadcast=OuterRef('pk'), user=user))
+        )
+
+    def unread_count(self, user):
+        """
+        Foydalanuvchining o'qilmagan faol umumiy bildirishnomalari - kvitansiyalardan.
+        Denormallashgan hisoblagichda saqlanmaydi: auditoriyaga keyin qo'shilganlar,
+        muddati tugaganlar va kaskad o'chirilganlar uni buzardi. Kesh kaliti
+        bildirishnomalar va auditoriya versiyalari bilan; muddat tugashi uchun
+        qisqa timeout.
+        """
+        key = _broadcast_unread_key(user)
+        count = cache.get(key)
+        if count is None:
+            count = self.for_user(user).exclude(receipts__user=user).count()
+            cache.set(key, count, BROADCAST_UNREAD_TIMEOUT)
+        return count
+
+
+BROADCAST_VERSION_KEY = 'communications:broadcast:version'
+BROADCAST_UNREAD_TIMEOUT = 60
+
+
+def _broadcast_unread_key(user):
+    versions = cache.get_many([
+        BROADCAST_VERSION_KEY, AUDIENCE_VERSION_KEY.format('users'), AUDIENCE_VERSION_KEY.format('groups'),
+    ])
+    return 'communications:broadcast_unread:{}:{}:{}:{}'.format(
+        versions.get(BROADCAST_VERSION_KEY, 0),
+        versions.get(AUDIENCE_VERSION_KEY.format('users'), 0),
+        versions.get(AUDIENCE_VERSION_KEY.format('groups'), 0),
+        user.pk,
+    )
+
+
+class BroadcastManager(models.Manager.from_queryset(BroadcastQuerySet)):
+
+    def mark_read(self, user, pk):
+        """Kvitansiya faqat birinchi o'qishda yoziladi"""
+        if not self.for_user(user).filter(pk=pk).exists():
+            return False
+        _, created = BroadcastReceipt.objects.get_or_create(broadcast_id=pk, user=user)
+        if created:
+            cache.delete(_broadcast_unread_key(user))
+        return created
+
+    def purge(self, older_than, now=None):
+        """Muddati tugagan yoki older_than dan eski umumiy bildirishnomalarni o'chirish"""
+        now = now or timezone.now()
+        expired = self.filter(Q(expires_at__lte=now) | Q(created_at__lt=older_than))
+        _, deleted = expired.delete()
+        return deleted.get(BroadcastNotification._meta.label, 0)
+
+    def mark_all_read(self, user):
+        """O'qilmagan umumiy bildirishnomalarga kvitansiyalar (bitta INSERT)"""
+        unread = self.for_user(user).exclude(receipts__user=user).values_list('pk', flat=True)
+        receipts = BroadcastReceipt.objects.bulk_create(
+            [BroadcastReceipt(broadcast_id=pk, user=user) for pk in unread],
+            ignore_conflicts=True,
+        )
+        cache.delete(_broadcast_unread_key(user))
+        return len(receipts)
+
+
+class BroadcastNotification(TimestampedModel):
+    """
+    Auditoriyaga bir marta yoziladigan bildirishnoma. Har bir foydalanuvchining
+    o'qiganlik holati BroadcastReceipt'da, faqat o'qilganda yoziladi.
+    """
+    class Audience(models.TextChoices):
+        ALL = 'all', 'Barcha foydalanuvchilar'
+        STUDENTS = 'students', 'Talabalar'
+        TEACHERS = 'teachers', "O'qituvchilar"
+        ADMINS = 'admins', 'Adminlar'
+        GROUP = 'group', 'Guruh'
+        COURSE = 'course', 'Kurs'
+        BRANCH = 'branch', 'Filial'
+
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    audience = models.CharField(max_length=20, choices=Audience.choices, default=Audience.ALL)
+    group = models.ForeignKey('courses.Group', on_delete=models.CASCADE, null=True, blank=True, related_name='broadcasts')
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE, null=True, blank=True, related_name='broadcasts')
+    branch = models.ForeignKey('core.Branch', on_delete=models.CASCADE, null=True, blank=True, related_name='broadcasts')
+    expires_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='broadcasts')
+
+    objects = BroadcastManager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='broadcast_inbox_idx'),
+            models.Index(fields=['expires_at'], name='broadcast_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_audience_display()} — {self.title}"
+
+    def recipient_filter(self):
+        """Auditoriyadagi foydalanuvchilar sharti (User so'rovi uchun)"""
+        if self.audience in ROLE_TYPES:
+            return Q(type__in=ROLE_TYPES[self.audience])
+        lookups = {
+            self.Audience.GROUP: ('groups', self.group_id),
+            self.Audience.COURSE: ('groups__course', self.course_id),
+            self.Audience.BRANCH: ('groups__branch', self.branch_id),
+        }
+        if self.audience in lookups:
+            path, value = lookups[self.audience]
+            return (
+                Q(**{f'student_profile__{path}': value})
+                | Q(**{f'teacher_profile__{path}': value})
+                | Q(**{f'support_profile__support_{path}': value})
+            )
+        return Q()
+
+    def recipients(self):
+        audience = User.objects.filter(self.recipient_filter()).values('pk')
+        return User.objects.filter(pk__in=audience, is_active=True, date_joined__lte=self.created_at)
+
+
+class BroadcastReceipt(models.Model):
+    """O'qiganlik kvitansiyasi - faqat o'qilgan bildirishnomalar uchun qator"""
+    broadcast = models.ForeignKey(BroadcastNotification, on_delete=models.CASCADE, related_name='receipts')
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='broadcast_receipts')
+    read_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'broadcast'], name='unique_broadcast_receipt'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} / {self.broadcast_id}"
+
+
+@receiver(post_save, sender=BroadcastNotification)
+@receiver(post_delete, sender=BroadcastNotification)
+def invalidate_broadcast_unread(sender, instance, created=False, **kwargs):
+    """
+    Yangi, o'zgargan yoki o'chirilgan (guruh/kurs/filial bilan kaskad ham)
+    bildirishnoma - keshlangan o'qilmaganlar soni yangi versiya bilan eskiradi
+    """
+    cache.set(BROADCAST_VERSION_KEY, time.time_ns(), None)
+    if created:
+        # Son yuborilmaydi (count=False) - mijoz nishonni bittaga oshiradi
+        transaction.on_commit(lambda: live.notify_users(
+            instance.recipients().filter(pk__in=live.get_hub().connected()).values_list('pk', flat=True),
+            'notification', {'id': instance.pk, 'title': instance.title, 'message': instance.message, 'broadcast': True},
+            count=False,
+        ))
+
+
+# ============================================================================
+# SHAXSIY XABARLAR
+# ============================================================================
+
+class MessageThread(TimestampedModel):
+    """
+    Suhbat. Oxirgi xabar va xabarlar soni shu yerda denormallashgan - quti
+    ro'yxati xabarlar jadvalini o'qimaydi.
+    """
+    subject = models.CharField(max_length=255)
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    message_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-last_message_at']
+
+    def __str__(self):
+        return self.subject
+
+
+class ThreadParticipant(models.Model):
+    """
+    Suhbat ishtirokchisi: har bir foydalanuvchining o'qilmaganlar soni va
+    suhbat vaqti (user, last_message_at) indeksi bilan kiruvchi quti uchun.
+    """
+    thread = models.ForeignKey(MessageThread, on_delete=models.CASCADE, related_name='participants')
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='message_threads')
+    unread_count = models.PositiveIntegerField(default=0)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['thread', 'user'], name='unique_thread_participant'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-last_message_at', '-id'], name='thread_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} / {self.thread_id}"
+
+
+class MessageManager(models.Manager):
+
+    @transaction.atomic
+    def send(self, sender, recipient, body, subject=None, thread=None):
+        """
+        Xabar yuborish (yangi suhbat yoki javob). So'rovlar soni suhbat
+        hajmiga bog'liq emas: INSERT + suhbat va ishtirokchilar UPDATE lari.
+        """
+        if thread is None:
+            thread = MessageThread.objects.create(subject=subject)
+            ThreadParticipant.objects.bulk_create([
+                ThreadParticipant(thread=thread, user=user) for user in {sender.pk: sender, recipient.pk: recipient}.values()
+            ])
+
+        message = self.create(
+            thread=thread, sender=sender, recipient=recipient, subject=subject or thread.subject, body=body,
+        )
+        MessageThread.objects.filter(pk=thread.pk).update(
+            last_message=message, last_message_at=message.created_at, message_count=F('message_count') + 1,
+        )
+        participants = ThreadParticipant.objects.filter(thread=thread)
+        participants.update(last_message_at=message.created_at)
+        participants.filter(user=recipient).exclude(user=sender).update(unread_count=F('unread_count') + 1)
+        return message
+
+    @transaction.atomic
+    def mark_thread_read(self, user, thread):
+        changed = self.filter(thread=thread, recipient=user, is_read=False).update(is_read=True)
+        ThreadParticipant.objects.filter(thread=thread, user=user).update(unread_count=0)
+        return changed
+
+
+class Message(TimestampedModel):
+    """Shaxsiy xabar (communications/forms.py::MessageForm)"""
+    thread = models.ForeignKey(MessageThread, on_delete=models.CASCADE, related_name='messages')
+    sender = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='sent_messages')
+    recipient = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='received_messages')
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    is_read = models.BooleanField(default=False)
+
+    objects = MessageManager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', 'is_read', 'created_at'], name='message_inbox_idx'),
+            models.Index(fields=['thread', 'created_at'], name='message_thread_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sender.email} -> {self.recipient.email}: {self.subject}"
+
+
+class AnnouncementQuerySet(models.QuerySet):
+
+    def active(self, now=None):
+        now = now or timezone.now()
+        return self.filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+
+
+class Announcement(TimestampedModel):
+    """
+    Umumiy e'lon (communications/forms.py::AnnouncementForm). Auditoriya - rol,
+    kurs, guruh yoki filial; har bir auditoriya lentasi alohida keshlanadi
+    (communications/announcements.py).
+    """
+    class Audience(models.TextChoices):
+        ALL = 'all', 'Barcha foydalanuvchilar'
+        STUDENTS = 'students', 'Talabalar'
+        TEACHERS = 'teachers', "O'qituvchilar"
+        STAFF = 'staff', 'Xodimlar'
+        COURSE = 'course', 'Kurs'
+        GROUP = 'group', 'Guruh'
+        BRANCH = 'branch', 'Filial'
+
+    title = models.CharField(max_length=255)
+    content = models.TextField()
+    target_audience = models.CharField(max_length=20, choices=Audience.choices, default=Audience.ALL)
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE, null=True, blank=True, related_name='announcements')
+    group = models.ForeignKey('courses.Group', on_delete=models.CASCADE, null=True, blank=True, related_name='announcements')
+    branch = models.ForeignKey('core.Branch', on_delete=models.CASCADE, null=True, blank=True, related_name='announcements')
+    expires_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='announcements')
+
+    objects = AnnouncementQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['target_audience', '-created_at'], name='announcement_audience_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def segment(self):
+        """Kesh segmenti: 'students', 'group:12' va hokazo"""
+        target = {
+            self.Audience.COURSE: self.course_id,
+            self.Audience.GROUP: self.group_id,
+            self.Audience.BRANCH: self.branch_id,
+        }
+        if self.target_audience in target:
+            return f"{self.target_audience}:{target[self.target_audience]}"
+        return self.target_audience
+
+
+@receiver(pre_save, sender=Announcement)
+def remember_previous_announcement_segment(sender, instance, **kwargs):
+    instance._previous_segment = None
+    if instance.pk:
+        previous = Announcement.objects.filter(pk=instance.pk).first()
+        instance._previous_segment = previous.segment if previous else None
+
+
+ANNOUNCEMENT_VERSION_KEY = 'communications:announcements:version:{}'
+
+
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+def invalidate_announcement_feed(sender, instance, **kwargs):
+    """Faqat o'zgargan auditoriya(lar) lentasi yangi versiya kaliti bilan eskiradi"""
+    segments = {instance.segment, getattr(instance, '_previous_segment', None)} - {None}
+    version = timezone.now().timestamp()
+    cache.set_many({ANNOUNCEMENT_VERSION_KEY.format(segment): version for segment in segments}, None)
+
+
+# ============================================================================
+# EMAIL NAVBATI (communications/emails.py)
+# ============================================================================
+
+class EmailOutbox(TimestampedModel):
+    """
+    Yuborilishi kerak bo'lgan email. So'rov faqat qator qo'shadi; yuborish
+    send_emails buyrug'ida paketlab, qayta urinish va domen cheklovi bilan.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Navbatda'
+        SENT = 'sent', 'Yuborildi'
+        FAILED = 'failed', 'Xato'
+
+    class Template(models.TextChoices):
+        WELCOME = 'welcome', 'Xush kelibsiz'
+        HOMEWORK_ASSIGNED = 'homework_assigned', 'Yangi uy vazifasi'
+        GRADE_POSTED = 'grade_posted', "Baho qo'yildi"
+        PAYMENT_APPROVED = 'payment_approved', "To'lov tasdiqlandi"
+        PASSWORD_RESET = 'password_reset', 'Parolni tiklash'
+        DAILY_DIGEST = 'daily_digest', "Kunlik bildirishnomalar"
+
+    to_email = models.EmailField()
+    domain = models.CharField(max_length=255)  # domen bo'yicha cheklov uchun
+    template = models.CharField(max_length=50, choices=Template.choices)
+    locale = models.CharField(max_length=10)
+    context = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['pk']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_due_idx'),
+            models.Index(fields=['domain', 'sent_at'], name='email_outbox_domain_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.to_email} — {self.template} ({self.status})"
+
+
+# ============================================================================
+# AUDITORIYA TO'PLAMLARI KESHI (communications/audience.py)
+# ============================================================================
+
+AUDIENCE_VERSION_KEY = 'communications:audience:version:{}'
+AUDIENCE_USER_FIELDS = {'type', 'is_active'}
+
+
+def bump_audience_version(*scopes):
+    """Shu guruhdagi keshlangan id to'plamlari yangi versiya kaliti bilan eskiradi"""
+    version = time.time_ns()
+    cache.set_many({AUDIENCE_VERSION_KEY.format(scope): version for scope in scopes}, None)
+
+
+@receiver(post_save, sender=User)
+def invalidate_audience_on_user_change(sender, instance, created, update_fields=None, **kwargs):
+    # last_login kabi qisman saqlashlar rol/holatga ta'sir qilmaydi
+    if created or update_fields is None or AUDIENCE_USER_FIELDS & set(update_fields):
+        bump_audience_version('users')
+
+
+@receiver(post_save, sender=StudentProfile)
+def invalidate_audience_on_student_status(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or 'status' in update_fields:
+        bump_audience_version('users')
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=StudentProfile)
+def invalidate_audience_on_delete(sender, instance, **kwargs):
+    bump_audience_version('users', 'groups')
+
+
+@receiver(post_save, sender='courses.Group')
+@receiver(post_delete, sender='courses.Group')
+def invalidate_audience_on_group_change(sender, instance, **kwargs):
+    bump_audience_version('groups')
+
+
+@receiver(m2m_changed, sender='courses.Group_students')
+def invalidate_audience_on_enrollment(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_audience_version('groups')
@@ -0,0 +1,101 @@
+"""
+SMS yuborish - almashtiriladigan shlyuz (gateway)
+
+Shlyuz klassi SMS_GATEWAY sozlamasidan olinadi (email backend kabi):
+
+    - FileSmsGateway - xabarlarni SMS_FILE_PATH fayliga JSON qatorlar sifatida
+      yozadi (testlar va lokal ishga tushirish uchun),
+    - haqiqiy provayder BaseSmsGateway dan meros olib send_messages ni
+      yozadi va SMS_GATEWAY ga ko'rsatiladi.
+
+send_batches xabarlarni SMS_BATCH_SIZE dan bo'lib yuboradi va tezlikni
+SMS_RATE_PER_SECOND dan oshirmaydi (provayder cheklovlari).
+"""
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+@dataclass
+class SmsMessage:
+    phone: str
+    text: str
+    key: object = None  # chaqiruvchining havolasi (masalan, qator id lari)
+
+
+def normalize_phone(phone):
+    """'+998 (90) 123-45-67' -> '+998901234567'; raqam bo'lmasa ''"""
+    digits = re.sub(r'\D', '', phone or '')
+    return f"+{digits}" if digits else ''
+
+
+class BaseSmsGateway:
+    """Provayder interfeysi: bir paket xabarni yuborish"""
+
+    def send_messages(self, messages):
+        """
+        Returns:
+            int: yuborilgan xabarlar soni
+
+        Raises:
+            Exception: paket yuborilmadi (butun paket qayta uriniladi)
+        """
+        raise NotImplementedError
+
+
+class FileSmsGateway(BaseSmsGateway):
+    """Stub: har bir xabar SMS_FILE_PATH ga bitta JSON qator"""
+    _lock = threading.Lock()
+
+    def __init__(self, path=None):
+        self.path = Path(path or settings.SMS_FILE_PATH)
+
+    def send_messages(self, messages):
+        sent_at = timezone.now().isoformat()
+        lines = ''.join(
+            json.dumps({'phone': message.phone, 'text': message.text, 'sent_at': sent_at}, ensure_ascii=False) + '\n'
+            for message in messages
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, self.path.open('a', encoding='utf-8') as stream:
+            stream.write(lines)
+        return len(messages)
+
+
+def get_gateway(path=None):
+    return import_string(path or settings.SMS_GATEWAY)()
+
+
+def send_batches(messages, gateway=None, batch_size=None, rate=None, sleep=time.sleep, clock=time.monotonic):
+    """
+    Xabarlarni paketlab yuborish; har paketdan keyin natija qaytariladi,
+    shunda chaqiruvchi yuborilganlarni darhol belgilaydi.
+
+    Yields:
+        tuple: (paket, xato yoki None)
+    """
+    gateway = gateway or get_gateway()
+    batch_size = batch_size or settings.SMS_BATCH_SIZE
+    rate = rate or settings.SMS_RATE_PER_SECOND
+    started, sent = clock(), 0
+
+    for start in range(0, len(messages), batch_size):
+        # Oldingi paketlar tezlik chegarasiga yetgan bo'lsa kutamiz
+        wait = sent / rate - (clock() - started)
+        if wait > 0:
+            sleep(wait)
+        batch = messages[start:start + batch_size]
+        try:
+            gateway.send_messages(batch)
+        except Exception as e:
+            yield batch, e
+        else:
+            yield batch, None
+        sent += len(batch)
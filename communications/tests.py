@@ -1,3 +1,858 @@
-from django.test import TestCase
+import asyncio
+import json
+import tempfile
+import time
+from contextlib import aclosing
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import StudentProfile, User
+from core import jobs
+from core.models import BackgroundJob, Branch
+from courses.models import Course, Group
+from . import announcements, audience, digest, emails, fanout, live, sms
+from .inbox import inbox, thread_inbox
+from .models import (
+    Announcement, BroadcastNotification, BroadcastReceipt, EmailOutbox, Message, Notification, NotificationDigest,
+    ThreadParticipant, bump_audience_version,
+)
+
+
+def make_user(email, **extra):
+    return User.objects.create_user(email=email, **extra)
+
+
+@override_settings(BACKGROUND_JOBS_EAGER=True)
+class NotificationFanoutTests(TestCase):
+    def setUp(self):
+        self.admin = make_user('admin@example.com', type=User.UserType.ADMIN)
+        self.students = [make_user(f's{i}@example.com') for i in range(3)]
+        self.teacher = make_user('teacher@example.com', type=User.UserType.TEACHER)
+        make_user('old@example.com', is_active=False)
+
+    def test_resolves_recipients_by_type_and_skips_inactive(self):
+        self.assertEqual(fanout.resolve_recipients('students'), [user.pk for user in self.students])
+        self.assertEqual(fanout.resolve_recipients('teachers'), [self.teacher.pk])
+        self.assertEqual(len(fanout.resolve_recipients('all')), 5)
+        self.assertEqual(fanout.resolve_recipients('specific', ['s1@example.com', 'old@example.com']), [self.students[1].pk])
+
+    def test_send_view_enqueues_job_and_redirects_to_progress(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.post(reverse('communications:notification_send'), {
+            'title': 'Dars jadvali', 'message': "Ertangi darslar 10:00 da boshlanadi",
+            'recipient_type': 'students',
+        })
+
+        job = BackgroundJob.objects.get()
+        self.assertRedirects(response, reverse('jobs:detail', args=[job.pk]), fetch_redirect_response=False)
+        self.assertEqual((job.status, job.total, job.processed), (BackgroundJob.Status.DONE, 3, 3))
+        self.assertEqual(Notification.objects.filter(user__in=self.students).count(), 3)
+
+    def test_large_audience_is_written_in_chunks(self):
+        User.objects.bulk_create([User(email=f'bulk{i}@example.com') for i in range(25)])
+
+        with mock.patch.object(fanout, 'CHUNK_SIZE', 10), CaptureQueriesContext(connection) as queries:
+            job = jobs.enqueue('communications.fanout.fanout_notification', {
+                'title': 'Test', 'message': 'Hammaga xabar', 'recipient_type': 'students',
+            })
+
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "communications_notification"')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual((job.total, job.processed), (28, 28))
+        self.assertEqual(Notification.objects.count(), 28)
+
+    def test_failed_job_keeps_error_for_polling(self):
+        job = jobs.enqueue('communications.fanout.fanout_notification', {
+            'title': 'Test', 'message': 'Hammaga xabar', 'recipient_type': 'nobody',
+        })
+        self.client.force_login(self.admin)
+
+        status = self.client.get(reverse('jobs:status', args=[job.pk])).json()
+
+        self.assertEqual(job.status, BackgroundJob.Status.FAILED)
+        self.assertTrue(status['finished'])
+        self.assertIn('nobody', status['error'])
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.user = make_user('reader@example.com')
+        self.other = make_user('other@example.com')
+
+    def unread(self, user=None):
+        return User.objects.values_list('unread_notifications', flat=True).get(pk=(user or self.user).pk)
+
+    def test_create_bulk_create_and_delete_keep_counter_in_sync(self):
+        first = Notification.objects.create(user=self.user, title='A', message='a')
+        Notification.objects.create_for_users([self.user.pk, self.other.pk], 'B', 'b')
+        self.assertEqual((self.unread(), self.unread(self.other)), (2, 1))
+
+        first.delete()
+        self.assertEqual(self.unread(), 1)
+
+    def test_mark_read_decrements_once(self):
+        notification = Notification.objects.create(user=self.user, title='A', message='a')
+        Notification.objects.create(user=self.user, title='B', message='b')
+
+        self.assertTrue(Notification.objects.mark_read(self.user, notification.pk))
+        self.assertFalse(Notification.objects.mark_read(self.user, notification.pk))
+        self.assertFalse(Notification.objects.mark_read(self.other, notification.pk))
+        self.assertEqual(self.unread(), 1)
+
+    def test_mark_all_read_view_is_single_update_and_resets_counter(self):
+        Notification.objects.create_for_users([self.user.pk], 'A', 'a')
+        Notification.objects.create(user=self.user, title='B', message='b')
+        self.client.force_login(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('communications:notification_read_all'))
+
+        self.assertRedirects(response, reverse('communications:notification_list'), fetch_redirect_response=False)
+        updates = [q for q in queries if q['sql'].startswith('UPDATE "communications_notification"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.unread(), 0)
+        self.assertFalse(Notification.objects.filter(user=self.user, is_read=False).exists())
+
+    def test_context_processor_does_not_query_notifications(self):
+        Notification.objects.create(user=self.user, title='A', message='a')
+        self.client.force_login(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('communications:notification_list'))
+
+        self.assertEqual(response.context['notification_count'], 1)
+        counts = [q for q in queries if 'COUNT(' in q['sql'] and 'communications_notification' in q['sql']]
+        self.assertEqual(counts, [])
+
+    def test_stale_user_save_does_not_overwrite_counter(self):
+        stale = User.objects.get(pk=self.user.pk)
+        Notification.objects.create(user=self.user, title='A', message='a')
+
+        stale.first_name = 'Ali'
+        stale.save()
+
+        self.assertEqual(self.unread(), 1)
+
+    def test_save_keeps_update_fields_and_deferred_semantics(self):
+        saved = []
+        receiver = lambda sender, update_fields=None, **kwargs: saved.append(update_fields)
+        post_save.connect(receiver, sender=User)
+        self.addCleanup(post_save.disconnect, receiver, sender=User)
+        Notification.objects.create(user=self.user, title='A', message='a')
+
+        partial = User.objects.only('first_name').get(pk=self.user.pk)
+        partial.first_name = 'Ali'
+        partial.save()  # faqat yuklangan maydon - qolganlari qayta o'qilmaydi
+        self.user.save()
+
+        self.assertEqual(saved, [frozenset({'first_name'}), None])
+        self.assertEqual(self.unread(), 1)
+
+    def test_recount_repairs_drift(self):
+        Notification.objects.create(user=self.user, title='A', message='a')
+        User.objects.filter(pk=self.user.pk).update(unread_notifications=7)
+
+        Notification.objects.recount()
+
+        self.assertEqual((self.unread(), self.unread(self.other)), (1, 0))
+
+
+class BroadcastNotificationTests(TestCase):
+    def setUp(self):
+        self.admin = make_user('admin@example.com', type=User.UserType.ADMIN)
+        self.student = make_user('student@example.com')
+        self.other = make_user('other@example.com')
+        self.teacher = make_user('teacher@example.com', type=User.UserType.TEACHER)
+        branch = Branch.objects.create(name='Chilonzor')
+        self.course = Course.objects.create(title='Python')
+        self.group = Group.objects.create(name='P1', course=self.course, branch=branch)
+        self.group.students.add(StudentProfile.objects.get(user=self.student))
+        self.branch = branch
+
+    def unread(self, user):
+        return Notification.objects.unread_count(User.objects.get(pk=user.pk))
+
+    def test_content_is_stored_once_and_targets_audience(self):
+        BroadcastNotification.objects.create(title='Hammaga', message='x', audience='all')
+        BroadcastNotification.objects.create(title='Guruh', message='x', audience='group', group=self.group)
+        BroadcastNotification.objects.create(title='Filial', message='x', audience='branch', branch=self.branch)
+        BroadcastNotification.objects.create(title='Ustozlar', message='x', audience='teachers')
+
+        self.assertEqual(Notification.objects.count(), 0)
+        self.assertEqual(BroadcastReceipt.objects.count(), 0)
+        self.assertEqual(
+            sorted(BroadcastNotification.objects.for_user(self.student).values_list('title', flat=True)),
+            ['Filial', 'Guruh', 'Hammaga'],
+        )
+        self.assertEqual((self.unread(self.student), self.unread(self.other), self.unread(self.teacher)), (3, 1, 2))
+
+    def test_read_receipt_is_written_lazily_once(self):
+        broadcast = BroadcastNotification.objects.create(title='Hammaga', message='x', audience='all')
+        self.client.force_login(self.student)
+
+        self.client.post(reverse('communications:broadcast_read', args=[broadcast.pk]))
+        self.client.post(reverse('communications:broadcast_read', args=[broadcast.pk]))
+
+        self.assertEqual(BroadcastReceipt.objects.filter(user=self.student).count(), 1)
+        self.assertEqual((self.unread(self.student), self.unread(self.other)), (0, 1))
+
+    def test_mark_all_read_covers_broadcasts(self):
+        BroadcastNotification.objects.create(title='Hammaga', message='x', audience='all')
+        Notification.objects.create(user=self.student, title='Shaxsiy', message='x')
+
+        self.assertEqual(Notification.objects.mark_all_read(self.student), 2)
+
+        items, _ = inbox(self.student)
+        self.assertTrue(all(item.is_read for item in items))
+        self.assertEqual(self.unread(self.student), 0)
+
+    def test_inbox_merges_with_keyset_cursor(self):
+        now = timezone.now()
+        User.objects.filter(pk=self.student.pk).update(date_joined=now - timedelta(days=1))
+        self.student.refresh_from_db()
+        for minutes in range(5):
+            Notification.objects.create(user=self.student, title=f'n{minutes}', message='x')
+            BroadcastNotification.objects.create(title=f'b{minutes}', message='x', audience='students')
+        # Bir xil vaqt belgisi - kursor chegarasida element yo'qolmasligi kerak
+        Notification.objects.update(created_at=now)
+        for index, broadcast in enumerate(BroadcastNotification.objects.order_by('pk')):
+            BroadcastNotification.objects.filter(pk=broadcast.pk).update(created_at=now - timedelta(minutes=index % 2))
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = inbox(self.student, cursor, limit=3)
+            seen += [item.title for item in page]
+            if not cursor:
+                break
+
+        self.assertEqual(len(seen), 10)
+        self.assertEqual(len(set(seen)), 10)
+        self.assertEqual(seen[:5], ['n4', 'n3', 'n2', 'n1', 'n0'])
+
+    def test_purge_removes_expired_and_old_read_notifications(self):
+        expired = BroadcastNotification.objects.create(
+            title='Eski', message='x', audience='all', expires_at=timezone.now() + timedelta(minutes=1),
+        )
+        BroadcastNotification.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+        kept = BroadcastNotification.objects.create(title='Yangi', message='x', audience='all')
+        old = Notification.objects.create(user=self.student, title='Eski', message='x', is_read=True)
+        unread_old = Notification.objects.create(user=self.student, title="O'qilmagan", message='x')
+        Notification.objects.filter(pk__in=[old.pk, unread_old.pk]).update(created_at=timezone.now() - timedelta(days=120))
+
+        call_command('purge_notifications', days=90, stdout=mock.Mock())
+
+        self.assertEqual(list(BroadcastNotification.objects.all()), [kept])
+        self.assertEqual(list(Notification.objects.all()), [unread_old])
+        self.assertEqual(self.unread(self.student), 2)  # kept + unread_old
+
+    def test_unread_count_is_not_kept_in_the_counter(self):
+        BroadcastNotification.objects.create(title='Hammaga', message='x', audience='all')
+
+        self.assertEqual(User.objects.get(pk=self.student.pk).unread_notifications, 0)
+        self.assertEqual(self.unread(self.student), 1)
+
+    def test_late_audience_member_is_not_decremented(self):
+        broadcast = BroadcastNotification.objects.create(title='Guruh', message='x', audience='group', group=self.group)
+        self.assertEqual(self.unread(self.other), 0)
+
+        self.group.students.add(StudentProfile.objects.get(user=self.other))
+        self.assertEqual(self.unread(self.other), 1)
+        BroadcastNotification.objects.mark_read(self.other, broadcast.pk)
+
+        self.assertEqual(self.unread(self.other), 0)
+        self.assertEqual(User.objects.get(pk=self.other.pk).unread_notifications, 0)
+
+    def test_expired_broadcast_is_not_counted(self):
+        broadcast = BroadcastNotification.objects.create(title='Hammaga', message='x', audience='all')
+        self.assertEqual(self.unread(self.student), 1)
+
+        BroadcastNotification.objects.filter(pk=broadcast.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+        cache.clear()  # muddat tugashi kesh timeout bilan ko'rinadi
+
+        self.assertEqual(self.unread(self.student), 0)
+
+    def test_cascade_delete_drops_broadcast_from_count(self):
+        BroadcastNotification.objects.create(title='Guruh', message='x', audience='group', group=self.group)
+        self.assertEqual(self.unread(self.student), 1)
+
+        self.group.delete()
+
+        self.assertEqual(self.unread(self.student), 0)
+
+    def test_broadcast_form_requires_target(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.post(reverse('communications:broadcast_create'), {
+            'title': 'Guruhga', 'message': 'Dars bekor', 'audience': 'group',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('group', response.context['form'].errors)
+
+        response = self.client.post(reverse('communications:broadcast_create'), {
+            'title': 'Guruhga', 'message': 'Dars bekor', 'audience': 'group', 'group': self.group.pk,
+            'course': self.course.pk,
+        })
+        self.assertRedirects(response, reverse('communications:notification_list'), fetch_redirect_response=False)
+        broadcast = BroadcastNotification.objects.get()
+        self.assertEqual((broadcast.group, broadcast.course, broadcast.created_by), (self.group, None, self.admin))
+
+
+class MessageThreadTests(TestCase):
+    def setUp(self):
+        self.alice = make_user('alice@example.com')
+        self.bob = make_user('bob@example.com')
+        self.carol = make_user('carol@example.com')
+
+    def test_send_and_reply_keep_thread_counters(self):
+        first = Message.objects.send(self.alice, self.bob, 'Salom, dars qachon?', subject='Dars')
+        Message.objects.send(self.alice, self.bob, 'Javob kutaman', thread=first.thread)
+        reply = Message.objects.send(self.bob, self.alice, 'Soat 10 da', thread=first.thread)
+
+        thread = reply.thread
+        thread.refresh_from_db()
+        self.assertEqual((thread.message_count, thread.last_message, thread.subject), (3, reply, 'Dars'))
+        unread = dict(ThreadParticipant.objects.filter(thread=thread).values_list('user__email', 'unread_count'))
+        self.assertEqual(unread, {'alice@example.com': 1, 'bob@example.com': 2})
+
+    def test_opening_thread_marks_it_read(self):
+        message = Message.objects.send(self.alice, self.bob, 'Salom, dars qachon?', subject='Dars')
+        self.client.force_login(self.bob)
+
+        response = self.client.get(reverse('communications:message_thread', args=[message.thread_id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Message.objects.filter(recipient=self.bob, is_read=False).exists())
+        self.assertEqual(ThreadParticipant.objects.get(thread=message.thread, user=self.bob).unread_count, 0)
+
+    def test_outsider_cannot_open_thread(self):
+        message = Message.objects.send(self.alice, self.bob, 'Salom, dars qachon?', subject='Dars')
+        self.client.force_login(self.carol)
+
+        response = self.client.get(reverse('communications:message_thread', args=[message.thread_id]))
+
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+
+    def test_compose_and_reply_views(self):
+        self.client.force_login(self.alice)
+        response = self.client.post(reverse('communications:message_compose'), {
+            'recipient_email': 'bob@example.com', 'subject': 'Uy vazifasi', 'body': 'Vazifani tekshirib bering',
+        })
+        thread_id = Message.objects.get().thread_id
+        self.assertRedirects(response, reverse('communications:message_thread', args=[thread_id]), fetch_redirect_response=False)
+
+        self.client.force_login(self.bob)
+        self.client.post(reverse('communications:message_thread', args=[thread_id]), {'body': 'Tekshirdim'})
+
+        reply = Message.objects.get(sender=self.bob)
+        self.assertEqual((reply.thread_id, reply.recipient), (thread_id, self.alice))
+
+    def test_inbox_uses_constant_queries_and_keyset(self):
+        for index in range(12):
+            Message.objects.send(self.alice if index % 2 else self.carol, self.bob, 'Matn', subject=f'Mavzu {index}')
+
+        with self.assertNumQueries(2):
+            page, cursor = thread_inbox(self.bob, limit=5)
+            [participant.thread.others[0].user.email for participant in page]
+        self.assertEqual([p.thread.subject for p in page], [f'Mavzu {i}' for i in range(11, 6, -1)])
+
+        subjects = [p.thread.subject for p in page]
+        while cursor:
+            page, cursor = thread_inbox(self.bob, cursor, limit=5)
+            subjects += [p.thread.subject for p in page]
+        self.assertEqual(len(set(subjects)), 12)
+
+        self.client.force_login(self.bob)
+        response = self.client.get(reverse('communications:message_list'))
+        self.assertEqual(len(response.context['threads']), 12)
+
+
+class AnnouncementFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = make_user('admin@example.com', type=User.UserType.ADMIN)
+        self.student = make_user('student@example.com')
+        self.teacher = make_user('teacher@example.com', type=User.UserType.TEACHER)
+        self.course = Course.objects.create(title='Python')
+        self.group = Group.objects.create(name='P1', course=self.course)
+        self.other_group = Group.objects.create(name='P2', course=self.course)
+        self.group.students.add(StudentProfile.objects.get(user=self.student))
+
+    def titles(self, user):
+        html = announcements.feed(user)
+        return [a.title for a in Announcement.objects.order_by('-created_at', '-pk') if a.title in html]
+
+    def test_feed_contains_only_users_segments(self):
+        Announcement.objects.create(title='Hammaga', content='x', target_audience='all')
+        Announcement.objects.create(title='Talabalarga', content='x', target_audience='students')
+        Announcement.objects.create(title='Ustozlarga', content='x', target_audience='teachers')
+        Announcement.objects.create(title='P1 guruhi', content='x', target_audience='group', group=self.group)
+        Announcement.objects.create(title='P2 guruhi', content='x', target_audience='group', group=self.other_group)
+        Announcement.objects.create(title='Python kursi', content='x', target_audience='course', course=self.course)
+
+        self.assertEqual(self.titles(self.student), ['Python kursi', 'P1 guruhi', 'Talabalarga', 'Hammaga'])
+        self.assertEqual(self.titles(self.teacher), ['Ustozlarga', 'Hammaga'])
+
+    def test_cached_feed_skips_announcement_queries(self):
+        Announcement.objects.create(title='Hammaga', content='x', target_audience='all')
+        announcements.feed(self.student)
+
+        with CaptureQueriesContext(connection) as queries:
+            html = announcements.feed(self.student)
+
+        self.assertIn('Hammaga', html)
+        self.assertEqual([q for q in queries if 'communications_announcement' in q['sql']], [])
+
+    def test_change_invalidates_only_its_segment(self):
+        Announcement.objects.create(title='Hammaga', content='x', target_audience='all')
+        group_announcement = Announcement.objects.create(
+            title='P1 guruhi', content='x', target_audience='group', group=self.group,
+        )
+        announcements.feed(self.student)
+
+        with mock.patch.object(announcements, 'render_segment', wraps=announcements.render_segment) as render:
+            group_announcement.title = 'P1 yangilandi'
+            group_announcement.save()
+            html = announcements.feed(self.student)
+
+        self.assertIn('P1 yangilandi', html)
+        self.assertEqual([c.args[0] for c in render.call_args_list], [f'group:{self.group.pk}'])
+
+    def test_moving_announcement_to_another_audience_refreshes_both(self):
+        announcement = Announcement.objects.create(title='Talabalarga', content='x', target_audience='students')
+        self.assertEqual(self.titles(self.student), ['Talabalarga'])
+
+        announcement.target_audience = 'teachers'
+        announcement.save()
+
+        self.assertEqual(self.titles(self.student), [])
+        self.assertEqual(self.titles(self.teacher), ['Talabalarga'])
+
+    def test_expired_announcement_leaves_feed(self):
+        Announcement.objects.create(
+            title='Tez tugaydi', content='x', target_audience='all', expires_at=timezone.now() + timedelta(hours=1),
+        )
+        _, timeout = announcements.render_segment('all')
+        self.assertLessEqual(timeout, 3601)
+
+        Announcement.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        items, _ = announcements.render_segment('all')
+        self.assertEqual(items, [])
+
+    def test_create_view_and_feed_page(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('communications:announcement_create'), {
+            'title': 'Imtihon', 'content': 'Imtihon juma kuni bo\'ladi', 'target_audience': 'group',
+            'group': self.group.pk,
+        })
+        self.assertRedirects(response, reverse('communications:announcement_manage'), fetch_redirect_response=False)
+
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('communications:announcement_list'))
+        self.assertContains(response, 'Imtihon juma kuni')
+
+
+class FlakyEmailBackend(EmailBackend):
+    """bad@ manzillariga yuborishda xato beradigan locmem backend"""
+
+    def send_messages(self, messages):
+        if any(address.startswith('bad@') for message in messages for address in message.to):
+            raise ConnectionError('550 mailbox unavailable')
+        return super().send_messages(messages)
+
+
+class EmailOutboxTests(TestCase):
+    def test_enqueue_only_writes_a_row(self):
+        emails.enqueue('Ali@Example.com', 'welcome', {'name': 'Ali'})
+
+        row = EmailOutbox.objects.get()
+        self.assertEqual((row.status, row.domain, row.locale), (EmailOutbox.Status.PENDING, 'example.com', 'uz-uz'))
+        self.assertEqual(mail.outbox, [])
+
+    def test_batch_is_sent_over_one_connection_and_templates_load_once(self):
+        emails.enqueue_many([(f's{i}@example.com', {'name': f'S{i}', 'homework': 'Loop', 'score': '90'}) for i in range(3)],
+                            'grade_posted')
+        emails.enqueue('new@example.com', 'welcome', {'name': 'Vali'})
+
+        with mock.patch.object(emails, 'get_connection', wraps=emails.get_connection) as connection, \
+                mock.patch.object(emails, 'get_template', wraps=emails.get_template) as template:
+            stats = emails.send_pending()
+
+        self.assertEqual(stats['sent'], 4)
+        self.assertEqual(connection.call_count, 1)
+        self.assertEqual(template.call_count, 2)
+        self.assertEqual(len(mail.outbox), 4)
+        graded = next(message for message in mail.outbox if message.to == ['s1@example.com'])
+        self.assertIn('90/100', graded.alternatives[0][0])
+        self.assertIn('Hurmatli S1', graded.body)
+        self.assertFalse(EmailOutbox.objects.exclude(status=EmailOutbox.Status.SENT).exists())
+
+    @override_settings(
+        EMAIL_BACKEND='communications.tests.FlakyEmailBackend',
+        EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_BACKOFF_SECONDS=60,
+    )
+    def test_failures_retry_with_exponential_backoff(self):
+        emails.enqueue('bad@example.com', 'welcome', {'name': 'X'})
+        emails.enqueue('good@example.com', 'welcome', {'name': 'Y'})
+        now = timezone.now()
+
+        stats = emails.send_pending(now=now)
+        self.assertEqual((stats['sent'], stats['retry']), (1, 1))
+        bad = EmailOutbox.objects.get(to_email='bad@example.com')
+        self.assertEqual((bad.attempts, bad.next_attempt_at), (1, now + timedelta(seconds=60)))
+        self.assertIn('550', bad.last_error)
+
+        self.assertEqual(emails.send_pending(now=now + timedelta(seconds=30)), {})
+        emails.send_pending(now=now + timedelta(seconds=60))
+        bad.refresh_from_db()
+        self.assertEqual((bad.attempts, bad.next_attempt_at), (2, now + timedelta(seconds=180)))
+
+        stats = emails.send_pending(now=now + timedelta(seconds=180))
+        bad.refresh_from_db()
+        self.assertEqual((stats['failed'], bad.status), (1, EmailOutbox.Status.FAILED))
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_OUTBOX_DOMAIN_LIMIT=2, EMAIL_OUTBOX_DOMAIN_WINDOW=60)
+    def test_per_domain_throttle_defers_without_counting_attempt(self):
+        for i in range(3):
+            emails.enqueue(f'u{i}@gmail.com', 'welcome')
+        emails.enqueue('u@mail.uz', 'welcome')
+        now = timezone.now()
+
+        stats = emails.send_pending(now=now)
+
+        self.assertEqual((stats['sent'], stats['throttled']), (3, 1))
+        deferred = EmailOutbox.objects.get(status=EmailOutbox.Status.PENDING)
+        self.assertEqual((deferred.to_email, deferred.attempts), ('u2@gmail.com', 0))
+        self.assertEqual(deferred.next_attempt_at, now + timedelta(seconds=60))
+
+    def test_send_emails_command_drains_queue(self):
+        emails.enqueue_many([(f'u{i}@example.com', {}) for i in range(5)], 'welcome')
+
+        call_command('send_emails', batch_size=2, stdout=mock.Mock())
+
+        self.assertEqual(len(mail.outbox), 5)
+
+
+class LiveHubTests(SimpleTestCase):
+    def test_full_queue_collapses_to_refresh(self):
+        async def scenario():
+            hub = live.Hub(max_connections=10, max_per_user=2, queue_size=3)
+            subscription = hub.subscribe(1)
+            for index in range(5):
+                hub.publish(1, 'notification', {'id': index})
+            await asyncio.sleep(0)
+            return [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())], subscription.dropped
+
+        events, dropped = asyncio.run(scenario())
+        self.assertEqual(events, [('refresh', {}), ('notification', {'id': 4})])
+        self.assertEqual(dropped, 3)
+
+    def test_connection_caps(self):
+        async def scenario():
+            hub = live.Hub(max_connections=3, max_per_user=2, queue_size=3)
+            hub.subscribe(1)
+            hub.subscribe(1)
+            with self.assertRaises(live.HubFull):
+                hub.subscribe(1)
+            hub.subscribe(2)
+            with self.assertRaises(live.HubFull):
+                hub.subscribe(3)
+            return len(hub)
+
+        self.assertEqual(asyncio.run(scenario()), 3)
+
+    def test_heartbeat_on_idle_stream(self):
+        async def scenario():
+            hub = live.Hub(max_connections=10, max_per_user=2, queue_size=3)
+            stream = live.event_stream(hub.subscribe(1), heartbeat=0.01)
+            chunks = [await anext(stream), await anext(stream)]
+            await stream.aclose()
+            return chunks, len(hub)
+
+        chunks, remaining = asyncio.run(scenario())
+        self.assertTrue(chunks[0].startswith('retry:'))
+        self.assertEqual(chunks[1], ': ping\n\n')
+        self.assertEqual(remaining, 0)
+
+    def test_holds_5000_idle_connections(self):
+        async def consume(stream, received):
+            async for chunk in stream:
+                if chunk.startswith('event:'):
+                    received.append(chunk)
+
+        async def scenario():
+            hub = live.Hub(max_connections=6000, max_per_user=1, queue_size=8)
+            received = []
+            started = time.monotonic()
+            tasks = [
+                asyncio.create_task(consume(live.event_stream(hub.subscribe(user_id), heartbeat=3600), received))
+                for user_id in range(5000)
+            ]
+            await asyncio.sleep(0.05)
+            connected = len(hub)
+            for user_id in range(0, 5000, 500):
+                hub.publish(user_id, 'notification', {'unread': 1})
+            await asyncio.sleep(0.05)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            return connected, len(received), len(hub), time.monotonic() - started
+
+        connected, received, remaining, elapsed = asyncio.run(scenario())
+        self.assertEqual((connected, received, remaining), (5000, 10, 0))
+        self.assertLess(elapsed, 10)
+
+
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        self.user = make_user('live@example.com')
+
+    def test_notification_creation_publishes_to_subscriber(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        hub = live.Hub(max_connections=10, max_per_user=2, queue_size=8)
+
+        async def subscribe():
+            return hub.subscribe(self.user.pk)
+
+        subscription = loop.run_until_complete(subscribe())
+        with mock.patch.object(live, 'get_hub', return_value=hub), self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=self.user, title='Yangi baho', message='x')
+
+        event, data = loop.run_until_complete(asyncio.wait_for(subscription.queue.get(), 1))
+        self.assertEqual((event, data['title'], data['unread']), ('notification', 'Yangi baho', 1))
+
+    def test_stream_requires_asgi(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('communications:notification_stream'))
+
+        self.assertEqual(response.status_code, 501)
+
+    async def test_stream_sends_initial_unread_count(self):
+        await self.async_client.aforce_login(self.user)
+        hub = live.Hub(max_connections=10, max_per_user=1, queue_size=8)
+
+        with mock.patch.object(live, 'get_hub', return_value=hub):
+            response = await self.async_client.get(reverse('communications:notification_stream'))
+            second = await self.async_client.get(reverse('communications:notification_stream'))
+            # ASGIHandler kabi: aiter(response) + aclosing; ichki oqim loop tomonidan yopiladi
+            content_type = response['Content-Type']
+            chunks = []
+
+            async def consume():
+                async with aclosing(aiter(response)) as stream:
+                    async for chunk in stream:
+                        chunks.append(chunk)
+
+            # Mijoz uzilishi - ASGIHandler so'rov vazifasini bekor qiladi
+            task = asyncio.create_task(consume())
+            while len(chunks) < 2:
+                await asyncio.sleep(0.001)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        self.assertEqual(content_type, 'text/event-stream')
+        self.assertEqual(second.status_code, 503)
+        self.assertEqual(chunks[1], b'event: unread\ndata: {"unread": 0}\n\n')
+        self.assertEqual(len(hub), 0)
+
+    async def test_failed_count_does_not_leak_subscription(self):
+        await self.async_client.aforce_login(self.user)
+        hub = live.Hub(max_connections=10, max_per_user=1, queue_size=8)
+
+        with mock.patch.object(live, 'get_hub', return_value=hub), \
+                mock.patch.object(Notification.objects, 'unread_count', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                await self.async_client.get(reverse('communications:notification_stream'))
+
+        self.assertEqual(len(hub), 0)
+
+
+class AudienceResolverTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = make_user('admin@example.com', type=User.UserType.ADMIN)
+        self.students = [make_user(f's{i}@example.com') for i in range(4)]
+        self.teacher = make_user('teacher@example.com', type=User.UserType.TEACHER)
+        self.course = Course.objects.create(title='Python', slug='python')
+        self.group = Group.objects.create(name='P1', course=self.course, teacher=self.teacher.teacher_profile)
+        self.group.students.add(*[StudentProfile.objects.get(user=user) for user in self.students[:3]])
+        StudentProfile.objects.filter(user=self.students[2]).update(status='blocked')
+        bump_audience_version('users')
+
+    def test_compiles_with_intersection_binding_tighter(self):
+        self.assertEqual(
+            audience.compile_expression('role:student | group:1 & status:active'),
+            ('|', ('role', 'student'), ('&', ('group', '1'), ('status', 'active'))),
+        )
+        self.assertEqual(
+            audience.compile_expression('all - (role:admin | role:teacher)'),
+            ('-', ('all', ''), ('|', ('role', 'admin'), ('role', 'teacher'))),
+        )
+        for expression in ('', 'role:', 'role:pilot', 'group:abc', 'nobody:1', '(all', 'all &', 'all all', 'all ; 1'):
+            with self.subTest(expression=expression), self.assertRaises(audience.AudienceError):
+                audience.compile_expression(expression)
+
+    def test_resolves_set_algebra_over_base_sets(self):
+        expected = [user.pk for user in self.students[:2]]
+
+        self.assertEqual(audience.resolve('role:student & course:python - status:blocked'), expected)
+        self.assertEqual(audience.resolve(f'group:{self.group.pk} - role:students'), [self.teacher.pk])
+        self.assertEqual(audience.resolve('all - role:student'), [self.admin.pk, self.teacher.pk])
+
+    def test_base_sets_are_cached_until_their_scope_changes(self):
+        expression = 'role:student & course:python'
+        audience.resolve(expression)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(len(audience.resolve(expression)), 3)
+
+        # Kirish (last_login) rol/holatni o'zgartirmaydi - kesh saqlanadi
+        self.client.force_login(self.students[0])
+        with self.assertNumQueries(0):
+            audience.resolve(expression)
+
+        self.group.students.add(StudentProfile.objects.get(user=self.students[3]))
+        self.assertEqual(len(audience.resolve(expression)), 4)
+
+        self.students[0].is_active = False
+        self.students[0].save()
+        self.assertEqual(audience.resolve('course:python & status:inactive'), [self.students[0].pk])
+
+    def test_resolving_over_100k_users_takes_milliseconds(self):
+        # load_atom almashtirilgan - baza so'rovi emas, jarayon xotirasi va kesh yo'llari o'lchanadi
+        base = {
+            ('role', 'student'): set(range(1, 100_001)),
+            ('course', 'python'): set(range(1, 100_001, 2)),
+            ('status', 'blocked'): set(range(1, 100_001, 7)),
+        }
+        expression = 'role:student & course:python - status:blocked'
+        with mock.patch.object(audience, 'load_atom', side_effect=base.__getitem__):
+            audience.resolve(expression)
+
+            started = time.perf_counter()
+            user_ids = audience.resolve(expression)
+            warm = time.perf_counter() - started
+
+            # Boshqa worker: jarayon xotirasi bo'sh, to'plamlar keshdagi baytlardan
+            audience._memo.clear()
+            started = time.perf_counter()
+            self.assertEqual(audience.resolve(expression), user_ids)
+            from_cache = time.perf_counter() - started
+
+        self.assertEqual(len(user_ids), len(base[('course', 'python')] - base[('status', 'blocked')]))
+        self.assertLess(warm, 0.1)
+        self.assertLess(from_cache, 0.2)
+
+    @override_settings(BACKGROUND_JOBS_EAGER=True)
+    def test_notification_form_accepts_audience_expression(self):
+        self.client.force_login(self.admin)
+        url = reverse('communications:notification_send')
+        data = {'title': 'Dars', 'message': "Ertangi darslar 10:00 da", 'recipient_type': 'audience'}
+
+        response = self.client.post(url, {**data, 'audience': 'role:student &'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('audience', response.context['form'].errors)
+
+        self.client.post(url, {**data, 'audience': 'course:python - status:blocked'})
+        self.assertEqual(
+            set(Notification.objects.values_list('user_id', flat=True)),
+            {self.students[0].pk, self.students[1].pk, self.teacher.pk},
+        )
+
+
+class NotificationDigestTests(TestCase):
+    def setUp(self):
+        self.users = [make_user(f'u{i}@example.com', first_name=f'U{i}') for i in range(3)]
+        make_user('off@example.com', is_active=False)
+
+    def notify(self, user, title, **extra):
+        return Notification.objects.create(user=user, title=title, message='Matn', **extra)
+
+    def outbox(self):
+        return {row.to_email: row.context for row in EmailOutbox.objects.filter(template='daily_digest')}
+
+    def test_one_email_per_user_with_only_recent_unread(self):
+        self.notify(self.users[0], 'A1')
+        self.notify(self.users[0], 'A2')
+        self.notify(self.users[0], "O'qilgan", is_read=True)
+        old = self.notify(self.users[1], 'Eski')
+        Notification.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=2))
+        self.notify(User.objects.get(email='off@example.com'), 'Faol emas')
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = digest.send_digests()
+
+        selects = [q for q in queries if q['sql'].startswith('SELECT') and 'communications_notification' in q['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual((stats['users'], stats['notifications']), (1, 2))
+        context = self.outbox()['u0@example.com']
+        self.assertEqual([item['title'] for item in context['items']], ['A1', 'A2'])
+        self.assertEqual((context['count'], context['name']), (2, 'U0'))
+
+    def test_rerun_is_incremental_by_watermark(self):
+        self.notify(self.users[0], 'Birinchi')
+        digest.send_digests()
+        self.assertEqual(digest.send_digests()['users'], 0)
+
+        latest = self.notify(self.users[0], 'Ikkinchi')
+        digest.send_digests()
+
+        contexts = EmailOutbox.objects.filter(to_email='u0@example.com').order_by('pk').values_list('context', flat=True)
+        self.assertEqual([[item['title'] for item in c['items']] for c in contexts], [['Birinchi'], ['Ikkinchi']])
+        self.assertEqual(NotificationDigest.objects.get(user=self.users[0]).last_notification_id, latest.pk)
+
+    def test_batches_and_caps_items_per_digest(self):
+        for user in self.users:
+            for i in range(4):
+                self.notify(user, f'{user.first_name}-{i}')
+
+        stats = digest.send_digests(batch_size=2, max_items=3)
+
+        self.assertEqual((stats['users'], stats['notifications']), (3, 12))
+        self.assertEqual(NotificationDigest.objects.count(), 3)
+        for context in self.outbox().values():
+            self.assertEqual((len(context['items']), context['more']), (3, 1))
+
+        emails.send_pending()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn('va yana 1 ta', mail.outbox[0].alternatives[0][0])
+
+
+class SmsGatewayTests(SimpleTestCase):
+    def test_batches_respect_rate_limit(self):
+        gateway = mock.Mock()
+        clock = mock.Mock(return_value=0.0)
+        sleeps = []
+        messages = [sms.SmsMessage(f'+99890000000{i}', 'Matn') for i in range(5)]
+
+        results = list(sms.send_batches(messages, gateway=gateway, batch_size=2, rate=4, sleep=sleeps.append, clock=clock))
+
+        self.assertEqual([len(batch) for batch, _ in results], [2, 2, 1])
+        self.assertEqual(gateway.send_messages.call_count, 3)
+        self.assertEqual(sleeps, [0.5, 1.0])  # 2 va 4 xabardan keyin, soat joyida turganda
+
+    def test_file_gateway_appends_json_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/sub/sms.jsonl'
+            sms.FileSmsGateway(path).send_messages([sms.SmsMessage('+998901234567', "Salom")])
+            sms.FileSmsGateway(path).send_messages([sms.SmsMessage('+998907654321', "Xayr")])
+            with open(path, encoding='utf-8') as stream:
+                self.assertEqual([json.loads(line)['text'] for line in stream], ['Salom', 'Xayr'])
+
+    def test_normalize_phone(self):
+        self.assertEqual(sms.normalize_phone('+998 (90) 123-45-67'), '+998901234567')
+        self.assertEqual(sms.normalize_phone(''), '')
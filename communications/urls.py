@@ -0,0 +1,26 @@
+# communications/urls.py
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    # Notifications - User
+    path('', views.NotificationListView.as_view(), name='notification_list'),
+    path('<int:pk>/read/', views.NotificationMarkReadView.as_view(), name='notification_read'),
+    path('broadcast/<int:pk>/read/', views.BroadcastMarkReadView.as_view(), name='broadcast_read'),
+    path('read-all/', views.NotificationMarkAllReadView.as_view(), name='notification_read_all'),
+    path('stream/', views.NotificationStreamView.as_view(), name='notification_stream'),
+
+    # Notifications - Admin
+    path('send/', views.NotificationSendView.as_view(), name='notification_send'),
+    path('broadcast/', views.BroadcastCreateView.as_view(), name='broadcast_create'),
+
+    # Messages
+    path('messages/', views.MessageListView.as_view(), name='message_list'),
+    path('messages/compose/', views.MessageComposeView.as_view(), name='message_compose'),
+    path('messages/<int:pk>/', views.MessageThreadView.as_view(), name='message_thread'),
+
+    # Announcements
+    path('announcements/', views.AnnouncementFeedView.as_view(), name='announcement_list'),
+    path('announcements/manage/', views.AnnouncementManageView.as_view(), name='announcement_manage'),
+    path('announcements/create/', views.AnnouncementCreateView.as_view(), name='announcement_create'),
+]
@@ -1,3 +1,289 @@
-from django.shortcuts import render
+# communications/views.py
+"""
+Communications Views - Bildirishnomalar
+"""
+import logging
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse_lazy
+from django.views import View
+from django.views.generic import CreateView, FormView, ListView, TemplateView
+from accounts.mixins import AdminRequiredMixin, CustomLoginRedirectMixin
+from accounts.models import User
+from core import jobs
+from .fanout import parse_emails
+from . import announcements, live
+from .forms import (
+    AnnouncementFilterForm, AnnouncementForm, BroadcastForm, MessageForm, MessageReplyForm, NotificationForm,
+)
+from .inbox import inbox, thread_inbox
+from .models import Announcement, BroadcastNotification, Message, Notification, ThreadParticipant
 
-# Create your views here.
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# NOTIFICATION VIEWS
+# ============================================================================
+
+class NotificationSendView(AdminRequiredMixin, FormView):
+    """
+    Bildirishnoma yuborish - tarqatish fon vazifasida, admin darhol
+    vazifa sahifasiga (progress) yo'naltiriladi.
+    """
+    form_class = NotificationForm
+    template_name = 'communications/notification_create.html'
+    
+    def form_valid(self, form):
+        data = form.cleaned_data
+        job = jobs.enqueue(
+            'communications.fanout.fanout_notification',
+            {
+                'title': data['title'],
+                'message': data['message'],
+                'recipient_type': data['recipient_type'],
+                'emails': parse_emails(data.get('specific_users')),
+                'expression': data.get('audience', ''),
+            },
+            created_by=self.request.user,
+        )
+        
+        messages.success(self.request, f"Bildirishnoma navbatga qo'yildi (vazifa #{job.pk}).")
+        
+        logger.info(
+            f"Bildirishnoma tarqatish: {data['recipient_type']}",
+            extra={'user_id': self.request.user.id, 'job_id': job.pk}
+        )
+        
+        return redirect('jobs:detail', pk=job.pk)
+
+
+class BroadcastCreateView(AdminRequiredMixin, CreateView):
+    """
+    Umumiy bildirishnoma - matn bir marta yoziladi, o'qilganlik holati
+    faqat o'qilganda (BroadcastReceipt) saqlanadi.
+    """
+    form_class = BroadcastForm
+    template_name = 'communications/broadcast_create.html'
+    success_url = reverse_lazy('communications:notification_list')
+
+    def form_valid(self, form):
+        form.instance.created_by = self.request.user
+        response = super().form_valid(form)
+        messages.success(self.request, "Umumiy bildirishnoma yuborildi.")
+        logger.info(
+            f"Umumiy bildirishnoma: {self.object.audience}",
+            extra={'user_id': self.request.user.id, 'broadcast_id': self.object.pk}
+        )
+        return response
+
+
+class NotificationListView(CustomLoginRedirectMixin, TemplateView):
+    """
+    Foydalanuvchining bildirishnomalari - shaxsiy va umumiy, keyset sahifalash (?before=)
+    """
+    template_name = 'communications/notifications_list.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['notifications'], context['next_cursor'] = inbox(
+            self.request.user, self.request.GET.get('before')
+        )
+        return context
+
+
+class NotificationMarkReadView(CustomLoginRedirectMixin, View):
+    """Bitta bildirishnomani o'qilgan qilish"""
+
+    def post(self, request, pk):
+        Notification.objects.mark_read(request.user, pk)
+        return redirect('communications:notification_list')
+
+
+class NotificationStreamView(View):
+    """
+    Jonli bildirishnomalar (SSE). Asinxron - ulanish oqim egallamaydi;
+    shuning uchun faqat ASGI ostida ishlaydi (WSGI da 501).
+    """
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse("SSE faqat ASGI server ostida ishlaydi", status=501)
+
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse(status=401)
+
+        # Son obunadan oldin o'qiladi - so'rov xato bersa yoki bekor qilinsa
+        # obuna osilib qolmaydi (obunani faqat event_stream yopadi)
+        unread = await sync_to_async(Notification.objects.unread_count)(
+            await User.objects.aget(pk=user.pk)
+        )
+        try:
+            subscription = live.get_hub().subscribe(user.pk)
+        except live.HubFull:
+            response = HttpResponse("Ulanishlar soni chegarasida", status=503)
+            response['Retry-After'] = '30'
+            return response
+
+        response = StreamingHttpResponse(
+            live.event_stream(subscription, initial=('unread', {'unread': unread})),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class BroadcastMarkReadView(CustomLoginRedirectMixin, View):
+    """Umumiy bildirishnomani o'qilgan qilish - kvitansiya yoziladi"""
+
+    def post(self, request, pk):
+        BroadcastNotification.objects.mark_read(request.user, pk)
+        return redirect('communications:notification_list')
+
+
+class NotificationMarkAllReadView(CustomLoginRedirectMixin, View):
+    """Barchasini o'qilgan qilish - bitta UPDATE"""
+
+    def post(self, request):
+        changed = Notification.objects.mark_all_read(request.user)
+        if changed:
+            messages.success(request, f"{changed} ta bildirishnoma o'qilgan deb belgilandi.")
+        return redirect('communications:notification_list')
+
+
+# ============================================================================
+# MESSAGE VIEWS
+# ============================================================================
+
+class MessageListView(CustomLoginRedirectMixin, TemplateView):
+    """
+    Xabarlar qutisi - suhbatlar oxirgi xabar bo'yicha, keyset sahifalash (?before=)
+    """
+    template_name = 'communications/messages_list.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['threads'], context['next_cursor'] = thread_inbox(
+            self.request.user, self.request.GET.get('before')
+        )
+        return context
+
+
+class MessageComposeView(CustomLoginRedirectMixin, FormView):
+    """Yangi suhbat boshlash"""
+    form_class = MessageForm
+    template_name = 'communications/message_compose.html'
+
+    def form_valid(self, form):
+        data = form.cleaned_data
+        recipient = User.objects.get(email=data['recipient_email'])
+        message = Message.objects.send(self.request.user, recipient, data['body'], subject=data['subject'])
+
+        messages.success(self.request, "Xabar yuborildi.")
+        logger.info(
+            "Xabar yuborildi",
+            extra={'user_id': self.request.user.id, 'thread_id': message.thread_id}
+        )
+        return redirect('communications:message_thread', pk=message.thread_id)
+
+
+class MessageThreadView(CustomLoginRedirectMixin, FormView):
+    """
+    Suhbat: xabarlar va javob formasi. Ochilganda o'qilmaganlar belgilanadi.
+    """
+    form_class = MessageReplyForm
+    template_name = 'communications/message_detail.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            self.participant = ThreadParticipant.objects.filter(
+                thread_id=kwargs['pk'], user=request.user
+            ).select_related('thread').first()
+            if self.participant is None:
+                raise Http404("Suhbat topilmadi")
+            self.thread = self.participant.thread
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        if self.participant.unread_count:
+            Message.objects.mark_thread_read(request.user, self.thread)
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['thread'] = self.thread
+        context['thread_messages'] = self.thread.messages.select_related('sender').order_by('created_at', 'pk')
+        return context
+
+    def form_valid(self, form):
+        other = self.thread.participants.exclude(user=self.request.user).select_related('user').first()
+        recipient = other.user if other else self.request.user
+        Message.objects.send(self.request.user, recipient, form.cleaned_data['body'], thread=self.thread)
+        return redirect('communications:message_thread', pk=self.thread.pk)
+
+
+# ============================================================================
+# ANNOUNCEMENT VIEWS
+# ============================================================================
+
+class AnnouncementFeedView(CustomLoginRedirectMixin, TemplateView):
+    """
+    Foydalanuvchi e'lonlari - auditoriya bo'yicha keshlangan bo'laklardan
+    """
+    template_name = 'communications/announcements_list.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['feed'] = announcements.feed(self.request.user)
+        return context
+
+
+class AnnouncementManageView(AdminRequiredMixin, ListView):
+    """
+    E'lonlarni boshqarish (Admin) - filtrlash bilan
+    """
+    template_name = 'communications/announcement_manage.html'
+    context_object_name = 'announcements'
+    paginate_by = 30
+
+    def get_queryset(self):
+        queryset = Announcement.objects.select_related('course', 'group', 'branch', 'created_by')
+        self.filter_form = AnnouncementFilterForm(self.request.GET or None)
+        if self.filter_form.is_valid():
+            data = self.filter_form.cleaned_data
+            if data.get('target_audience'):
+                queryset = queryset.filter(target_audience=data['target_audience'])
+            if data.get('search'):
+                queryset = queryset.filter(title__icontains=data['search'])
+            if data.get('start_date'):
+                queryset = queryset.filter(created_at__date__gte=data['start_date'])
+            if data.get('end_date'):
+                queryset = queryset.filter(created_at__date__lte=data['end_date'])
+        return queryset.order_by('-created_at')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['filter_form'] = self.filter_form
+        return context
+
+
+class AnnouncementCreateView(AdminRequiredMixin, CreateView):
+    """E'lon yaratish - faqat o'z auditoriyasi lentasi keshi yangilanadi"""
+    form_class = AnnouncementForm
+    template_name = 'communications/announcement_form.html'
+    success_url = reverse_lazy('communications:announcement_manage')
+
+    def form_valid(self, form):
+        form.instance.created_by = self.request.user
+        response = super().form_valid(form)
+        messages.success(self.request, "E'lon joylandi.")
+        logger.info(
+            f"E'lon yaratildi: {self.object.segment}",
+            extra={'user_id': self.request.user.id, 'announcement_id': self.object.pk}
+        )
+        return response
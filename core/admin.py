@@ -1,6 +1,14 @@
 from django.contrib import admin
 
 
-from .models import Branch
+from .models import BackgroundJob, Branch
 
-admin.site.register(Branch)
\ No newline at end of file
+admin.site.register(Branch)
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'processed', 'total', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('payload', 'error')
+    ordering = ('-created_at',)
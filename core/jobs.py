@@ -0,0 +1,129 @@
+"""
+Fon vazifalari
+
+Uzoq ishlaydigan amallar (bildirishnoma tarqatish, import, tozalash) so'rov
+ichida emas, jarayon ichidagi ishchi oqimlarda bajariladi. Har bir vazifa
+BackgroundJob qatori: admin darhol job id oladi va progressni so'rab turadi.
+
+Vazifa funksiyasi: func(job, **payload). Progress job.set_total() / job.advance()
+bilan yoziladi (bitta UPDATE, F() orqali).
+
+Jarayon qayta ishga tushsa navbatda qolgan vazifalarni
+`python manage.py run_pending_jobs` bajaradi; jarayon bilan birga to'xtab
+RUNNING da qolganlari ham (recover_stale) - qayta boshlash xavfsiz bo'lsa
+navbatga qaytadi, aks holda FAILED.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+# Qayta boshlash xavfsiz (idempotent) vazifalar: purge faqat deleted_at belgilangan
+# qatorlarni o'chiradi, to'xtagan joyidan davom etadi
+RESUMABLE = {'core.purge.purge_job'}
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'BACKGROUND_JOB_WORKERS', 2),
+            thread_name_prefix='background-job',
+        )
+    return _executor
+
+
+def enqueue(name, payload=None, created_by=None):
+    """
+    Vazifani navbatga qo'yish. Ishchi tranzaksiya commit bo'lgach boshlanadi.
+    BACKGROUND_JOBS_EAGER=True bo'lsa (testlar) shu yerning o'zida bajariladi.
+    """
+    job = BackgroundJob.objects.create(name=name, payload=payload or {}, created_by=created_by)
+    if getattr(settings, 'BACKGROUND_JOBS_EAGER', False):
+        run(job.pk)
+        job.refresh_from_db()
+    else:
+        transaction.on_commit(lambda: get_executor().submit(run_in_thread, job.pk))
+    return job
+
+
+def run_in_thread(job_id):
+    close_old_connections()
+    try:
+        run(job_id)
+    finally:
+        connection.close()
+
+
+def run(job_id):
+    claimed = BackgroundJob.objects.filter(pk=job_id, status=BackgroundJob.Status.QUEUED).update(
+        status=BackgroundJob.Status.RUNNING, started_at=timezone.now(),
+    )
+    if not claimed:
+        return  # boshqa ishchi allaqachon olgan
+
+    job = BackgroundJob.objects.get(pk=job_id)
+    try:
+        import_string(job.name)(JobProgress(job), **job.payload)
+    except Exception as e:
+        logger.exception(f"Fon vazifasi xatosi: #{job.pk} {job.name}")
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            status=BackgroundJob.Status.FAILED, error=str(e), finished_at=timezone.now(),
+        )
+    else:
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            status=BackgroundJob.Status.DONE, finished_at=timezone.now(),
+        )
+
+
+def recover_stale(now=None):
+    """
+    BACKGROUND_JOB_STALE_AFTER dan beri RUNNING da turgan vazifalar (ishchi
+    jarayon o'lgan): RESUMABLE lar progressi tozalanib navbatga qaytadi,
+    qolganlari FAILED - yarim bajarilgan ishni qayta boshlash xavfli.
+
+    Returns:
+        tuple: (navbatga qaytganlar, FAILED qilinganlar)
+    """
+    now = now or timezone.now()
+    stale = BackgroundJob.objects.filter(
+        status=BackgroundJob.Status.RUNNING,
+        started_at__lt=now - timedelta(seconds=settings.BACKGROUND_JOB_STALE_AFTER),
+    )
+    requeued = stale.filter(name__in=RESUMABLE).update(
+        status=BackgroundJob.Status.QUEUED, started_at=None, processed=0,
+    )
+    failed = stale.update(
+        status=BackgroundJob.Status.FAILED, error="Ishchi jarayon to'xtadi", finished_at=now,
+    )
+    if requeued or failed:
+        logger.warning("To'xtab qolgan fon vazifalari", extra={'requeued': requeued, 'failed': failed})
+    return requeued, failed
+
+
+class JobProgress:
+    """Vazifa funksiyasiga beriladigan progress yozuvchi"""
+
+    def __init__(self, job):
+        self.job = job
+
+    @property
+    def id(self):
+        return self.job.pk
+
+    def set_total(self, total):
+        BackgroundJob.objects.filter(pk=self.job.pk).update(total=total)
+
+    def advance(self, count):
+        BackgroundJob.objects.filter(pk=self.job.pk).update(processed=F('processed') + count)
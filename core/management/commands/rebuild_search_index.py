@@ -0,0 +1,35 @@
+"""
+Qidiruv indeksini (core/search.py) noldan qurish
+
+Signallar kundalik o'zgarishlarni kuzatadi; bu buyruq birinchi o'rnatishda,
+queryset.update() / SQL bilan o'zgartirilgan ma'lumotdan keyin yoki
+hujjat tarkibi o'zgarganda ishlatiladi.
+
+Usage:
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --kind user --kind group
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = "To'liq matnli qidiruv indeksini qayta quradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', action='append', choices=list(search.KINDS), help="Faqat shu tur(lar)")
+
+    def handle(self, *args, **options):
+        if not search.available():
+            raise CommandError("Qidiruv indeksi faqat SQLite (FTS5) bazada ishlaydi.")
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            stats = search.rebuild(options['kind'])
+        for kind, count in stats.items():
+            self.stdout.write(f"{search.KINDS[kind].label}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Indeks qayta qurildi ({time.perf_counter() - started:.1f} s)"))
@@ -0,0 +1,32 @@
+"""
+Navbatda qolgan fon vazifalarini bajarish (masalan, server qayta ishga tushgandan keyin).
+Avval to'xtab qolgan (RUNNING) vazifalar tiklanadi - core.jobs.recover_stale.
+
+Usage:
+    python manage.py run_pending_jobs
+"""
+from django.core.management.base import BaseCommand
+
+from core.jobs import recover_stale, run
+from core.models import BackgroundJob
+
+
+class Command(BaseCommand):
+    help = "Navbatda (queued) qolgan fon vazifalarini ketma-ket bajaradi"
+
+    def handle(self, *args, **options):
+        requeued, failed = recover_stale()
+        if requeued or failed:
+            self.stdout.write(f"To'xtab qolgan vazifalar: {requeued} ta navbatga qaytdi, {failed} ta FAILED")
+
+        job_ids = list(BackgroundJob.objects.filter(
+            status=BackgroundJob.Status.QUEUED
+        ).order_by('created_at').values_list('pk', flat=True))
+
+        for job_id in job_ids:
+            run(job_id)
+            job = BackgroundJob.objects.get(pk=job_id)
+            style = self.style.SUCCESS if job.status == BackgroundJob.Status.DONE else self.style.ERROR
+            self.stdout.write(style(f"#{job.pk} {job.name}: {job.status} ({job.processed}/{job.total})"))
+
+        self.stdout.write(f"{len(job_ids)} ta vazifa bajarildi")
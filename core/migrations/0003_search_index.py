@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "title, body, ref UNINDEXED, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS search_index")
+
+
+class Migration(migrations.Migration):
+    """FTS5 qidiruv indeksi (core/search.py); mavjud ma'lumot: rebuild_search_index"""
+
+    dependencies = [
+        ('core', '0002_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
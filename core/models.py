@@ -1,7 +1,11 @@
 # core/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
+from . import search
+
 
 class TimestampedModel(models.Model):
     """Abstract model: created_at, updated_at"""
@@ -12,6 +16,41 @@ class TimestampedModel(models.Model):
         abstract = True
 
 
+class SoftDeleteManager(models.Manager):
+    """
+    deleted_at belgilangan qatorlar darhol ko'rinmaydi; haqiqiy o'chirish
+    (kaskad bog'liqlar bilan) fonda, bo'laklab - core/purge.py.
+    _base_manager filtrlanmaydi: FK orqali kirish va purge ularni ko'radi.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+    def soft_delete_updates(self):
+        """Qo'shimcha UPDATE qiymatlari (masalan, unique maydonni bo'shatish)"""
+        return {}
+
+    def after_soft_delete(self, ids):
+        """update() signal chaqirmaydi - keshlar/indekslar shu yerda yangilanadi"""
+
+    def soft_delete(self, ids, created_by=None):
+        """
+        Yashirish va fon purge vazifasini navbatga qo'yish.
+
+        Returns:
+            BackgroundJob | None: hech narsa o'chirilmagan bo'lsa None
+        """
+        from .jobs import enqueue
+
+        ids = list(self.filter(pk__in=ids).values_list('pk', flat=True))
+        if not ids:
+            return None
+        with transaction.atomic():
+            self.filter(pk__in=ids).update(deleted_at=timezone.now(), **self.soft_delete_updates())
+            self.after_soft_delete(ids)
+        return enqueue('core.purge.purge_job', {'model': self.model._meta.label, 'ids': ids}, created_by)
+
+
 class Branch(TimestampedModel):
     """Agar bir nechta filial bo'lsa - manzili va manageri"""
     name = models.CharField(max_length=150)
@@ -21,3 +60,106 @@ class Branch(TimestampedModel):
 
     def __str__(self):
         return f"{self.name}"
+
+
+class BackgroundJob(TimestampedModel):
+    """
+    Fon vazifasi (core/jobs.py): holati va bajarilish progressi.
+    Admin so'rovi darhol job id bilan qaytadi, progress shu qatordan o'qiladi.
+    """
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    name = models.CharField(max_length=150, help_text="Bajariladigan funksiya (dotted path)")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED, db_index=True)
+    payload = models.JSONField(default=dict, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='background_jobs')
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"#{self.pk} {self.name} ({self.status})"
+
+    @property
+    def percent(self):
+        if self.status == self.Status.DONE:
+            return 100
+        return int(self.processed * 100 / self.total) if self.total else 0
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.DONE, self.Status.FAILED)
+
+
+# ============================================================================
+# QIDIRUV INDEKSI SIGNALLARI (core/search.py)
+# ============================================================================
+
+SEARCH_USER_FIELDS = {'first_name', 'last_name', 'email', 'phone'}
+SEARCH_PARENT_FIELDS = {'parent_name', 'parent_phone'}
+
+
+def _touches(update_fields, fields):
+    # last_login, balance kabi qisman saqlashlar indeksga ta'sir qilmaydi
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+@receiver(post_save, sender='accounts.User')
+def index_user(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, SEARCH_USER_FIELDS):
+        search.index('user', [instance.pk])
+
+
+@receiver(post_save, sender='accounts.StudentProfile')
+def index_student_parent(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, SEARCH_PARENT_FIELDS):
+        search.index('user', [instance.user_id])
+
+
+@receiver(post_save, sender='courses.Course')
+def index_course(sender, instance, **kwargs):
+    search.index('course', [instance.pk])
+    # Guruh hujjatida kurs nomi bor
+    search.index('group', instance.groups.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender='courses.Group')
+def index_group(sender, instance, **kwargs):
+    search.index('group', [instance.pk])
+    search.index('homework', instance.homeworks.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender='academics.Homework')
+def index_homework(sender, instance, **kwargs):
+    search.index('homework', [instance.pk])
+
+
+@receiver(post_save, sender='finance.Payment')
+def index_payment(sender, instance, **kwargs):
+    search.index('payment', [instance.pk])
+
+
+SEARCH_DELETE_KINDS = {
+    'accounts.User': 'user',
+    'courses.Course': 'course',
+    'courses.Group': 'group',
+    'academics.Homework': 'homework',
+    'finance.Payment': 'payment',
+}
+
+
+def unindex_deleted(sender, instance, **kwargs):
+    search.remove(SEARCH_DELETE_KINDS[sender._meta.label], [instance.pk])
+
+
+for _label in SEARCH_DELETE_KINDS:
+    post_delete.connect(unindex_deleted, sender=_label, dispatch_uid=f'search-unindex-{_label}')
@@ -0,0 +1,76 @@
+"""
+Soft delete qilingan obyektlarni fonda bo'laklab o'chirish
+
+queryset.delete() Collector bilan barcha kaskad qatorlarni (davomat, vazifa
+topshiriqlari, to'lovlar, bildirishnomalar...) bitta so'rov ichida xotiraga
+yuklaydi va SQLite yozish qulfini soniyalab ushlab turadi. Bu yerda:
+
+    - CASCADE bog'liqlar Collector bilan bir xil qoidada topiladi va eng
+      chuqurlaridan boshlab o'chiriladi,
+    - har bo'lak (PURGE_CHUNK_SIZE qator) alohida qisqa tranzaksiya - qulf
+      bo'laklar orasida bo'shaydi,
+    - bo'lak oddiy delete() bilan o'chiriladi: signallar (qarzdorlik, qidiruv
+      indeksi, yopilgan davr himoyasi) ishlaydi, SET_NULL ham shu yerda,
+    - progress BackgroundJob ga yoziladi (core/jobs.py).
+
+Vazifa yiqilsa (masalan, yopilgan davr to'lovi) obyektlar yashirinligicha
+qoladi; sababi tuzatilgach purge qayta ishga tushirilishi mumkin.
+"""
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CASCADE
+from django.db.models.deletion import get_candidate_relations_to_delete
+
+logger = logging.getLogger(__name__)
+
+
+def dependents(model, queryset, path=()):
+    """
+    CASCADE bilan o'chadigan (model, queryset) lar - bolalar ota-onadan oldin.
+    queryset lar subquery: id ro'yxatlari xotirada qurilmaydi.
+    """
+    path = (*path, model)
+    for relation in get_candidate_relations_to_delete(model._meta):
+        related = relation.related_model
+        if relation.on_delete is not CASCADE or related in path:
+            continue
+        children = related._base_manager.filter(**{f'{relation.field.name}__in': queryset})
+        yield from dependents(related, children, path)
+        yield related, children
+
+
+def plan(model, ids):
+    """Bajarilish tartibidagi qadamlar: avval bog'liqlar, oxirida obyektlarning o'zi"""
+    root = model._base_manager.filter(pk__in=ids, deleted_at__isnull=False)
+    return [*dependents(model, root), (model, root)]
+
+
+def purge(model, ids, progress=None, chunk_size=None):
+    """
+    Returns:
+        dict: model label -> o'chirilgan qatorlar
+    """
+    chunk_size = chunk_size or settings.PURGE_CHUNK_SIZE
+    steps = plan(model, ids)
+    if progress:
+        progress.set_total(sum(queryset.count() for _, queryset in steps))
+
+    stats = {}
+    for step_model, queryset in steps:
+        while chunk := list(queryset.values_list('pk', flat=True)[:chunk_size]):
+            with transaction.atomic():
+                step_model._base_manager.filter(pk__in=chunk).delete()
+            label = step_model._meta.label
+            stats[label] = stats.get(label, 0) + len(chunk)
+            if progress:
+                progress.advance(len(chunk))
+    return stats
+
+
+def purge_job(job, model, ids):
+    """Fon vazifasi (SoftDeleteManager.soft_delete navbatga qo'yadi)"""
+    stats = purge(apps.get_model(model), ids, progress=job)
+    logger.info(f"Purge tugadi: {model}", extra={'job_id': job.id, 'ids': ids, 'deleted': stats})
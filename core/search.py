@@ -0,0 +1,275 @@
+"""
+To'liq matnli qidiruv (SQLite FTS5)
+
+Foydalanuvchilar (telefon, ota-ona ismi bilan), guruhlar, kurslar, uy
+vazifalari va to'lov izohlari bitta `search_index` virtual jadvalida.
+Qator rowid = obyekt_id * 8 + tur kodi - bitta obyektni qayta indekslash
+rowid bo'yicha (butun jadvalni ko'rmasdan), ORM filtrlari esa
+`pk__in=matching(...)` orqali indeksga subquery bilan ulanadi.
+
+Qidiruv so'zlar boshlanishi bo'yicha (prefiks, `"so'z"*`), natijalar
+bm25 bilan saralanadi (sarlavha tanadan 10 barobar og'ir). 2-4 harfli
+prefiks indeksi typeahead so'rovlarini terminlar ro'yxatini ko'rmasdan
+bajaradi.
+
+Indeks core/models.py dagi signallar bilan yangilanadi; bulk_create /
+update() signal chaqirmaydi - bunday joylar index() ni o'zi chaqiradi.
+To'liq qayta qurish: `python manage.py rebuild_search_index`.
+"""
+import re
+from dataclasses import dataclass
+from itertools import islice
+
+from django.apps import apps
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+
+TABLE = 'search_index'
+SLOTS = 8  # rowid dagi tur kodlari uchun joy
+MAX_TERMS = 8
+MIN_PREFIX = 2
+BATCH_SIZE = 2000
+RANK_LIMIT = 3000  # bundan ko'p mos qatorda bm25 o'rniga arzon tartib (search())
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "title, body, ref UNINDEXED, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+)
+DROP_SQL = f"DROP TABLE IF EXISTS {TABLE}"
+RANK = f"bm25({TABLE}, 10.0, 1.0)"
+
+WORD_RE = re.compile(r'\w+')
+
+
+def available():
+    """FTS5 faqat SQLite da; boshqa bazada ko'rinishlar eski icontains filtrlariga qaytadi"""
+    return connection.vendor == 'sqlite'
+
+
+# ============================================================================
+# HUJJATLAR - har tur uchun (pk, title, body, ref) qatorlari
+# ============================================================================
+
+def _filter(queryset, ids):
+    return queryset if ids is None else queryset.filter(pk__in=ids)
+
+
+def _phone_terms(*phones):
+    """+998 90 123-45-67 -> '998901234567 901234567' (kod bilan ham, kodsiz ham topilsin)"""
+    terms = []
+    for phone in phones:
+        digits = re.sub(r'\D', '', phone or '')
+        if digits:
+            terms.append(digits)
+            if len(digits) == 12 and digits.startswith('998'):
+                terms.append(digits[3:])
+    return terms
+
+
+def user_rows(ids=None):
+    queryset = _filter(apps.get_model('accounts', 'User').objects.order_by(), ids).values_list(
+        'pk', 'first_name', 'last_name', 'email', 'phone',
+        'student_profile__parent_name', 'student_profile__parent_phone',
+    )
+    for row in queryset.iterator(BATCH_SIZE):
+        yield user_document(*row)
+
+
+def user_document(pk, first_name, last_name, email, phone, parent_name, parent_phone):
+    body = ' '.join(filter(None, [email, parent_name, *_phone_terms(phone, parent_phone)]))
+    return pk, f"{first_name} {last_name}".strip() or email, body, pk
+
+
+def group_rows(ids=None):
+    queryset = _filter(apps.get_model('courses', 'Group').objects.order_by(), ids)
+    for pk, name, course in queryset.values_list('pk', 'name', 'course__title').iterator(BATCH_SIZE):
+        yield pk, name, course or '', pk
+
+
+def course_rows(ids=None):
+    queryset = _filter(apps.get_model('courses', 'Course').objects.order_by(), ids)
+    for pk, title, description in queryset.values_list('pk', 'title', 'description').iterator(BATCH_SIZE):
+        yield pk, title, description or '', pk
+
+
+def homework_rows(ids=None):
+    queryset = _filter(apps.get_model('academics', 'Homework').objects.order_by(), ids)
+    for pk, title, group_id, group in queryset.values_list(
+        'pk', 'title', 'group_id', 'group__name',
+    ).iterator(BATCH_SIZE):
+        yield pk, title, group or '', group_id
+
+
+def payment_rows(ids=None):
+    # Izohsiz to'lovlarda qidiradigan narsa yo'q
+    queryset = _filter(apps.get_model('finance', 'Payment').objects.order_by(), ids).exclude(note='')
+    for pk, amount, note, user_id in queryset.values_list(
+        'pk', 'amount', 'note', 'student__user_id',
+    ).iterator(BATCH_SIZE):
+        yield pk, f"To'lov #{pk}: {amount:,.0f}", note, user_id
+
+
+@dataclass(frozen=True)
+class Kind:
+    code: int
+    label: str
+    rows: object
+    url_name: str
+
+
+KINDS = {
+    'user': Kind(1, 'Foydalanuvchi', user_rows, 'admin_panel:user_detail'),
+    'group': Kind(2, 'Guruh', group_rows, 'admin_panel:group_detail'),
+    'course': Kind(3, 'Kurs', course_rows, 'admin_panel:course_detail'),
+    'homework': Kind(4, 'Uy vazifasi', homework_rows, 'admin_panel:group_detail'),
+    'payment': Kind(5, "To'lov", payment_rows, 'admin_panel:user_detail'),
+}
+KINDS_BY_CODE = {kind.code: name for name, kind in KINDS.items()}
+
+
+# ============================================================================
+# INDEKSNI YANGILASH
+# ============================================================================
+
+def _rowids(kind, ids):
+    code = KINDS[kind].code
+    return [(pk * SLOTS + code,) for pk in ids]
+
+
+def remove(kind, ids):
+    if ids and available():
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", _rowids(kind, ids))
+
+
+def _insert(cursor, kind, rows):
+    code = KINDS[kind].code
+    cursor.executemany(
+        f"INSERT INTO {TABLE} (rowid, title, body, ref) VALUES (%s, %s, %s, %s)",
+        [(pk * SLOTS + code, title, body, ref) for pk, title, body, ref in rows],
+    )
+
+
+def add(kind, rows):
+    """Yangi obyektlar hujjatlari (bulk_create dan keyin, qayta so'rovsiz)"""
+    if available():
+        with connection.cursor() as cursor:
+            _insert(cursor, kind, rows)
+
+
+def index(kind, ids):
+    """Berilgan obyektlarni qayta indekslash (o'chirilganlari indeksdan chiqadi)"""
+    ids = list(ids)
+    if not ids or not available():
+        return
+    remove(kind, ids)
+    with connection.cursor() as cursor:
+        _insert(cursor, kind, KINDS[kind].rows(ids))
+
+
+def rebuild(kinds=None, progress=None):
+    """
+    Indeksni noldan qurish. progress(kind, count) har paketdan keyin chaqiriladi.
+
+    Returns:
+        dict: tur -> indekslangan qatorlar
+    """
+    stats = {}
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_SQL)
+        for kind in kinds or KINDS:
+            code = KINDS[kind].code
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid %% %s = %s", [SLOTS, code])
+            rows, stats[kind] = KINDS[kind].rows(), 0
+            while batch := list(islice(rows, BATCH_SIZE)):
+                _insert(cursor, kind, batch)
+                stats[kind] += len(batch)
+                if progress:
+                    progress(kind, len(batch))
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return stats
+
+
+# ============================================================================
+# QIDIRUV
+# ============================================================================
+
+def build_query(text):
+    """
+    Foydalanuvchi matni -> FTS5 so'rovi: har so'z prefiks sifatida, hammasi AND.
+    FTS5 sintaksisi (qo'shtirnoq, NEAR, -) foydalanuvchidan o'tmaydi; bitta
+    harfli so'zlar tashlanadi - ular prefiks indeksida yo'q va butun terminlar
+    ro'yxatini ko'rishga majbur qiladi.
+    """
+    terms = [term for term in WORD_RE.findall((text or '').lower()) if len(term) >= MIN_PREFIX]
+    return ' '.join(f'"{term}"*' for term in terms[:MAX_TERMS])
+
+
+def matching(kind, text):
+    """
+    ORM uchun subquery: Model.objects.filter(pk__in=matching('user', q)).
+    Bo'sh so'rov hech narsaga mos kelmaydi.
+    """
+    return RawSQL(
+        f"SELECT rowid / {SLOTS} FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid %% {SLOTS} = {KINDS[kind].code}",
+        (build_query(text) or '""',),
+    )
+
+
+def filter_queryset(queryset, kind, text, field='pk'):
+    return queryset.filter(**{f'{field}__in': matching(kind, text)})
+
+
+@dataclass(frozen=True)
+class Result:
+    kind: str
+    id: int
+    title: str
+    body: str
+    url: str
+
+    @property
+    def label(self):
+        return KINDS[self.kind].label
+
+
+def search(text, kinds=None, limit=10):
+    """
+    Typeahead: eng mos `limit` ta natija (barcha turlardan yoki `kinds` dan).
+
+    bm25 har bir mos qatorni baholaydi (~2 mks/qator): 100k foydalanuvchida
+    "al" kabi keng prefiks 20k+ qatorga mos keladi va 40+ ms oladi. Shuning
+    uchun avval sanaladi (~1-2 ms); RANK_LIMIT dan ko'p bo'lsa reyting o'rniga
+    sarlavhada mos kelganlar, yangilari birinchi (rowid indeksi bo'yicha).
+
+    Returns:
+        list[Result]: juda qisqa so'rov - bo'sh
+    """
+    query = build_query(text)
+    if not query or not available():
+        return []
+    columns = f"SELECT rowid, title, body, ref FROM {TABLE} WHERE {TABLE} MATCH %s"
+    kind_filter = ''
+    if kinds:
+        kind_filter = f" AND rowid %% {SLOTS} IN ({', '.join(str(KINDS[kind].code) for kind in kinds)})"
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {TABLE} WHERE {TABLE} MATCH %s{kind_filter}", [query])
+        if cursor.fetchone()[0] <= RANK_LIMIT:
+            cursor.execute(f"{columns}{kind_filter} ORDER BY {RANK} LIMIT %s", [query, limit])
+            rows = cursor.fetchall()
+        else:
+            cursor.execute(f"{columns}{kind_filter} ORDER BY rowid DESC LIMIT %s", [f'title : ({query})', limit])
+            rows = cursor.fetchall()
+            if len(rows) < limit:
+                # Masalan telefon prefiksi - faqat tanada mos keladi
+                cursor.execute(f"{columns}{kind_filter} ORDER BY rowid DESC LIMIT %s", [query, limit * 2])
+                seen = {row[0] for row in rows}
+                rows += [row for row in cursor.fetchall() if row[0] not in seen][:limit - len(rows)]
+
+    results = []
+    for rowid, title, body, ref in rows:
+        kind = KINDS_BY_CODE[rowid % SLOTS]
+        results.append(Result(kind, rowid // SLOTS, title, body, reverse(KINDS[kind].url_name, args=[ref])))
+    return results
@@ -1,3 +1,234 @@
-from django.test import TestCase
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from academics.models import Attendance, Homework, HomeworkSubmission
+from communications.models import Notification
+from accounts.models import StudentProfile, User
+from courses.models import Course, Group
+from finance.models import DebtorBalance, Invoice, Payment
+from . import purge, search
+from .models import BackgroundJob
+
+
+def titles(text, **kwargs):
+    return [result.title for result in search.search(text, **kwargs)]
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.ali = User.objects.create_user(
+            email='ali.valiyev@example.com', first_name='Ali', last_name='Valiyev', phone='+998 90 123-45-67',
+        )
+        StudentProfile.objects.filter(user=self.ali).update(parent_name='Karim Valiyev')
+        self.ali.student_profile.refresh_from_db()
+        self.ali.student_profile.save()
+        self.course = Course.objects.create(title='Python asoslari')
+        self.group = Group.objects.create(name='PY-101', course=self.course)
+
+    def test_users_found_by_name_email_phone_and_parent(self):
+        self.assertEqual(titles('ali val'), ['Ali Valiyev'])
+        self.assertEqual(titles('VALIYEV@example'), ['Ali Valiyev'])
+        self.assertEqual(titles('90123'), ['Ali Valiyev'])  # +998 siz
+        self.assertEqual(titles('karim'), ['Ali Valiyev'])
+        self.assertEqual(titles('a'), [])  # bitta harf - typeahead qidirmaydi
+        # FTS5 sintaksisi oddiy so'z sifatida qidiriladi, xato bermaydi
+        self.assertEqual(titles('"ali*'), ['Ali Valiyev'])
+        self.assertEqual(titles('ali OR NEAR('), [])
+
+    def test_signals_keep_index_in_sync(self):
+        self.ali.first_name = 'Alisher'
+        self.ali.save()
+        self.assertEqual(titles('alisher'), ['Alisher Valiyev'])
+
+        with mock.patch.object(search, 'index') as index:
+            self.ali.save(update_fields=['last_login'])
+        index.assert_not_called()
+
+        self.course.title = 'Django'
+        self.course.save()
+        self.assertEqual(titles('django', kinds=['group']), ['PY-101'])
+
+        Homework.objects.create(group=self.group, title='Rekursiya mashqlari')
+        self.group.name = 'PY-202'
+        self.group.save()
+        [homework] = search.search('rekursiya')
+        self.assertEqual((homework.kind, homework.body), ('homework', 'PY-202'))
+        self.assertEqual(homework.url, reverse('admin_panel:group_detail', args=[self.group.pk]))
+
+        self.ali.delete()
+        self.assertEqual(titles('alisher'), [])
+
+    def test_payment_notes(self):
+        payment = Payment.objects.create(student=self.ali.student_profile, amount=Decimal('250000'), note='Click orqali oktabr')
+        Payment.objects.create(student=self.ali.student_profile, amount=Decimal('100000'))
+
+        [result] = search.search('oktabr')
+        self.assertEqual((result.kind, result.id), ('payment', payment.pk))
+        self.assertEqual(result.url, reverse('admin_panel:user_detail', args=[self.ali.pk]))
+
+        payment.note = ''
+        payment.save()
+        self.assertEqual(titles('oktabr'), [])
+
+    def test_broad_prefix_skips_ranking_and_fills_from_body(self):
+        User.objects.create_user(email='b@example.com', first_name='Bobur', phone='+998901112233')
+
+        with mock.patch.object(search, 'RANK_LIMIT', 0):
+            self.assertEqual(titles('bo', limit=1), ['Bobur'])
+            # Telefon faqat tanada - sarlavha natijalari yetmasa to'ldiriladi
+            self.assertEqual(titles('99890'), ['Bobur', 'Ali Valiyev'])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.TABLE}")
+        self.assertEqual(titles('ali'), [])
+
+        out = io.StringIO()
+        call_command('rebuild_search_index', stdout=out)
+
+        self.assertEqual(titles('ali'), ['Ali Valiyev'])
+        self.assertEqual(titles('py', kinds=['group']), ['PY-101'])
+        self.assertIn('Foydalanuvchi: 1', out.getvalue())
+
+
+class SearchViewTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', type=User.UserType.ADMIN)
+        self.student = User.objects.create_user(email='s@example.com', first_name='Sardor', last_name='Karimov')
+        User.objects.create_user(email='o@example.com', first_name='Otabek', last_name='Nazarov')
+
+    def test_typeahead_endpoint(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.get(reverse('search:global'), {'q': 'sar'})
+
+        self.assertEqual(response.json()['results'], [{
+            'kind': 'user', 'label': 'Foydalanuvchi', 'title': 'Sardor Karimov', 'body': 's@example.com',
+            'url': reverse('admin_panel:user_detail', args=[self.student.pk]),
+        }])
+
+    def test_typeahead_requires_admin(self):
+        self.client.force_login(self.student)
+
+        self.assertEqual(self.client.get(reverse('search:global'), {'q': 'sar'}).status_code, 302)
+
+    def test_user_list_search_uses_index(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.get(reverse('admin_panel:user_list'), {'search': 'karim'})
+
+        self.assertEqual(list(response.context['users']), [self.student])
+
+
+@override_settings(BACKGROUND_JOBS_EAGER=True, PURGE_CHUNK_SIZE=2)
+class SoftDeletePurgeTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', type=User.UserType.ADMIN)
+        self.student = User.objects.create_user(email='s@example.com', first_name='Sardor')
+        self.other = User.objects.create_user(email='o@example.com')
+        self.group = Group.objects.create(name='PY-1', course=Course.objects.create(title='Python'))
+        profile = self.student.student_profile
+        self.group.students.add(profile, self.other.student_profile)
+        homework = Homework.objects.create(group=self.group, title='Vazifa')
+        for day in range(1, 6):
+            Attendance.objects.create(group=self.group, student=profile, date=f'2026-09-0{day}', added_by=self.admin)
+        HomeworkSubmission.objects.create(homework=homework, student=profile, checked_by=self.admin)
+        Payment.objects.create(student=profile, amount=Decimal('100'), note='Sentabr')
+        Notification.objects.bulk_create(Notification(user=self.student, title=f'N{i}', message='.') for i in range(3))
+
+    def test_bulk_delete_hides_then_purges_in_chunks(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.post(reverse('admin_panel:user_bulk'), {
+            'action': 'delete', 'user_ids': [self.student.pk, self.admin.pk],
+        })
+
+        self.assertRedirects(response, reverse('admin_panel:user_list'), fetch_redirect_response=False)
+        self.assertTrue(User.objects.filter(pk=self.admin.pk).exists())  # o'zini o'chirmaydi
+        self.assertFalse(User._base_manager.filter(pk=self.student.pk).exists())
+        self.assertFalse(Attendance.objects.exists())
+        self.assertFalse(HomeworkSubmission.objects.exists())
+        self.assertFalse(Payment.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(list(self.group.students.all()), [self.other.student_profile])
+
+        job = BackgroundJob.objects.get(name='core.purge.purge_job')
+        self.assertEqual(job.status, BackgroundJob.Status.DONE)
+        self.assertEqual((job.total, job.processed), (13, 13))
+
+    def test_soft_delete_hides_immediately_and_frees_email(self):
+        with override_settings(BACKGROUND_JOBS_EAGER=False), self.captureOnCommitCallbacks():
+            job = User.objects.soft_delete([self.student.pk])
+
+        self.assertEqual(job.status, BackgroundJob.Status.QUEUED)
+        self.assertFalse(User.objects.filter(pk=self.student.pk).exists())
+        self.assertEqual(titles('sardor'), [])
+        self.assertTrue(Attendance.objects.exists())  # purge hali ishlamagan
+        # Email bo'shadi - purge tugamasdan qayta ro'yxatdan o'tish mumkin
+        User.objects.create_user(email='s@example.com')
+
+    def test_purge_runs_children_before_parents_in_short_transactions(self):
+        User.objects.filter(pk=self.student.pk).update(deleted_at='2026-10-01T00:00Z')
+        steps = [model._meta.label for model, _ in purge.plan(User, [self.student.pk])]
+
+        self.assertLess(steps.index('academics.Attendance'), steps.index('accounts.StudentProfile'))
+        self.assertLess(steps.index('accounts.StudentProfile'), steps.index('accounts.User'))
+        self.assertEqual(steps[-1], 'accounts.User')
+
+        progress = mock.Mock()
+        stats = purge.purge(User, [self.student.pk], progress=progress)
+
+        self.assertEqual(stats['academics.Attendance'], 5)
+        progress.set_total.assert_called_once_with(13)
+        # Har bo'lak (ko'pi bilan 2 qator) alohida tranzaksiya: 5 davomat -> 2 + 2 + 1
+        chunks = [c.args[0] for c in progress.advance.call_args_list]
+        self.assertEqual((len(chunks), max(chunks), sum(chunks)), (10, 2, 13))
+
+    def test_soft_deleted_student_is_not_billed_or_counted_before_purge(self):
+        DebtorBalance.objects.refresh()
+        self.assertTrue(DebtorBalance.objects.filter(student__user=self.student).exists())
+
+        with override_settings(BACKGROUND_JOBS_EAGER=False), self.captureOnCommitCallbacks():
+            User.objects.soft_delete([self.student.pk])
+
+        billed = [row[0] for row in Invoice.objects.billable_enrollments(date(2026, 9, 1))]
+        self.assertEqual(billed, [self.other.student_profile.pk])
+        self.assertEqual(self.group.active_students_count(), 1)
+        self.assertFalse(DebtorBalance.objects.filter(student__user_id=self.student.pk).exists())
+
+    def test_stale_running_purge_is_resumed(self):
+        User.objects.filter(pk=self.student.pk).update(deleted_at=timezone.now())
+        started = timezone.now() - timedelta(days=1)
+        stale = BackgroundJob.objects.create(
+            name='core.purge.purge_job', payload={'model': 'accounts.User', 'ids': [self.student.pk]},
+            status=BackgroundJob.Status.RUNNING, started_at=started, processed=4,
+        )
+        other = BackgroundJob.objects.create(
+            name='communications.fanout.send_job', status=BackgroundJob.Status.RUNNING, started_at=started,
+        )
+
+        call_command('run_pending_jobs', stdout=io.StringIO())
+
+        stale.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((stale.status, stale.processed), (BackgroundJob.Status.DONE, 13))
+        self.assertEqual(other.status, BackgroundJob.Status.FAILED)
+        self.assertFalse(User._base_manager.filter(pk=self.student.pk).exists())
+
+    def test_group_soft_delete(self):
+        self.client.force_login(self.admin)
+
+        self.client.post(reverse('admin_panel:group_delete', args=[self.group.pk]))
+
+        self.assertFalse(Group._base_manager.exists())
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(User.objects.filter(pk=self.student.pk).count(), 1)
+        Group.objects.create(name='PY-1', course=Course.objects.get())
@@ -0,0 +1,8 @@
+# core/urls_jobs.py
+from django.urls import path
+from .views import JobDetailView, JobStatusView
+
+urlpatterns = [
+    path('<int:pk>/', JobDetailView.as_view(), name='detail'),
+    path('<int:pk>/status/', JobStatusView.as_view(), name='status'),
+]
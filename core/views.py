@@ -1,8 +1,14 @@
-from django.views.generic import TemplateView
-from accounts.mixins import StudentRequiredMixin, TeacherRequiredMixin #, AdminRequiredMixin
+from django.http import JsonResponse
+from django.views import View
+from django.views.generic import DetailView, TemplateView
+from accounts.mixins import AdminRequiredMixin, StudentRequiredMixin, TeacherRequiredMixin
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from accounts.models import User 
+from . import search
+from .models import BackgroundJob
+
+SEARCH_LIMIT = 10
 
 class StudentDashboardView(StudentRequiredMixin, TemplateView):
     template_name = 'student/dashboard.html'
@@ -39,4 +45,42 @@ class IndexView(TemplateView):
     def dispatch(self, request, *args, **kwargs):
         if request.user.is_authenticated:
             return custom_login_redirect(request)
-        return super().dispatch(request, *args, **kwargs)
\ No newline at end of file
+        return super().dispatch(request, *args, **kwargs)
+
+
+class JobDetailView(AdminRequiredMixin, DetailView):
+    """Fon vazifasi sahifasi - progress JobStatusView orqali so'rab turiladi"""
+    model = BackgroundJob
+    template_name = 'core/job_detail.html'
+    context_object_name = 'job'
+
+
+class JobStatusView(AdminRequiredMixin, View):
+    """Fon vazifasi holati (JSON, polling uchun)"""
+
+    def get(self, request, pk):
+        job = BackgroundJob.objects.filter(pk=pk).only(
+            'status', 'total', 'processed', 'error', 'finished_at',
+        ).first()
+        if job is None:
+            return JsonResponse({'error': 'not found'}, status=404)
+
+        return JsonResponse({
+            'status': job.status,
+            'total': job.total,
+            'processed': job.processed,
+            'percent': job.percent,
+            'finished': job.is_finished,
+            'error': job.error,
+        })
+
+
+class SearchView(AdminRequiredMixin, View):
+    """Global qidiruv (typeahead, JSON) - core/search.py FTS5 indeksi"""
+
+    def get(self, request):
+        results = search.search(request.GET.get('q', ''), limit=SEARCH_LIMIT)
+        return JsonResponse({'results': [
+            {'kind': result.kind, 'label': result.label, 'title': result.title, 'body': result.body[:120], 'url': result.url}
+            for result in results
+        ]})
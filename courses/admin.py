@@ -13,8 +13,8 @@ class CourseAdmin(admin.ModelAdmin):
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ('name', 'course', 'teacher', 'status', 'start_date', 'end_date')
-    list_filter = ('status', 'course')
+    list_display = ('name', 'course', 'branch', 'teacher', 'status', 'start_date', 'end_date')
+    list_filter = ('status', 'course', 'branch')
     search_fields = ('name', 'course__title')
     filter_horizontal = ('students',)
 
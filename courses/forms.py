@@ -118,7 +118,7 @@ class GroupForm(forms.ModelForm):
     """
     class Meta:
         model = Group
-        fields = ['name', 'course', 'teacher', 'support_teacher', 'start_date', 'end_date', 'status']
+        fields = ['name', 'course', 'branch', 'teacher', 'support_teacher', 'start_date', 'end_date', 'status']
         widgets = {
             'name': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -129,6 +129,9 @@ class GroupForm(forms.ModelForm):
                 'class': 'form-control',
                 'required': True
             }),
+            'branch': forms.Select(attrs={
+                'class': 'form-control',
+            }),
             'teacher': forms.Select(attrs={
                 'class': 'form-control',
                 'required': True
@@ -154,6 +157,7 @@ class GroupForm(forms.ModelForm):
         labels = {
             'name': 'Guruh nomi',
             'course': 'Kurs',
+            'branch': 'Filial',
             'teacher': 'O\'qituvchi',
             'support_teacher': 'Qo\'shimcha o\'qituvchi',
             'start_date': 'Boshlash sanasi',
@@ -204,6 +208,8 @@ class GroupAddStudentsForm(forms.Form):
     """
     Guruhga talabalarni qo'shish formasі
     """
+    MAX_EMAILS = 5000
+    
     students = forms.CharField(
         label="Talabaları qo'shish",
         widget=forms.Textarea(attrs={
@@ -226,6 +232,8 @@ class GroupAddStudentsForm(forms.Form):
         
         if not emails:
             raise ValidationError("Hech qanday to'g'ri email topilmadi.")
+        if len(emails) > self.MAX_EMAILS:
+            raise ValidationError(f"Bir martada ko'pi bilan {self.MAX_EMAILS} ta email kiriting.")
         
         # Email validatsiyasi
         from django.core.validators import validate_email
@@ -238,6 +246,52 @@ class GroupAddStudentsForm(forms.Form):
         return emails
 
 
+class StudentImportForm(forms.Form):
+    """
+    Talabalarni CSV fayldan ommaviy import qilish formasі
+    """
+    file = forms.FileField(
+        label="Talabalar ro'yxati",
+        widget=forms.FileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv',
+        }),
+        help_text="CSV (UTF-8): email, first_name, last_name, phone, password, parent_name, parent_phone, join_date"
+    )
+    
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.select_related('course').order_by('name'),
+        required=False,
+        label="Guruhga qo'shish",
+        widget=forms.Select(attrs={
+            'class': 'form-control',
+        })
+    )
+    
+    def clean_file(self):
+        file = self.cleaned_data.get('file')
+        
+        if file:
+            if not file.name.lower().endswith('.csv'):
+                raise ValidationError("Faqat CSV formatidagi fayllar qabul qilinadi.")
+            
+            # Fayl hajmini tekshirish (maks 50 MB ~ 300k qator)
+            if file.size > 50 * 1024 * 1024:
+                raise ValidationError("Fayl hajmi 50 MB dan oshmasligi kerak.")
+            
+            # Faqat sarlavha qatori tekshiriladi - qolgani fon vazifasida oqim bilan o'qiladi
+            try:
+                header = file.readline().decode('utf-8-sig').lower()
+            except UnicodeDecodeError:
+                raise ValidationError("Fayl UTF-8 kodirovkasida bo'lishi kerak.")
+            finally:
+                file.seek(0)
+            if 'email' not in [column.strip().strip('"') for column in header.split(',')]:
+                raise ValidationError("Kerakli ustun topilmadi: email")
+        
+        return file
+
+
 class GroupFilterForm(forms.Form):
     """
     Guruhlarni filtrlash formasі
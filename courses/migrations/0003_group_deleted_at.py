@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_group_branch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
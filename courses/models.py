@@ -1,8 +1,12 @@
 # courses/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed
 from django.utils.text import slugify
 from django.utils import timezone
-from core.models import TimestampedModel
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Cast, Concat
+from core import search
+from core.models import TimestampedModel, SoftDeleteManager
 
 
 class CourseLevel(models.TextChoices):
@@ -40,15 +44,123 @@ class GroupStatus(models.TextChoices):
     ARCHIVED = 'archived', 'Archived'
 
 
+class EnrollmentResult(models.TextChoices):
+    ADDED = 'added', "Qo'shildi"
+    ALREADY_ENROLLED = 'already_enrolled', "Allaqachon guruhda"
+    REMOVED = 'removed', 'Chiqarildi'
+    NOT_ENROLLED = 'not_enrolled', "Guruhda emas"
+    NOT_FOUND = 'not_found', 'Topilmadi'
+    NOT_STUDENT = 'not_student', 'Talaba emas'
+
+
+class GroupManager(SoftDeleteManager):
+    def soft_delete_updates(self):
+        # unique_together (name, course) - xuddi shu nomli yangi guruh ochish mumkin bo'lsin
+        return {'name': Concat(F('name'), Value(" (o'chirilgan #"), Cast('pk', CharField()), Value(')'))}
+
+    def after_soft_delete(self, ids):
+        from communications.models import bump_audience_version
+
+        search.remove('group', ids)
+        bump_audience_version('groups')
+
+    # ------------------------------------------------------------------
+    # Guruhga ommaviy yozish / chiqarish
+    # ------------------------------------------------------------------
+
+    def _resolve_students(self, emails):
+        """
+        Emaillar -> StudentProfile id (bitta IN so'rov). Natija: {email: profile_id | result}
+        """
+        from accounts.models import User
+
+        emails = list(dict.fromkeys(User.objects.normalize_email(email.strip()) for email in emails if email.strip()))
+        found = dict(
+            User.objects.filter(email__in=emails, type=User.UserType.STUDENT).values_list('email', 'student_profile__id')
+        )
+        # Talaba bo'lmaganlarni ajratish uchun ikkinchi so'rov faqat topilmaganlar bo'lsa
+        missing = [email for email in emails if not found.get(email)]
+        others = set(User.objects.filter(email__in=missing).values_list('email', flat=True)) if missing else set()
+        return {
+            email: found.get(email) or (EnrollmentResult.NOT_STUDENT if email in others else EnrollmentResult.NOT_FOUND)
+            for email in emails
+        }
+
+    def _roster(self, group, profile_ids):
+        through = self.model.students.through
+        return set(through.objects.filter(group_id=group.pk, studentprofile_id__in=profile_ids).values_list(
+            'studentprofile_id', flat=True,
+        ))
+
+    def _send_m2m(self, group, action, profile_ids):
+        """Oddiy add()/remove() bilan bir xil signal - auditoriya/prognoz keshlari eskiradi"""
+        from accounts.models import StudentProfile
+
+        m2m_changed.send(
+            sender=self.model.students.through, instance=group, action=action, reverse=False,
+            model=StudentProfile, pk_set=set(profile_ids), using=self.db,
+        )
+
+    def add_students(self, group, profile_ids):
+        """Ro'yxatdagi farqni yozish: bitta bulk_create(ignore_conflicts). Returns: qo'shilgan id lar"""
+        roster = self._roster(group, profile_ids)
+        new_ids = [pk for pk in dict.fromkeys(profile_ids) if pk not in roster]
+        if new_ids:
+            through = self.model.students.through
+            self._send_m2m(group, 'pre_add', new_ids)
+            through.objects.bulk_create(
+                [through(group_id=group.pk, studentprofile_id=pk) for pk in new_ids], ignore_conflicts=True,
+            )
+            self._send_m2m(group, 'post_add', new_ids)
+        return new_ids
+
+    def remove_students(self, group, profile_ids):
+        """Bitta DELETE ... IN. Returns: chiqarilgan id lar"""
+        roster = self._roster(group, profile_ids)
+        removed = [pk for pk in dict.fromkeys(profile_ids) if pk in roster]
+        if removed:
+            self._send_m2m(group, 'pre_remove', removed)
+            self.model.students.through.objects.filter(group_id=group.pk, studentprofile_id__in=removed).delete()
+            self._send_m2m(group, 'post_remove', removed)
+        return removed
+
+    def _bulk(self, group, emails, change, done, skipped):
+        resolved = self._resolve_students(emails)
+        profile_ids = [value for value in resolved.values() if isinstance(value, int)]
+        with transaction.atomic():
+            changed = set(change(group, profile_ids))
+        return {
+            email: value if not isinstance(value, int) else (done if value in changed else skipped)
+            for email, value in resolved.items()
+        }
+
+    def enroll(self, group, emails):
+        """
+        Talabalarni emaillar bo'yicha guruhga yozish.
+
+        Returns:
+            dict: email -> EnrollmentResult (kiritilgan tartibda, takrorlar birlashtirilgan)
+        """
+        return self._bulk(group, emails, self.add_students, EnrollmentResult.ADDED, EnrollmentResult.ALREADY_ENROLLED)
+
+    def unenroll(self, group, emails):
+        """Emaillar bo'yicha guruhdan chiqarish; natija enroll() bilan bir xil ko'rinishda"""
+        return self._bulk(group, emails, self.remove_students, EnrollmentResult.REMOVED, EnrollmentResult.NOT_ENROLLED)
+
+
 class Group(TimestampedModel):
     name = models.CharField(max_length=255)
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='groups')
     teacher = models.ForeignKey('accounts.TeacherProfile', on_delete=models.SET_NULL, null=True, blank=True, related_name='groups')
     support_teacher = models.ForeignKey('accounts.SupportTeacherProfile', on_delete=models.SET_NULL, null=True, blank=True, related_name='support_groups')
     students = models.ManyToManyField('accounts.StudentProfile', blank=True, related_name='groups')
+    branch = models.ForeignKey('core.Branch', on_delete=models.SET_NULL, null=True, blank=True, related_name='groups')
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
     status = models.CharField(max_length=30, choices=GroupStatus.choices, default=GroupStatus.ACTIVE)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = GroupManager()
 
     class Meta:
         unique_together = ('name', 'course')
@@ -58,7 +170,7 @@ class Group(TimestampedModel):
         return f"{self.name} — {self.course.title}"
 
     def active_students_count(self):
-        return self.students.filter(status='active').count()
+        return self.students.filter(status='active', user__deleted_at__isnull=True).count()
 
 
 def material_upload_path(instance, filename):
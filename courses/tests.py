@@ -1,3 +1,106 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from accounts.models import StudentProfile, User
+from communications.models import AUDIENCE_VERSION_KEY
+from .models import Course, EnrollmentResult, Group
+
+
+def create_students(count, start=0):
+    users = User.objects.bulk_create(
+        User(email=f's{i}@example.com', type=User.UserType.STUDENT) for i in range(start, start + count)
+    )
+    StudentProfile.objects.bulk_create(StudentProfile(user_id=user.pk) for user in users)
+    return users
+
+
+class GroupEnrollmentTests(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name='PY-1', course=Course.objects.create(title='Python'))
+        create_students(3)
+        User.objects.create_user(email='t@example.com', type=User.UserType.TEACHER)
+        self.group.students.add(StudentProfile.objects.get(user__email='s0@example.com'))
+
+    def test_enroll_reports_outcome_per_email(self):
+        report = Group.objects.enroll(self.group, [
+            's0@example.com', 's1@EXAMPLE.COM', 's1@example.com', 't@example.com', 'yoq@example.com', ' s2@example.com ',
+        ])
+
+        self.assertEqual(report, {
+            's0@example.com': EnrollmentResult.ALREADY_ENROLLED,
+            's1@example.com': EnrollmentResult.ADDED,
+            't@example.com': EnrollmentResult.NOT_STUDENT,
+            'yoq@example.com': EnrollmentResult.NOT_FOUND,
+            's2@example.com': EnrollmentResult.ADDED,
+        })
+        self.assertEqual(
+            sorted(self.group.students.values_list('user__email', flat=True)),
+            ['s0@example.com', 's1@example.com', 's2@example.com'],
+        )
+
+    def test_unenroll(self):
+        report = Group.objects.unenroll(self.group, ['s0@example.com', 's1@example.com'])
+
+        self.assertEqual(report, {
+            's0@example.com': EnrollmentResult.REMOVED,
+            's1@example.com': EnrollmentResult.NOT_ENROLLED,
+        })
+        self.assertFalse(self.group.students.exists())
+
+    def test_enrolling_2k_students_takes_a_few_queries(self):
+        create_students(2000, start=100)
+        emails = [f's{i}@example.com' for i in range(100, 2100)]
+        version = cache.get(AUDIENCE_VERSION_KEY.format('groups'))
+
+        with CaptureQueriesContext(connection) as queries:
+            report = Group.objects.enroll(self.group, emails)
+
+        # email IN, ro'yxat farqi va bitta bulk_create - SQLite o'zgaruvchilar chegarasi uni
+        # 499 qatorlik INSERT larga bo'ladi, qator boshiga so'rov yo'q
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertEqual(statements.count('SELECT'), 2)
+        self.assertEqual(statements.count('INSERT'), 5)
+        self.assertLessEqual(len(statements), 9)
+
+        self.assertEqual(set(report.values()), {EnrollmentResult.ADDED})
+        self.assertEqual(self.group.students.count(), 2001)
+        # m2m_changed yuborildi - auditoriya keshi eskirdi
+        self.assertNotEqual(cache.get(AUDIENCE_VERSION_KEY.format('groups')), version)
+
+
+class GroupEnrollViewTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', type=User.UserType.ADMIN)
+        self.group = Group.objects.create(name='PY-1', course=Course.objects.create(title='Python'))
+        create_students(2)
+        self.client.force_login(self.admin)
+
+    def test_enroll_and_remove_via_form(self):
+        url = reverse('admin_panel:group_enroll', args=[self.group.pk])
+
+        response = self.client.post(url, {'students': 's0@example.com\ns1@example.com\nyoq@example.com'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report'], [
+            ('s0@example.com', EnrollmentResult.ADDED),
+            ('s1@example.com', EnrollmentResult.ADDED),
+            ('yoq@example.com', EnrollmentResult.NOT_FOUND),
+        ])
+        self.assertContains(response, 'Topilmadi')
+
+        self.client.post(url, {'students': 's1@example.com', 'remove': ''})
+        self.assertEqual(list(self.group.students.values_list('user__email', flat=True)), ['s0@example.com'])
+
+    def test_remove_single_student(self):
+        profile = StudentProfile.objects.get(user__email='s0@example.com')
+        self.group.students.add(profile)
+
+        response = self.client.post(reverse('admin_panel:group_remove_student', args=[self.group.pk, profile.pk]))
+
+        self.assertRedirects(
+            response, reverse('admin_panel:group_detail', args=[self.group.pk]), fetch_redirect_response=False,
+        )
+        self.assertFalse(self.group.students.exists())
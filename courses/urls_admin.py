@@ -14,6 +14,7 @@ from .views import (
     AdminUserEditView,
     AdminUserDeleteView,
     AdminUserBulkActionView,
+    AdminStudentImportView,
     
     # Course Management
     AdminCourseListView,
@@ -54,6 +55,7 @@ urlpatterns = [
     path('users/<int:pk>/edit/', AdminUserEditView.as_view(), name='user_edit'),
     path('users/<int:pk>/delete/', AdminUserDeleteView.as_view(), name='user_delete'),
     path('users/bulk-action/', AdminUserBulkActionView.as_view(), name='user_bulk'),
+    path('users/import/', AdminStudentImportView.as_view(), name='user_import'),
     
     # ========================================
     # COURSE MANAGEMENT
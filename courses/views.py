@@ -3,11 +3,15 @@
 Admin Panel Views - Fixed for your models
 """
 import logging
+import uuid
+from collections import Counter
+from pathlib import Path
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.views.generic import (
     TemplateView, ListView, DetailView, 
-    CreateView, UpdateView, DeleteView, View
+    CreateView, UpdateView, DeleteView, FormView, View
 )
 from django.urls import reverse_lazy, reverse
 from django.db.models import Count, Q, Avg
@@ -16,12 +20,14 @@ from django.utils import timezone
 from datetime import datetime, timedelta
 
 from accounts.mixins import AdminRequiredMixin
+from core import jobs
+from core import search as search_index
 from accounts.models import User, TeacherProfile, StudentProfile
-from courses.models import Course, Group
+from courses.models import Course, EnrollmentResult, Group
 from academics.models import Homework, HomeworkSubmission, Attendance
 
 from courses.forms import CourseForm
-from courses.forms import GroupForm
+from courses.forms import GroupAddStudentsForm, GroupForm, StudentImportForm
 
 logger = logging.getLogger(__name__)
 
@@ -166,7 +172,10 @@ class AdminUserListView(AdminRequiredMixin, ListView):
         
         # Search
         search = self.request.GET.get('search', '')
-        if search:
+        if search and search_index.available():
+            # FTS5 indeks (ism, email, telefon, ota-ona) - so'z boshlanishi bo'yicha
+            queryset = search_index.filter_queryset(queryset, 'user', search)
+        elif search:
             queryset = queryset.filter(
                 Q(first_name__icontains=search) |
                 Q(last_name__icontains=search) |
@@ -232,6 +241,40 @@ class AdminUserCreateView(AdminRequiredMixin, CreateView):
         return super().form_invalid(form)
 
 
+class AdminStudentImportView(AdminRequiredMixin, FormView):
+    """
+    Talabalarni CSV dan import qilish - fayl diskka oqim bilan yoziladi,
+    import fon vazifasida (accounts/imports.py), admin progress sahifasiga o'tadi.
+    """
+    form_class = StudentImportForm
+    template_name = 'admin/users/import.html'
+    
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        group = form.cleaned_data['group']
+        
+        directory = Path(settings.MEDIA_ROOT) / 'imports'
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"students-{uuid.uuid4().hex}.csv"
+        with path.open('wb') as destination:
+            for chunk in upload.chunks():
+                destination.write(chunk)
+        
+        job = jobs.enqueue(
+            'accounts.imports.import_students_job',
+            {'path': str(path), 'group_id': group.pk if group else None},
+            created_by=self.request.user,
+        )
+        
+        messages.success(self.request, f"Import navbatga qo'yildi (vazifa #{job.pk}).")
+        logger.info(
+            f"Talabalar importi: {upload.name}",
+            extra={'user_id': self.request.user.id, 'job_id': job.pk}
+        )
+        
+        return redirect('jobs:detail', pk=job.pk)
+
+
 class AdminUserDetailView(AdminRequiredMixin, DetailView):
     """
     Foydalanuvchi detallari
@@ -306,18 +349,19 @@ class AdminUserDeleteView(AdminRequiredMixin, DeleteView):
     template_name = 'admin/users/delete_confirm.html'
     success_url = reverse_lazy('admin_panel:user_list')
     
-    def delete(self, request, *args, **kwargs):
-        user = self.get_object()
-        email = user.email
+    def form_valid(self, form):
+        """Soft delete: darhol yashiriladi, bog'liq ma'lumot fonda o'chiriladi (core/purge.py)"""
+        email = self.object.email
+        job = User.objects.soft_delete([self.object.pk], created_by=self.request.user)
         
         messages.success(
-            request,
+            self.request,
             f"✅ Foydalanuvchi o'chirildi: {email}"
         )
         
-        logger.warning(f"User deleted by admin: {email}")
+        logger.warning(f"User deleted by admin: {email}", extra={'job_id': job.pk})
         
-        return super().delete(request, *args, **kwargs)
+        return redirect(self.success_url)
 
 
 class AdminUserBulkActionView(AdminRequiredMixin, View):
@@ -335,9 +379,15 @@ class AdminUserBulkActionView(AdminRequiredMixin, View):
         users = User.objects.filter(id__in=user_ids)
         
         if action == 'delete':
-            count = users.count()
-            users.delete()
-            messages.success(request, f"✅ {count} ta foydalanuvchi o'chirildi")
+            # Inline delete() kaskad qatorlarni so'rov ichida yuklardi - endi fonda, bo'laklab
+            ids = list(users.exclude(pk=request.user.pk).values_list('pk', flat=True))
+            job = User.objects.soft_delete(ids, created_by=request.user)
+            messages.success(request, f"✅ {len(ids)} ta foydalanuvchi o'chirildi")
+            if job:
+                logger.warning(
+                    f"Users deleted by admin: {len(ids)}",
+                    extra={'user_id': request.user.id, 'job_id': job.pk}
+                )
             
         elif action == 'activate':
             users.update(is_active=True)
@@ -444,12 +494,57 @@ class AdminGroupEditView(AdminRequiredMixin, TemplateView):
 class AdminGroupDeleteView(AdminRequiredMixin, TemplateView):
     template_name = 'admin/groups/delete_confirm.html'
 
-class AdminGroupEnrollView(AdminRequiredMixin, TemplateView):
-    template_name = 'admin/groups/enroll.html'
+    def post(self, request, pk):
+        """Soft delete - davomat, vazifalar va a'zolik fonda o'chiriladi"""
+        group = get_object_or_404(Group, pk=pk)
+        job = Group.objects.soft_delete([group.pk], created_by=request.user)
+        messages.success(request, f"✅ Guruh o'chirildi: {group.name}")
+        logger.warning(f"Group deleted by admin: {group.name}", extra={'group_id': group.pk, 'job_id': job.pk})
+        return redirect('admin_panel:group_list')
+
+class AdminGroupEnrollView(AdminRequiredMixin, FormView):
+    """
+    Guruhga emaillar ro'yxati bo'yicha ommaviy yozish / chiqarish
+    (GroupManager.enroll / unenroll) - har email uchun natija ko'rsatiladi.
+    """
+    form_class = GroupAddStudentsForm
+    template_name = 'admin/groups/add_students.html'
+    
+    def dispatch(self, request, *args, **kwargs):
+        self.group = get_object_or_404(Group.objects.select_related('course'), pk=kwargs['pk'])
+        return super().dispatch(request, *args, **kwargs)
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['group'] = self.group
+        return context
+    
+    def form_valid(self, form):
+        emails = form.cleaned_data['students']
+        if 'remove' in self.request.POST:
+            report = Group.objects.unenroll(self.group, emails)
+        else:
+            report = Group.objects.enroll(self.group, emails)
+        
+        counts = Counter(report.values())
+        logger.info(
+            f"Guruh a'zoligi yangilandi: {self.group.name}",
+            extra={'user_id': self.request.user.id, 'group_id': self.group.pk, 'counts': dict(counts)}
+        )
+        return self.render_to_response(self.get_context_data(
+            form=self.form_class(),
+            report=[(email, EnrollmentResult(result)) for email, result in report.items()],
+            counts=[(EnrollmentResult(result).label, count) for result, count in counts.items()],
+        ))
+
 
 class AdminGroupRemoveStudentView(AdminRequiredMixin, View):
     def post(self, request, group_pk, student_pk):
-        messages.info(request, "Feature coming soon")
+        group = get_object_or_404(Group, pk=group_pk)
+        if Group.objects.remove_students(group, [student_pk]):
+            messages.success(request, "✅ Talaba guruhdan chiqarildi")
+        else:
+            messages.warning(request, "⚠️ Talaba bu guruhda emas")
         return redirect('admin_panel:group_detail', pk=group_pk)
 
 class AdminReportsView(AdminRequiredMixin, TemplateView):
@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+
+Jonli bildirishnomalar (/notifications/stream/, communications/live.py) faqat
+shu ilova orqali ishlaydi: uvicorn erp_system.asgi:application --workers 1
 """
 
 import os
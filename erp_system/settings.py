@@ -110,6 +110,24 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Birinchisi - standart; import qilingan boshlang'ich parollar (accounts/hashers.py)
+# birinchi kirishda standart xeshga avtomatik o'tkaziladi
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'accounts.hashers.InitialPBKDF2PasswordHasher',
+]
+STUDENT_IMPORT_PASSWORD_HASHER = 'pbkdf2_sha256_initial'
+STUDENT_IMPORT_CHUNK_SIZE = 1000
+# Shuncha kun ichida kirilmasa boshlang'ich parol o'chiriladi (expire_initial_passwords, cron)
+STUDENT_IMPORT_PASSWORD_MAX_AGE_DAYS = 14
+
+# Soft delete qilingan user/guruhlarni fonda o'chirish (core/purge.py): bitta tranzaksiyadagi qatorlar
+PURGE_CHUNK_SIZE = 500
+
 # ============================================================================
 # AUTHENTICATION
 # ============================================================================
@@ -119,6 +137,24 @@ LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'accounts:login'
 
+# Login/ro'yxatdan o'tish cheklovi (accounts/throttle.py) - xesh hisoblashdan oldin
+LOGIN_THROTTLE_ENABLED = True
+LOGIN_THROTTLE_SHARED = False  # True - holat keshda (bir nechta worker uchun umumiy)
+LOGIN_THROTTLE_IP_LIMIT = 20  # IP dan barcha urinishlar / oyna
+LOGIN_THROTTLE_IP_WINDOW = 60
+LOGIN_THROTTLE_EMAIL_LIMIT = 5  # email bo'yicha muvaffaqiyatsiz urinishlar / oyna
+LOGIN_THROTTLE_EMAIL_WINDOW = 15 * 60
+LOGIN_THROTTLE_LOCKOUT = 60  # 1, 2, 4, ... daqiqa
+LOGIN_THROTTLE_LOCKOUT_MAX = 60 * 60
+LOGIN_THROTTLE_MAX_KEYS = 100_000  # jarayon xotirasidagi kalitlar
+# Jarayonda bir vaqtdagi parol tekshiruvlari: host CPU lari WEB_CONCURRENCY (gunicorn/uvicorn
+# worker soni) jarayon orasida bo'linadi
+LOGIN_THROTTLE_MAX_CONCURRENT = max(2, (os.cpu_count() or 1) // int(os.environ.get('WEB_CONCURRENCY', 1)))
+LOGIN_THROTTLE_HASH_WAIT = 1.0  # bo'sh joyni kutish (soniya), keyin 429
+
+# Foydalanuvchi ruxsatlari to'plami keshi (accounts/permissions.py); versiya kalitlari bilan eskiradi
+PERMISSION_CACHE_TIMEOUT = 60 * 60
+
 # Session Security
 SESSION_COOKIE_SECURE = False  # DEBUG=True bo'lgani uchun
 SESSION_COOKIE_HTTPONLY = True
@@ -161,6 +197,68 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ============================================================================
+# BACKGROUND JOBS (core/jobs.py)
+# ============================================================================
+
+BACKGROUND_JOB_WORKERS = 2
+BACKGROUND_JOBS_EAGER = False  # True - vazifa so'rov ichida bajariladi (testlar uchun)
+BACKGROUND_JOB_STALE_AFTER = 6 * 60 * 60  # shundan beri RUNNING - ishchi o'lgan (run_pending_jobs tiklaydi)
+
+# ============================================================================
+# NOTIFICATIONS
+# ============================================================================
+
+# purge_notifications: o'qilgan shaxsiy va umumiy bildirishnomalar shuncha kundan keyin o'chiriladi
+NOTIFICATION_TTL_DAYS = 90
+# send_notification_digest: oxirgi shuncha soatdagi o'qilmaganlar, xatda ko'pi bilan shuncha band
+NOTIFICATION_DIGEST_WINDOW_HOURS = 24
+NOTIFICATION_DIGEST_MAX_ITEMS = 10
+NOTIFICATION_DIGEST_BATCH_SIZE = 500  # bitta tranzaksiyadagi foydalanuvchilar
+
+# Jonli bildirishnomalar (SSE, communications/live.py) - faqat ASGI server ostida
+LIVE_MAX_CONNECTIONS = 10000  # jarayon bo'yicha
+LIVE_MAX_CONNECTIONS_PER_USER = 5
+LIVE_QUEUE_SIZE = 32  # to'lsa - "refresh" hodisasi
+LIVE_HEARTBEAT_SECONDS = 20
+LIVE_RETRY_MS = 5000
+
+# ============================================================================
+# EMAIL (communications/emails.py - navbat send_emails buyrug'i bilan yuboriladi)
+# ============================================================================
+
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '') == '1'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@erp.local')
+
+EMAIL_OUTBOX_BATCH_SIZE = 200
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6
+EMAIL_OUTBOX_BACKOFF_SECONDS = 60  # 1, 2, 4, 8, ... daqiqa
+EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = 6 * 60 * 60
+EMAIL_OUTBOX_DOMAIN_LIMIT = 100  # bitta domenga oynada ko'pi bilan
+EMAIL_OUTBOX_DOMAIN_WINDOW = 60  # soniya
+
+# ============================================================================
+# SMS (communications/sms.py - shlyuz almashtiriladi, lokalda fayl stub)
+# ============================================================================
+
+SMS_GATEWAY = os.environ.get('SMS_GATEWAY', 'communications.sms.FileSmsGateway')
+SMS_FILE_PATH = os.environ.get('SMS_FILE_PATH', str(BASE_DIR / 'logs' / 'sms.jsonl'))
+SMS_BATCH_SIZE = 100
+SMS_RATE_PER_SECOND = 20
+
+# ============================================================================
+# ONLINE PAYMENT GATEWAY
+# ============================================================================
+
+# Provayder callback'larini imzolash uchun umumiy kalit - faqat env orqali.
+# O'rnatilmagan bo'lsa callback'lar rad etiladi (finance/gateway.py)
+PAYMENT_GATEWAY_SECRET = os.environ.get('PAYMENT_GATEWAY_SECRET', '')
+
 # ============================================================================
 # LOGGING
 # ============================================================================
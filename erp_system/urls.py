@@ -38,7 +38,13 @@ urlpatterns = [
     path('finance/', include(('finance.urls', 'finance'), namespace='finance')),
     
     # Communications - Bildirishnomalar
-    # path('notifications/', include(('communications.urls', 'communications'), namespace='communications')),
+    path('notifications/', include(('communications.urls', 'communications'), namespace='communications')),
+    
+    # Fon vazifalari - progress
+    path('jobs/', include(('core.urls_jobs', 'jobs'), namespace='jobs')),
+    
+    # Global qidiruv (typeahead)
+    path('search/', include(('core.urls_search', 'search'), namespace='search')),
 ]
 
 # Static va Media files (faqat DEBUG=True bo'lganda)
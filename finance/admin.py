@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Payment, Expense
+from .models import (
+    Payment, PaymentCallback, Expense, ExpenseCategory, ExpenseBudget, ExpenseMonthTotal, DebtorBalance, Invoice,
+    FinancePeriod, Payslip,
+)
 
 
 @admin.register(Payment)
@@ -14,9 +17,81 @@ class PaymentAdmin(admin.ModelAdmin):
     student_name.short_description = 'Student'
 
 
+@admin.register(PaymentCallback)
+class PaymentCallbackAdmin(admin.ModelAdmin):
+    list_display = ('provider', 'event_id', 'transaction_id', 'status', 'payment', 'received_at')
+    list_filter = ('provider', 'status')
+    search_fields = ('event_id', 'transaction_id')
+    raw_id_fields = ('payment',)
+    ordering = ('-received_at',)
+
+
 @admin.register(Expense)
 class ExpenseAdmin(admin.ModelAdmin):
     list_display = ('category', 'amount', 'date', 'added_by')
-    list_filter = ('date',)
-    search_fields = ('category', 'added_by__username')
+    list_filter = ('category', 'date')
+    search_fields = ('category__name', 'added_by__email')
     ordering = ('-date',)
+
+
+@admin.register(ExpenseCategory)
+class ExpenseCategoryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'code', 'is_active')
+    list_filter = ('is_active',)
+    search_fields = ('name', 'code')
+    prepopulated_fields = {'code': ('name',)}
+
+
+@admin.register(ExpenseBudget)
+class ExpenseBudgetAdmin(admin.ModelAdmin):
+    list_display = ('category', 'period', 'amount')
+    list_filter = ('category', 'period')
+    ordering = ('-period',)
+
+
+@admin.register(ExpenseMonthTotal)
+class ExpenseMonthTotalAdmin(admin.ModelAdmin):
+    list_display = ('category', 'period', 'total')
+    list_filter = ('category',)
+    ordering = ('-period',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DebtorBalance)
+class DebtorBalanceAdmin(admin.ModelAdmin):
+    list_display = ('student', 'expected_total', 'paid_total', 'debt', 'updated_at')
+    search_fields = ('student__user__first_name', 'student__user__last_name', 'student__user__email')
+    raw_id_fields = ('student',)
+    ordering = ('-debt',)
+
+
+@admin.register(Invoice)
+class InvoiceAdmin(admin.ModelAdmin):
+    list_display = ('student', 'group', 'period', 'amount', 'status')
+    list_filter = ('status', 'period')
+    search_fields = ('student__user__first_name', 'student__user__last_name', 'student__user__email')
+    raw_id_fields = ('student', 'group')
+    ordering = ('-period',)
+
+
+@admin.register(FinancePeriod)
+class FinancePeriodAdmin(admin.ModelAdmin):
+    list_display = ('period', 'income_total', 'expense_total', 'closed_by', 'created_at')
+    ordering = ('-period',)
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Payslip)
+class PayslipAdmin(admin.ModelAdmin):
+    list_display = ('user', 'period', 'role', 'base_salary', 'lessons_count', 'lesson_pay', 'total')
+    list_filter = ('role', 'period')
+    search_fields = ('user__email', 'user__first_name', 'user__last_name')
+    raw_id_fields = ('user',)
+    ordering = ('-period',)
@@ -0,0 +1,219 @@
+# finance/forecasting.py
+"""
+Pul oqimi prognozi (3, 6, 12 oy).
+
+Tarix oylik qatorlarga (array('d')) bittadan guruhlangan so'rov bilan yuklanadi:
+    - tasdiqlangan to'lovlar (yopilgan oylar FinancePeriod'dan, ochiq oylar to'lovlardan),
+    - xarajatlar (ExpenseMonthTotal yig'ma jadvali),
+    - faol guruhlardagi o'quvchilar (kurs narxi x o'quvchilar soni).
+
+Model oddiy: oxirgi 12 oy o'rtachasi + yillik trend, kamida 2 yil tarix bo'lsa
+kalendar oyi bo'yicha mavsumiy koeffitsient. Natija keshlanadi va to'lov,
+xarajat yoki guruh o'zgarganda versiya kaliti yangilanadi (models.py).
+"""
+from array import array
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from courses.models import Group, GroupStatus
+from .models import (
+    FORECAST_VERSION_KEY, ExpenseMonthTotal, FinancePeriod, Payment, PaymentStatus, period_bounds,
+)
+
+
+HORIZONS = (3, 6, 12)
+CACHE_TIMEOUT = 60 * 60
+SEASONAL_MIN_MONTHS = 24
+HISTORY_MIN_MONTHS = 3
+
+
+def month_index(value):
+    """Oyni butun songa aylantirish (yil * 12 + oy) - qatorlarda indeks sifatida"""
+    return value.year * 12 + value.month - 1
+
+
+def month_from_index(index):
+    return date(index // 12, index % 12 + 1, 1)
+
+
+@dataclass
+class MonthlySeries:
+    """Oylik qator: start - birinchi oy indeksi, values - har oy uchun summa"""
+    start: int
+    values: array
+
+    @classmethod
+    def from_rows(cls, rows, end):
+        """
+        (oy, summa) qatorlaridan uzluksiz qator qurish; bo'sh oylar 0.
+        end - qatorga kirmaydigan birinchi oy indeksi.
+        """
+        totals = {month_index(month): float(total or 0) for month, total in rows}
+        if not totals:
+            return cls(end, array('d'))
+        start = min(totals)
+        return cls(start, array('d', (totals.get(i, 0.0) for i in range(start, end))))
+
+    def __len__(self):
+        return len(self.values)
+
+
+def load_income_series(end):
+    """
+    Yopilgan oylar FinancePeriod.income_total dan, ochiq oylar (oxirgi yopilgandan
+    keyin) to'lovlardan guruhlab olinadi - har bir to'lov qatori qayta yig'ilmaydi.
+    """
+    closed = list(FinancePeriod.objects.filter(period__lt=end).values_list('period', 'income_total'))
+    tail = Payment.objects.filter(
+        status=PaymentStatus.APPROVED,
+        payment_date__lt=timezone.make_aware(datetime.combine(end, time.min)),
+    )
+    if closed:
+        tail = tail.filter(payment_date__gte=period_bounds(max(closed)[0])[1])
+    rows = tail.annotate(month=TruncMonth('payment_date')).values('month').annotate(
+        total=Sum('amount')
+    ).values_list('month', 'total')
+    return MonthlySeries.from_rows(
+        closed + [(timezone.localtime(month).date(), total) for month, total in rows],
+        month_index(end),
+    )
+
+
+def load_expense_series(end):
+    rows = ExpenseMonthTotal.objects.filter(period__lt=end).values('period').annotate(
+        total=Sum('total')
+    ).values_list('period', 'total')
+    return MonthlySeries.from_rows(rows, month_index(end))
+
+
+def load_enrollments(start):
+    """
+    Faol guruhlar jadvali: (boshlanish oyi, tugash oyi, oylik tushum) massivlari.
+    Oy indeksi -1 / 10**9 - chegara yo'q.
+    """
+    rows = Group.students.through.objects.filter(
+        studentprofile__status='active',
+        studentprofile__user__deleted_at__isnull=True,
+        group__status=GroupStatus.ACTIVE,
+    ).filter(
+        Q(group__end_date__isnull=True) | Q(group__end_date__gte=start),
+    ).values('group__start_date', 'group__end_date', 'group__course__price').annotate(
+        size=Count('pk')
+    ).values_list('group__start_date', 'group__end_date', 'group__course__price', 'size')
+
+    starts, ends, amounts = array('l'), array('l'), array('d')
+    for start_date, end_date, price, size in rows:
+        starts.append(month_index(start_date) if start_date else -1)
+        ends.append(month_index(end_date) if end_date else 10 ** 9)
+        amounts.append(float(price or 0) * size)
+    return starts, ends, amounts
+
+
+def scheduled_income(enrollments, first, horizon):
+    """Guruh jadvali bo'yicha har oy kutilayotgan tushum"""
+    starts, ends, amounts = enrollments
+    result = array('d', [0.0] * horizon)
+    for start, end, amount in zip(starts, ends, amounts):
+        for offset in range(max(start - first, 0), min(end - first + 1, horizon)):
+            result[offset] += amount
+    return result
+
+
+def seasonal_projection(series, first, horizon):
+    """
+    Oxirgi 12 oy darajasi + trend, 2 yildan ortiq tarixda kalendar oyi koeffitsienti.
+    first - prognozning birinchi oyi indeksi.
+    """
+    values = series.values
+    n = len(values)
+    if n == 0:
+        return array('d', [0.0] * horizon)
+
+    recent = values[-12:]
+    level = sum(recent) / len(recent)
+
+    trend = 0.0
+    if n >= SEASONAL_MIN_MONTHS:
+        previous = values[-24:-12]
+        trend = (level - sum(previous) / 12) / 12
+
+    seasonal = [1.0] * 12
+    overall = sum(values) / n
+    if n >= SEASONAL_MIN_MONTHS and overall:
+        sums, counts = [0.0] * 12, [0] * 12
+        for offset, value in enumerate(values):
+            month = (series.start + offset) % 12
+            sums[month] += value
+            counts[month] += 1
+        seasonal = [(sums[m] / counts[m]) / overall if counts[m] else 1.0 for m in range(12)]
+
+    # Daraja oxirgi 12 oyning o'rtasiga (6.5 oy oldin) to'g'ri keladi
+    center = first - (series.start + n) + (len(recent) + 1) / 2
+    return array('d', (
+        max(0.0, (level + trend * (center + offset)) * seasonal[(first + offset) % 12])
+        for offset in range(horizon)
+    ))
+
+
+def build_forecast(months, today=None):
+    """
+    Joriy oydan boshlab months oy uchun prognoz.
+
+    Returns:
+        dict: months, rows (month, scheduled_income, income, expense, net, balance),
+        opening_balance (o'tgan oy oxiridagi qoldiq)
+    """
+    today = today or timezone.localdate()
+    current = today.replace(day=1)
+    first = month_index(current)
+
+    income_history = load_income_series(current)
+    expense_history = load_expense_series(current)
+    scheduled = scheduled_income(load_enrollments(current), first, months)
+    income = seasonal_projection(income_history, first, months)
+    expense = seasonal_projection(expense_history, first, months)
+    if len(income_history) < HISTORY_MIN_MONTHS:
+        # Tarix kam - guruh jadvalidagi tushumga tayanamiz
+        income = scheduled
+
+    def money(value):
+        return Decimal(f'{value:.2f}')
+
+    # Qoldiq oy boshiga: joriy oyning haqiqiy to'lov/xarajatlari 0-qatordagi
+    # to'liq oylik prognozda hisoblangan, ikki marta qo'shilmaydi
+    month_end = current - timedelta(days=1)
+    opening = FinancePeriod.objects.income_as_of(month_end) - FinancePeriod.objects.expense_as_of(month_end)
+    balance = opening
+    rows = []
+    for offset in range(months):
+        net = money(income[offset] - expense[offset])
+        balance += net
+        rows.append({
+            'month': month_from_index(first + offset),
+            'scheduled_income': money(scheduled[offset]),
+            'income': money(income[offset]),
+            'expense': money(expense[offset]),
+            'net': net,
+            'balance': balance,
+        })
+    return {'months': months, 'rows': rows, 'opening_balance': opening}
+
+
+def forecast(months, today=None):
+    """build_forecast natijasi, manba ma'lumotlar o'zgarguncha keshda"""
+    if months not in HORIZONS:
+        raise ValueError(f"Prognoz muddati {HORIZONS} dan biri bo'lishi kerak")
+    today = today or timezone.localdate()
+    version = cache.get(FORECAST_VERSION_KEY, 0)
+    key = f'finance:forecast:{version}:{months}:{today.isoformat()}'
+    result = cache.get(key)
+    if result is None:
+        result = build_forecast(months, today)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
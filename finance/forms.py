@@ -4,8 +4,12 @@ Finance Forms - To'lovlar va Xarajatlar
 """
 from django import forms
 from django.core.exceptions import ValidationError
-from .models import Payment, Expense
+from django.utils import timezone
+from .models import Payment, Expense, ExpenseBudget, ExpenseCategory, PeriodClosedError, ensure_period_open
+from .reconciliation import StatementError, read_statement
 from accounts.models import StudentProfile
+from core.models import Branch
+from courses.models import Course, Group
 
 
 # ============================================================================
@@ -63,7 +67,8 @@ class PaymentForm(forms.ModelForm):
         email = self.cleaned_data.get('student_email')
         
         try:
-            StudentProfile.objects.get(user__email=email)
+            # save() da qayta qidirmaslik uchun saqlab qo'yamiz
+            self._student = StudentProfile.objects.get(user__email=email)
         except StudentProfile.DoesNotExist:
             raise ValidationError(
                 f"Email '{email}' bo'ylab talaba topilmadi. "
@@ -72,13 +77,23 @@ class PaymentForm(forms.ModelForm):
         
         return email
     
+    def clean(self):
+        cleaned_data = super().clean()
+        
+        # Yopilgan davrga to'lov qo'shib/o'zgartirib bo'lmaydi
+        payment_date = self.instance.payment_date or timezone.now()
+        try:
+            ensure_period_open(timezone.localtime(payment_date).date())
+        except PeriodClosedError as e:
+            raise ValidationError(e.messages)
+        
+        return cleaned_data
+    
     def save(self, commit=True):
         """To'lovni saqlash va talabani bog'lash"""
         instance = super().save(commit=False)
         
-        email = self.cleaned_data['student_email']
-        student = StudentProfile.objects.get(user__email=email)
-        instance.student = student
+        instance.student = self._student
         
         if commit:
             instance.save()
@@ -86,6 +101,49 @@ class PaymentForm(forms.ModelForm):
         return instance
 
 
+class BankStatementUploadForm(forms.Form):
+    """
+    Bank ko'chirmasini yuklash va to'lovlar bilan solishtirish formasі
+    """
+    file = forms.FileField(
+        label="Bank ko'chirmasi",
+        widget=forms.FileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv',
+        }),
+        help_text="CSV formatida (date, amount, email, phone, name, note)"
+    )
+    
+    window_days = forms.IntegerField(
+        label="Sana farqi (kun)",
+        initial=3,
+        min_value=0,
+        max_value=31,
+        widget=forms.NumberInput(attrs={
+            'class': 'form-control',
+        })
+    )
+    
+    def clean_file(self):
+        file = self.cleaned_data.get('file')
+        
+        if file:
+            if not file.name.lower().endswith('.csv'):
+                raise ValidationError("Faqat CSV formatidagi fayllar qabul qilinadi.")
+            
+            # Fayl hajmini tekshirish (maks 20 MB ~ 200k qator)
+            if file.size > 20 * 1024 * 1024:
+                raise ValidationError("Fayl hajmi 20 MB dan oshmasligi kerak.")
+            
+            # Kodirovka, CSV va ustunlar xatolari forma xatosi sifatida
+            try:
+                self.statement_lines = read_statement(file)
+            except StatementError as e:
+                raise ValidationError(str(e))
+        
+        return file
+
+
 class PaymentApproveForm(forms.Form):
     """
     To'lovni tasdiqlash formasі
@@ -195,6 +253,77 @@ class PaymentFilterForm(forms.Form):
         return cleaned_data
 
 
+class DebtorFilterForm(forms.Form):
+    """
+    Qarzdorlarni filtrlash formasі
+    """
+    branch = forms.ModelChoiceField(
+        queryset=Branch.objects.filter(is_active=True),
+        required=False,
+        label="Filial",
+        empty_label="--- Barcha filiallar ---",
+        widget=forms.Select(attrs={
+            'class': 'form-control',
+        })
+    )
+    
+    course = forms.ModelChoiceField(
+        queryset=Course.objects.filter(is_active=True),
+        required=False,
+        label="Kurs",
+        empty_label="--- Barcha kurslar ---",
+        widget=forms.Select(attrs={
+            'class': 'form-control',
+        })
+    )
+    
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.select_related('course'),
+        required=False,
+        label="Guruh",
+        empty_label="--- Barcha guruhlar ---",
+        widget=forms.Select(attrs={
+            'class': 'form-control',
+        })
+    )
+
+
+class PeriodCloseForm(forms.Form):
+    """
+    Moliyaviy davrni (oyni) yopish formasі
+    """
+    period = forms.DateField(
+        label="Oy",
+        input_formats=['%Y-%m'],
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'month',
+        })
+    )
+    
+    confirm = forms.BooleanField(
+        required=True,
+        label="Davr yopilgandan keyin uning to'lov va xarajatlarini o'zgartirib bo'lmaydi",
+        widget=forms.CheckboxInput(attrs={
+            'class': 'form-check-input',
+        })
+    )
+
+
+class PayrollMonthForm(forms.Form):
+    """
+    Ish haqi hisoblanadigan oyni tanlash formasі
+    """
+    period = forms.DateField(
+        label="Oy",
+        input_formats=['%Y-%m'],
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'month',
+        })
+    )
+
+
 # ============================================================================
 # EXPENSE FORMS
 # ============================================================================
@@ -204,20 +333,9 @@ class ExpenseForm(forms.ModelForm):
     Xarajat qo'shish formasі (Admin uchun)
     """
     
-    CATEGORY_CHOICES = [
-        ('ijara', 'Ijara'),
-        ('maoshi', 'Xodimlar maoshi'),
-        ('utilities', 'Utilities (elektr, suv, gaz)'),
-        ('material', 'Materi va xarajat'),
-        ('reklama', 'Reklama'),
-        ('transport', 'Transport'),
-        ('jihozlar', 'Ofis jihozlari'),
-        ('tamirlash', 'Tamirlash va qayta tiklash'),
-        ('boshqa', 'Boshqa'),
-    ]
-    
-    category = forms.ChoiceField(
-        choices=CATEGORY_CHOICES,
+    category = forms.ModelChoiceField(
+        queryset=ExpenseCategory.objects.filter(is_active=True),
+        to_field_name='code',
         widget=forms.Select(attrs={
             'class': 'form-control',
         })
@@ -261,35 +379,75 @@ class ExpenseForm(forms.ModelForm):
     
     def clean(self):
         cleaned_data = super().clean()
-        from django.utils import timezone
         
         date = cleaned_data.get('date')
         if date and date > timezone.now().date():
             raise ValidationError("Xarajat sanasi kelajakda bo'lolmaydi.")
         
+        # Yopilgan davrga xarajat qo'shib/o'zgartirib bo'lmaydi
+        if date:
+            try:
+                ensure_period_open(date)
+            except PeriodClosedError as e:
+                self.add_error('date', e)
+        
         return cleaned_data
 
 
+class ExpenseBudgetForm(forms.ModelForm):
+    """
+    Kategoriya uchun oylik byudjet belgilash formasі
+    """
+    category = forms.ModelChoiceField(
+        queryset=ExpenseCategory.objects.filter(is_active=True),
+        widget=forms.Select(attrs={
+            'class': 'form-control',
+        })
+    )
+    period = forms.DateField(
+        label="Oy",
+        input_formats=['%Y-%m'],
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'month',
+        })
+    )
+    
+    class Meta:
+        model = ExpenseBudget
+        fields = ['category', 'period', 'amount']
+        widgets = {
+            'amount': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'type': 'number',
+                'min': '0',
+                'step': '1000',
+            }),
+        }
+    
+    def clean_period(self):
+        return self.cleaned_data['period'].replace(day=1)
+    
+    def clean_amount(self):
+        amount = self.cleaned_data.get('amount')
+        if amount is not None and amount < 0:
+            raise ValidationError("Byudjet manfiy bo'lishi mumkin emas.")
+        return amount
+    
+    def validate_unique(self):
+        # Oyning mavjud byudjeti view'da update_or_create bilan yangilanadi
+        pass
+
+
 class ExpenseFilterForm(forms.Form):
     """
     Xarajatlarni filtrlash formasі
     """
-    CATEGORY_CHOICES = [
-        ('', '--- Barcha kategoriyalar ---'),
-        ('ijara', 'Ijara'),
-        ('maoshi', 'Xodimlar maoshi'),
-        ('utilities', 'Utilities'),
-        ('material', 'Materi va xarajat'),
-        ('reklama', 'Reklama'),
-        ('transport', 'Transport'),
-        ('jihozlar', 'Ofis jihozlari'),
-        ('tamirlash', 'Tamirlash'),
-        ('boshqa', 'Boshqa'),
-    ]
-    
-    category = forms.ChoiceField(
-        choices=CATEGORY_CHOICES,
+    category = forms.ModelChoiceField(
+        queryset=ExpenseCategory.objects.all(),
+        to_field_name='code',
         required=False,
+        empty_label='--- Barcha kategoriyalar ---',
         label="Kategoriya",
         widget=forms.Select(attrs={
             'class': 'form-control',
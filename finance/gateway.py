@@ -0,0 +1,190 @@
+"""
+Onlayn to'lov provayderi callback'lari
+
+Provayder har bir hodisa uchun JSON xabar yuboradi va uni umumiy kalit bilan
+imzolaydi (X-Signature: HMAC-SHA256 hex). Xabarlar (provider, event_id) bo'yicha
+PaymentCallback jadvalida dedup qilinadi: qayta yuborishlar bitta INSERT bilan
+tashlab yuboriladi. To'lov yaratish/tasdiqlash va balansni oshirish bitta
+tranzaksiyada bajariladi.
+
+Xabar maydonlari:
+    event_id, transaction_id, student_id, amount, status (pending|paid|cancelled), paid_at
+"""
+import hashlib
+import hmac
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import StudentProfile
+from .models import Payment, PaymentCallback, PaymentMethod, PaymentStatus
+
+
+SIGNATURE_HEADER = 'HTTP_X_SIGNATURE'
+
+
+class CallbackStatus:
+    PENDING = 'pending'
+    PAID = 'paid'
+    CANCELLED = 'cancelled'
+
+    ALL = (PENDING, PAID, CANCELLED)
+
+
+# Provayder holati -> Payment holati
+TRANSITIONS = {
+    CallbackStatus.PENDING: PaymentStatus.PENDING,
+    CallbackStatus.PAID: PaymentStatus.APPROVED,
+    CallbackStatus.CANCELLED: PaymentStatus.REJECTED,
+}
+
+
+class CallbackResult:
+    PROCESSED = 'processed'
+    DUPLICATE = 'duplicate'
+
+
+class GatewayError(ValueError):
+    """Xabarni qabul qilib bo'lmaydi (noto'g'ri maydonlar, noma'lum talaba)"""
+
+
+class GatewayConflict(GatewayError):
+    """Xabar mavjud tranzaksiyaga zid (boshqa talaba yoki summa)"""
+
+
+@dataclass(frozen=True)
+class Notification:
+    event_id: str
+    transaction_id: str
+    student_id: int
+    amount: Decimal
+    status: str
+    paid_at: datetime
+
+
+def is_configured():
+    return bool(settings.PAYMENT_GATEWAY_SECRET)
+
+
+def sign(body, secret=None):
+    secret = secret or settings.PAYMENT_GATEWAY_SECRET
+    if not secret:
+        raise ImproperlyConfigured("PAYMENT_GATEWAY_SECRET o'rnatilmagan")
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body, signature):
+    """Kalit o'rnatilmagan bo'lsa hech bir imzo to'g'ri emas (fail closed)"""
+    if not signature or not is_configured():
+        return False
+    return hmac.compare_digest(sign(body), signature)
+
+
+def parse_notification(body):
+    """Xom JSON -> Notification; xato bo'lsa GatewayError"""
+    try:
+        data = json.loads(body)
+        paid_at = datetime.fromisoformat(data['paid_at']) if data.get('paid_at') else timezone.now()
+        notification = Notification(
+            event_id=str(data['event_id']),
+            transaction_id=str(data['transaction_id']),
+            student_id=int(data['student_id']),
+            amount=Decimal(str(data['amount'])),
+            status=data['status'],
+            paid_at=timezone.make_aware(paid_at) if timezone.is_naive(paid_at) else paid_at,
+        )
+    except (ValueError, TypeError, KeyError, InvalidOperation) as e:
+        raise GatewayError(f"Noto'g'ri xabar: {e}")
+
+    if notification.status not in CallbackStatus.ALL:
+        raise GatewayError(f"Noma'lum holat: {notification.status}")
+    if notification.amount <= 0:
+        raise GatewayError("Summa musbat bo'lishi kerak")
+    if not notification.event_id or not notification.transaction_id:
+        raise GatewayError("event_id va transaction_id majburiy")
+    return notification
+
+
+@transaction.atomic
+def process_notification(notification, provider='stub'):
+    """
+    Xabarni qayta ishlash.
+
+    Returns:
+        tuple: (CallbackResult, Payment | None)
+    """
+    try:
+        with transaction.atomic():
+            callback = PaymentCallback.objects.create(
+                provider=provider,
+                event_id=notification.event_id,
+                transaction_id=notification.transaction_id,
+                status=notification.status,
+            )
+    except IntegrityError:
+        return CallbackResult.DUPLICATE, None
+
+    if not StudentProfile.objects.filter(pk=notification.student_id).exists():
+        raise GatewayError(f"Talaba topilmadi: {notification.student_id}")
+
+    status = TRANSITIONS[notification.status]
+    payment, created = Payment.objects.get_or_create(
+        external_id=notification.transaction_id,
+        defaults={
+            'student_id': notification.student_id,
+            'amount': notification.amount,
+            'payment_date': notification.paid_at,
+            'payment_method': PaymentMethod.ONLINE,
+            'status': status,
+            'note': f"{provider} onlayn to'lov",
+        },
+    )
+    if not created:
+        payment = Payment.objects.select_for_update().get(pk=payment.pk)
+        if payment.student_id != notification.student_id or payment.amount != notification.amount:
+            # Tranzaksiya boshqa talaba/summa bilan qayta yuborildi - qabul qilinmaydi,
+            # callback yozuvi ham tranzaksiya bilan birga bekor bo'ladi
+            raise GatewayConflict(
+                f"Tranzaksiya {notification.transaction_id} boshqa talaba yoki summa bilan yozilgan"
+            )
+        # Faqat pending -> approved/rejected; tasdiqlangan to'lov o'zgarmaydi
+        if payment.status != PaymentStatus.PENDING or status == PaymentStatus.PENDING:
+            status = None
+        else:
+            payment.status = status
+            payment.save(update_fields=['status', 'updated_at'])
+
+    if status == PaymentStatus.APPROVED:
+        # Balans bitta atomar UPDATE bilan - parallel callback'lar ikki marta qo'shmaydi
+        StudentProfile.objects.filter(pk=payment.student_id).update(balance=F('balance') + payment.amount)
+
+    callback.payment = payment
+    callback.save(update_fields=['payment'])
+    return CallbackResult.PROCESSED, payment
+
+
+class StubProvider:
+    """
+    Lokal sinov provayderi: imzolangan xabarlar yasaydi (load test va testlar uchun).
+    """
+    name = 'stub'
+
+    def notification(self, student_id, amount, status=CallbackStatus.PAID, transaction_id=None, event_id=None):
+        payload = {
+            'event_id': event_id or uuid.uuid4().hex,
+            'transaction_id': transaction_id or f'stub-{uuid.uuid4().hex}',
+            'student_id': student_id,
+            'amount': str(amount),
+            'status': status,
+            'paid_at': timezone.now().isoformat(),
+        }
+        body = json.dumps(payload).encode()
+        return body, sign(body)
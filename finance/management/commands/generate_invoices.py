@@ -0,0 +1,38 @@
+"""
+Oylik hisob-fakturalarni yaratish
+
+Usage:
+    python manage.py generate_invoices --month 2025-10
+"""
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from finance.models import Invoice
+
+
+class Command(BaseCommand):
+    help = "Faol guruhlardagi faol talabalar uchun oylik hisob-fakturalarni yaratadi (qayta ishga tushirish xavfsiz)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help="Oy YYYY-MM formatida (standart: joriy oy)")
+        parser.add_argument('--chunk-size', type=int, default=Invoice.objects.GENERATE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                period = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("--month YYYY-MM formatida bo'lishi kerak")
+        else:
+            period = timezone.localdate().replace(day=1)
+
+        started = time.monotonic()
+        created = Invoice.objects.generate(
+            period,
+            chunk_size=options['chunk_size'],
+            progress=lambda processed: self.stdout.write(f"  {processed} qator ko'rib chiqildi"),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{period:%Y-%m}: {created} ta yangi hisob-faktura ({time.monotonic() - started:.1f}s)"
+        ))
@@ -0,0 +1,104 @@
+"""
+Onlayn to'lov callback'lari uchun yuklama testi (lokal stub provayder bilan)
+
+Har bir tranzaksiya uchun pending + paid xabarlari yasaladi, har biri --retries
+marta aralash tartibda yuboriladi. Oxirida balanslar aynan bir marta
+oshganligi tekshiriladi va yaratilgan to'lovlar o'chiriladi (--keep bo'lmasa).
+
+Usage:
+    python manage.py payment_callback_loadtest --count 500 --retries 3
+    python manage.py payment_callback_loadtest --url http://127.0.0.1:8000/finance/payments/callback/stub/ --workers 8
+"""
+import random
+import time
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import StudentProfile
+from finance.gateway import CallbackStatus, StubProvider, is_configured
+from finance.models import Payment, PaymentCallback
+
+
+class Command(BaseCommand):
+    help = "Stub provayder orqali to'lov callback'larini yuboradi va ikki marta hisoblanmaganini tekshiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500, help="Tranzaksiyalar soni")
+        parser.add_argument('--retries', type=int, default=3, help="Har bir xabar necha marta yuboriladi")
+        parser.add_argument('--url', help="Ishlab turgan server manzili (bo'lmasa jarayon ichida test Client)")
+        parser.add_argument('--workers', type=int, default=8, help="--url bilan parallel yuboruvchilar")
+        parser.add_argument('--keep', action='store_true', help="Yaratilgan to'lovlarni o'chirmaslik")
+
+    def handle(self, *args, **options):
+        if not is_configured():
+            raise CommandError("PAYMENT_GATEWAY_SECRET o'rnatilmagan (server bilan bir xil kalit kerak)")
+        students = list(StudentProfile.objects.values_list('id', flat=True)[:100])
+        if not students:
+            raise CommandError("Kamida bitta talaba kerak")
+
+        provider = StubProvider()
+        amounts = {}
+        messages = []
+        for _ in range(options['count']):
+            student_id = random.choice(students)
+            amount = Decimal(random.randrange(50, 500) * 1000)
+            transaction_id = f'stub-{uuid.uuid4().hex}'
+            for status in (CallbackStatus.PENDING, CallbackStatus.PAID):
+                body, signature = provider.notification(student_id, amount, status=status, transaction_id=transaction_id)
+                messages += [(body, signature)] * options['retries']
+            amounts[transaction_id] = (student_id, amount)
+        random.shuffle(messages)
+
+        before = dict(StudentProfile.objects.filter(pk__in=students).values_list('id', 'balance'))
+
+        started = time.monotonic()
+        if options['url']:
+            with ThreadPoolExecutor(options['workers']) as pool:
+                statuses = Counter(pool.map(lambda message: self.post_http(options['url'], *message), messages))
+        else:
+            client = Client(SERVER_NAME='localhost')
+            url = reverse('finance:payment_callback', args=[provider.name])
+            statuses = Counter(
+                client.post(url, body, content_type='application/json', HTTP_X_SIGNATURE=signature).status_code
+                for body, signature in messages
+            )
+        elapsed = time.monotonic() - started
+
+        expected = Counter()
+        for student_id, amount in amounts.values():
+            expected[student_id] += amount
+        after = dict(StudentProfile.objects.filter(pk__in=students).values_list('id', 'balance'))
+        wrong = [pk for pk in students if after[pk] - before[pk] != expected[pk]]
+
+        self.stdout.write(
+            f"{len(messages)} ta xabar, {elapsed:.2f}s ({len(messages) / elapsed:.0f}/s), javoblar: {dict(statuses)}"
+        )
+        if wrong:
+            self.stdout.write(self.style.ERROR(f"Balans noto'g'ri: {len(wrong)} ta talaba"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Ikki marta hisoblangan to'lov yo'q"))
+
+        if not options['keep']:
+            self.cleanup(amounts, expected)
+
+    def post_http(self, url, body, signature):
+        request = urllib.request.Request(
+            url, data=body, headers={'Content-Type': 'application/json', 'X-Signature': signature},
+        )
+        with urllib.request.urlopen(request) as response:
+            return response.status
+
+    def cleanup(self, amounts, expected):
+        payments = Payment.objects.filter(external_id__in=amounts)
+        PaymentCallback.objects.filter(transaction_id__in=amounts).delete()
+        payments.delete()
+        for student_id, amount in expected.items():
+            StudentProfile.objects.filter(pk=student_id).update(balance=F('balance') - amount)
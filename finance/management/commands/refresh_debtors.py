@@ -0,0 +1,20 @@
+"""
+Qarzdorlar jadvalini to'liq qayta hisoblash
+
+Usage:
+    python manage.py refresh_debtors
+"""
+import time
+from django.core.management.base import BaseCommand
+from finance.models import DebtorBalance
+
+
+class Command(BaseCommand):
+    help = "Barcha faol talabalar uchun qarzdorlik jadvalini qayta hisoblaydi"
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = DebtorBalance.objects.refresh()
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} ta talaba qayta hisoblandi ({time.monotonic() - started:.1f}s)"
+        ))
@@ -0,0 +1,33 @@
+"""
+Oylik ish haqini hisoblash
+
+Usage:
+    python manage.py run_payroll --month 2025-10
+"""
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from finance.models import Payslip
+
+
+class Command(BaseCommand):
+    help = "O'qituvchi, admin va managerlar uchun oylik hisob varaqlarini hisoblaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help="Oy YYYY-MM formatida (standart: joriy oy)")
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                period = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("--month YYYY-MM formatida bo'lishi kerak")
+        else:
+            period = timezone.localdate().replace(day=1)
+
+        started = time.monotonic()
+        count = Payslip.objects.run(period)
+        self.stdout.write(self.style.SUCCESS(
+            f"{period:%Y-%m}: {count} ta hisob varaq ({time.monotonic() - started:.1f}s)"
+        ))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('finance', '0002_payment_course_payment_group'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DebtorBalance',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='debtor_balance', serialize=False, to='accounts.studentprofile')),
+                ('expected_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('paid_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('debt', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-debt'],
+                'indexes': [models.Index(fields=['-debt'], name='finance_deb_debt_c45297_idx')],
+            },
+        ),
+    ]
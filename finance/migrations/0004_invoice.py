@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('courses', '0002_group_branch'),
+        ('finance', '0003_debtorbalance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Invoice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period', models.DateField(help_text='Oyning birinchi kuni')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('status', models.CharField(choices=[('unpaid', 'Unpaid'), ('paid', 'Paid'), ('cancelled', 'Cancelled')], default='unpaid', max_length=30)),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='courses.course')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoices', to='courses.group')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoices', to='accounts.studentprofile')),
+            ],
+            options={
+                'ordering': ['-period'],
+                'indexes': [models.Index(fields=['period', 'status'], name='finance_inv_period_32e13b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'group', 'period'), name='unique_invoice_per_month')],
+            },
+        ),
+    ]
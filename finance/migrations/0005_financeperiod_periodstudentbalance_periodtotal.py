@@ -0,0 +1,59 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:29
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('finance', '0004_invoice'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancePeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period', models.DateField(help_text='Oyning birinchi kuni', unique=True)),
+                ('income_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-period'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PeriodStudentBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('paid_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_balances', to='finance.financeperiod')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_balances', to='accounts.studentprofile')),
+            ],
+            options={
+                'unique_together': {('period', 'student')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PeriodTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('payment_method', 'Payment method'), ('expense_category', 'Expense category')], max_length=30)),
+                ('key', models.CharField(max_length=120)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cumulative', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='totals', to='finance.financeperiod')),
+            ],
+            options={
+                'unique_together': {('period', 'kind', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_financeperiod_periodstudentbalance_periodtotal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Payslip',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period', models.DateField(help_text='Oyning birinchi kuni')),
+                ('role', models.CharField(choices=[('teacher', 'Teacher'), ('admin', 'Admin'), ('manager', 'Manager')], max_length=30)),
+                ('base_salary', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('lessons_count', models.PositiveIntegerField(default=0)),
+                ('lesson_rate', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('lesson_pay', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payslips', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-period', 'role', 'user_id'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'period', 'role'), name='unique_payslip_per_month')],
+            },
+        ),
+    ]
@@ -0,0 +1,146 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.utils.text import slugify
+
+
+DEFAULT_CATEGORIES = [
+    ('ijara', 'Ijara'),
+    ('maoshi', 'Xodimlar maoshi'),
+    ('utilities', 'Utilities'),
+    ('material', 'Materi va xarajat'),
+    ('reklama', 'Reklama'),
+    ('transport', 'Transport'),
+    ('jihozlar', 'Ofis jihozlari'),
+    ('tamirlash', 'Tamirlash va qayta tiklash'),
+    ('boshqa', 'Boshqa'),
+]
+
+
+def unique_code(value, taken):
+    """
+    Erkin matn -> takrorlanmas kod. Unicode harflar saqlanadi (kirill
+    kategoriyalar 'boshqa' ga qo'shilib ketmaydi), to'qnashuvda -2, -3, ...
+    """
+    base = slugify(value, allow_unicode=True)[:110] or 'kategoriya'
+    code, n = base, 1
+    while code in taken:
+        n += 1
+        code = f'{base}-{n}'
+    taken.add(code)
+    return code
+
+
+def seed_categories(apps, schema_editor):
+    """
+    Standart kategoriyalar + mavjud erkin matnli qiymatlar. Har bir alohida
+    qiymat o'z kategoriyasini oladi (nomi - asl matn), hech biri boshqasiga
+    qo'shilmaydi; yopilgan davrlardagi PeriodTotal.key lar ham yangi kodga
+    o'tkaziladi - davr qoldiqlari Expense bilan mos qoladi.
+    """
+    ExpenseCategory = apps.get_model('finance', 'ExpenseCategory')
+    Expense = apps.get_model('finance', 'Expense')
+    PeriodTotal = apps.get_model('finance', 'PeriodTotal')
+
+    names = dict(DEFAULT_CATEGORIES)
+    taken = set(names)
+    values = set(Expense.objects.values_list('category', flat=True).distinct())
+    # Kodga allaqachon mos qiymatlar (masalan 'ijara') o'zgarmaydi
+    for value in values:
+        if value in names:
+            continue
+        if value == slugify(value, allow_unicode=True) and value not in taken:
+            taken.add(value)
+            names[value] = value
+
+    for value in values:
+        if value in names:
+            continue
+        code = unique_code(value.strip(), taken)
+        names[code] = value.strip() or code
+        Expense.objects.filter(category=value).update(category=code)
+        PeriodTotal.objects.filter(kind='expense_category', key=value).update(key=code)
+
+    ExpenseCategory.objects.bulk_create(
+        [ExpenseCategory(code=code, name=name[:120]) for code, name in names.items()],
+        ignore_conflicts=True,
+    )
+
+
+def build_month_totals(apps, schema_editor):
+    ExpenseCategory = apps.get_model('finance', 'ExpenseCategory')
+    Expense = apps.get_model('finance', 'Expense')
+    ExpenseMonthTotal = apps.get_model('finance', 'ExpenseMonthTotal')
+
+    categories = dict(ExpenseCategory.objects.values_list('code', 'pk'))
+    rows = Expense.objects.annotate(period=TruncMonth('date')).values('category', 'period').annotate(
+        total=Sum('amount')
+    ).values_list('category', 'period', 'total')
+    ExpenseMonthTotal.objects.bulk_create(
+        [ExpenseMonthTotal(category_id=categories[code], period=period, total=total) for code, period, total in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_payslip'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('code', models.SlugField(max_length=120, unique=True)),
+                ('name', models.CharField(max_length=120)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Expense categories',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(seed_categories, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='expense',
+            name='category',
+            field=models.ForeignKey(db_column='category', on_delete=django.db.models.deletion.PROTECT, related_name='expenses', to='finance.expensecategory', to_field='code'),
+        ),
+        migrations.CreateModel(
+            name='ExpenseBudget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period', models.DateField(help_text='Oyning birinchi kuni')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='budgets', to='finance.expensecategory')),
+            ],
+            options={
+                'ordering': ['-period', 'category'],
+                'constraints': [models.UniqueConstraint(fields=('category', 'period'), name='unique_expense_budget_per_month')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExpenseMonthTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(help_text='Oyning birinchi kuni')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='month_totals', to='finance.expensecategory')),
+            ],
+            options={
+                'ordering': ['-period', 'category'],
+                'constraints': [models.UniqueConstraint(fields=('category', 'period'), name='unique_expense_total_per_month')],
+            },
+        ),
+        migrations.RunPython(build_month_totals, migrations.RunPython.noop),
+    ]
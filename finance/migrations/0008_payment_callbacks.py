@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_expense_categories_budgets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='external_id',
+            field=models.CharField(blank=True, help_text="Onlayn to'lov provayderidagi tranzaksiya ID", max_length=100, null=True, unique=True),
+        ),
+        migrations.CreateModel(
+            name='PaymentCallback',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=30)),
+                ('event_id', models.CharField(max_length=100)),
+                ('transaction_id', models.CharField(db_index=True, max_length=100)),
+                ('status', models.CharField(max_length=20)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='callbacks', to='finance.payment')),
+            ],
+            options={
+                'ordering': ['-received_at'],
+                'constraints': [models.UniqueConstraint(fields=('provider', 'event_id'), name='unique_payment_callback_event')],
+            },
+        ),
+    ]
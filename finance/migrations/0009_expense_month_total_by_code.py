@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+
+def clear_month_totals(apps, schema_editor):
+    """Ustun pk dan kodga o'tadi - yig'ma jadval hosila, keyin qayta quriladi"""
+    apps.get_model('finance', 'ExpenseMonthTotal').objects.all().delete()
+
+
+def build_month_totals(apps, schema_editor):
+    Expense = apps.get_model('finance', 'Expense')
+    ExpenseMonthTotal = apps.get_model('finance', 'ExpenseMonthTotal')
+
+    rows = Expense.objects.annotate(period=TruncMonth('date')).values('category', 'period').annotate(
+        total=Sum('amount')
+    ).values_list('category', 'period', 'total')
+    ExpenseMonthTotal.objects.bulk_create(
+        [ExpenseMonthTotal(category_id=code, period=period, total=total) for code, period, total in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_payment_callbacks'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='expensecategory',
+            name='code',
+            field=models.SlugField(allow_unicode=True, max_length=120, unique=True),
+        ),
+        migrations.RunPython(clear_month_totals, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='expensemonthtotal',
+            name='category',
+            field=models.ForeignKey(db_column='category', on_delete=django.db.models.deletion.CASCADE, related_name='month_totals', to='finance.expensecategory', to_field='code'),
+        ),
+        migrations.RunPython(build_month_totals, clear_month_totals),
+    ]
@@ -1,7 +1,22 @@
 # finance/models.py
-from django.db import models
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Q, QuerySet, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.core.cache import cache
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
 from django.utils import timezone
 from core.models import TimestampedModel
+from academics.models import Attendance
+from accounts.models import AdminProfile, ManagerProfile, StudentProfile, TeacherProfile
+from courses.models import Course, Group, GroupStatus
+
+
+MONEY_FIELD = models.DecimalField(max_digits=14, decimal_places=2)
 
 
 class PaymentMethod(models.TextChoices):
@@ -28,6 +43,7 @@ class Payment(TimestampedModel):
     status = models.CharField(max_length=30, choices=PaymentStatus.choices, default=PaymentStatus.PENDING)
     course = models.ForeignKey('courses.Course', on_delete=models.SET_NULL, null=True, blank=True)
     group = models.ForeignKey('courses.Group', on_delete=models.SET_NULL, null=True, blank=True) 
+    external_id = models.CharField(max_length=100, null=True, blank=True, unique=True, help_text="Onlayn to'lov provayderidagi tranzaksiya ID")
 
     class Meta:
         ordering = ['-payment_date']
@@ -36,12 +52,905 @@ class Payment(TimestampedModel):
         return f"{self.amount} — {self.student.user.get_full_name()} ({self.payment_date.date()})"
 
 
+class PaymentCallback(models.Model):
+    """
+    Provayder xabarnomalari uchun idempotentlik jadvali: (provider, event_id)
+    unikal - qayta yuborilgan xabar bitta INSERT xatosi bilan tashlab yuboriladi.
+    """
+    provider = models.CharField(max_length=30)
+    event_id = models.CharField(max_length=100)
+    transaction_id = models.CharField(max_length=100, db_index=True)
+    status = models.CharField(max_length=20)
+    payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, null=True, blank=True, related_name='callbacks')
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-received_at']
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'event_id'], name='unique_payment_callback_event'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider}:{self.event_id} ({self.status})"
+
+
+class ExpenseCategory(TimestampedModel):
+    """Xarajat kategoriyasi - Expense.category shu jadvalning code'iga bog'lanadi"""
+    code = models.SlugField(max_length=120, unique=True, allow_unicode=True)
+    name = models.CharField(max_length=120)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'Expense categories'
+
+    def __str__(self):
+        return self.name
+
+
 class Expense(TimestampedModel):
-    category = models.CharField(max_length=120)
+    # db_column va to_field saqlangan: ustunda avvalgidek kategoriya kodi turadi,
+    # shuning uchun davr yopish (PeriodTotal.key) kodlari o'zgarmaydi.
+    category = models.ForeignKey(
+        ExpenseCategory, on_delete=models.PROTECT, to_field='code', db_column='category',
+        related_name='expenses',
+    )
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     date = models.DateField(default=timezone.now)
     added_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, blank=True)
     note = models.TextField(blank=True)
 
     def __str__(self):
-        return f"{self.category}: {self.amount} ({self.date})"
+        return f"{self.category_id}: {self.amount} ({self.date})"
+
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        # post_save dagi ExpenseMonthTotal yangilanishi xarajat bilan bitta tranzaksiyada
+        super().save(*args, **kwargs)
+
+    @transaction.atomic
+    def delete(self, *args, **kwargs):
+        return super().delete(*args, **kwargs)
+
+
+# ============================================================================
+# XARAJAT BYUDJETLARI (oylik reja va yig'ma summalar)
+# ============================================================================
+
+class ExpenseBudget(TimestampedModel):
+    """Kategoriya bo'yicha oylik byudjet"""
+    category = models.ForeignKey(ExpenseCategory, on_delete=models.CASCADE, related_name='budgets')
+    period = models.DateField(help_text="Oyning birinchi kuni")
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        ordering = ['-period', 'category']
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'period'], name='unique_expense_budget_per_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.period:%Y-%m} — {self.category_id}: {self.amount}"
+
+
+class ExpenseMonthTotalManager(models.Manager):
+
+    def apply(self, category_id, date, delta):
+        """
+        Oylik yig'ma summaga delta qo'shish - bitta atomar UPDATE (F() bilan),
+        qator yo'q bo'lsa avval 0 bilan yaratiladi. category_id - kategoriya
+        kodi (Expense.category_id bilan bir xil), qo'shimcha so'rovsiz.
+        """
+        if not delta:
+            return
+        period = month_start(date)
+        self.bulk_create([self.model(category_id=category_id, period=period)], ignore_conflicts=True)
+        self.filter(category_id=category_id, period=period).update(total=models.F('total') + delta)
+
+    @transaction.atomic
+    def rebuild(self):
+        """Barcha yig'ma summalarni Expense jadvalidan qayta hisoblash (bitta guruhlangan so'rov)"""
+        self.all().delete()
+        rows = Expense.objects.annotate(period=TruncMonth('date')).values('category', 'period').annotate(
+            total=Sum('amount')
+        ).values_list('category', 'period', 'total')
+        self.bulk_create(
+            [self.model(category_id=code, period=period, total=total) for code, period, total in rows],
+            batch_size=1000,
+        )
+
+    def budget_report(self, period):
+        """
+        Byudjet va haqiqiy xarajat - oldindan hisoblangan ikki kichik jadvaldan.
+
+        Returns:
+            list[dict]: category, budget, actual, remaining, percent, over_budget
+        """
+        period = month_start(period)
+        budgets = dict(ExpenseBudget.objects.filter(period=period).values_list('category_id', 'amount'))
+        actuals = dict(self.filter(period=period).values_list('category_id', 'total'))
+
+        report = []
+        for category in ExpenseCategory.objects.filter(Q(is_active=True) | Q(code__in=actuals)):
+            budget = budgets.get(category.pk)
+            actual = actuals.get(category.code, Decimal('0'))
+            if budget is None and not actual:
+                continue
+            report.append({
+                'category': category,
+                'budget': budget,
+                'actual': actual,
+                'remaining': budget - actual if budget is not None else None,
+                'percent': round(actual * 100 / budget) if budget else None,
+                'over_budget': budget is not None and actual > budget,
+            })
+        return report
+
+    def is_over_budget(self, category_id, date):
+        period = month_start(date)
+        return ExpenseBudget.objects.filter(
+            category__code=category_id,
+            period=period,
+            amount__lt=Subquery(
+                self.filter(category_id=category_id, period=period).values('total')[:1]
+            ),
+        ).exists()
+
+
+class ExpenseMonthTotal(models.Model):
+    """Kategoriya bo'yicha oy boshidan yig'ma xarajat (signallar orqali yangilanadi)"""
+    # Expense kabi kod orqali bog'langan - yangilash uchun kategoriya pk si kerak emas
+    category = models.ForeignKey(
+        ExpenseCategory, on_delete=models.CASCADE, to_field='code', db_column='category',
+        related_name='month_totals',
+    )
+    period = models.DateField(help_text="Oyning birinchi kuni")
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    objects = ExpenseMonthTotalManager()
+
+    class Meta:
+        ordering = ['-period', 'category']
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'period'], name='unique_expense_total_per_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.period:%Y-%m} — {self.category_id}: {self.total}"
+
+
+@receiver(pre_save, sender=Expense)
+def remember_previous_expense(sender, instance, **kwargs):
+    instance._previous_expense = None
+    if instance.pk:
+        instance._previous_expense = Expense.objects.filter(pk=instance.pk).values_list(
+            'category', 'date', 'amount'
+        ).first()
+
+
+@receiver(post_save, sender=Expense)
+def add_expense_to_month_total(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_expense', None)
+    if previous:
+        ExpenseMonthTotal.objects.apply(previous[0], previous[1], -previous[2])
+    ExpenseMonthTotal.objects.apply(instance.category_id, instance.date, Decimal(instance.amount))
+
+
+@receiver(post_delete, sender=Expense)
+def remove_expense_from_month_total(sender, instance, **kwargs):
+    ExpenseMonthTotal.objects.apply(instance.category_id, instance.date, -Decimal(instance.amount))
+
+
+# ============================================================================
+# HISOB-FAKTURALAR (oylik to'lov majburiyatlari)
+# ============================================================================
+
+class InvoiceStatus(models.TextChoices):
+    UNPAID = 'unpaid', 'Unpaid'
+    PAID = 'paid', 'Paid'
+    CANCELLED = 'cancelled', 'Cancelled'
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+class InvoiceManager(models.Manager):
+    GENERATE_CHUNK_SIZE = 5000
+
+    def billable_enrollments(self, period):
+        """
+        Oy davomida faol bo'lgan guruhlardagi faol talabalar:
+        (student_id, group_id, course_id, price) qatorlari.
+        """
+        period_end = next_month(period)
+        return Group.students.through.objects.filter(
+            studentprofile__status='active',
+            studentprofile__user__deleted_at__isnull=True,  # soft delete - purge kutilmaydi
+            group__status=GroupStatus.ACTIVE,
+        ).filter(
+            Q(group__start_date__isnull=True) | Q(group__start_date__lt=period_end),
+            Q(group__end_date__isnull=True) | Q(group__end_date__gte=period),
+        ).order_by('pk').values_list(
+            'studentprofile_id', 'group_id', 'group__course_id', 'group__course__price',
+        )
+
+    def generate(self, period, chunk_size=None, progress=None):
+        """
+        Oy uchun hisob-fakturalarni yaratish. Qayta ishga tushirish xavfsiz:
+        (student, group, period) unikal kaliti va ignore_conflicts dublikatlarni tashlab yuboradi.
+
+        Args:
+            period: oyning istalgan kuni (date)
+            chunk_size: bitta tranzaksiyadagi qatorlar soni
+            progress: callable(processed) - har chunkdan keyin chaqiriladi
+
+        Returns:
+            int: yangi yaratilgan hisob-fakturalar soni
+        """
+        period = month_start(period)
+        chunk_size = chunk_size or self.GENERATE_CHUNK_SIZE
+        before = self.filter(period=period).count()
+
+        processed = 0
+        chunk = []
+        for student_id, group_id, course_id, price in self.billable_enrollments(period).iterator(chunk_size=chunk_size):
+            chunk.append(self.model(
+                student_id=student_id,
+                group_id=group_id,
+                course_id=course_id,
+                period=period,
+                amount=price,
+            ))
+            if len(chunk) >= chunk_size:
+                processed += self._insert_chunk(chunk)
+                chunk = []
+                if progress:
+                    progress(processed)
+        if chunk:
+            processed += self._insert_chunk(chunk)
+            if progress:
+                progress(processed)
+
+        return self.filter(period=period).count() - before
+
+    def settle(self, paid_totals, student_ids=None):
+        """
+        To'lovlarni hisob-fakturalarga FIFO bo'yicha taqsimlash: talabaning
+        tasdiqlangan to'lovlari eng eski hisob-fakturalardan boshlab yopadi,
+        to'liq qoplanganlari PAID, qolganlari UNPAID. Faqat holati o'zgargan
+        qatorlar update() bilan yoziladi (signal chaqirilmaydi).
+
+        Args:
+            paid_totals: dict student_id -> tasdiqlangan to'lovlar yig'indisi
+            student_ids: faqat shu talabalar (None - hammasi)
+
+        Returns:
+            int: holati o'zgargan hisob-fakturalar soni
+        """
+        invoices = self.exclude(status=InvoiceStatus.CANCELLED)
+        if student_ids is not None:
+            invoices = invoices.filter(student_id__in=student_ids)
+
+        changes = {InvoiceStatus.PAID: [], InvoiceStatus.UNPAID: []}
+        current, left = None, Decimal('0')
+        for pk, student_id, amount, status in invoices.order_by('student_id', 'period', 'pk').values_list(
+            'pk', 'student_id', 'amount', 'status',
+        ).iterator(chunk_size=5000):
+            if student_id not in paid_totals:
+                continue  # faol bo'lmagan talaba - holati tegilmaydi
+            if student_id != current:
+                current, left = student_id, paid_totals[student_id]
+            covered = amount <= left
+            left = left - amount if covered else Decimal('-1')  # birinchi qoplanmagandan keyin hammasi UNPAID
+            new_status = InvoiceStatus.PAID if covered else InvoiceStatus.UNPAID
+            if new_status != status:
+                changes[new_status].append(pk)
+
+        for status, pks in changes.items():
+            for i in range(0, len(pks), DebtorBalanceManager.REFRESH_CHUNK_SIZE):
+                self.filter(pk__in=pks[i:i + DebtorBalanceManager.REFRESH_CHUNK_SIZE]).update(status=status)
+        return sum(len(pks) for pks in changes.values())
+
+    def _insert_chunk(self, invoices):
+        with transaction.atomic():
+            self.bulk_create(invoices, batch_size=len(invoices), ignore_conflicts=True)
+            # bulk_create signal yubormaydi - qarzdorlar shu yerda yangilanadi
+            DebtorBalance.objects.refresh({invoice.student_id for invoice in invoices})
+        return len(invoices)
+
+
+class Invoice(TimestampedModel):
+    """Talabaning guruh uchun oylik to'lov majburiyati"""
+    student = models.ForeignKey('accounts.StudentProfile', on_delete=models.CASCADE, related_name='invoices')
+    group = models.ForeignKey('courses.Group', on_delete=models.CASCADE, related_name='invoices')
+    course = models.ForeignKey('courses.Course', on_delete=models.SET_NULL, null=True, blank=True)
+    period = models.DateField(help_text="Oyning birinchi kuni")
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    status = models.CharField(max_length=30, choices=InvoiceStatus.choices, default=InvoiceStatus.UNPAID)
+
+    objects = InvoiceManager()
+
+    class Meta:
+        ordering = ['-period']
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'group', 'period'], name='unique_invoice_per_month'),
+        ]
+        indexes = [models.Index(fields=['period', 'status'])]
+
+    def __str__(self):
+        return f"{self.period:%Y-%m} — {self.student_id}: {self.amount}"
+
+
+# ============================================================================
+# QARZDORLAR (keshlangan hisob-kitob)
+# ============================================================================
+
+DEBTOR_TOTAL_VERSION_KEY = 'finance:debtors:version'
+
+
+class DebtorBalanceManager(models.Manager):
+    REFRESH_CHUNK_SIZE = 900
+    PAGE_SIZE = 50
+    TOTAL_CACHE_TIMEOUT = 5 * 60
+
+    def _expected_charges(self):
+        """
+        Talaba bo'yicha kutilayotgan to'lov - bekor qilinmagan hisob-fakturalar
+        yig'indisi (generate_invoices har oy yaratadi).
+        """
+        return Invoice.objects.filter(
+            student_id=OuterRef('pk'),
+        ).exclude(
+            status=InvoiceStatus.CANCELLED
+        ).values('student_id').annotate(total=Sum('amount')).values('total')
+
+    def _paid_totals(self):
+        return Payment.objects.filter(
+            student_id=OuterRef('pk'),
+            status=PaymentStatus.APPROVED,
+        ).values('student_id').annotate(total=Sum('amount')).values('total')
+
+    def compute(self, student_ids=None):
+        """
+        Faol talabalar uchun (student_id, expected, paid) qatorlari -
+        bitta SQL so'rov, guruhlash talaba bo'yicha.
+        """
+        zero = Value(Decimal('0'), output_field=MONEY_FIELD)
+        students = StudentProfile.objects.filter(status='active', user__deleted_at__isnull=True)
+        if student_ids is not None:
+            students = students.filter(pk__in=student_ids)
+
+        return students.annotate(
+            expected=Coalesce(Subquery(self._expected_charges(), output_field=MONEY_FIELD), zero),
+            paid=Coalesce(Subquery(self._paid_totals(), output_field=MONEY_FIELD), zero),
+        ).values_list('pk', 'expected', 'paid')
+
+    def refresh(self, student_ids=None):
+        """
+        Qarzdorlar jadvalini yangilash.
+
+        Args:
+            student_ids: faqat shu talabalar (None - hammasi)
+
+        Returns:
+            int: yangilangan qatorlar soni
+        """
+        if student_ids is None:
+            return self._refresh_chunk(None)
+
+        student_ids = list(set(student_ids))
+        updated = 0
+        for i in range(0, len(student_ids), self.REFRESH_CHUNK_SIZE):
+            updated += self._refresh_chunk(student_ids[i:i + self.REFRESH_CHUNK_SIZE])
+        return updated
+
+    @transaction.atomic
+    def _refresh_chunk(self, student_ids):
+        rows = [
+            self.model(student_id=pk, expected_total=expected, paid_total=paid, debt=expected - paid)
+            for pk, expected, paid in self.compute(student_ids).iterator(chunk_size=5000)
+        ]
+
+        # Faol bo'lmagan (yoki o'chirilgan) talabalar jadvaldan chiqariladi
+        stale = self.exclude(student_id__in=[row.student_id for row in rows]) if student_ids is None \
+            else self.filter(student_id__in=set(student_ids) - {row.student_id for row in rows})
+        stale.delete()
+
+        self.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['student'],
+            update_fields=['expected_total', 'paid_total', 'debt', 'updated_at'],
+        )
+        Invoice.objects.settle({row.student_id: row.paid_total for row in rows}, student_ids)
+        transaction.on_commit(lambda: cache.set(DEBTOR_TOTAL_VERSION_KEY, timezone.now().timestamp(), None))
+        return len(rows)
+
+    def page(self, queryset, cursor=None, limit=None):
+        """
+        Keyset sahifalash (-debt, student_id) bo'yicha: OFFSET siz, har sahifa
+        indeksdan o'qiladi. Kursor '<debt>_<student_id>'.
+
+        Returns:
+            tuple: (DebtorBalance ro'yxati, keyingi sahifa kursori yoki None)
+        """
+        limit = limit or self.PAGE_SIZE
+        if cursor:
+            try:
+                debt, student_id = cursor.rsplit('_', 1)
+                debt, student_id = Decimal(debt), int(student_id)
+            except (ArithmeticError, ValueError):
+                pass
+            else:
+                queryset = queryset.filter(Q(debt__lt=debt) | Q(debt=debt, student_id__gt=student_id))
+
+        rows = list(queryset.order_by('-debt', 'student_id')[:limit + 1])
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, f"{rows[-1].debt}_{rows[-1].student_id}"
+
+    def total_debt(self, queryset, key=''):
+        """
+        Filtrlangan qarzdorlar yig'indisi - keshdan. Kesh kaliti qarzdorlar
+        jadvali har yangilanganda o'zgaradigan versiya bilan.
+
+        Args:
+            key: filtrlarni ifodalovchi satr (masalan, 'group=5')
+        """
+        version = cache.get(DEBTOR_TOTAL_VERSION_KEY, 0)
+        cache_key = f'finance:debtors:total:{version}:{key}'
+        total = cache.get(cache_key)
+        if total is None:
+            total = queryset.aggregate(Sum('debt'))['debt__sum'] or Decimal('0')
+            cache.set(cache_key, total, self.TOTAL_CACHE_TIMEOUT)
+        return total
+
+
+class DebtorBalance(models.Model):
+    """
+    Talabaning hisob-fakturalari va tasdiqlangan to'lovlari farqi.
+    To'lov, hisob-faktura yoki talaba holati o'zgarganda signal orqali yangilanadi.
+    """
+    student = models.OneToOneField('accounts.StudentProfile', on_delete=models.CASCADE, primary_key=True, related_name='debtor_balance')
+    expected_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    debt = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DebtorBalanceManager()
+
+    class Meta:
+        ordering = ['-debt']
+        indexes = [models.Index(fields=['-debt'])]
+
+    def __str__(self):
+        return f"{self.student_id}: {self.debt}"
+
+
+def refresh_debtors_on_commit(student_ids):
+    student_ids = [pk for pk in student_ids if pk]
+    if student_ids:
+        transaction.on_commit(lambda: DebtorBalance.objects.refresh(student_ids))
+
+
+@receiver(pre_save, sender=Payment)
+def remember_previous_payment(sender, instance, **kwargs):
+    """
+    O'zgarishdan oldingi (student_id, payment_date) - to'lov boshqa talabaga
+    o'tkazilsa eski talaba ham yangilanadi, davrni yopish tekshiruvi ham shundan foydalanadi.
+    """
+    instance._previous_payment = None
+    if instance.pk:
+        instance._previous_payment = Payment.objects.filter(pk=instance.pk).values_list(
+            'student_id', 'payment_date'
+        ).first()
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def refresh_debtor_on_payment_change(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_payment', None)
+    refresh_debtors_on_commit([instance.student_id, previous[0] if previous else None])
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def refresh_debtor_on_invoice_change(sender, instance, origin=None, **kwargs):
+    # Guruh/kurs o'chirilganda kaskad o'chirishlar pre_delete da bir marta yangilanadi
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model in (Group, Course):
+        return
+    refresh_debtors_on_commit([instance.student_id])
+
+
+@receiver(post_save, sender=StudentProfile)
+def refresh_debtor_on_student_status_change(sender, instance, created, update_fields=None, **kwargs):
+    # credit()/debit() faqat balance ni yangilaydi - qarzga ta'sir qilmaydi
+    if created or (update_fields and set(update_fields) == {'balance'}):
+        return
+    refresh_debtors_on_commit([instance.pk])
+
+
+@receiver(pre_delete, sender=Group)
+@receiver(pre_delete, sender=Course)
+def refresh_debtors_on_group_delete(sender, instance, **kwargs):
+    invoices = Invoice.objects.filter(group=instance) if sender is Group \
+        else Invoice.objects.filter(group__course=instance)
+    refresh_debtors_on_commit(list(invoices.values_list('student_id', flat=True).distinct()))
+
+
+# ============================================================================
+# DAVRNI YOPISH (oylik yopilish qoldiqlari)
+# ============================================================================
+
+class PeriodClosedError(ValidationError):
+    pass
+
+
+def period_bounds(period):
+    """Oy boshidan keyingi oy boshigacha - aware datetime lar"""
+    start = timezone.make_aware(datetime.combine(period, time.min))
+    end = timezone.make_aware(datetime.combine(next_month(period), time.min))
+    return start, end
+
+
+class FinancePeriodManager(models.Manager):
+
+    def last_closed(self, before=None):
+        """Eng oxirgi yopilgan davr (before - shu sanadan oldin tugaganlar ichidan)"""
+        queryset = self.all()
+        if before is not None:
+            queryset = queryset.filter(period__lt=month_start(before))
+        return queryset.order_by('-period').first()
+
+    def closed_through(self):
+        """Yopilgan davrlar tugaydigan sana (shu sanadan oldingi yozuvlar muzlatilgan)"""
+        last = self.order_by('-period').values_list('period', flat=True).first()
+        return next_month(last) if last else None
+
+    @transaction.atomic
+    def close(self, period, closed_by=None):
+        """
+        Oyni yopish: yopilish qoldiqlarini hisoblash va saqlash.
+        Oylar ketma-ket yopiladi, kutilayotgan to'lovlar qolmasligi kerak.
+        """
+        period = month_start(period)
+        previous = self.last_closed()
+
+        if previous and period <= previous.period:
+            raise PeriodClosedError(f"{period:%Y-%m} allaqachon yopilgan.")
+        if previous and period != next_month(previous.period):
+            raise ValidationError(f"Avval {next_month(previous.period):%Y-%m} oyini yoping.")
+        if next_month(period) > timezone.localdate():
+            raise ValidationError("Faqat tugagan oyni yopish mumkin.")
+
+        start, end = period_bounds(period)
+        month_payments = Payment.objects.filter(
+            status=PaymentStatus.APPROVED, payment_date__gte=start, payment_date__lt=end,
+        )
+        month_expenses = Expense.objects.filter(date__gte=period, date__lt=next_month(period))
+
+        # Yig'ma qiymatlar: oldingi davr + shu oy (birinchi yopilishda - butun tarix)
+        if previous:
+            delta_payments = Payment.objects.filter(payment_date__gte=start, payment_date__lt=end)
+            delta_expenses = month_expenses
+        else:
+            delta_payments = Payment.objects.filter(payment_date__lt=end)
+            delta_expenses = Expense.objects.filter(date__lt=next_month(period))
+
+        if delta_payments.filter(status=PaymentStatus.PENDING).exists():
+            raise ValidationError(f"{period:%Y-%m} gacha kutilayotgan to'lovlar bor.")
+        delta_payments = delta_payments.filter(status=PaymentStatus.APPROVED)
+
+        closing = self.create(
+            period=period,
+            closed_by=closed_by,
+            income_total=month_payments.aggregate(total=Sum('amount'))['total'] or 0,
+            expense_total=month_expenses.aggregate(total=Sum('amount'))['total'] or 0,
+        )
+
+        balances = {}
+        if previous:
+            balances = dict(previous.student_balances.values_list('student_id', 'paid_total'))
+        for student_id, total in delta_payments.values('student_id').annotate(total=Sum('amount')).values_list('student_id', 'total'):
+            balances[student_id] = balances.get(student_id, 0) + total
+        PeriodStudentBalance.objects.bulk_create(
+            [PeriodStudentBalance(period=closing, student_id=pk, paid_total=total) for pk, total in balances.items()],
+            batch_size=1000,
+        )
+
+        totals = []
+        for kind, field, month_rows, delta_rows in (
+            (PeriodTotal.Kind.PAYMENT_METHOD, 'payment_method', month_payments, delta_payments),
+            (PeriodTotal.Kind.EXPENSE_CATEGORY, 'category', month_expenses, delta_expenses),
+        ):
+            cumulative = {}
+            if previous:
+                cumulative = dict(previous.totals.filter(kind=kind).values_list('key', 'cumulative'))
+            for key, total in delta_rows.values(field).annotate(total=Sum('amount')).values_list(field, 'total'):
+                cumulative[key] = cumulative.get(key, 0) + total
+            amounts = dict(month_rows.values(field).annotate(total=Sum('amount')).values_list(field, 'total'))
+            totals += [
+                PeriodTotal(period=closing, kind=kind, key=key, amount=amounts.get(key, 0), cumulative=value)
+                for key, value in cumulative.items()
+            ]
+        PeriodTotal.objects.bulk_create(totals)
+
+        return closing
+
+    # ------------------------------------------------------------------------
+    # Sana bo'yicha so'rovlar: eng yaqin yopilgan davr + ochiq "dum"
+    # ------------------------------------------------------------------------
+
+    def student_paid_as_of(self, student_id, date=None):
+        """Talabaning shu sanagacha (sana ichida) tasdiqlangan to'lovlari yig'indisi"""
+        date = date or timezone.localdate()
+        closing = self.last_closed(before=date)
+        total = Decimal('0')
+        tail = Payment.objects.filter(student_id=student_id, status=PaymentStatus.APPROVED)
+
+        if closing:
+            total = closing.student_balances.filter(student_id=student_id).values_list('paid_total', flat=True).first() or total
+            tail = tail.filter(payment_date__gte=period_bounds(closing.period)[1])
+
+        until = timezone.make_aware(datetime.combine(date + timedelta(days=1), time.min))
+        return total + (tail.filter(payment_date__lt=until).aggregate(total=Sum('amount'))['total'] or 0)
+
+    def _cumulative_as_of(self, kind, date):
+        """
+        Usul yoki kategoriya bo'yicha shu sanagacha (sana ichida) yig'ma summa:
+        eng yaqin yopilgan davr qoldig'i + ochiq davr yozuvlari.
+        """
+        closing = self.last_closed(before=date)
+        totals = {}
+
+        if kind == PeriodTotal.Kind.PAYMENT_METHOD:
+            field = 'payment_method'
+            until = timezone.make_aware(datetime.combine(date + timedelta(days=1), time.min))
+            tail = Payment.objects.filter(status=PaymentStatus.APPROVED, payment_date__lt=until)
+            if closing:
+                tail = tail.filter(payment_date__gte=period_bounds(closing.period)[1])
+        else:
+            field = 'category'
+            tail = Expense.objects.filter(date__lte=date)
+            if closing:
+                tail = tail.filter(date__gte=next_month(closing.period))
+
+        if closing:
+            totals = dict(closing.totals.filter(kind=kind).values_list('key', 'cumulative'))
+        for key, total in tail.values(field).annotate(total=Sum('amount')).values_list(field, 'total'):
+            totals[key] = totals.get(key, 0) + total
+        return totals
+
+    def payment_totals_as_of(self, date=None):
+        """To'lov usuli bo'yicha tasdiqlangan to'lovlar (shu sanagacha)"""
+        return self._cumulative_as_of(PeriodTotal.Kind.PAYMENT_METHOD, date or timezone.localdate())
+
+    def expense_totals_as_of(self, date=None):
+        """Kategoriya bo'yicha xarajatlar (shu sanagacha)"""
+        return self._cumulative_as_of(PeriodTotal.Kind.EXPENSE_CATEGORY, date or timezone.localdate())
+
+    def income_as_of(self, date=None):
+        return sum(self.payment_totals_as_of(date).values(), Decimal('0'))
+
+    def expense_as_of(self, date=None):
+        return sum(self.expense_totals_as_of(date).values(), Decimal('0'))
+
+    def totals_as_of(self, date=None):
+        """
+        Shu sanagacha jami daromad/xarajat va usul/kategoriya bo'yicha taqsimot.
+
+        Returns:
+            dict: income, expense, by_method, by_category
+        """
+        by_method = self.payment_totals_as_of(date)
+        by_category = self.expense_totals_as_of(date)
+        return {
+            'income': sum(by_method.values(), Decimal('0')),
+            'expense': sum(by_category.values(), Decimal('0')),
+            'by_method': by_method,
+            'by_category': by_category,
+        }
+
+
+class FinancePeriod(TimestampedModel):
+    """Yopilgan oy - shu oygacha bo'lgan to'lov va xarajatlar muzlatiladi"""
+    period = models.DateField(unique=True, help_text="Oyning birinchi kuni")
+    closed_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, blank=True)
+    income_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    objects = FinancePeriodManager()
+
+    class Meta:
+        ordering = ['-period']
+
+    def __str__(self):
+        return f"{self.period:%Y-%m}"
+
+
+class PeriodStudentBalance(models.Model):
+    """Davr oxiridagi talabaning yig'ma tasdiqlangan to'lovlari"""
+    period = models.ForeignKey(FinancePeriod, on_delete=models.CASCADE, related_name='student_balances')
+    student = models.ForeignKey('accounts.StudentProfile', on_delete=models.CASCADE, related_name='period_balances')
+    paid_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('period', 'student')
+
+    def __str__(self):
+        return f"{self.period} — {self.student_id}: {self.paid_total}"
+
+
+class PeriodTotal(models.Model):
+    """Davr bo'yicha to'lov usuli / xarajat kategoriyasi jami (oylik va yig'ma)"""
+
+    class Kind(models.TextChoices):
+        PAYMENT_METHOD = 'payment_method', 'Payment method'
+        EXPENSE_CATEGORY = 'expense_category', 'Expense category'
+
+    period = models.ForeignKey(FinancePeriod, on_delete=models.CASCADE, related_name='totals')
+    kind = models.CharField(max_length=30, choices=Kind.choices)
+    key = models.CharField(max_length=120)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cumulative = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('period', 'kind', 'key')
+
+    def __str__(self):
+        return f"{self.period} — {self.kind}:{self.key} = {self.amount}"
+
+
+def ensure_period_open(date):
+    closed_through = FinancePeriod.objects.closed_through()
+    if closed_through and date < closed_through:
+        raise PeriodClosedError(f"{date:%Y-%m} davri yopilgan, o'zgartirish mumkin emas.")
+
+
+# Formalar yopilgan davrni o'zlari tekshiradi (PaymentForm/ExpenseForm.clean);
+# quyidagi signallar boshqa yo'llar (admin, shell) uchun himoya sifatida qoladi.
+@receiver(pre_save, sender=Payment)
+@receiver(pre_delete, sender=Payment)
+def freeze_closed_payment(sender, instance, **kwargs):
+    dates = [instance.payment_date]
+    previous = getattr(instance, '_previous_payment', None)  # remember_previous_payment (pre_save)
+    if previous:
+        dates.append(previous[1])
+    for value in dates:
+        ensure_period_open(timezone.localtime(value).date() if timezone.is_aware(value) else value.date())
+
+
+@receiver(pre_save, sender=Expense)
+@receiver(pre_delete, sender=Expense)
+def freeze_closed_expense(sender, instance, **kwargs):
+    dates = [instance.date]
+    previous = getattr(instance, '_previous_expense', None)  # remember_previous_expense (pre_save)
+    if previous:
+        dates.append(previous[1])
+    for value in dates:
+        ensure_period_open(value)
+
+
+# ============================================================================
+# ISH HAQI (oylik hisob-kitob)
+# ============================================================================
+
+class PayslipManager(models.Manager):
+
+    def lesson_counts(self, period):
+        """
+        O'qituvchi bo'yicha o'tilgan darslar soni - davomatdagi noyob
+        (group, date) juftliklari. Bitta guruhlangan COUNT(DISTINCT date)
+        so'rovi: natija guruhlar soniga teng qator, darslar soniga emas.
+
+        Cheklov: dars guruhning *hozirgi* o'qituvchisiga yoziladi - davomatda
+        dars vaqtidagi o'qituvchi saqlanmaydi, shuning uchun oy o'rtasida
+        o'qituvchi almashsa butun oy yangi o'qituvchiga hisoblanadi.
+        """
+        per_group = Attendance.objects.filter(
+            date__gte=period,
+            date__lt=next_month(period),
+            group__teacher__isnull=False,
+        ).values('group_id', 'group__teacher_id').annotate(
+            lessons=Count('date', distinct=True),
+        ).order_by()
+
+        counts = defaultdict(int)
+        for row in per_group:
+            counts[row['group__teacher_id']] += row['lessons']
+        return counts
+
+    @transaction.atomic
+    def run(self, period):
+        """
+        Oy uchun barcha xodimlarning ish haqini hisoblash (qayta ishga tushirish
+        mavjud hisob varaqlarini yangilaydi).
+
+        Returns:
+            int: hisob varaqlari soni
+        """
+        period = month_start(period)
+        lessons = self.lesson_counts(period)
+        payslips = []
+
+        for teacher_id, user_id, salary, rate in TeacherProfile.objects.filter(
+            user__is_active=True
+        ).values_list('id', 'user_id', 'salary', 'lesson_rate').iterator():
+            count = lessons.get(teacher_id, 0)
+            payslips.append(self.model(
+                user_id=user_id, period=period, role=Payslip.Role.TEACHER,
+                base_salary=salary, lessons_count=count, lesson_rate=rate,
+                lesson_pay=count * rate, total=salary + count * rate,
+            ))
+
+        for role, profile in ((Payslip.Role.ADMIN, AdminProfile), (Payslip.Role.MANAGER, ManagerProfile)):
+            for user_id, salary in profile.objects.filter(user__is_active=True).values_list('user_id', 'salary').iterator():
+                payslips.append(self.model(
+                    user_id=user_id, period=period, role=role,
+                    base_salary=salary, total=salary,
+                ))
+
+        self.bulk_create(
+            payslips,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user', 'period', 'role'],
+            update_fields=['base_salary', 'lessons_count', 'lesson_rate', 'lesson_pay', 'total', 'updated_at'],
+        )
+        return len(payslips)
+
+
+class Payslip(TimestampedModel):
+    """Xodimning oylik hisob varag'i: asosiy maosh + darslar uchun to'lov"""
+
+    class Role(models.TextChoices):
+        TEACHER = 'teacher', 'Teacher'
+        ADMIN = 'admin', 'Admin'
+        MANAGER = 'manager', 'Manager'
+
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='payslips')
+    period = models.DateField(help_text="Oyning birinchi kuni")
+    role = models.CharField(max_length=30, choices=Role.choices)
+    base_salary = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    lessons_count = models.PositiveIntegerField(default=0)
+    lesson_rate = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    lesson_pay = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    objects = PayslipManager()
+
+    class Meta:
+        ordering = ['-period', 'role', 'user_id']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'period', 'role'], name='unique_payslip_per_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.period:%Y-%m} — {self.user_id} ({self.role}): {self.total}"
+
+
+# ============================================================================
+# PUL OQIMI PROGNOZI KESHI (finance/forecasting.py)
+# ============================================================================
+
+FORECAST_VERSION_KEY = 'finance:forecast:version'
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(m2m_changed, sender=Group.students.through)
+def invalidate_forecast(sender, **kwargs):
+    """Manba ma'lumot o'zgardi - keshdagi prognozlar yangi versiya kaliti bilan eskiradi"""
+    cache.set(FORECAST_VERSION_KEY, timezone.now().timestamp(), None)
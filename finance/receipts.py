@@ -0,0 +1,256 @@
+"""
+To'lov kvitansiyalari (PNG / PDF)
+
+Kvitansiya tasdiqlangan to'lovdan chiziladi va diskda kontent-manzilli keshda
+saqlanadi: fayl nomi (payment id, updated_at, format, RENDER_VERSION) dan olingan
+sha256. To'lov o'zgarmaguncha qayta yuklab olish CPU sarflamaydi.
+
+Oylik arxiv oqim bilan zip qilinadi: har kvitansiya keshdan olinadi (yo'q bo'lsa
+shu yerda chiziladi) va darhol yuboriladi. Ko'p kvitansiyani oldindan chizish
+(prerender_job, davr yopilganda) fon vazifasida, spawn jarayonlar hovuzida.
+"""
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+import django
+
+from PIL import Image, ImageDraw, ImageFont
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Payment, PaymentStatus, period_bounds
+
+
+RENDER_VERSION = 1
+TITLE = "TO'LOV KVITANSIYASI"
+FORMATS = {
+    'png': 'image/png',
+    'pdf': 'application/pdf',
+}
+POOL_MIN_JOBS = 8  # bundan kam kvitansiya uchun jarayonlar hovuzini ochmaymiz
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+
+# ============================================================================
+# MA'LUMOT VA CHIZISH (jarayonlar hovuzida ishlaydi - faqat oddiy dict)
+# ============================================================================
+
+def receipt_data(payment):
+    """Kvitansiya uchun kerakli maydonlar - pickle qilinadigan dict"""
+    approver = payment.approved_by.user if payment.approved_by else None
+    course = payment.course or (payment.group.course if payment.group else None)
+    return {
+        'id': payment.id,
+        'number': f"{payment.payment_date:%Y%m}-{payment.id:06d}",
+        'student': payment.student.user.get_full_name() or payment.student.user.email,
+        'course': course.title if course else '—',
+        'amount': f"{payment.amount:,.2f} so'm".replace(',', ' '),
+        'date': f"{timezone.localtime(payment.payment_date):%Y-%m-%d %H:%M}",
+        'method': payment.get_payment_method_display(),
+        'approver': (approver.get_full_name() or approver.email) if approver else 'Onlayn / tizim',
+    }
+
+
+def receipt_lines(data):
+    return [
+        ('Kvitansiya', f"No. {data['number']}"),
+        ("O'quvchi", data['student']),
+        ('Kurs', data['course']),
+        ('Summa', data['amount']),
+        ('Sana', data['date']),
+        ("To'lov usuli", data['method']),
+        ('Tasdiqlagan', data['approver']),
+    ]
+
+
+def render_png(data):
+    image = Image.new('RGB', (800, 420), 'white')
+    draw = ImageDraw.Draw(image)
+    try:
+        title_font, font = ImageFont.load_default(size=32), ImageFont.load_default(size=22)
+    except TypeError:  # FreeType'siz Pillow - bitmap shrift
+        title_font = font = ImageFont.load_default()
+
+    draw.rectangle((10, 10, 789, 409), outline='#0d6efd', width=3)
+    draw.text((40, 30), TITLE, fill='#0d6efd', font=title_font)
+    y = 100
+    for label, value in receipt_lines(data):
+        draw.text((40, y), f"{label}:", fill='#555555', font=font)
+        draw.text((260, y), str(value), fill='black', font=font)
+        y += 40
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _pdf_text(value):
+    text = str(value).encode('latin-1', 'replace').decode('latin-1')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def render_pdf(data):
+    """Bitta sahifali oddiy PDF (Helvetica, tashqi kutubxonasiz)"""
+    commands = ['BT', '/F1 20 Tf', '50 780 Td', f"({_pdf_text(TITLE)}) Tj", 'ET']
+    y = 730
+    for label, value in receipt_lines(data):
+        commands += ['BT', '/F1 12 Tf', f'50 {y} Td', f'({_pdf_text(label)}:) Tj', 'ET']
+        commands += ['BT', '/F1 12 Tf', f'200 {y} Td', f'({_pdf_text(value)}) Tj', 'ET']
+        y -= 24
+    stream = '\n'.join(commands).encode('latin-1')
+
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+        b'/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Length ' + str(len(stream)).encode() + b' >>\nstream\n' + stream + b'\nendstream',
+    ]
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f'{number} 0 obj\n'.encode() + body + b'\nendobj\n'
+    xref = len(output)
+    output += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    output += b''.join(f'{offset:010d} 00000 n \n'.encode() for offset in offsets)
+    output += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return bytes(output)
+
+
+RENDERERS = {
+    'png': render_png,
+    'pdf': render_pdf,
+}
+
+
+def render(job):
+    """(data, fmt) -> bytes; ProcessPoolExecutor.map uchun modul darajasida"""
+    data, fmt = job
+    return RENDERERS[fmt](data)
+
+
+# ============================================================================
+# DISK KESHI
+# ============================================================================
+
+def cache_root():
+    return Path(settings.MEDIA_ROOT) / 'receipts'
+
+
+def cache_path(payment, fmt):
+    """Kontent-manzilli yo'l: payment id + updated_at o'zgarsa, yangi fayl"""
+    key = f"{payment.id}:{payment.updated_at.isoformat()}:{fmt}:{RENDER_VERSION}"
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return cache_root() / digest[:2] / f"{digest}.{fmt}"
+
+
+def _store(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Noyob vaqtinchalik nom: bir jarayondagi ikki oqim bir kvitansiyani chizsa ham to'qnashmaydi
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.tmp', delete=False) as tmp:
+        tmp.write(content)
+    os.replace(tmp.name, path)  # yarim yozilgan fayl hech qachon ko'rinmaydi
+
+
+def approved_payments():
+    return Payment.objects.filter(status=PaymentStatus.APPROVED).select_related(
+        'student__user', 'course', 'group__course', 'approved_by__user',
+    )
+
+
+def get_receipt(payment, fmt='png'):
+    """Bitta kvitansiya: keshdan yoki shu jarayonda chizib"""
+    path = cache_path(payment, fmt)
+    if not path.exists():
+        _store(path, render((receipt_data(payment), fmt)))
+    return path
+
+
+def ensure_receipts(payments, fmt='png', progress=None):
+    """
+    Keshda yo'q kvitansiyalarni chizish (ko'p bo'lsa jarayonlar hovuzida).
+    So'rov ichida chaqirilmaydi - fon vazifasi yoki buyruqdan. Hovuz 'spawn'
+    bilan: ko'p oqimli jarayonni fork qilish meros qolgan qulflarda
+    (logging, DB) qotib qolishi mumkin.
+
+    Returns:
+        list: (payment, path) juftliklari
+    """
+    items = [(payment, cache_path(payment, fmt)) for payment in payments]
+    missing = [(payment, path) for payment, path in items if not path.exists()]
+    if progress:
+        progress.set_total(len(missing))
+
+    if missing:
+        jobs = [(receipt_data(payment), fmt) for payment, _ in missing]
+        if len(jobs) >= POOL_MIN_JOBS and MAX_WORKERS > 1:
+            with ProcessPoolExecutor(
+                max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup,
+            ) as pool:
+                rendered = pool.map(render, jobs, chunksize=16)
+                for (_, path), content in zip(missing, rendered):
+                    _store(path, content)
+                    if progress:
+                        progress.advance(1)
+        else:
+            for (_, path), job in zip(missing, jobs):
+                _store(path, render(job))
+                if progress:
+                    progress.advance(1)
+    return items
+
+
+def prerender_job(job, period, fmt='png'):
+    """Fon vazifasi: oy kvitansiyalarini oldindan chizish (FinancePeriodListView navbatga qo'yadi)"""
+    ensure_receipts(month_payments(date.fromisoformat(period)), fmt, progress=job)
+
+
+# ============================================================================
+# OYLIK ARXIV (oqimli zip)
+# ============================================================================
+
+class _ZipStream(io.RawIOBase):
+    """zipfile yozadigan, lekin o'qib olingan qismini darhol bo'shatadigan bufer"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        return len(data)
+
+    def pop(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def month_payments(period):
+    start, end = period_bounds(period)
+    return approved_payments().filter(payment_date__gte=start, payment_date__lt=end).order_by('payment_date')
+
+
+def stream_month_zip(period, fmt='png'):
+    """
+    Oyning barcha kvitansiyalari - har biri keshdan olinadi (yo'g'i shu yerda
+    chiziladi) va darhol zip oqimiga yoziladi: birinchi bayt hammasi
+    chizilishini kutmaydi, so'rov jarayoni fork qilinmaydi.
+    """
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for payment in month_payments(period).iterator(chunk_size=200):
+            archive.write(get_receipt(payment, fmt), arcname=f"receipt-{payment.id}.{fmt}")
+            yield stream.pop()
+    yield stream.pop()
@@ -0,0 +1,419 @@
+"""
+Bank ko'chirmasini solishtirish (reconciliation)
+
+Bank ko'chirmasi (CSV) qatorlari talabalar va mavjud to'lovlar bilan
+xotiradagi indekslar orqali solishtiriladi (hash-join). Talabalar ham,
+to'lovlar ham bitta so'rov bilan yuklanadi, shuning uchun 50k qator va 100k
+talaba uchun ham so'rovlar soni o'zgarmaydi.
+
+CSV ustunlari (sarlavha qatori majburiy):
+    date, amount, email, phone, name, note
+"""
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import StudentProfile
+from .models import FinancePeriod, Payment, PaymentMethod, PaymentStatus
+
+
+DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S')
+DEFAULT_WINDOW_DAYS = 3
+BULK_BATCH_SIZE = 1000
+PROPOSAL_TTL = 24 * 60 * 60  # tasdiqlanmagan takliflar shundan keyin tozalanadi
+
+
+class MatchStatus:
+    MATCHED = 'matched'      # Mavjud kutilayotgan to'lovga mos keldi
+    RECORDED = 'recorded'    # To'lov allaqachon kiritilgan va tasdiqlangan
+    NEW = 'new'              # Talaba topildi, yangi to'lov taklif qilinadi
+    AMBIGUOUS = 'ambiguous'  # Bir nechta talaba mos keldi
+    UNMATCHED = 'unmatched'  # Talaba topilmadi
+    INVALID = 'invalid'      # Qatorni o'qib bo'lmadi
+
+    ALL = (MATCHED, RECORDED, NEW, AMBIGUOUS, UNMATCHED, INVALID)
+
+
+StatementLine = namedtuple('StatementLine', 'line_no date amount email phone name note')
+MatchResult = namedtuple('MatchResult', 'line status student_id payment_id candidates reason')
+
+
+# ============================================================================
+# NORMALIZATSIYA
+# ============================================================================
+
+def normalize_email(value):
+    return (value or '').strip().lower()
+
+
+def normalize_phone(value):
+    """Faqat raqamlar, oxirgi 9 tasi (+998 kodi bilan va kodsiz bir xil)"""
+    digits = re.sub(r'\D', '', value or '')
+    return digits[-9:] if len(digits) >= 9 else digits
+
+
+_NAME_STRIP_RE = re.compile(r"[`'ʻʼ‘’\-.]")
+
+
+def normalize_name(value):
+    """Ism-familiya tartibiga bog'liq bo'lmagan kalit: 'Ali Valiyev' == 'valiyev ali'"""
+    value = _NAME_STRIP_RE.sub('', (value or '').casefold())
+    return ' '.join(sorted(value.split()))
+
+
+def parse_amount(value):
+    cleaned = re.sub(r'[\s,]', '', value or '')
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        return None
+    return amount.quantize(Decimal('0.01')) if amount > 0 else None
+
+
+def parse_date(value):
+    value = (value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+# ============================================================================
+# CSV O'QISH
+# ============================================================================
+
+REQUIRED_COLUMNS = {'date', 'amount'}
+IDENTITY_COLUMNS = {'email', 'phone', 'name'}
+
+
+class StatementError(ValueError):
+    """Ko'chirma faylini o'qib bo'lmadi (kodirovka, CSV yoki ustunlar xatosi)"""
+
+
+def read_statement(uploaded_file, encoding='utf-8-sig'):
+    """
+    Yuklangan CSV faylni to'liq o'qiydi.
+
+    Returns:
+        list[StatementLine] - noto'g'ri qatorlarda date/amount None bo'ladi
+
+    Raises:
+        StatementError: fayl UTF-8 emas, CSV buzilgan yoki kerakli ustunlar yo'q
+    """
+    stream = io.TextIOWrapper(uploaded_file, encoding=encoding, newline='')
+    try:
+        reader = csv.DictReader(stream)
+        fieldnames = [name.strip().lower() for name in (reader.fieldnames or [])]
+
+        missing = REQUIRED_COLUMNS - set(fieldnames)
+        if missing:
+            raise StatementError(f"Kerakli ustunlar topilmadi: {', '.join(sorted(missing))}")
+        if not IDENTITY_COLUMNS & set(fieldnames):
+            raise StatementError("Kamida bitta ustun bo'lishi kerak: email, phone yoki name")
+        reader.fieldnames = fieldnames
+
+        return [
+            StatementLine(
+                line_no=line_no,
+                date=parse_date(row.get('date')),
+                amount=parse_amount(row.get('amount')),
+                email=normalize_email(row.get('email')),
+                phone=normalize_phone(row.get('phone')),
+                name=normalize_name(row.get('name')),
+                note=(row.get('note') or '').strip(),
+            )
+            for line_no, row in enumerate(reader, start=2)
+        ]
+    except UnicodeDecodeError:
+        raise StatementError("Fayl UTF-8 kodirovkasida bo'lishi kerak.")
+    except csv.Error as e:
+        raise StatementError(f"CSV faylni o'qib bo'lmadi: {e}")
+    finally:
+        # Yuklangan faylni yopmaslik uchun
+        stream.detach()
+
+
+# ============================================================================
+# INDEKSLAR
+# ============================================================================
+
+class StudentIndex:
+    """
+    Talabalarni email, telefon va normallashgan ism bo'yicha indekslash.
+    Bitta so'rov bilan yuklanadi.
+    """
+
+    def __init__(self, rows):
+        self.by_email = {}
+        self.by_phone = defaultdict(set)
+        self.by_name = defaultdict(set)
+
+        for student_id, email, phone, first_name, last_name, parent_phone in rows:
+            if email:
+                self.by_email[normalize_email(email)] = student_id
+            for raw_phone in (phone, parent_phone):
+                key = normalize_phone(raw_phone)
+                if key:
+                    self.by_phone[key].add(student_id)
+            name_key = normalize_name(f"{first_name} {last_name}")
+            if name_key:
+                self.by_name[name_key].add(student_id)
+
+    @classmethod
+    def load(cls):
+        rows = StudentProfile.objects.values_list(
+            'id', 'user__email', 'user__phone',
+            'user__first_name', 'user__last_name', 'parent_phone',
+        ).iterator(chunk_size=5000)
+        return cls(rows)
+
+    def candidates(self, line):
+        """Qator uchun mos talabalar to'plami"""
+        if line.email and line.email in self.by_email:
+            return {self.by_email[line.email]}
+
+        by_name = self.by_name.get(line.name, set()) if line.name else set()
+        by_phone = self.by_phone.get(line.phone, set()) if line.phone else set()
+
+        if by_phone and by_name:
+            both = by_phone & by_name
+            if both:
+                return both
+        return set(by_phone or by_name)
+
+
+class PaymentIndex:
+    """
+    Kutilayotgan va tasdiqlangan to'lovlar (student_id, amount) kaliti bo'yicha.
+    Har bir to'lov faqat bir qatorga "band qilinadi".
+    """
+
+    def __init__(self, rows):
+        self._index = {
+            PaymentStatus.PENDING: defaultdict(list),
+            PaymentStatus.APPROVED: defaultdict(list),
+        }
+        self._claimed = set()
+        for payment_id, student_id, amount, payment_date, status in rows:
+            local_date = timezone.localtime(payment_date).date() if timezone.is_aware(payment_date) else payment_date.date()
+            self._index[status][(student_id, amount)].append((local_date, payment_id))
+
+    @classmethod
+    def load(cls, start_date, end_date):
+        start = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+        end = timezone.make_aware(datetime.combine(end_date, datetime.max.time()))
+        rows = Payment.objects.filter(
+            status__in=[PaymentStatus.PENDING, PaymentStatus.APPROVED],
+            payment_date__range=(start, end),
+        ).values_list('id', 'student_id', 'amount', 'payment_date', 'status').iterator(chunk_size=5000)
+        return cls(rows)
+
+    def find(self, status, student_id, amount, date, window):
+        """Sanasi eng yaqin, hali band qilinmagan to'lov id si"""
+        best = None
+        for payment_date, payment_id in self._index[status].get((student_id, amount), ()):
+            if payment_id in self._claimed:
+                continue
+            distance = abs((payment_date - date).days)
+            if distance <= window and (best is None or distance < best[0]):
+                best = (distance, payment_id)
+        return best[1] if best else None
+
+    def claim(self, payment_id):
+        self._claimed.add(payment_id)
+
+
+# ============================================================================
+# SOLISHTIRISH
+# ============================================================================
+
+def reconcile(lines, window_days=DEFAULT_WINDOW_DAYS):
+    """
+    Ko'chirma qatorlarini talabalar va kutilayotgan to'lovlar bilan solishtirish.
+
+    Args:
+        lines: StatementLine lar ketma-ketligi
+        window_days: to'lov sanasi farqiga ruxsat (kun)
+
+    Returns:
+        list[MatchResult]
+    """
+    lines = list(lines)
+    valid = [line for line in lines if line.date and line.amount]
+    window = timedelta(days=window_days)
+
+    students = StudentIndex.load()
+    if valid:
+        payments = PaymentIndex.load(
+            min(line.date for line in valid) - window,
+            max(line.date for line in valid) + window,
+        )
+    else:
+        payments = PaymentIndex(())
+
+    results = []
+    for line in lines:
+        if not line.date or not line.amount:
+            results.append(MatchResult(line, MatchStatus.INVALID, None, None, (), "Sana yoki summa noto'g'ri"))
+            continue
+
+        candidates = students.candidates(line)
+        if not candidates:
+            results.append(MatchResult(line, MatchStatus.UNMATCHED, None, None, (), "Talaba topilmadi"))
+            continue
+
+        # Avval kutilayotgan, keyin tasdiqlangan to'lovlar qidiriladi.
+        # Bir nechta nomzod bo'lsa, to'lov ularni ajratib beradi.
+        result = None
+        for status, match_status in (
+            (PaymentStatus.PENDING, MatchStatus.MATCHED),
+            (PaymentStatus.APPROVED, MatchStatus.RECORDED),
+        ):
+            hits = []
+            for student_id in candidates:
+                payment_id = payments.find(status, student_id, line.amount, line.date, window_days)
+                if payment_id:
+                    hits.append((student_id, payment_id))
+            if len(hits) == 1:
+                student_id, payment_id = hits[0]
+                payments.claim(payment_id)
+                reason = "To'lov allaqachon kiritilgan" if match_status == MatchStatus.RECORDED else ''
+                result = MatchResult(line, match_status, student_id, payment_id, tuple(candidates), reason)
+                break
+
+        if result is None and len(candidates) == 1:
+            student_id = next(iter(candidates))
+            result = MatchResult(line, MatchStatus.NEW, student_id, None, (student_id,), '')
+        elif result is None:
+            result = MatchResult(
+                line, MatchStatus.AMBIGUOUS, None, None, tuple(sorted(candidates)),
+                f"{len(candidates)} ta talaba mos keldi",
+            )
+        results.append(result)
+
+    return results
+
+
+def summarize(results):
+    counts = dict.fromkeys(MatchStatus.ALL, 0)
+    for result in results:
+        counts[result.status] += 1
+    return counts
+
+
+def build_proposal(results):
+    """
+    NEW holatidagi qatorlardan yaratish taklifi - JSON ga mos ixcham
+    ro'yxat: [line_no, student_id, amount, date, note]
+    """
+    return [
+        [r.line.line_no, r.student_id, str(r.line.amount), r.line.date.isoformat(), r.line.note]
+        for r in results
+        if r.status == MatchStatus.NEW
+    ]
+
+
+# ============================================================================
+# TAKLIFNI SAQLASH - 50k qatorli taklif sessiyaga (har so'rovda o'qiladigan
+# DB blob) emas, token nomli vaqtinchalik faylga yoziladi
+# ============================================================================
+
+_TOKEN_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+def proposal_dir():
+    return Path(tempfile.gettempdir()) / 'erp-reconcile'
+
+
+def _sweep(directory):
+    """Tasdiqlanmay qolgan eski takliflar"""
+    expired = time.time() - PROPOSAL_TTL
+    for path in directory.glob('*.json'):
+        try:
+            if path.stat().st_mtime < expired:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def save_proposal(proposal):
+    """
+    Returns:
+        str: sessiyada saqlanadigan token
+    """
+    directory = proposal_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    _sweep(directory)
+    token = uuid.uuid4().hex
+    with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as tmp:
+        json.dump(proposal, tmp)
+    os.replace(tmp.name, directory / f'{token}.json')
+    return token
+
+
+def take_proposal(token):
+    """
+    Taklifni bir martagina olish: fayl avval atomar qayta nomlanadi, shuning
+    uchun ikki parallel tasdiqlashdan faqat bittasi uni oladi.
+
+    Returns:
+        list | None: topilmasa yoki token noto'g'ri bo'lsa None
+    """
+    if not token or not _TOKEN_RE.match(token):
+        return None
+    path = proposal_dir() / f'{token}.json'
+    claimed = path.with_suffix(f'.{uuid.uuid4().hex}.taken')
+    try:
+        os.rename(path, claimed)
+    except FileNotFoundError:
+        return None
+    try:
+        with open(claimed) as fh:
+            return json.load(fh)
+    finally:
+        claimed.unlink()
+
+
+@transaction.atomic
+def create_proposed_payments(proposal, recorded_by=None):
+    """
+    Tasdiqlangan taklif bo'yicha to'lovlarni bulk_create bilan yaratish.
+    To'lovlar 'pending' holatida yaratiladi - tasdiqlash odatdagidek.
+    Yopilgan davrlarga tushgan qatorlar o'tkazib yuboriladi (bulk_create
+    pre_save signalini chaqirmaydi).
+
+    Returns:
+        int: yaratilgan to'lovlar soni
+    """
+    closed_through = FinancePeriod.objects.closed_through()
+    payments = []
+    for line_no, student_id, amount, date, note in proposal:
+        date = datetime.strptime(date, '%Y-%m-%d').date()
+        if closed_through and date < closed_through:
+            continue
+        payments.append(Payment(
+            student_id=student_id,
+            amount=Decimal(amount),
+            payment_date=timezone.make_aware(datetime.combine(date, datetime.min.time())),
+            payment_method=PaymentMethod.TRANSFER,
+            status=PaymentStatus.PENDING,
+            recorded_by=recorded_by,
+            note=f"Bank ko'chirmasi, qator {line_no}. {note}".strip(),
+        ))
+
+    Payment.objects.bulk_create(payments, batch_size=BULK_BATCH_SIZE)
+    return len(payments)
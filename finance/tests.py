@@ -1,3 +1,732 @@
-from django.test import TestCase
+import importlib
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from academics.models import Attendance
+from accounts.models import User
+from communications.models import EmailOutbox
+from core import jobs
+from courses.models import Course, Group
+from . import forecasting, gateway, receipts, reconciliation
+from .models import (
+    DebtorBalance, Expense, ExpenseBudget, ExpenseCategory, ExpenseMonthTotal, FinancePeriod, Invoice,
+    Payment, PaymentCallback, PaymentStatus, PeriodClosedError, Payslip, next_month,
+)
+from .views import PaymentReconcileView
+
+
+def make_student(email='student@example.com', **extra):
+    user = User.objects.create_user(email=email, **extra)
+    return user.student_profile
+
+
+def make_admin(email='admin@example.com'):
+    return User.objects.create_user(email=email, type=User.UserType.ADMIN)
+
+
+def aware(date, hour=12):
+    return timezone.make_aware(datetime.combine(date, time(hour)))
+
+
+def statement(text, name='statement.csv', encoding='utf-8'):
+    return SimpleUploadedFile(name, text.encode(encoding), content_type='text/csv')
+
+
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.ali = make_student('ali@example.com', first_name="Ali", last_name="Valiyev", phone='+998 90 123 45 67')
+        self.vali = make_student('vali@example.com', first_name="Vali", last_name="Aliyev", phone='901112233')
+        self.twin = make_student('twin@example.com', first_name="Vali", last_name="Aliyev")
+
+    def reconcile(self, rows):
+        text = "date,amount,email,phone,name,note\n" + "\n".join(rows)
+        return reconciliation.reconcile(reconciliation.read_statement(statement(text)))
+
+    def test_student_lookup_by_email_phone_and_name(self):
+        results = self.reconcile([
+            f"{self.today},1000,ALI@example.com,,,",
+            f"{self.today:%d.%m.%Y},1000,,90-123-45-67,,",
+            f"{self.today},1000,,,valiyev ali,",
+            f"{self.today},1000,,,Nobody Here,",
+            "yesterday,abc,ali@example.com,,,",
+        ])
+
+        self.assertEqual([r.status for r in results[:3]], [reconciliation.MatchStatus.NEW] * 3)
+        self.assertTrue(all(r.student_id == self.ali.id for r in results[:3]))
+        self.assertEqual(results[3].status, reconciliation.MatchStatus.UNMATCHED)
+        self.assertEqual(results[4].status, reconciliation.MatchStatus.INVALID)
+
+    def test_duplicate_names_are_ambiguous_unless_phone_decides(self):
+        results = self.reconcile([
+            f"{self.today},1000,,,Vali Aliyev,",
+            f"{self.today},1000,,901112233,Vali Aliyev,",
+        ])
+
+        self.assertEqual(results[0].status, reconciliation.MatchStatus.AMBIGUOUS)
+        self.assertEqual(results[1].status, reconciliation.MatchStatus.NEW)
+        self.assertEqual(results[1].student_id, self.vali.id)
+
+    def test_pending_payment_in_window_is_matched_once(self):
+        pending = Payment.objects.create(
+            student=self.ali, amount=Decimal('50000'),
+            payment_date=aware(self.today - timezone.timedelta(days=2)),
+        )
+
+        results = self.reconcile([
+            f"{self.today},50000,ali@example.com,,,",
+            f"{self.today},50000,ali@example.com,,,",
+        ])
+
+        self.assertEqual(results[0].status, reconciliation.MatchStatus.MATCHED)
+        self.assertEqual(results[0].payment_id, pending.id)
+        self.assertEqual(results[1].status, reconciliation.MatchStatus.NEW)
+
+    def test_approved_payment_is_reported_as_recorded(self):
+        Payment.objects.create(
+            student=self.ali, amount=Decimal('50000'), status=PaymentStatus.APPROVED,
+            payment_date=aware(self.today),
+        )
+
+        results = self.reconcile([f"{self.today},50000,ali@example.com,,,"])
+
+        self.assertEqual(results[0].status, reconciliation.MatchStatus.RECORDED)
+        self.assertEqual(reconciliation.build_proposal(results), [])
+
+    def test_bad_files_raise_statement_error(self):
+        with self.assertRaises(reconciliation.StatementError):
+            reconciliation.read_statement(statement("when,how much\n2025-01-01,5"))
+        with self.assertRaises(reconciliation.StatementError):
+            reconciliation.read_statement(statement("date,amount,email\n2025-01-01,5,a@b.uz", encoding='utf-16'))
+
+
+class PaymentReconcileViewTests(TestCase):
+    def setUp(self):
+        self.student = make_student('ali@example.com')
+        self.client.force_login(make_admin())
+        self.url = reverse('finance:payment_reconcile')
+
+    def test_preview_then_confirm_creates_payments(self):
+        response = self.client.post(self.url, {
+            'file': statement(f"date,amount,email\n{timezone.localdate()},1000,ali@example.com\n"),
+            'window_days': 3,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['summary']['new'], 1)
+        self.assertFalse(Payment.objects.exists())
+
+        confirm = reverse('finance:payment_reconcile_confirm')
+        self.client.post(confirm, {'token': response.context['proposal_token']})
+        self.assertEqual(Payment.objects.filter(student=self.student, status=PaymentStatus.PENDING).count(), 1)
+
+        # Taklif bir marta ishlatiladi
+        self.client.post(confirm, {'token': response.context['proposal_token']})
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_session_keeps_only_the_token(self):
+        response = self.client.post(self.url, {
+            'file': statement(f"date,amount,email\n{timezone.localdate()},1000,ali@example.com\n"),
+            'window_days': 3,
+        })
+        token = response.context['proposal_token']
+
+        self.assertEqual(self.client.session[PaymentReconcileView.session_key], token)
+        self.assertTrue((reconciliation.proposal_dir() / f'{token}.json').exists())
+
+        self.assertIsNone(reconciliation.take_proposal('../../etc/passwd'))
+        self.assertEqual(len(reconciliation.take_proposal(token)), 1)
+        self.assertIsNone(reconciliation.take_proposal(token))
+
+    def test_undecodable_upload_is_a_form_error(self):
+        response = self.client.post(self.url, {
+            'file': statement("date,amount,email\n2025-01-01,5,a@b.uz", encoding='utf-16'),
+            'window_days': 3,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('file', response.context['form'].errors)
+
+
+class FinancePeriodCloseTests(TestCase):
+    def setUp(self):
+        this_month = timezone.localdate().replace(day=1)
+        self.month2 = (this_month.replace(day=1) - timezone.timedelta(days=1)).replace(day=1)
+        self.month1 = (self.month2 - timezone.timedelta(days=1)).replace(day=1)
+        self.student = make_student()
+
+        self.p1 = Payment.objects.create(
+            student=self.student, amount=Decimal('100'), status=PaymentStatus.APPROVED,
+            payment_method='cash', payment_date=aware(self.month1.replace(day=5)),
+        )
+        Payment.objects.create(
+            student=self.student, amount=Decimal('200'), status=PaymentStatus.APPROVED,
+            payment_method='card', payment_date=aware(self.month2.replace(day=5)),
+        )
+        Expense.objects.create(category_id='ijara', amount=Decimal('50'), date=self.month1.replace(day=2))
+
+    def test_totals_are_equal_before_and_after_close(self):
+        before = FinancePeriod.objects.totals_as_of()
+        FinancePeriod.objects.close(self.month1)
+        after = FinancePeriod.objects.totals_as_of()
+
+        self.assertEqual(before['income'], after['income'])
+        self.assertEqual(after['income'], Decimal('300'))
+        self.assertEqual(after['by_method'], {'cash': Decimal('100'), 'card': Decimal('200')})
+        self.assertEqual(FinancePeriod.objects.expense_as_of(), Decimal('50'))
+
+    def test_student_paid_as_of_uses_snapshot_and_tail(self):
+        FinancePeriod.objects.close(self.month1)
+        sid = self.student.id
+
+        self.assertEqual(FinancePeriod.objects.student_paid_as_of(sid, self.month2.replace(day=1)), Decimal('100'))
+        self.assertEqual(FinancePeriod.objects.student_paid_as_of(sid), Decimal('300'))
+
+    def test_months_are_closed_in_order(self):
+        FinancePeriod.objects.close(self.month1)
+
+        with self.assertRaises(PeriodClosedError):
+            FinancePeriod.objects.close(self.month1)
+        with self.assertRaises(ValidationError):
+            FinancePeriod.objects.close(next_month(self.month2))
+
+    def test_close_refuses_pending_payments(self):
+        Payment.objects.create(student=self.student, amount=Decimal('1'), payment_date=aware(self.month1.replace(day=9)))
+
+        with self.assertRaises(ValidationError):
+            FinancePeriod.objects.close(self.month1)
+
+    def test_closed_rows_are_frozen(self):
+        FinancePeriod.objects.close(self.month1)
+
+        self.p1.amount = Decimal('1')
+        with self.assertRaises(PeriodClosedError):
+            self.p1.save()
+        with self.assertRaises(PeriodClosedError):
+            Expense.objects.create(category_id='ijara', amount=Decimal('1'), date=self.month1.replace(day=3))
+
+    def test_backdated_expense_form_shows_error(self):
+        FinancePeriod.objects.close(self.month1)
+        self.client.force_login(make_admin())
+
+        response = self.client.post(reverse('finance:expense_create'), {
+            'category': 'ijara', 'amount': '1000', 'date': self.month1.replace(day=3).isoformat(),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('date', response.context['form'].errors)
+        self.assertEqual(Expense.objects.count(), 1)
+
+
+class InvoiceGenerationTests(TestCase):
+    def setUp(self):
+        self.period = timezone.localdate().replace(day=1)
+        course = Course.objects.create(title='Python', price=Decimal('300000'))
+        self.group = Group.objects.create(name='P1', course=course)
+        self.finished = Group.objects.create(name='P0', course=course, status='finished')
+        self.ali = make_student('ali@example.com')
+        self.blocked = make_student('vali@example.com')
+        self.blocked.status = 'blocked'
+        self.blocked.save()
+        self.group.students.add(self.ali, self.blocked)
+        self.finished.students.add(self.ali)
+
+    def test_bills_active_students_in_active_groups_once(self):
+        self.assertEqual(Invoice.objects.generate(self.period.replace(day=15)), 1)
+
+        invoice = Invoice.objects.get()
+        self.assertEqual((invoice.student, invoice.group, invoice.period), (self.ali, self.group, self.period))
+        self.assertEqual(invoice.amount, Decimal('300000'))
+
+    def test_rerun_is_idempotent(self):
+        Invoice.objects.generate(self.period, chunk_size=1)
+
+        self.assertEqual(Invoice.objects.generate(self.period, chunk_size=1), 0)
+        self.assertEqual(Invoice.objects.count(), 1)
+
+    def test_group_outside_the_month_is_not_billed(self):
+        self.group.start_date = next_month(self.period)
+        self.group.save()
+
+        self.assertEqual(Invoice.objects.generate(self.period), 0)
+
+
+class DebtorBalanceTests(TestCase):
+    def setUp(self):
+        self.period = timezone.localdate().replace(day=1)
+        self.course = Course.objects.create(title='Python', price=Decimal('300000'))
+        self.group = Group.objects.create(name='P1', course=self.course)
+        self.other_group = Group.objects.create(name='P2', course=self.course)
+        self.ali = make_student('ali@example.com')
+        self.vali = make_student('vali@example.com')
+        self.group.students.add(self.ali, self.vali)
+        self.other_group.students.add(self.ali)
+        Invoice.objects.generate(self.period)
+
+    def debt(self, student):
+        return DebtorBalance.objects.get(student=student).debt
+
+    def test_debt_follows_invoices_and_approved_payments(self):
+        self.assertEqual(self.debt(self.ali), Decimal('600000'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.create(student=self.ali, amount=Decimal('100000'))
+        self.assertEqual(self.debt(self.ali), Decimal('600000'))
+
+        payment.status = PaymentStatus.APPROVED
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.save()
+        self.assertEqual(self.debt(self.ali), Decimal('500000'))
+
+    def test_moving_payment_refreshes_previous_student(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.create(student=self.ali, amount=Decimal('100000'), status=PaymentStatus.APPROVED)
+
+        payment.student = self.vali
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.save()
+
+        self.assertEqual(self.debt(self.ali), Decimal('600000'))
+        self.assertEqual(self.debt(self.vali), Decimal('200000'))
+
+    def test_inactive_student_leaves_the_table(self):
+        self.ali.status = 'blocked'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ali.save()
+
+        self.assertFalse(DebtorBalance.objects.filter(student=self.ali).exists())
+
+    def test_deleting_group_drops_its_charges(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.delete()
+
+        self.assertEqual(self.debt(self.ali), Decimal('300000'))
+        self.assertEqual(self.debt(self.vali), Decimal('0'))
+
+    def test_payments_settle_oldest_invoices_first(self):
+        statuses = lambda: list(Invoice.objects.filter(student=self.ali).order_by('pk').values_list('status', flat=True))
+        self.assertEqual(statuses(), ['unpaid', 'unpaid'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.create(student=self.ali, amount=Decimal('350000'), status=PaymentStatus.APPROVED)
+        self.assertEqual(statuses(), ['paid', 'unpaid'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.delete()
+        self.assertEqual(statuses(), ['unpaid', 'unpaid'])
+
+    def test_debtor_list_pages_by_cursor_with_cached_total(self):
+        for i in range(3):
+            self.group.students.add(make_student(f'extra{i}@example.com'))
+        Invoice.objects.generate(self.period)
+        self.client.force_login(make_admin())
+        url = reverse('finance:debtor_list')
+
+        with mock.patch.object(DebtorBalance.objects, 'PAGE_SIZE', 2):
+            seen, cursor = [], None
+            while True:
+                response = self.client.get(url, {'after': cursor} if cursor else {})
+                seen += [debtor.student_id for debtor in response.context['debtors']]
+                self.assertEqual(response.context['total_debt'], Decimal('1800000'))
+                cursor = response.context['next_cursor']
+                if not cursor:
+                    break
+
+        self.assertEqual(seen[0], self.ali.id)
+        self.assertEqual(len(seen), len(set(seen)), 5)
+
+        # Kesh qarzdorlar yangilanganda eskiradi
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(student=self.vali, amount=Decimal('100000'), status=PaymentStatus.APPROVED)
+        self.assertEqual(self.client.get(url).context['total_debt'], Decimal('1700000'))
+
+
+class PayrollTests(TestCase):
+    def setUp(self):
+        self.period = timezone.localdate().replace(day=1)
+        teacher_user = User.objects.create_user(email='teacher@example.com', type=User.UserType.TEACHER)
+        self.teacher = teacher_user.teacher_profile
+        self.teacher.salary = Decimal('1000000')
+        self.teacher.lesson_rate = Decimal('50000')
+        self.teacher.save()
+        self.admin = make_admin()
+        self.admin.admin_profile.salary = Decimal('2000000')
+        self.admin.admin_profile.save()
+
+        course = Course.objects.create(title='Python', price=Decimal('300000'))
+        self.group = Group.objects.create(name='P1', course=course, teacher=self.teacher)
+        ali = make_student('ali@example.com')
+        vali = make_student('vali@example.com')
+        for day in (1, 2):
+            for student in (ali, vali):
+                Attendance.objects.create(group=self.group, student=student, date=self.period.replace(day=day))
+
+    def test_lessons_are_counted_once_per_group_and_day(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(Payslip.objects.lesson_counts(self.period), {self.teacher.id: 2})
+
+    def test_teacher_total_is_salary_plus_lesson_pay(self):
+        Payslip.objects.run(self.period)
+
+        payslip = Payslip.objects.get(role=Payslip.Role.TEACHER)
+        self.assertEqual(payslip.lessons_count, 2)
+        self.assertEqual(payslip.lesson_pay, Decimal('100000'))
+        self.assertEqual(payslip.total, Decimal('1100000'))
+
+    def test_admin_gets_base_salary(self):
+        Payslip.objects.run(self.period)
+
+        payslip = Payslip.objects.get(user=self.admin)
+        self.assertEqual((payslip.role, payslip.total), (Payslip.Role.ADMIN, Decimal('2000000')))
+
+    def test_rerun_updates_existing_payslips(self):
+        Payslip.objects.run(self.period)
+        self.teacher.lesson_rate = Decimal('60000')
+        self.teacher.save()
+
+        Payslip.objects.run(self.period)
+
+        self.assertEqual(Payslip.objects.count(), 2)
+        self.assertEqual(Payslip.objects.get(role=Payslip.Role.TEACHER).total, Decimal('1120000'))
+
+    def test_export_streams_csv(self):
+        Payslip.objects.run(self.period)
+        self.client.force_login(self.admin)
+
+        response = self.client.get(reverse('finance:payroll_export'), {'period': f'{self.period:%Y-%m}'})
+
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(rows[0].startswith('email,'))
+
+
+class ExpenseBudgetTests(TestCase):
+    def setUp(self):
+        self.period = timezone.localdate().replace(day=1)
+        self.rent = ExpenseCategory.objects.get(code='ijara')
+        ExpenseBudget.objects.create(category=self.rent, period=self.period, amount=Decimal('100'))
+
+    def month_total(self, period=None):
+        return ExpenseMonthTotal.objects.get(category=self.rent, period=period or self.period).total
+
+    def test_running_total_follows_create_edit_and_delete(self):
+        expense = Expense.objects.create(category=self.rent, amount=Decimal('60'), date=self.period)
+        Expense.objects.create(category=self.rent, amount=Decimal('30'), date=self.period)
+        self.assertEqual(self.month_total(), Decimal('90'))
+
+        expense.amount = Decimal('80')
+        expense.save()
+        self.assertEqual(self.month_total(), Decimal('110'))
+
+        expense.delete()
+        self.assertEqual(self.month_total(), Decimal('30'))
+
+    def test_total_update_is_atomic_with_the_save(self):
+        with mock.patch.object(ExpenseMonthTotal.objects, 'apply', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                Expense.objects.create(category=self.rent, amount=Decimal('60'), date=self.period)
+
+        self.assertFalse(Expense.objects.exists())
+
+    def test_legacy_category_codes_stay_distinct(self):
+        migration = importlib.import_module('finance.migrations.0007_expense_categories_budgets')
+        taken = {'ijara', 'boshqa'}
+
+        codes = [migration.unique_code(value, taken) for value in ('Аренда', 'Ijara', 'IJARA', '???')]
+
+        self.assertEqual(codes, ['аренда', 'ijara-2', 'ijara-3', 'kategoriya'])
+
+    def test_moving_expense_to_another_month_moves_its_total(self):
+        previous = (self.period - timedelta(days=1)).replace(day=1)
+        expense = Expense.objects.create(category=self.rent, amount=Decimal('60'), date=self.period)
+
+        expense.date = previous
+        expense.save()
+
+        self.assertEqual(self.month_total(), Decimal('0'))
+        self.assertEqual(self.month_total(previous), Decimal('60'))
+
+    def test_rebuild_matches_incremental_totals(self):
+        Expense.objects.create(category=self.rent, amount=Decimal('60'), date=self.period)
+        ExpenseMonthTotal.objects.update(total=0)
+
+        ExpenseMonthTotal.objects.rebuild()
+
+        self.assertEqual(self.month_total(), Decimal('60'))
+
+    def test_budget_report_flags_overspending(self):
+        Expense.objects.create(category=self.rent, amount=Decimal('150'), date=self.period)
+
+        row, = ExpenseMonthTotal.objects.budget_report(self.period)
+
+        self.assertEqual((row['category'], row['actual'], row['remaining']), (self.rent, Decimal('150'), Decimal('-50')))
+        self.assertTrue(row['over_budget'])
+        self.assertTrue(ExpenseMonthTotal.objects.is_over_budget('ijara', self.period))
+
+    def test_create_view_warns_when_over_budget(self):
+        self.client.force_login(make_admin())
+
+        response = self.client.post(reverse('finance:expense_create'), {
+            'category': 'ijara', 'amount': '150000', 'date': self.period.isoformat(),
+        }, follow=True)
+
+        levels = [message.level_tag for message in response.context['messages']]
+        self.assertIn('warning', levels)
+
+
+class CashFlowForecastTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.first = forecasting.month_index(self.today.replace(day=1))
+
+    def test_seasonal_projection_repeats_yearly_pattern(self):
+        start = self.first - 36
+        values = [200.0 if (start + i) % 12 == self.first % 12 else 100.0 for i in range(36)]
+        series = forecasting.MonthlySeries(start, forecasting.array('d', values))
+
+        projection = forecasting.seasonal_projection(series, self.first, 12)
+
+        self.assertGreater(projection[0], 1.5 * projection[1])
+        self.assertAlmostEqual(projection[1], projection[2])
+
+    def test_scheduled_income_respects_group_dates(self):
+        enrollments = (
+            forecasting.array('l', [self.first + 1]),
+            forecasting.array('l', [self.first + 2]),
+            forecasting.array('d', [300.0]),
+        )
+
+        self.assertEqual(list(forecasting.scheduled_income(enrollments, self.first, 4)), [0, 300, 300, 0])
+
+    def test_short_history_falls_back_to_scheduled_income(self):
+        course = Course.objects.create(title='Python', price=Decimal('300000'))
+        group = Group.objects.create(name='P1', course=course)
+        group.students.add(make_student('ali@example.com'), make_student('vali@example.com'))
+
+        result = forecasting.forecast(3)
+
+        self.assertEqual([row['income'] for row in result['rows']], [Decimal('600000.00')] * 3)
+
+    def test_cached_forecast_is_invalidated_by_new_payment(self):
+        student = make_student()
+        forecasting.forecast(3)
+
+        Payment.objects.create(
+            student=student, amount=Decimal('1000'), status=PaymentStatus.APPROVED,
+            payment_date=aware(self.today.replace(day=1) - timedelta(days=1)),
+        )
+
+        self.assertEqual(forecasting.forecast(3)['opening_balance'], Decimal('1000'))
+
+    def test_month_to_date_cash_is_not_counted_twice(self):
+        course = Course.objects.create(title='Python', price=Decimal('300000'))
+        group = Group.objects.create(name='P1', course=course)
+        student = make_student('ali@example.com')
+        group.students.add(student)
+        Payment.objects.create(
+            student=student, amount=Decimal('300000'), status=PaymentStatus.APPROVED,
+            payment_date=aware(self.today.replace(day=1)),
+        )
+
+        result = forecasting.forecast(3)
+
+        # Joriy oy to'lovi oy prognoziga kiradi, boshlang'ich qoldiqqa emas
+        self.assertEqual(result['opening_balance'], Decimal('0'))
+        self.assertEqual(result['rows'][0]['balance'], Decimal('300000.00'))
+
+    def test_view_rejects_unknown_horizon(self):
+        self.client.force_login(make_admin())
+
+        response = self.client.get(reverse('finance:forecast'), {'months': '7'})
+
+        self.assertEqual(response.context['forecast']['months'], 3)
+
+
+@override_settings(PAYMENT_GATEWAY_SECRET='test-secret')
+class PaymentCallbackTests(TestCase):
+    def setUp(self):
+        self.student = make_student()
+        self.provider = gateway.StubProvider()
+        self.url = reverse('finance:payment_callback', args=[self.provider.name])
+
+    def send(self, body, signature):
+        return self.client.post(self.url, body, content_type='application/json', HTTP_X_SIGNATURE=signature)
+
+    def notify(self, status, transaction_id='tx-1', amount='150000'):
+        return self.send(*self.provider.notification(self.student.id, amount, status=status, transaction_id=transaction_id))
+
+    def test_retried_paid_callback_credits_once(self):
+        message = self.provider.notification(self.student.id, '150000')
+
+        first = self.send(*message)
+        retry = self.send(*message)
+
+        self.assertEqual(first.json()['status'], gateway.CallbackResult.PROCESSED)
+        self.assertEqual(retry.json()['status'], gateway.CallbackResult.DUPLICATE)
+        payment = Payment.objects.get()
+        self.assertEqual((payment.status, payment.payment_method), (PaymentStatus.APPROVED, 'online'))
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.balance, Decimal('150000'))
+
+    def test_pending_then_paid_approves_existing_payment(self):
+        self.notify(gateway.CallbackStatus.PENDING)
+        self.assertEqual(Payment.objects.get().status, PaymentStatus.PENDING)
+
+        self.notify(gateway.CallbackStatus.PAID)
+        self.notify(gateway.CallbackStatus.PENDING)  # kechikkan xabar
+
+        self.assertEqual(Payment.objects.get().status, PaymentStatus.APPROVED)
+        self.assertEqual(PaymentCallback.objects.filter(payment__isnull=False).count(), 3)
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.balance, Decimal('150000'))
+
+    def test_cancelled_rejects_pending_payment(self):
+        self.notify(gateway.CallbackStatus.PENDING)
+        self.notify(gateway.CallbackStatus.CANCELLED)
+
+        self.assertEqual(Payment.objects.get().status, PaymentStatus.REJECTED)
+
+    def test_invalid_signature_is_refused(self):
+        body, _ = self.provider.notification(self.student.id, '1000')
+
+        self.assertEqual(self.send(body, 'bad').status_code, 403)
+        self.assertFalse(PaymentCallback.objects.exists())
+
+    def test_malformed_or_unknown_student_is_bad_request(self):
+        body = b'{"event_id": "e1"}'
+        self.assertEqual(self.send(body, gateway.sign(body)).status_code, 400)
+
+        response = self.send(*self.provider.notification(self.student.id + 100, '1000'))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PaymentCallback.objects.exists())
+
+    def test_replay_with_different_amount_or_student_is_a_conflict(self):
+        self.notify(gateway.CallbackStatus.PAID)
+        other = make_student('other@example.com')
+
+        changed_amount = self.notify(gateway.CallbackStatus.PAID, amount='999999')
+        changed_student = self.send(*self.provider.notification(
+            other.id, '150000', status=gateway.CallbackStatus.PAID, transaction_id='tx-1',
+        ))
+
+        self.assertEqual((changed_amount.status_code, changed_student.status_code), (409, 409))
+        self.assertEqual(PaymentCallback.objects.count(), 1)
+        self.student.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.student.balance, other.balance), (Decimal('150000'), Decimal('0')))
+
+    @override_settings(PAYMENT_GATEWAY_SECRET='')
+    def test_missing_secret_rejects_every_callback(self):
+        body = b'{"event_id": "e1"}'
+
+        with self.assertRaises(ImproperlyConfigured):
+            gateway.sign(body)
+        self.assertEqual(self.send(body, gateway.sign(body, secret='guess')).status_code, 503)
+        self.assertFalse(gateway.verify_signature(body, gateway.sign(body, secret='guess')))
+
+
+class ReceiptTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.student = make_student(first_name='Ali', last_name='Valiyev')
+        self.payment = Payment.objects.create(
+            student=self.student, amount=Decimal('150000'), status=PaymentStatus.APPROVED,
+        )
+
+    def test_receipt_is_rendered_once_and_cached_on_disk(self):
+        path = receipts.get_receipt(self.payment, 'png')
+        self.assertTrue(path.read_bytes().startswith(b'\x89PNG'))
+
+        with mock.patch.object(receipts, 'render') as render:
+            self.assertEqual(receipts.get_receipt(self.payment, 'png'), path)
+        render.assert_not_called()
+
+    def test_changed_payment_gets_a_new_cache_entry(self):
+        path = receipts.get_receipt(self.payment, 'pdf')
+
+        self.payment.note = 'tuzatildi'
+        self.payment.save()
+
+        self.assertNotEqual(receipts.get_receipt(self.payment, 'pdf'), path)
+        self.assertTrue(path.read_bytes().startswith(b'%PDF-1.4'))
+
+    def test_student_downloads_only_own_receipts(self):
+        other = Payment.objects.create(
+            student=make_student('vali@example.com'), amount=Decimal('1000'), status=PaymentStatus.APPROVED,
+        )
+        self.client.force_login(self.student.user)
+
+        own = self.client.get(reverse('finance:payment_receipt', args=[self.payment.pk]), {'format': 'pdf'})
+        foreign = self.client.get(reverse('finance:payment_receipt', args=[other.pk]))
+
+        self.assertEqual((own.status_code, own['Content-Type']), (200, 'application/pdf'))
+        self.assertRedirects(foreign, '/', fetch_redirect_response=False)  # handler404 -> bosh sahifa
+
+    def test_month_zip_streams_every_approved_receipt(self):
+        for _ in range(receipts.POOL_MIN_JOBS):
+            Payment.objects.create(student=self.student, amount=Decimal('1000'), status=PaymentStatus.APPROVED)
+        Payment.objects.create(student=self.student, amount=Decimal('1000'))  # pending - kirmaydi
+        self.client.force_login(make_admin())
+
+        response = self.client.get(reverse('finance:monthly_receipts'))
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(len(archive.namelist()), receipts.POOL_MIN_JOBS + 1)
+        self.assertIsNone(archive.testzip())
+
+    def test_month_zip_yields_before_rendering_the_rest(self):
+        for _ in range(3):
+            Payment.objects.create(student=self.student, amount=Decimal('1000'), status=PaymentStatus.APPROVED)
+        period = timezone.localdate().replace(day=1)
+
+        with mock.patch.object(receipts, 'render', wraps=receipts.render) as render:
+            stream = receipts.stream_month_zip(period)
+            next(stream)
+            self.assertEqual(render.call_count, 1)
+            b''.join(stream)
+        self.assertEqual(render.call_count, 4)
+
+    def test_prerender_job_fills_the_cache_in_a_spawned_pool(self):
+        for _ in range(receipts.POOL_MIN_JOBS):
+            Payment.objects.create(student=self.student, amount=Decimal('1000'), status=PaymentStatus.APPROVED)
+        period = timezone.localdate().replace(day=1)
+
+        with override_settings(BACKGROUND_JOBS_EAGER=True):
+            job = jobs.enqueue('finance.receipts.prerender_job', {'period': period.isoformat()})
+
+        self.assertEqual((job.status, job.total, job.processed), ('done', receipts.POOL_MIN_JOBS + 1, receipts.POOL_MIN_JOBS + 1))
+        self.assertTrue(all(path.exists() for _, path in receipts.ensure_receipts(receipts.month_payments(period))))
+
+
+class PaymentApprovalEmailTests(TestCase):
+    def test_approval_enqueues_email_without_sending(self):
+        student = make_student()
+        payment = Payment.objects.create(student=student, amount=Decimal('250000'), payment_date=timezone.now())
+        admin = make_admin()
+        self.client.force_login(admin)
+
+        self.client.post(reverse('finance:payment_approve', args=[payment.pk]))
+
+        row = EmailOutbox.objects.get()
+        self.assertEqual((row.to_email, row.template, row.context['amount']), (student.user.email, 'payment_approved', '250 000'))
+        self.assertEqual(mail.outbox, [])
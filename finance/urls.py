@@ -12,10 +12,33 @@ urlpatterns = [
     path('payments/', views.PaymentListView.as_view(), name='payment_list'),
     path('payments/create/', views.PaymentCreateView.as_view(), name='payment_create'),
     path('payments/<int:pk>/approve/', views.PaymentApproveView.as_view(), name='payment_approve'),
+    path('payments/reconcile/', views.PaymentReconcileView.as_view(), name='payment_reconcile'),
+    path('payments/reconcile/confirm/', views.PaymentReconcileConfirmView.as_view(), name='payment_reconcile_confirm'),
+    
+    # Debtors - Admin
+    path('debtors/', views.DebtorListView.as_view(), name='debtor_list'),
+    
+    # Period close - Admin
+    path('periods/', views.FinancePeriodListView.as_view(), name='period_list'),
+    
+    # Receipts
+    path('payments/<int:pk>/receipt/', views.ReceiptDownloadView.as_view(), name='payment_receipt'),
+    path('payments/receipts/', views.MonthlyReceiptsZipView.as_view(), name='monthly_receipts'),
+    
+    # Online payment gateway callback
+    path('payments/callback/<slug:provider>/', views.PaymentCallbackView.as_view(), name='payment_callback'),
+    
+    # Cash flow forecast - Admin
+    path('forecast/', views.CashFlowForecastView.as_view(), name='forecast'),
+    
+    # Payroll - Admin
+    path('payroll/', views.PayrollView.as_view(), name='payroll'),
+    path('payroll/export/', views.PayrollExportView.as_view(), name='payroll_export'),
     
     # Expenses - Admin
     path('expenses/', views.ExpenseListView.as_view(), name='expense_list'),
     path('expenses/create/', views.ExpenseCreateView.as_view(), name='expense_create'),
+    path('expenses/budgets/', views.ExpenseBudgetView.as_view(), name='expense_budgets'),
     
     # Student Payment History
     path('my-payments/', views.StudentPaymentHistoryView.as_view(), name='my_payments'),
@@ -2,16 +2,33 @@
 """
 Finance Views - To'lovlar va xarajatlar boshqaruvi
 """
+import csv
 import logging
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 from django.urls import reverse_lazy
-from django.views.generic import ListView, CreateView, UpdateView, DetailView
-from django.db.models import Sum, Q
-from accounts.mixins import AdminRequiredMixin, StudentRequiredMixin
+from django.views import View
+from django.views.generic import ListView, CreateView, UpdateView, DetailView, FormView, TemplateView
+from django.core.exceptions import ValidationError
+from django.db.models import Sum, Q, Exists, OuterRef
+from accounts.mixins import AdminRequiredMixin, CustomLoginRedirectMixin, StudentRequiredMixin
 from accounts.models import StudentProfile
-from .models import Payment, Expense
-from .forms import PaymentForm, ExpenseForm
+from communications import emails
+from core import jobs
+from courses.models import Group
+from .models import (
+    Payment, Expense, DebtorBalance, FinancePeriod, Payslip, ExpenseBudget, ExpenseMonthTotal,
+    month_start,
+)
+from .forms import (
+    PaymentForm, ExpenseForm, BankStatementUploadForm, DebtorFilterForm, PeriodCloseForm,
+    PayrollMonthForm, ExpenseBudgetForm,
+)
+from . import forecasting, gateway, receipts, reconciliation
 
 logger = logging.getLogger(__name__)
 
@@ -39,10 +56,8 @@ class PaymentListView(AdminRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Statistika
-        context['total_amount'] = Payment.objects.filter(
-            status='approved'
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
+        # Statistika - oxirgi yopilgan davr + ochiq davr to'lovlari
+        context['total_amount'] = FinancePeriod.objects.income_as_of()
         
         context['pending_amount'] = Payment.objects.filter(
             status='pending'
@@ -115,6 +130,13 @@ class PaymentApproveView(AdminRequiredMixin, UpdateView):
         student = payment.student
         student.credit(payment.amount)
         
+        emails.enqueue(student.user.email, 'payment_approved', {
+            'name': student.user.get_full_name() or student.user.email,
+            'amount': f"{payment.amount:,.0f}".replace(',', ' '),
+            'date': f"{timezone.localtime(payment.payment_date):%Y-%m-%d}",
+            'course': str(payment.course or ''),
+        })
+        
         messages.success(
             request,
             f"To'lov {payment.amount} so'm tasdiqlandi."
@@ -132,6 +154,351 @@ class PaymentApproveView(AdminRequiredMixin, UpdateView):
         return redirect('finance:payment_list')
 
 
+class PaymentReconcileView(AdminRequiredMixin, FormView):
+    """
+    Bank ko'chirmasini to'lovlar bilan solishtirish.
+    Avval natija ko'rsatiladi, yangi to'lovlar taklifi vaqtinchalik faylga
+    yoziladi (sessiyada faqat token) va faqat PaymentReconcileConfirmView
+    orqali yaratiladi.
+    """
+    form_class = BankStatementUploadForm
+    template_name = 'finance/reconcile.html'
+    preview_limit = 50
+    session_key = 'finance_reconcile_proposal'
+    
+    def form_valid(self, form):
+        results = reconciliation.reconcile(form.statement_lines, form.cleaned_data['window_days'])
+        summary = reconciliation.summarize(results)
+        
+        token = reconciliation.save_proposal(reconciliation.build_proposal(results))
+        self.request.session[self.session_key] = token
+        
+        # Har bir holat bo'yicha dastlabki qatorlar
+        preview = {status: [] for status in reconciliation.MatchStatus.ALL}
+        for result in results:
+            rows = preview[result.status]
+            if len(rows) < self.preview_limit:
+                rows.append(result)
+        
+        logger.info(
+            f"Bank ko'chirmasi solishtirildi: {len(results)} qator",
+            extra={'user_id': self.request.user.id, **summary}
+        )
+        
+        return self.render_to_response(self.get_context_data(
+            form=form,
+            summary=summary,
+            preview=preview,
+            total_lines=len(results),
+            proposal_token=token,
+        ))
+
+
+class PaymentReconcileConfirmView(AdminRequiredMixin, View):
+    """
+    Ko'rib chiqilgan taklif bo'yicha yangi to'lovlarni yaratish
+    """
+    def post(self, request):
+        token = request.session.get(PaymentReconcileView.session_key)
+        proposal = None
+        if token and token == request.POST.get('token'):
+            del request.session[PaymentReconcileView.session_key]
+            proposal = reconciliation.take_proposal(token)
+        
+        if proposal is None:
+            messages.error(request, "Taklif topilmadi yoki eskirgan. Ko'chirmani qayta yuklang.")
+            return redirect('finance:payment_reconcile')
+        
+        created = reconciliation.create_proposed_payments(proposal, recorded_by=request.user)
+        
+        messages.success(request, f"{created} ta to'lov yaratildi. Tasdiqlashni kutmoqda.")
+        
+        logger.info(
+            f"Bank ko'chirmasidan to'lovlar yaratildi: {created}",
+            extra={'user_id': request.user.id}
+        )
+        
+        return redirect('finance:payment_list')
+
+
+class DebtorListView(AdminRequiredMixin, TemplateView):
+    """
+    Qarzdorlar ro'yxati - keshlangan DebtorBalance jadvalidan,
+    keyset sahifalash (?after=) va keshlangan jami qarz bilan
+    """
+    template_name = 'finance/debtors.html'
+    
+    def get_queryset(self):
+        queryset = DebtorBalance.objects.filter(debt__gt=0).select_related('student__user')
+        self.filter_key = ''
+        
+        self.filter_form = DebtorFilterForm(self.request.GET or None)
+        if self.filter_form.is_valid():
+            enrollments = Group.students.through.objects.filter(
+                studentprofile_id=OuterRef('student_id')
+            )
+            filters = {
+                'group__branch': self.filter_form.cleaned_data.get('branch'),
+                'group__course': self.filter_form.cleaned_data.get('course'),
+                'group': self.filter_form.cleaned_data.get('group'),
+            }
+            filters = {key: value for key, value in filters.items() if value}
+            
+            # JOIN + DISTINCT o'rniga EXISTS - sahifalash tez qoladi
+            if filters:
+                queryset = queryset.filter(Exists(enrollments.filter(**filters)))
+                self.filter_key = ','.join(f'{key}={value.pk}' for key, value in sorted(filters.items()))
+        
+        return queryset
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        queryset = self.get_queryset()
+        context['debtors'], context['next_cursor'] = DebtorBalance.objects.page(
+            queryset, self.request.GET.get('after')
+        )
+        context['filter_form'] = self.filter_form
+        context['total_debt'] = DebtorBalance.objects.total_debt(queryset, self.filter_key)
+        
+        params = self.request.GET.copy()
+        params.pop('after', None)
+        context['filter_query'] = params.urlencode()
+        return context
+
+
+# ============================================================================
+# PERIOD CLOSE VIEWS
+# ============================================================================
+
+class FinancePeriodListView(AdminRequiredMixin, FormView):
+    """
+    Yopilgan davrlar ro'yxati va yangi oyni yopish
+    """
+    form_class = PeriodCloseForm
+    template_name = 'finance/periods.html'
+    success_url = reverse_lazy('finance:period_list')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['periods'] = FinancePeriod.objects.select_related('closed_by')[:24]
+        context['totals'] = FinancePeriod.objects.totals_as_of()
+        return context
+    
+    def form_valid(self, form):
+        try:
+            closing = FinancePeriod.objects.close(form.cleaned_data['period'], closed_by=self.request.user)
+        except ValidationError as e:
+            for error in e.messages:
+                messages.error(self.request, error)
+            return self.form_invalid(form)
+        
+        messages.success(self.request, f"{closing} davri yopildi.")
+        
+        # Oylik kvitansiyalar arxivi odatda yopilgandan keyin yuklanadi - oldindan chizib qo'yamiz
+        jobs.enqueue(
+            'finance.receipts.prerender_job', {'period': closing.period.isoformat()}, created_by=self.request.user,
+        )
+        
+        logger.info(
+            f"Moliyaviy davr yopildi: {closing}",
+            extra={'user_id': self.request.user.id, 'period_id': closing.id}
+        )
+        
+        return super().form_valid(form)
+
+
+# ============================================================================
+# PAYROLL VIEWS
+# ============================================================================
+
+def get_period_param(request):
+    """?period=YYYY-MM parametri (standart: joriy oy)"""
+    form = PayrollMonthForm(request.GET or None)
+    if form.is_valid():
+        return month_start(form.cleaned_data['period'])
+    return timezone.localdate().replace(day=1)
+
+
+class PayrollView(AdminRequiredMixin, ListView):
+    """
+    Oy bo'yicha hisob varaqlari va ish haqini (qayta) hisoblash
+    """
+    model = Payslip
+    template_name = 'finance/payroll.html'
+    context_object_name = 'payslips'
+    paginate_by = 50
+    
+    def get_queryset(self):
+        self.period = get_period_param(self.request)
+        return Payslip.objects.filter(period=self.period).select_related('user')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['period'] = self.period
+        context['form'] = PayrollMonthForm(initial={'period': self.period.strftime('%Y-%m')})
+        context['payroll_total'] = self.object_list.aggregate(Sum('total'))['total__sum'] or 0
+        return context
+    
+    def post(self, request, *args, **kwargs):
+        form = PayrollMonthForm(request.POST)
+        if not form.is_valid():
+            messages.error(request, "Oyni to'g'ri tanlang.")
+            return redirect('finance:payroll')
+        
+        period = month_start(form.cleaned_data['period'])
+        count = Payslip.objects.run(period)
+        
+        messages.success(request, f"{period:%Y-%m}: {count} ta hisob varaq hisoblandi.")
+        
+        logger.info(
+            f"Ish haqi hisoblandi: {period:%Y-%m}",
+            extra={'user_id': request.user.id, 'count': count}
+        )
+        
+        return redirect(f"{reverse_lazy('finance:payroll')}?period={period:%Y-%m}")
+
+
+class Echo:
+    """csv.writer uchun - yozilgan qatorni qaytaradi (StreamingHttpResponse)"""
+    def write(self, value):
+        return value
+
+
+class PayrollExportView(AdminRequiredMixin, View):
+    """
+    Hisob varaqlarini CSV sifatida oqim bilan eksport qilish
+    """
+    def get(self, request):
+        period = get_period_param(request)
+        rows = Payslip.objects.filter(period=period).values_list(
+            'user__email', 'user__first_name', 'user__last_name', 'role',
+            'base_salary', 'lessons_count', 'lesson_rate', 'lesson_pay', 'total',
+        ).order_by('role', 'user_id')
+        
+        writer = csv.writer(Echo())
+        header = ['email', 'first_name', 'last_name', 'role', 'base_salary',
+                  'lessons_count', 'lesson_rate', 'lesson_pay', 'total']
+        
+        def stream():
+            yield writer.writerow(header)
+            for row in rows.iterator(chunk_size=2000):
+                yield writer.writerow(row)
+        
+        response = StreamingHttpResponse(stream(), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="payroll-{period:%Y-%m}.csv"'
+        return response
+
+
+# ============================================================================
+# PAYMENT RECEIPTS
+# ============================================================================
+
+class ReceiptDownloadView(CustomLoginRedirectMixin, View):
+    """
+    Tasdiqlangan to'lov kvitansiyasi (?format=png|pdf).
+    Admin barcha, o'quvchi faqat o'z to'lovlarini yuklab oladi.
+    """
+    def get(self, request, pk):
+        fmt = request.GET.get('format', 'png')
+        if fmt not in receipts.FORMATS:
+            raise Http404
+        
+        payments = receipts.approved_payments()
+        if request.user.type not in ['admin', 'manager', 'super_user'] and not request.user.is_superuser:
+            payments = payments.filter(student__user=request.user)
+        payment = get_object_or_404(payments, pk=pk)
+        
+        path = receipts.get_receipt(payment, fmt)
+        return FileResponse(
+            path.open('rb'),
+            content_type=receipts.FORMATS[fmt],
+            as_attachment=True,
+            filename=f"receipt-{payment.id}.{fmt}",
+        )
+
+
+class MonthlyReceiptsZipView(AdminRequiredMixin, View):
+    """
+    Oyning barcha kvitansiyalari bitta zip arxivda (?period=YYYY-MM&format=png|pdf)
+    """
+    def get(self, request):
+        fmt = request.GET.get('format', 'png')
+        if fmt not in receipts.FORMATS:
+            raise Http404
+        period = get_period_param(request)
+        
+        logger.info(
+            f"Kvitansiyalar arxivi: {period:%Y-%m}",
+            extra={'user_id': request.user.id}
+        )
+        
+        response = StreamingHttpResponse(receipts.stream_month_zip(period, fmt), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="receipts-{period:%Y-%m}.zip"'
+        return response
+
+
+# ============================================================================
+# ONLINE PAYMENT CALLBACK
+# ============================================================================
+
+@method_decorator(csrf_exempt, name='dispatch')
+class PaymentCallbackView(View):
+    """
+    Onlayn to'lov provayderi xabarnomalari (imzo bilan, sessiyasiz).
+    Qayta yuborilgan xabarlar 200 "duplicate" bilan javob oladi.
+    """
+    def post(self, request, provider):
+        if not gateway.is_configured():
+            logger.error("PAYMENT_GATEWAY_SECRET o'rnatilmagan - to'lov xabari rad etildi", extra={'provider': provider})
+            return JsonResponse({'error': 'gateway not configured'}, status=503)
+        
+        if not gateway.verify_signature(request.body, request.META.get(gateway.SIGNATURE_HEADER)):
+            return JsonResponse({'error': 'invalid signature'}, status=403)
+        
+        try:
+            notification = gateway.parse_notification(request.body)
+            result, payment = gateway.process_notification(notification, provider=provider)
+        except gateway.GatewayConflict as e:
+            logger.warning(str(e), extra={'provider': provider, 'event_id': notification.event_id})
+            return JsonResponse({'error': str(e)}, status=409)
+        except gateway.GatewayError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except ValidationError as e:  # PeriodClosedError
+            return JsonResponse({'error': ' '.join(e.messages)}, status=409)
+        
+        if result == gateway.CallbackResult.PROCESSED:
+            logger.info(
+                f"Onlayn to'lov xabari: {provider}:{notification.event_id} ({notification.status})",
+                extra={'payment_id': payment.id, 'student_id': payment.student_id}
+            )
+        
+        return JsonResponse({'status': result, 'payment_id': payment.id if payment else None})
+
+
+# ============================================================================
+# CASH FLOW FORECAST
+# ============================================================================
+
+class CashFlowForecastView(AdminRequiredMixin, TemplateView):
+    """
+    3, 6 yoki 12 oylik pul oqimi prognozi (?months=)
+    """
+    template_name = 'finance/forecast.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            months = int(self.request.GET.get('months', forecasting.HORIZONS[0]))
+        except ValueError:
+            months = forecasting.HORIZONS[0]
+        if months not in forecasting.HORIZONS:
+            months = forecasting.HORIZONS[0]
+        
+        context['forecast'] = forecasting.forecast(months)
+        context['horizons'] = forecasting.HORIZONS
+        return context
+
+
 # ============================================================================
 # EXPENSE VIEWS
 # ============================================================================
@@ -147,16 +514,18 @@ class ExpenseListView(AdminRequiredMixin, ListView):
     
     def get_queryset(self):
         return Expense.objects.select_related(
-            'added_by'
+            'added_by', 'category'
         ).order_by('-date')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Statistika
-        context['total_expenses'] = Expense.objects.aggregate(
-            Sum('amount')
-        )['amount__sum'] or 0
+        # Statistika - oylik yig'ma summalardan (Expense jadvali qayta yig'ilmaydi)
+        month = timezone.localdate().replace(day=1)
+        context['total_expenses'] = ExpenseMonthTotal.objects.aggregate(total=Sum('total'))['total'] or 0
+        context['month_expenses'] = ExpenseMonthTotal.objects.filter(
+            period=month
+        ).aggregate(total=Sum('total'))['total'] or 0
         
         return context
 
@@ -180,6 +549,16 @@ class ExpenseCreateView(AdminRequiredMixin, CreateView):
             f"Xarajat {expense.category}: {expense.amount} so'm qo'shildi."
         )
         
+        if ExpenseMonthTotal.objects.is_over_budget(expense.category_id, expense.date):
+            messages.warning(
+                self.request,
+                f"{expense.category}: {expense.date:%Y-%m} oyi byudjetidan oshib ketdi."
+            )
+            logger.warning(
+                f"Byudjetdan oshildi: {expense.category_id}",
+                extra={'user_id': self.request.user.id, 'expense_id': expense.id}
+            )
+        
         logger.info(
             f"Xarajat qo'shildi: {expense.category}",
             extra={'user_id': self.request.user.id, 'expense_id': expense.id}
@@ -195,6 +574,42 @@ class ExpenseCreateView(AdminRequiredMixin, CreateView):
         return super().form_invalid(form)
 
 
+class ExpenseBudgetView(AdminRequiredMixin, FormView):
+    """
+    Byudjet va haqiqiy xarajat (oylik yig'ma summalardan) + byudjet belgilash
+    """
+    form_class = ExpenseBudgetForm
+    template_name = 'finance/expense_budgets.html'
+    
+    def get_initial(self):
+        self.period = get_period_param(self.request)
+        return {'period': self.period.strftime('%Y-%m')}
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        report = ExpenseMonthTotal.objects.budget_report(self.period)
+        context['period'] = self.period
+        context['report'] = report
+        context['over_budget'] = [row for row in report if row['over_budget']]
+        return context
+    
+    def form_valid(self, form):
+        data = form.cleaned_data
+        ExpenseBudget.objects.update_or_create(
+            category=data['category'], period=data['period'],
+            defaults={'amount': data['amount']},
+        )
+        
+        messages.success(self.request, f"{data['category']}: {data['period']:%Y-%m} byudjeti saqlandi.")
+        
+        logger.info(
+            f"Byudjet belgilandi: {data['category'].code} {data['period']:%Y-%m}",
+            extra={'user_id': self.request.user.id}
+        )
+        
+        return redirect(f"{reverse_lazy('finance:expense_budgets')}?period={data['period']:%Y-%m}")
+
+
 # ============================================================================
 # STUDENT PAYMENT VIEWS
 # ============================================================================
@@ -219,9 +634,6 @@ class StudentPaymentHistoryView(StudentRequiredMixin, ListView):
         student = self.request.user.student_profile
         
         context['student'] = student
-        context['total_paid'] = Payment.objects.filter(
-            student=student,
-            status='approved'
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
+        context['total_paid'] = FinancePeriod.objects.student_paid_as_of(student.id)
         
         return context
\ No newline at end of file
@@ -79,4 +79,97 @@ function copyToClipboard(text) {
     }).catch(function(err) {
         console.error('Nusxalash xatosi:', err);
     });
-}
\ No newline at end of file
+}
+// ============================================
+// Jonli bildirishnomalar (SSE) - faqat ASGI ostida ishlaydi
+// ============================================
+document.addEventListener('DOMContentLoaded', function() {
+    const button = document.getElementById('notificationsDropdown');
+    const badge = document.getElementById('notificationBadge');
+    if (!button || !badge || !window.EventSource) {
+        return;
+    }
+
+    function setUnread(count) {
+        badge.textContent = count;
+        badge.classList.toggle('d-none', !count);
+    }
+
+    function connect() {
+        const source = new EventSource(button.dataset.streamUrl);
+        const update = function(event) {
+            const data = JSON.parse(event.data);
+            // Umumiy bildirishnomalar sonsiz keladi - nishon bittaga oshadi
+            setUnread('unread' in data ? data.unread : (parseInt(badge.textContent, 10) || 0) + 1);
+        };
+        source.addEventListener('unread', update);
+        source.addEventListener('notification', update);
+        // Navbat to'lgan - qayta ulanish joriy hisoblagichni yuboradi
+        source.addEventListener('refresh', function() {
+            source.close();
+            connect();
+        });
+        // 501/503 - server SSE bermaydi yoki band, brauzer o'zi qayta urinadi
+    }
+
+    connect();
+});
+
+// ============================================
+// Global qidiruv (typeahead) - /search/?q=
+// ============================================
+document.addEventListener('DOMContentLoaded', function() {
+    const input = document.getElementById('globalSearch');
+    const list = document.getElementById('globalSearchResults');
+    if (!input || !list) {
+        return;
+    }
+
+    let timer = null;
+    let controller = null;
+
+    function render(results) {
+        list.replaceChildren();
+        results.forEach(function(result) {
+            const link = document.createElement('a');
+            link.className = 'dropdown-item';
+            link.href = result.url;
+            const title = document.createElement('div');
+            title.textContent = result.title;
+            const meta = document.createElement('small');
+            meta.className = 'text-muted';
+            meta.textContent = result.label + (result.body ? ' · ' + result.body : '');
+            link.append(title, meta);
+            const item = document.createElement('li');
+            item.append(link);
+            list.append(item);
+        });
+        list.classList.toggle('show', results.length > 0);
+    }
+
+    input.addEventListener('input', function() {
+        clearTimeout(timer);
+        const query = input.value.trim();
+        if (query.length < 2) {
+            render([]);
+            return;
+        }
+        // Har bosishda emas - yozish to'xtaganda; eski so'rov bekor qilinadi
+        timer = setTimeout(function() {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            fetch(input.dataset.searchUrl + '?q=' + encodeURIComponent(query), {signal: controller.signal})
+                .then(function(response) { return response.json(); })
+                .then(function(data) { render(data.results); })
+                .catch(function() {});
+        }, 150);
+    });
+
+    document.addEventListener('click', function(event) {
+        if (!list.contains(event.target) && event.target !== input) {
+            list.classList.remove('show');
+        }
+    });
+});